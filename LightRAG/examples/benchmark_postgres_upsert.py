@@ -0,0 +1,121 @@
+"""
+Write-throughput benchmark of the PostgreSQL storages.
+
+Upserts synthetic chunks into PGVectorStorage and documents into PGDocStatusStorage
+with several POSTGRES_BATCH_SIZE values and reports rows per second. Connection
+settings are read like the server does (POSTGRES_* environment or config.ini).
+The rows are written to a throwaway workspace that is dropped afterwards.
+
+    python examples/benchmark_postgres_upsert.py --rows 2000 --dim 3072 --batch-sizes 1 100 500
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from lightrag.kg.postgres_impl import (
+    ClientManager,
+    PGDocStatusStorage,
+    PGVectorStorage,
+    PostgreSQLDB,
+)
+from lightrag.namespace import NameSpace, make_namespace
+from lightrag.utils import EmbeddingFunc
+
+WORKSPACE = "benchmark_upsert"
+
+
+def make_embedding_func(dim: int) -> EmbeddingFunc:
+    async def embed(texts: list[str], **kwargs) -> np.ndarray:
+        # Deterministic vectors, the benchmark measures the database and not the model
+        seeds = np.arange(len(texts), dtype=np.float32)[:, None]
+        return np.sin(seeds + np.arange(dim, dtype=np.float32)[None, :])
+
+    return EmbeddingFunc(embedding_dim=dim, max_token_size=8192, func=embed)
+
+
+async def bench_vectors(db: PostgreSQLDB, rows: int, dim: int) -> float:
+    storage = PGVectorStorage(
+        namespace=make_namespace("", NameSpace.VECTOR_STORE_CHUNKS),
+        global_config={
+            "embedding_batch_num": 256,
+            "vector_db_storage_cls_kwargs": {"cosine_better_than_threshold": 0.2},
+        },
+        embedding_func=make_embedding_func(dim),
+        db=db,
+    )
+    data = {
+        f"chunk-{i}": {
+            "content": f"benchmark chunk {i}",
+            "tokens": 4,
+            "chunk_order_index": i,
+            "full_doc_id": f"doc-{i // 100}",
+            "file_path": "benchmark",
+        }
+        for i in range(rows)
+    }
+    start = time.perf_counter()
+    await storage.upsert(data)
+    elapsed = time.perf_counter() - start
+    await storage.drop()
+    return rows / elapsed
+
+
+async def bench_doc_status(db: PostgreSQLDB, rows: int) -> float:
+    storage = PGDocStatusStorage(
+        namespace=make_namespace("", NameSpace.DOC_STATUS),
+        global_config={},
+        embedding_func=None,
+        db=db,
+    )
+    now = time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
+    data = {
+        f"doc-{i}": {
+            "content": f"benchmark document {i}",
+            "content_summary": f"benchmark document {i}",
+            "content_length": 20,
+            "status": "pending",
+            "file_path": "benchmark",
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(rows)
+    }
+    start = time.perf_counter()
+    await storage.upsert(data)
+    elapsed = time.perf_counter() - start
+    await storage.drop()
+    return rows / elapsed
+
+
+async def main(args):
+    config = ClientManager.get_config()
+    config["workspace"] = WORKSPACE
+    db = PostgreSQLDB(config)
+    await db.initdb()
+    await db.check_tables()
+    print(
+        f"{args.rows} rows, {args.dim} dims, binary vector codec: {db.vector_codec}\n"
+    )
+    print(f"{'batch size':>10}  {'vectors rows/s':>15}  {'doc status rows/s':>18}")
+    try:
+        for batch_size in args.batch_sizes:
+            db.batch_size = batch_size
+            vectors = await bench_vectors(db, args.rows, args.dim)
+            doc_status = await bench_doc_status(db, args.rows)
+            print(f"{batch_size:>10}  {vectors:>15.0f}  {doc_status:>18.0f}")
+    finally:
+        await db.pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument(
+        "--dim", type=int, default=int(os.getenv("EMBEDDING_DIM", 3072))
+    )
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 500])
+    asyncio.run(main(parser.parse_args()))
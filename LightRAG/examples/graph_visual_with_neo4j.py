@@ -99,7 +99,8 @@ def process_in_batches(tx, query, data, batch_size):
 
 
 def main():
-    # Paths
+    # Paths, export the GraphML file first with:
+    #   lightrag-export-graphml --working-dir ./dickens --output ./dickens/graph_chunk_entity_relation.graphml
     xml_file = os.path.join(WORKING_DIR, "graph_chunk_entity_relation.graphml")
     json_file = os.path.join(WORKING_DIR, "graph_data.json")
 
@@ -119,7 +119,8 @@ async def main():
     try:
         # Clear old data files
         files_to_delete = [
-            "graph_chunk_entity_relation.graphml",
+            "graph_chunk_entity_relation.snapshot",
+            "graph_chunk_entity_relation.wal",
             "kv_store_doc_status.json",
             "kv_store_full_docs.json",
             "kv_store_text_chunks.json",
@@ -328,6 +328,7 @@ def create_app(args):
                 else {}
             ),
             embedding_func=embedding_func,
+            embedding_model_name=args.embedding_model,
             kv_storage=args.kv_storage,
             graph_storage=args.graph_storage,
             vector_storage=args.vector_storage,
@@ -359,6 +360,7 @@ def create_app(args):
             llm_model_max_async=args.max_async,
             llm_model_max_token_size=args.max_tokens,
             embedding_func=embedding_func,
+            embedding_model_name=args.embedding_model,
             kv_storage=args.kv_storage,
             graph_storage=args.graph_storage,
             vector_storage=args.vector_storage,
@@ -493,6 +495,9 @@ def create_app(args):
                 },
                 "auth_mode": auth_mode,
                 "pipeline_busy": pipeline_status.get("busy", False),
+                "embedding_cache": rag.embedding_vector_cache.stats()
+                if rag.embedding_vector_cache
+                else None,
                 "core_version": core_version,
                 "api_version": __api_version__,
                 "webui_title": webui_title,
@@ -3,16 +3,27 @@ This module contains all document-related routes for the LightRAG API.
 """
 
 import asyncio
+import json
 from pyuca import Collator
 from lightrag.utils import logger
 import aiofiles
 import shutil
 import traceback
+from dataclasses import asdict
 import pipmaster as pm
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Literal
-from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    UploadFile,
+)
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, field_validator
 
 from lightrag import LightRAG
@@ -216,6 +227,28 @@ class ClearDocumentsResponse(BaseModel):
         }
 
 
+class DeleteDocumentResponse(BaseModel):
+    """Response model for single document deletion
+
+    Attributes:
+        status: Status of the delete operation
+        message: Message describing the operation result
+    """
+
+    status: Literal["success", "not_found"] = Field(
+        description="Status of the delete operation"
+    )
+    message: str = Field(description="Message describing the operation result")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status": "success",
+                "message": "Document doc-123 deleted successfully",
+            }
+        }
+
+
 class ClearCacheRequest(BaseModel):
     """Request model for clearing cache
 
@@ -351,6 +384,89 @@ class DocsStatusesResponse(BaseModel):
         }
 
 
+class DocsPageResponse(BaseModel):
+    """Response model for one page of document statuses
+
+    Attributes:
+        documents: Document summaries of this page, most recently updated first
+        next_cursor: Cursor to pass back to fetch the next page, None on the last page
+        status_counts: Number of documents in each status across the whole storage
+    """
+
+    documents: List[DocStatusResponse] = Field(
+        default_factory=list, description="Document summaries of this page"
+    )
+    next_cursor: Optional[str] = Field(
+        default=None, description="Cursor of the next page, None on the last page"
+    )
+    status_counts: Dict[str, int] = Field(
+        default_factory=dict, description="Number of documents in each status"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "documents": [
+                    {
+                        "id": "doc_456",
+                        "content_summary": "Processed document",
+                        "content_length": 8000,
+                        "status": "PROCESSED",
+                        "created_at": "2025-03-31T09:00:00",
+                        "updated_at": "2025-03-31T09:05:00",
+                        "chunks_count": 8,
+                        "file_path": "processed_doc.pdf",
+                    }
+                ],
+                "next_cursor": "WyIyMDI1LTAzLTMxVDA5OjA1OjAwKzAwOjAwIiwgImRvY180NTYiXQ==",
+                "status_counts": {"pending": 0, "processed": 1},
+            }
+        }
+
+
+class DocStatusesByIdRequest(BaseModel):
+    """Request model for looking up document statuses by id
+
+    Attributes:
+        ids: Document ids to look up
+    """
+
+    ids: List[str] = Field(
+        min_length=1, max_length=1000, description="Document ids to look up"
+    )
+
+    class Config:
+        json_schema_extra = {"example": {"ids": ["doc_123456", "doc_456"]}}
+
+
+class DocStatusesByIdResponse(BaseModel):
+    """Response model for document statuses looked up by id
+
+    Attributes:
+        documents: Statuses of the requested documents that exist, in request order
+    """
+
+    documents: List[DocStatusResponse] = Field(
+        default_factory=list, description="Statuses of the documents found"
+    )
+
+
+def doc_summary_to_response(doc: Dict[str, Any]) -> DocStatusResponse:
+    """Build the API response of a summary dict returned by get_docs_paginated"""
+    return DocStatusResponse(
+        id=doc["id"],
+        content_summary=doc.get("content_summary") or "",
+        content_length=doc.get("content_length") or 0,
+        status=doc["status"],
+        created_at=format_datetime(doc.get("created_at")),
+        updated_at=format_datetime(doc.get("updated_at")),
+        chunks_count=doc.get("chunks_count"),
+        error=doc.get("error"),
+        metadata=doc.get("metadata"),
+        file_path=doc.get("file_path") or "no-file-path",
+    )
+
+
 class PipelineStatusResponse(BaseModel):
     """Response model for pipeline status
 
@@ -1214,6 +1330,43 @@ def create_document_routes(
                 if "history_messages" in pipeline_status:
                     pipeline_status["history_messages"].append(completion_msg)
 
+    @router.delete(
+        "/{doc_id}",
+        response_model=DeleteDocumentResponse,
+        dependencies=[Depends(combined_auth)],
+    )
+    async def delete_document(doc_id: str):
+        """
+        Delete a single document and the chunks, entities and relationships it produced.
+
+        Only the records indexed for this document are touched, so the cost does not
+        grow with the size of the knowledge base. Entities and relationships shared
+        with other documents are kept and only lose this document's chunks as sources.
+
+        Args:
+            doc_id (str): ID of the document to delete.
+
+        Returns:
+            DeleteDocumentResponse: A response object containing the status and message.
+                - status="success":    The document and its data were deleted.
+                - status="not_found":  No document with this ID exists.
+
+        Raises:
+            HTTPException: If an error occurs during deletion (500).
+        """
+        try:
+            if not await rag.adelete_by_doc_id(doc_id):
+                return DeleteDocumentResponse(
+                    status="not_found", message=f"Document {doc_id} not found"
+                )
+            return DeleteDocumentResponse(
+                status="success", message=f"Document {doc_id} deleted successfully"
+            )
+        except Exception as e:
+            logger.error(f"Error deleting document {doc_id}: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise HTTPException(status_code=500, detail=str(e))
+
     @router.get(
         "/pipeline_status",
         dependencies=[Depends(combined_auth)],
@@ -1286,6 +1439,140 @@ def create_document_routes(
             logger.error(traceback.format_exc())
             raise HTTPException(status_code=500, detail=str(e))
 
+    @router.get(
+        "/paginated",
+        response_model=DocsPageResponse,
+        dependencies=[Depends(combined_auth)],
+    )
+    async def documents_paginated(
+        status: Optional[DocStatus] = Query(default=None),
+        updated_after: Optional[datetime] = Query(default=None),
+        updated_before: Optional[datetime] = Query(default=None),
+        file_path_prefix: Optional[str] = Query(default=None),
+        cursor: Optional[str] = Query(default=None),
+        limit: int = Query(default=100, ge=1, le=1000),
+    ) -> DocsPageResponse:
+        """
+        Get one page of document statuses, most recently updated first.
+
+        Only the summary columns are read from storage, the document contents are
+        never loaded. Documents can be filtered by status, by last update time in
+        [updated_after, updated_before) and by file path prefix. Pass next_cursor of
+        a response as cursor to fetch the following page.
+
+        Returns:
+            DocsPageResponse: The documents of the page, the cursor of the next page
+                              and the document counts of every status.
+
+        Raises:
+            HTTPException: If the cursor is malformed (400) or an error occurs
+                           while retrieving the documents (500).
+        """
+        try:
+            (docs, next_cursor), status_counts = await asyncio.gather(
+                rag.get_docs_paginated(
+                    status=status,
+                    updated_after=updated_after,
+                    updated_before=updated_before,
+                    file_path_prefix=file_path_prefix,
+                    cursor=cursor,
+                    limit=limit,
+                ),
+                rag.get_processing_status(),
+            )
+            return DocsPageResponse(
+                documents=[doc_summary_to_response(doc) for doc in docs],
+                next_cursor=next_cursor,
+                status_counts=status_counts,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            logger.error(f"Error GET /documents/paginated: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @router.get("/paginated/stream", dependencies=[Depends(combined_auth)])
+    async def documents_stream(
+        status: Optional[DocStatus] = Query(default=None),
+        updated_after: Optional[datetime] = Query(default=None),
+        updated_before: Optional[datetime] = Query(default=None),
+        file_path_prefix: Optional[str] = Query(default=None),
+        page_size: int = Query(default=500, ge=1, le=5000),
+    ):
+        """
+        Stream all matching document statuses as NDJSON, one document per line.
+
+        Takes the same filters as /documents/paginated and walks the pages on the
+        server, so admin UIs can render large document sets progressively without
+        the server holding them all in memory.
+
+        Returns:
+            StreamingResponse: application/x-ndjson lines of DocStatusResponse
+        """
+
+        async def stream_generator():
+            cursor = None
+            try:
+                while True:
+                    docs, cursor = await rag.get_docs_paginated(
+                        status=status,
+                        updated_after=updated_after,
+                        updated_before=updated_before,
+                        file_path_prefix=file_path_prefix,
+                        cursor=cursor,
+                        limit=page_size,
+                    )
+                    for doc in docs:
+                        yield doc_summary_to_response(doc).model_dump_json() + "\n"
+                    if cursor is None:
+                        break
+            except Exception as e:
+                logger.error(f"Error GET /documents/paginated/stream: {str(e)}")
+                logger.error(traceback.format_exc())
+                yield json.dumps({"error": str(e)}) + "\n"
+
+        return StreamingResponse(
+            stream_generator(),
+            media_type="application/x-ndjson",
+            headers={"Cache-Control": "no-cache"},
+        )
+
+    @router.post(
+        "/statuses",
+        response_model=DocStatusesByIdResponse,
+        dependencies=[Depends(combined_auth)],
+    )
+    async def documents_by_ids(
+        request: DocStatusesByIdRequest,
+    ) -> DocStatusesByIdResponse:
+        """
+        Get the status of specific documents by their ids.
+
+        Unlike the listing endpoints this does not depend on when a document was
+        last updated, so documents skipped as already known on resubmission are
+        found too. Ids that do not exist are left out of the response.
+
+        Returns:
+            DocStatusesByIdResponse: The statuses of the documents found.
+
+        Raises:
+            HTTPException: If an error occurs while retrieving the statuses (500).
+        """
+        try:
+            docs = await rag.aget_docs_by_ids(request.ids)
+            return DocStatusesByIdResponse(
+                documents=[
+                    doc_summary_to_response({"id": doc_id, **asdict(docs[doc_id])})
+                    for doc_id in request.ids
+                    if doc_id in docs
+                ]
+            )
+        except Exception as e:
+            logger.error(f"Error POST /documents/statuses: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise HTTPException(status_code=500, detail=str(e))
+
     @router.get(
         "", response_model=DocsStatusesResponse, dependencies=[Depends(combined_auth)]
     )
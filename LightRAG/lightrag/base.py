@@ -1,18 +1,26 @@
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
 from enum import Enum
 import os
 from dotenv import load_dotenv
 from dataclasses import dataclass, field
+from datetime import datetime
 from typing import (
     Any,
+    AsyncIterator,
     Literal,
     TypedDict,
     TypeVar,
     Callable,
 )
-from .utils import EmbeddingFunc
+from .constants import DEFAULT_GRAPH_UPSERT_CONCURRENCY
+from .utils import (
+    EmbeddingCacheIndexRegistry,
+    EmbeddingFunc,
+    paginate_doc_status_summaries,
+)
 from .types import KnowledgeGraph
 
 # use the .env that is inside the current folder
@@ -98,6 +106,14 @@ class QueryParam:
     If proivded, this will be use instead of the default vaulue from prompt template.
     """
 
+    branch_timeout: float = float(os.getenv("QUERY_BRANCH_TIMEOUT", "60"))
+    """Timeout in seconds for each retrieval branch (local, global, vector) of a query.
+    A branch that fails or times out is dropped from the context. 0 disables the timeout.
+    """
+
+    branch_timings: dict[str, float] = field(default_factory=dict)
+    """Filled in while building the query context: elapsed seconds per retrieval branch."""
+
 
 @dataclass
 class StorageNameSpace(ABC):
@@ -226,6 +242,13 @@ class BaseVectorStorage(StorageNameSpace, ABC):
 @dataclass
 class BaseKVStorage(StorageNameSpace, ABC):
     embedding_func: EmbeddingFunc
+    embedding_cache_indexes: EmbeddingCacheIndexRegistry = field(
+        default_factory=EmbeddingCacheIndexRegistry,
+        init=False,
+        repr=False,
+        compare=False,
+    )
+    """Embedding indexes of the LLM cache modes, used by the semantic cache lookup"""
 
     @abstractmethod
     async def get_by_id(self, id: str) -> dict[str, Any] | None:
@@ -233,7 +256,7 @@ class BaseKVStorage(StorageNameSpace, ABC):
 
     @abstractmethod
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
-        """Get values by ids"""
+        """Get values by ids, in the same order as ids (None for missing ids)"""
 
     @abstractmethod
     async def filter_keys(self, keys: set[str]) -> set[str]:
@@ -263,6 +286,40 @@ class BaseKVStorage(StorageNameSpace, ABC):
             None
         """
 
+    async def get_cache_entry(self, mode: str, args_hash: str) -> dict[str, Any] | None:
+        """Get one LLM response cache entry by cache mode and args hash
+
+        Default implementation reads the whole mode dict. Storages used for
+        llm_response_cache override it with a point read that honors llm_cache_ttl.
+
+        Args:
+            mode: Cache mode, e.g. "default" for extraction or a query mode
+            args_hash: Hash of the LLM call arguments
+
+        Returns:
+            The cache entry if found and not expired, otherwise None
+        """
+        mode_cache = await self.get_by_id(mode) or {}
+        return mode_cache.get(args_hash)
+
+    async def upsert_cache_entry(
+        self, mode: str, args_hash: str, entry: dict[str, Any]
+    ) -> None:
+        """Insert or replace one LLM response cache entry
+
+        Default implementation rewrites the whole mode dict. Storages used for
+        llm_response_cache override it with a point write that applies
+        llm_cache_ttl and evicts entries beyond llm_cache_max_entries.
+
+        Args:
+            mode: Cache mode, e.g. "default" for extraction or a query mode
+            args_hash: Hash of the LLM call arguments
+            entry: Cache entry with "return", "original_prompt", "cache_type" and embedding fields
+        """
+        mode_cache = await self.get_by_id(mode) or {}
+        mode_cache[args_hash] = entry
+        await self.upsert({mode: mode_cache})
+
     async def drop_cache_by_modes(self, modes: list[str] | None = None) -> bool:
         """Delete specific records from storage by cache mode
 
@@ -441,6 +498,80 @@ class BaseGraphStorage(StorageNameSpace, ABC):
             result[node_id] = edges if edges is not None else []
         return result
 
+    async def iter_nodes(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[tuple[str, dict]]]:
+        """Scan all nodes as batches of (node ID, node data)
+
+        Default implementation pages the sorted labels through get_nodes_batch.
+        Override this method in storage backends that can scan nodes natively.
+        """
+        labels = await self.get_all_labels()
+        for i in range(0, len(labels), batch_size):
+            node_ids = labels[i : i + batch_size]
+            nodes = await self.get_nodes_batch(node_ids)
+            yield [
+                (node_id, nodes[node_id]) for node_id in node_ids if node_id in nodes
+            ]
+
+    async def iter_edges(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[tuple[str, str, dict]]]:
+        """Scan all edges as batches of (source ID, target ID, edge data)
+
+        Every edge is returned once. Default implementation pages the sorted labels
+        through get_nodes_edges_batch and get_edges_batch, emitting each edge from
+        its smaller endpoint. Override this method in storage backends that can scan
+        edges natively.
+        """
+        labels = await self.get_all_labels()
+        for i in range(0, len(labels), batch_size):
+            nodes_edges = await self.get_nodes_edges_batch(labels[i : i + batch_size])
+            pairs = {
+                (src, tgt)
+                for node_id, edges in nodes_edges.items()
+                for src, tgt in edges
+                if node_id == min(src, tgt)
+            }
+            if not pairs:
+                continue
+            edges = await self.get_edges_batch(
+                [{"src": src, "tgt": tgt} for src, tgt in sorted(pairs)]
+            )
+            yield [(src, tgt, data) for (src, tgt), data in edges.items()]
+
+    async def upsert_nodes_batch(self, nodes: dict[str, dict[str, str]]) -> None:
+        """Insert or update several nodes, keyed by node ID
+
+        Default implementation upserts the nodes one by one with bounded concurrency.
+        Override this method for better performance in storage backends
+        that support batch operations.
+        """
+        semaphore = asyncio.Semaphore(DEFAULT_GRAPH_UPSERT_CONCURRENCY)
+
+        async def upsert(node_id: str, node_data: dict[str, str]) -> None:
+            async with semaphore:
+                await self.upsert_node(node_id, node_data)
+
+        await asyncio.gather(*[upsert(k, v) for k, v in nodes.items()])
+
+    async def upsert_edges_batch(
+        self, edges: dict[tuple[str, str], dict[str, str]]
+    ) -> None:
+        """Insert or update several edges, keyed by (source ID, target ID)
+
+        Both endpoint nodes must exist. Default implementation upserts the edges one
+        by one with bounded concurrency. Override this method for better performance
+        in storage backends that support batch operations.
+        """
+        semaphore = asyncio.Semaphore(DEFAULT_GRAPH_UPSERT_CONCURRENCY)
+
+        async def upsert(src_id: str, tgt_id: str, edge_data: dict[str, str]) -> None:
+            async with semaphore:
+                await self.upsert_edge(src_id, tgt_id, edge_data)
+
+        await asyncio.gather(*[upsert(s, t, v) for (s, t), v in edges.items()])
+
     @abstractmethod
     async def upsert_node(self, node_id: str, node_data: dict[str, str]) -> None:
         """Insert a new node or update an existing node in the graph.
@@ -548,10 +679,12 @@ class DocStatus(str, Enum):
 
 @dataclass
 class DocProcessingStatus:
-    """Document processing status data structure"""
+    """Document processing status data structure
+
+    The document content is not part of the status, it is stored once in full_docs
+    under the same document id.
+    """
 
-    content: str
-    """Original content of the document"""
     content_summary: str
     """First 100 chars of document content, used for preview"""
     content_length: int
@@ -566,6 +699,12 @@ class DocProcessingStatus:
     """ISO format timestamp when document was last updated"""
     chunks_count: int | None = None
     """Number of chunks after splitting, used for processing"""
+    chunks_list: list[str] = field(default_factory=list)
+    """IDs of the chunks created from this document, used for deletion"""
+    entities_list: list[str] = field(default_factory=list)
+    """Names of the entities extracted from this document, used for deletion"""
+    relations_list: list[list[str]] = field(default_factory=list)
+    """(source, target) pairs of the relationships extracted from this document"""
     error: str | None = None
     """Error message if failed"""
     metadata: dict[str, Any] = field(default_factory=dict)
@@ -586,6 +725,59 @@ class DocStatusStorage(BaseKVStorage, ABC):
     ) -> dict[str, DocProcessingStatus]:
         """Get all documents with a specific status"""
 
+    async def update_status(self, data: dict[str, dict[str, Any]]) -> None:
+        """Partially update existing document status records
+
+        Only the given fields (e.g. status, updated_at, error) are written, the other
+        fields of each record are kept and ids that are not stored are ignored. The
+        default implementation reads the records back and upserts them, storages
+        should override it with an in-place update.
+        """
+        if not data:
+            return
+        existing = await asyncio.gather(*(self.get_by_id(doc_id) for doc_id in data))
+        await self.upsert(
+            {
+                doc_id: {**record, **fields}
+                for (doc_id, fields), record in zip(data.items(), existing)
+                if record is not None
+            }
+        )
+
+    async def get_docs_paginated(
+        self,
+        status: DocStatus | None = None,
+        updated_after: datetime | None = None,
+        updated_before: datetime | None = None,
+        file_path_prefix: str | None = None,
+        cursor: str | None = None,
+        limit: int = 100,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """Get one page of document summaries, most recently updated first
+
+        Documents are filtered by status, by updated_at in [updated_after,
+        updated_before) and by file path prefix. Each entry holds the document id and
+        the summary fields only, never the document content. Pass the returned cursor
+        back to fetch the next page, it is None on the last page.
+
+        The default implementation loads the documents through get_docs_by_status,
+        storages should override it to filter and project at the storage layer.
+        """
+        statuses = [status] if status is not None else list(DocStatus)
+        results = await asyncio.gather(*(self.get_docs_by_status(s) for s in statuses))
+        docs = (
+            (doc_id, vars(doc)) for result in results for doc_id, doc in result.items()
+        )
+        return paginate_doc_status_summaries(
+            docs,
+            status=status.value if status is not None else None,
+            updated_after=updated_after,
+            updated_before=updated_before,
+            file_path_prefix=file_path_prefix,
+            cursor=cursor,
+            limit=limit,
+        )
+
     async def drop_cache_by_modes(self, modes: list[str] | None = None) -> bool:
         """Drop cache is not supported for Doc Status storage"""
         return False
@@ -12,6 +12,15 @@ DEFAULT_FORCE_LLM_SUMMARY_ON_MERGE = 6
 DEFAULT_WOKERS = 2
 DEFAULT_TIMEOUT = 150
 
+# Max number of chunk ids resolved by a single get_by_ids call during queries
+DEFAULT_CHUNK_FETCH_BATCH_SIZE = 500
+
+# Max number of concurrent node/edge upserts of graph storages without batch upserts
+DEFAULT_GRAPH_UPSERT_CONCURRENCY = 16
+
+# Milliseconds a single-text embedding call waits to be batched with concurrent ones
+DEFAULT_EMBEDDING_BATCH_WAIT_MS = 3
+
 # Logging configuration defaults
 DEFAULT_LOG_MAX_BYTES = 10485760  # Default 10MB
 DEFAULT_LOG_BACKUP_COUNT = 5  # Default 5 backups
@@ -1,11 +1,14 @@
 import asyncio
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import partial
 from typing import Any, final
 import numpy as np
 
 from lightrag.base import BaseVectorStorage
-from lightrag.utils import logger
+from lightrag.utils import logger, LatencyHistogram
 import pipmaster as pm
 
 if not pm.is_installed("chromadb"):
@@ -14,11 +17,21 @@ if not pm.is_installed("chromadb"):
 from chromadb import HttpClient, PersistentClient  # type: ignore
 from chromadb.config import Settings  # type: ignore
 
+try:
+    from chromadb import AsyncHttpClient  # type: ignore
+except ImportError:  # chromadb < 0.5.4 has no async client
+    AsyncHttpClient = None
+
 
 @final
 @dataclass
 class ChromaVectorDBStorage(BaseVectorStorage):
-    """ChromaDB vector storage implementation."""
+    """ChromaDB vector storage implementation.
+
+    Remote servers are accessed through Chroma's AsyncHttpClient when available.
+    Otherwise (embedded PersistentClient or an old chromadb) every collection call
+    is offloaded to a bounded thread pool so it never blocks the event loop.
+    """
 
     def __post_init__(self):
         try:
@@ -55,7 +68,18 @@ class ChromaVectorDBStorage(BaseVectorStorage):
                 **user_collection_settings,
             }
 
+            self._collection_settings = collection_settings
+            self._collection = None
+            self._async_client = None
+            self._collection_lock = asyncio.Lock()
+            self._latency: dict[str, LatencyHistogram] = {}
+            self._executor = ThreadPoolExecutor(
+                max_workers=config.get("executor_max_workers", 8),
+                thread_name_prefix=f"chroma-{self.namespace}",
+            )
+
             local_path = config.get("local_path", None)
+            use_async = config.get("use_async_client", True)
             if local_path:
                 self._client = PersistentClient(
                     path=local_path,
@@ -80,7 +104,7 @@ class ChromaVectorDBStorage(BaseVectorStorage):
                 elif "basic_authn" in auth_provider:
                     auth_credentials = config.get("auth_credentials", "admin:admin")
 
-                self._client = HttpClient(
+                http_client_kwargs = dict(
                     host=config.get("host", "localhost"),
                     port=config.get("port", 8000),
                     headers=headers,
@@ -92,14 +116,13 @@ class ChromaVectorDBStorage(BaseVectorStorage):
                         anonymized_telemetry=False,
                     ),
                 )
+                if use_async and AsyncHttpClient is not None:
+                    # Created lazily on the running event loop
+                    self._client = None
+                    self._async_client_kwargs = http_client_kwargs
+                else:
+                    self._client = HttpClient(**http_client_kwargs)
 
-            self._collection = self._client.get_or_create_collection(
-                name=self.namespace,
-                metadata={
-                    **collection_settings,
-                    "dimension": self.embedding_func.embedding_dim,
-                },
-            )
             # Use batch size from collection settings if specified
             self._max_batch_size = self.global_config.get(
                 "embedding_batch_num", collection_settings.get("hnsw:batch_size", 32)
@@ -108,14 +131,67 @@ class ChromaVectorDBStorage(BaseVectorStorage):
             logger.error(f"ChromaDB initialization failed: {str(e)}")
             raise
 
+    async def initialize(self):
+        await self._get_collection()
+
+    async def finalize(self):
+        if self._latency:
+            logger.info(
+                f"ChromaDB {self.namespace} latency stats: {self.get_latency_stats()}"
+            )
+        self._executor.shutdown(wait=False)
+
+    async def _get_collection(self):
+        """Get the collection, creating the client and collection on first use"""
+        if self._collection is not None:
+            return self._collection
+        async with self._collection_lock:
+            if self._collection is not None:
+                return self._collection
+            metadata = {
+                **self._collection_settings,
+                "dimension": self.embedding_func.embedding_dim,
+            }
+            if self._client is None:
+                self._async_client = await AsyncHttpClient(**self._async_client_kwargs)
+                self._collection = await self._async_client.get_or_create_collection(
+                    name=self.namespace, metadata=metadata
+                )
+            else:
+                self._collection = await self._offload(
+                    self._client.get_or_create_collection,
+                    name=self.namespace,
+                    metadata=metadata,
+                )
+            return self._collection
+
+    async def _offload(self, func, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, **kwargs))
+
+    async def _collection_call(self, op: str, **kwargs) -> Any:
+        """Run a collection operation without blocking the event loop and record its latency"""
+        collection = await self._get_collection()
+        start = time.perf_counter()
+        try:
+            if self._async_client is not None:
+                return await getattr(collection, op)(**kwargs)
+            return await self._offload(getattr(collection, op), **kwargs)
+        finally:
+            self._latency.setdefault(op, LatencyHistogram()).observe(
+                time.perf_counter() - start
+            )
+
+    def get_latency_stats(self) -> dict[str, dict[str, Any]]:
+        """Get latency histograms of Chroma operations, keyed by operation name"""
+        return {op: hist.get_stats() for op, hist in self._latency.items()}
+
     async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
         logger.info(f"Inserting {len(data)} to {self.namespace}")
         if not data:
             return
 
         try:
-            import time
-
             current_time = int(time.time())
 
             ids = list(data.keys())
@@ -151,7 +227,8 @@ class ChromaVectorDBStorage(BaseVectorStorage):
             for i in range(0, len(ids), self._max_batch_size):
                 batch_slice = slice(i, i + self._max_batch_size)
 
-                self._collection.upsert(
+                await self._collection_call(
+                    "upsert",
                     ids=ids[batch_slice],
                     embeddings=embeddings[batch_slice].tolist(),
                     documents=documents[batch_slice],
@@ -172,7 +249,8 @@ class ChromaVectorDBStorage(BaseVectorStorage):
                 [query], _priority=5
             )  # higher priority for query
 
-            results = self._collection.query(
+            results = await self._collection_call(
+                "query",
                 query_embeddings=embedding.tolist()
                 if not isinstance(embedding, list)
                 else embedding,
@@ -213,7 +291,7 @@ class ChromaVectorDBStorage(BaseVectorStorage):
         """
         try:
             logger.info(f"Deleting entity with ID {entity_name} from {self.namespace}")
-            self._collection.delete(ids=[entity_name])
+            await self._collection_call("delete", ids=[entity_name])
         except Exception as e:
             logger.error(f"Error during entity deletion: {str(e)}")
             raise
@@ -235,7 +313,7 @@ class ChromaVectorDBStorage(BaseVectorStorage):
         """
         try:
             logger.info(f"Deleting {len(ids)} vectors from {self.namespace}")
-            self._collection.delete(ids=ids)
+            await self._collection_call("delete", ids=ids)
             logger.debug(
                 f"Successfully deleted {len(ids)} vectors from {self.namespace}"
             )
@@ -258,8 +336,8 @@ class ChromaVectorDBStorage(BaseVectorStorage):
         """
         try:
             # Query the collection for a single vector by ID
-            result = self._collection.get(
-                ids=[id], include=["metadatas", "embeddings", "documents"]
+            result = await self._collection_call(
+                "get", ids=[id], include=["metadatas", "embeddings", "documents"]
             )
 
             if not result or not result["ids"] or len(result["ids"]) == 0:
@@ -291,8 +369,8 @@ class ChromaVectorDBStorage(BaseVectorStorage):
 
         try:
             # Query the collection for multiple vectors by IDs
-            result = self._collection.get(
-                ids=ids, include=["metadatas", "embeddings", "documents"]
+            result = await self._collection_call(
+                "get", ids=ids, include=["metadatas", "embeddings", "documents"]
             )
 
             if not result or not result["ids"] or len(result["ids"]) == 0:
@@ -325,10 +403,10 @@ class ChromaVectorDBStorage(BaseVectorStorage):
         """
         try:
             # Get all IDs in the collection
-            result = self._collection.get(include=[])
+            result = await self._collection_call("get", include=[])
             if result and result["ids"] and len(result["ids"]) > 0:
                 # Delete all documents
-                self._collection.delete(ids=result["ids"])
+                await self._collection_call("delete", ids=result["ids"])
 
             logger.info(
                 f"Process {os.getpid()} drop ChromaDB collection {self.namespace}"
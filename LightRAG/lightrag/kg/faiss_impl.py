@@ -11,6 +11,7 @@ import pipmaster as pm
 from lightrag.utils import logger, compute_mdhash_id
 from lightrag.base import BaseVectorStorage
 
+from .mmap_vector_file import MmapVectorFile
 from .shared_storage import (
     get_storage_lock,
     get_update_flag,
@@ -25,13 +26,17 @@ FAISS_PACKAGE = "faiss-gpu" if USE_GPU else "faiss-cpu"
 if not pm.is_installed(FAISS_PACKAGE):
     pm.install(FAISS_PACKAGE)
 
+# Row type of the memory-mapped vector file: float16, int8 or float32
+MMAP_VECTOR_DTYPE = os.getenv("MMAP_VECTOR_DTYPE", "float16")
+
 
 @final
 @dataclass
 class FaissVectorDBStorage(BaseVectorStorage):
     """
     A Faiss-based Vector DB Storage for LightRAG.
-    Uses cosine similarity by storing normalized vectors in a Faiss index with inner product search.
+    Vectors are normalized and kept in a memory-mapped vector file (see MmapVectorFile)
+    shared by all worker processes, and searched with Faiss inner product kNN.
     """
 
     def __post_init__(self):
@@ -44,25 +49,22 @@ class FaissVectorDBStorage(BaseVectorStorage):
             )
         self.cosine_better_than_threshold = cosine_threshold
 
-        # Where to save index file if you want persistent storage
+        # Index and metadata files written by earlier versions, imported on first start
         self._faiss_index_file = os.path.join(
             self.global_config["working_dir"], f"faiss_index_{self.namespace}.index"
         )
         self._meta_file = self._faiss_index_file + ".meta.json"
+        self._vector_file_name = os.path.join(
+            self.global_config["working_dir"], f"faiss_index_{self.namespace}"
+        )
 
         self._max_batch_size = self.global_config["embedding_batch_num"]
         # Embedding dimension (e.g. 768) must match your embedding function
         self._dim = self.embedding_func.embedding_dim
 
-        # Create an empty Faiss index for inner product (useful for normalized vectors = cosine similarity).
-        # If you have a large number of vectors, you might want IVF or other indexes.
-        # For demonstration, we use a simple IndexFlatIP.
-        self._index = faiss.IndexFlatIP(self._dim)
-        # Keep a local store for metadata, IDs, etc.
-        # Maps <int faiss_id> → metadata (including your original ID).
-        self._id_to_meta = {}
-
-        self._load_faiss_index()
+        self._vectors = MmapVectorFile(
+            self._vector_file_name, self._dim, dtype=MMAP_VECTOR_DTYPE
+        )
 
     async def initialize(self):
         """Initialize storage data"""
@@ -71,6 +73,11 @@ class FaissVectorDBStorage(BaseVectorStorage):
         # Get the storage lock for use in other methods
         self._storage_lock = get_storage_lock()
 
+        async with self._storage_lock:
+            self._vectors.refresh()
+            if not self._vectors.exists and os.path.exists(self._meta_file):
+                self._import_legacy_index()
+
     async def _get_index(self):
         """Check if the shtorage should be reloaded"""
         # Acquire lock to prevent concurrent read and write
@@ -80,16 +87,14 @@ class FaissVectorDBStorage(BaseVectorStorage):
                 logger.info(
                     f"Process {os.getpid()} FAISS reloading {self.namespace} due to update by another process"
                 )
-                # Reload data
-                self._index = faiss.IndexFlatIP(self._dim)
-                self._id_to_meta = {}
-                self._load_faiss_index()
+                # Read the records appended by the other process
+                self._vectors.refresh()
                 self.storage_updated.value = False
-            return self._index
+            return self._vectors
 
     async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
         """
-        Insert or update vectors in the Faiss index.
+        Insert or update vectors in the vector file.
 
         data: {
            "custom_id_1": {
@@ -115,7 +120,6 @@ class FaissVectorDBStorage(BaseVectorStorage):
         for k, v in data.items():
             # Store only known meta fields if needed
             meta = {mf: v[mf] for mf in self.meta_fields if mf in v}
-            meta["__id__"] = k
             meta["__created_at__"] = current_time
             list_data.append(meta)
             contents.append(v["content"])
@@ -137,37 +141,27 @@ class FaissVectorDBStorage(BaseVectorStorage):
             )
             return []
 
-        # Convert to float32 and normalize embeddings for cosine similarity (in-place)
-        embeddings = embeddings.astype(np.float32)
-        faiss.normalize_L2(embeddings)
-
-        # Upsert logic:
-        # 1. Identify which vectors to remove if they exist
-        # 2. Remove them
-        # 3. Add the new vectors
-        existing_ids_to_remove = []
-        for meta, emb in zip(list_data, embeddings):
-            faiss_internal_id = self._find_faiss_id_by_custom_id(meta["__id__"])
-            if faiss_internal_id is not None:
-                existing_ids_to_remove.append(faiss_internal_id)
-
-        if existing_ids_to_remove:
-            await self._remove_faiss_ids(existing_ids_to_remove)
-
-        # Step 2: Add new vectors
-        index = await self._get_index()
-        start_idx = index.ntotal
-        index.add(embeddings)
-
-        # Step 3: Store metadata + vector for each new ID
-        for i, meta in enumerate(list_data):
-            fid = start_idx + i
-            # Store the raw vector so we can rebuild if something is removed
-            meta["__vector__"] = embeddings[i].tolist()
-            self._id_to_meta.update({fid: meta})
+        # The vector file normalizes the vectors and supersedes existing ids
+        vectors = await self._get_index()
+        vectors.upsert(
+            {
+                k: (meta, embeddings[i])
+                for i, (k, meta) in enumerate(zip(data.keys(), list_data))
+            }
+        )
 
         logger.info(f"Upserted {len(list_data)} vectors into Faiss index.")
-        return [m["__id__"] for m in list_data]
+        return list(data.keys())
+
+    @staticmethod
+    def _faiss_knn(
+        matrix: np.ndarray, query: np.ndarray, k: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Inner product kNN of one query over a chunk of normalized vectors"""
+        distances, indices = faiss.knn(
+            query[None, :], matrix, k, metric=faiss.METRIC_INNER_PRODUCT
+        )
+        return distances[0], indices[0]
 
     async def query(
         self, query: str, top_k: int, ids: list[str] | None = None
@@ -179,46 +173,35 @@ class FaissVectorDBStorage(BaseVectorStorage):
             [query], _priority=5
         )  # higher priority for query
         # embedding is shape (1, dim)
-        embedding = np.array(embedding, dtype=np.float32)
-        faiss.normalize_L2(embedding)  # we do in-place normalization
+        embedding = np.array(embedding, dtype=np.float32)[0]
 
         logger.info(
             f"Query: {query}, top_k: {top_k}, threshold: {self.cosine_better_than_threshold}"
         )
 
-        # Perform the similarity search
-        index = await self._get_index()
-        distances, indices = index.search(embedding, top_k)
-
-        distances = distances[0]
-        indices = indices[0]
-
-        results = []
-        for dist, idx in zip(distances, indices):
-            if idx == -1:
-                # Faiss returns -1 if no neighbor
-                continue
-
-            # Cosine similarity threshold
-            if dist < self.cosine_better_than_threshold:
-                continue
-
-            meta = self._id_to_meta.get(idx, {})
-            results.append(
-                {
-                    **meta,
-                    "id": meta.get("__id__"),
-                    "distance": float(dist),
-                    "created_at": meta.get("__created_at__"),
-                }
-            )
+        # Perform the similarity search, chunk by chunk over the mapped vectors
+        vectors = await self._get_index()
+        matches = vectors.search(
+            embedding,
+            top_k,
+            better_than_threshold=self.cosine_better_than_threshold,
+            knn=self._faiss_knn,
+        )
 
-        return results
+        return [
+            {
+                **meta,
+                "id": meta.get("__id__"),
+                "distance": dist,
+                "created_at": meta.get("__created_at__"),
+            }
+            for meta, dist in matches
+        ]
 
     @property
     def client_storage(self):
         # Return whatever structure LightRAG might need for debugging
-        return {"data": list(self._id_to_meta.values())}
+        return {"data": list(self._vectors.items())}
 
     async def delete(self, ids: list[str]):
         """
@@ -230,17 +213,9 @@ class FaissVectorDBStorage(BaseVectorStorage):
            KG-storage-log should be used to avoid data corruption
         """
         logger.info(f"Deleting {len(ids)} vectors from {self.namespace}")
-        to_remove = []
-        for cid in ids:
-            fid = self._find_faiss_id_by_custom_id(cid)
-            if fid is not None:
-                to_remove.append(fid)
-
-        if to_remove:
-            await self._remove_faiss_ids(to_remove)
-        logger.debug(
-            f"Successfully deleted {len(to_remove)} vectors from {self.namespace}"
-        )
+        vectors = await self._get_index()
+        deleted = vectors.delete(ids)
+        logger.debug(f"Successfully deleted {deleted} vectors from {self.namespace}")
 
     async def delete_entity(self, entity_name: str) -> None:
         """
@@ -261,122 +236,51 @@ class FaissVectorDBStorage(BaseVectorStorage):
            KG-storage-log should be used to avoid data corruption
         """
         logger.debug(f"Searching relations for entity {entity_name}")
-        relations = []
-        for fid, meta in self._id_to_meta.items():
-            if meta.get("src_id") == entity_name or meta.get("tgt_id") == entity_name:
-                relations.append(fid)
+        vectors = await self._get_index()
+        relations = [
+            meta["__id__"]
+            for meta in vectors.items()
+            if meta.get("src_id") == entity_name or meta.get("tgt_id") == entity_name
+        ]
 
         logger.debug(f"Found {len(relations)} relations for {entity_name}")
         if relations:
-            await self._remove_faiss_ids(relations)
+            vectors.delete(relations)
             logger.debug(f"Deleted {len(relations)} relations for {entity_name}")
 
     # --------------------------------------------------------------------------------
     # Internal helper methods
     # --------------------------------------------------------------------------------
 
-    def _find_faiss_id_by_custom_id(self, custom_id: str):
-        """
-        Return the Faiss internal ID for a given custom ID, or None if not found.
-        """
-        for fid, meta in self._id_to_meta.items():
-            if meta.get("__id__") == custom_id:
-                return fid
-        return None
-
-    async def _remove_faiss_ids(self, fid_list):
-        """
-        Remove a list of internal Faiss IDs from the index.
-        Because IndexFlatIP doesn't support 'removals',
-        we rebuild the index excluding those vectors.
-        """
-        keep_fids = [fid for fid in self._id_to_meta if fid not in fid_list]
-
-        # Rebuild the index
-        vectors_to_keep = []
-        new_id_to_meta = {}
-        for new_fid, old_fid in enumerate(keep_fids):
-            vec_meta = self._id_to_meta[old_fid]
-            vectors_to_keep.append(vec_meta["__vector__"])  # stored as list
-            new_id_to_meta[new_fid] = vec_meta
-
-        async with self._storage_lock:
-            # Re-init index
-            self._index = faiss.IndexFlatIP(self._dim)
-            if vectors_to_keep:
-                arr = np.array(vectors_to_keep, dtype=np.float32)
-                self._index.add(arr)
-
-            self._id_to_meta = new_id_to_meta
-
-    def _save_faiss_index(self):
-        """
-        Save the current Faiss index + metadata to disk so it can persist across runs.
-        """
-        faiss.write_index(self._index, self._faiss_index_file)
-
-        # Save metadata dict to JSON. Convert all keys to strings for JSON storage.
-        # _id_to_meta is { int: { '__id__': doc_id, '__vector__': [float,...], ... } }
-        # We'll keep the int -> dict, but JSON requires string keys.
-        serializable_dict = {}
-        for fid, meta in self._id_to_meta.items():
-            serializable_dict[str(fid)] = meta
-
-        with open(self._meta_file, "w", encoding="utf-8") as f:
-            json.dump(serializable_dict, f)
-
-    def _load_faiss_index(self):
+    def _import_legacy_index(self):
         """
-        Load the Faiss index + metadata from disk if it exists,
-        and rebuild in-memory structures so we can query.
+        Import the vectors of the JSON metadata file written by earlier versions,
+        which kept every raw vector next to its metadata.
         """
-        if not os.path.exists(self._faiss_index_file):
-            logger.warning("No existing Faiss index file found. Starting fresh.")
-            return
-
         try:
-            # Load the Faiss index
-            self._index = faiss.read_index(self._faiss_index_file)
-            # Load metadata
             with open(self._meta_file, "r", encoding="utf-8") as f:
                 stored_dict = json.load(f)
-
-            # Convert string keys back to int
-            self._id_to_meta = {}
-            for fid_str, meta in stored_dict.items():
-                fid = int(fid_str)
-                self._id_to_meta[fid] = meta
-
+            items = {}
+            for meta in stored_dict.values():
+                meta = dict(meta)
+                vector = np.array(meta.pop("__vector__"), dtype=np.float32)
+                items[meta.pop("__id__")] = (meta, vector)
+            self._vectors.upsert(items)
+            self._vectors.save()
             logger.info(
-                f"Faiss index loaded with {self._index.ntotal} vectors from {self._faiss_index_file}"
+                f"Imported {len(items)} vectors of {self._meta_file} into {self._vector_file_name}"
             )
         except Exception as e:
-            logger.error(f"Failed to load Faiss index or metadata: {e}")
+            logger.error(f"Failed to import Faiss index metadata: {e}")
             logger.warning("Starting with an empty Faiss index.")
-            self._index = faiss.IndexFlatIP(self._dim)
-            self._id_to_meta = {}
 
     async def index_done_callback(self) -> None:
-        async with self._storage_lock:
-            # Check if storage was updated by another process
-            if self.storage_updated.value:
-                # Storage was updated by another process, reload data instead of saving
-                logger.warning(
-                    f"Storage for FAISS {self.namespace} was updated by another process, reloading..."
-                )
-                self._index = faiss.IndexFlatIP(self._dim)
-                self._id_to_meta = {}
-                self._load_faiss_index()
-                self.storage_updated.value = False
-                return False  # Return error
-
-        # Acquire lock and perform persistence
         async with self._storage_lock:
             try:
-                # Save data to disk
-                self._save_faiss_index()
-                # Notify other processes that data has been updated
-                await set_all_update_flags(self.namespace)
+                # Reads the records of other processes first, then appends ours
+                if self._vectors.save():
+                    # Notify other processes that data has been updated
+                    await set_all_update_flags(self.namespace)
                 # Reset own update flag to avoid self-reloading
                 self.storage_updated.value = False
             except Exception as e:
@@ -394,13 +298,8 @@ class FaissVectorDBStorage(BaseVectorStorage):
         Returns:
             The vector data if found, or None if not found
         """
-        # Find the Faiss internal ID for the custom ID
-        fid = self._find_faiss_id_by_custom_id(id)
-        if fid is None:
-            return None
-
-        # Get the metadata for the found ID
-        metadata = self._id_to_meta.get(fid, {})
+        vectors = await self._get_index()
+        metadata = vectors.get(id)
         if not metadata:
             return None
 
@@ -422,19 +321,18 @@ class FaissVectorDBStorage(BaseVectorStorage):
         if not ids:
             return []
 
+        vectors = await self._get_index()
         results = []
         for id in ids:
-            fid = self._find_faiss_id_by_custom_id(id)
-            if fid is not None:
-                metadata = self._id_to_meta.get(fid, {})
-                if metadata:
-                    results.append(
-                        {
-                            **metadata,
-                            "id": metadata.get("__id__"),
-                            "created_at": metadata.get("__created_at__"),
-                        }
-                    )
+            metadata = vectors.get(id)
+            if metadata:
+                results.append(
+                    {
+                        **metadata,
+                        "id": metadata.get("__id__"),
+                        "created_at": metadata.get("__created_at__"),
+                    }
+                )
 
         return results
 
@@ -442,12 +340,12 @@ class FaissVectorDBStorage(BaseVectorStorage):
         """Drop all vector data from storage and clean up resources
 
         This method will:
-        1. Remove the vector database storage file if it exists
+        1. Remove the vector files (and legacy index files) if they exist
         2. Reinitialize the vector database client
         3. Update flags to notify other processes
         4. Changes is persisted to disk immediately
 
-        This method will remove all vectors from the Faiss index and delete the storage files.
+        This method will remove all vectors and delete the storage files.
 
         Returns:
             dict[str, str]: Operation status and message
@@ -456,19 +354,14 @@ class FaissVectorDBStorage(BaseVectorStorage):
         """
         try:
             async with self._storage_lock:
-                # Reset the index
-                self._index = faiss.IndexFlatIP(self._dim)
-                self._id_to_meta = {}
+                self._vectors.drop()
 
-                # Remove storage files if they exist
+                # Remove legacy storage files if they exist
                 if os.path.exists(self._faiss_index_file):
                     os.remove(self._faiss_index_file)
                 if os.path.exists(self._meta_file):
                     os.remove(self._meta_file)
 
-                self._id_to_meta = {}
-                self._load_faiss_index()
-
                 # Notify other processes
                 await set_all_update_flags(self.namespace)
                 self.storage_updated.value = False
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from datetime import datetime
 import os
 from typing import Any, Union, final
 
@@ -10,6 +11,7 @@ from lightrag.base import (
 from lightrag.utils import (
     load_json,
     logger,
+    paginate_doc_status_summaries,
     write_json,
 )
 from .shared_storage import (
@@ -84,9 +86,8 @@ class JsonDocStatusStorage(DocStatusStorage):
                     try:
                         # Make a copy of the data to avoid modifying the original
                         data = v.copy()
-                        # If content is missing, use content_summary as content
-                        if "content" not in data and "content_summary" in data:
-                            data["content"] = data["content_summary"]
+                        # Records written by older versions also carry the content
+                        data.pop("content", None)
                         # If file_path is not in data, use document id as file path
                         if "file_path" not in data:
                             data["file_path"] = "no-file-path"
@@ -96,6 +97,41 @@ class JsonDocStatusStorage(DocStatusStorage):
                         continue
         return result
 
+    async def update_status(self, data: dict[str, dict[str, Any]]) -> None:
+        """Partially update existing records in place, see DocStatusStorage.update_status"""
+        if not data:
+            return
+        async with self._storage_lock:
+            for doc_id, fields in data.items():
+                record = self._data.get(doc_id)
+                if record is not None:
+                    # Reassign instead of mutating, so shared Manager dicts see the change
+                    self._data[doc_id] = {**record, **fields}
+            await set_all_update_flags(self.namespace)
+
+        await self.index_done_callback()
+
+    async def get_docs_paginated(
+        self,
+        status: DocStatus | None = None,
+        updated_after: datetime | None = None,
+        updated_before: datetime | None = None,
+        file_path_prefix: str | None = None,
+        cursor: str | None = None,
+        limit: int = 100,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """Get one page of document summaries without copying document contents"""
+        async with self._storage_lock:
+            return paginate_doc_status_summaries(
+                self._data.items(),
+                status=status.value if status is not None else None,
+                updated_after=updated_after,
+                updated_before=updated_before,
+                file_path_prefix=file_path_prefix,
+                cursor=cursor,
+                limit=limit,
+            )
+
     async def index_done_callback(self) -> None:
         async with self._storage_lock:
             if self.storage_updated.value:
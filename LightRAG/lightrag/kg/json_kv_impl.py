@@ -1,4 +1,5 @@
 import os
+import time
 from dataclasses import dataclass
 from typing import Any, final
 
@@ -109,6 +110,40 @@ class JsonKVStorage(BaseKVStorage):
                 for id in ids
             ]
 
+    async def get_cache_entry(self, mode: str, args_hash: str) -> dict[str, Any] | None:
+        ttl = self.global_config.get("llm_cache_ttl", 0)
+        async with self._storage_lock:
+            mode_cache = self._data.get(mode)
+            if not mode_cache or args_hash not in mode_cache:
+                return None
+            entry = mode_cache[args_hash]
+            if ttl > 0 and entry.get("create_time", 0) + ttl < time.time():
+                mode_cache.pop(args_hash)
+                self._data[mode] = mode_cache
+                await set_all_update_flags(self.namespace)
+                return None
+            if self.global_config.get("llm_cache_max_entries", 0) > 0 and not hasattr(
+                self._data, "_getvalue"
+            ):
+                # Keep the mode dict in LRU order (only cheap for process-local data)
+                mode_cache[args_hash] = mode_cache.pop(args_hash)
+            return entry
+
+    async def upsert_cache_entry(
+        self, mode: str, args_hash: str, entry: dict[str, Any]
+    ) -> None:
+        max_entries = self.global_config.get("llm_cache_max_entries", 0)
+        async with self._storage_lock:
+            mode_cache = self._data.get(mode) or {}
+            mode_cache.pop(args_hash, None)
+            mode_cache[args_hash] = entry
+            if max_entries > 0 and len(mode_cache) > max_entries:
+                # Evict least recently used entries from the front of the dict
+                for key in list(mode_cache)[: len(mode_cache) - max_entries]:
+                    del mode_cache[key]
+            self._data[mode] = mode_cache
+            await set_all_update_flags(self.namespace)
+
     async def filter_keys(self, keys: set[str]) -> set[str]:
         async with self._storage_lock:
             return set(keys) - set(self._data.keys())
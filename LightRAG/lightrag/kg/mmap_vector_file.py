@@ -0,0 +1,403 @@
+"""
+Memory-mapped vector file shared by the local vector storages.
+
+Vectors are L2-normalised and stored as fixed-size rows (float32, float16 or int8)
+in an append-only file that every process maps read-only, so workers share the
+pages through the OS page cache instead of each holding its own copy of the matrix.
+Ids and metadata go to an append-only JSON lines log, where updates supersede the
+previous row of an id and deletes append tombstones. Saving only appends the rows
+and log records added since the last save, and other processes replay just the
+records they have not read yet. Once tombstoned rows outnumber the live ones, the
+live rows are rewritten as a new generation of files.
+
+Files for the base path P:
+    P.manifest       {"generation", "dim", "dtype"} of the current files
+    P.<gen>.vectors  vector rows
+    P.<gen>.log      {"row", "id", "meta"} records and {"del": id} tombstones
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import os
+from typing import Any, Callable, Iterator
+
+import numpy as np
+
+from lightrag.utils import logger
+
+VECTOR_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+# int8 rows hold normalised components scaled to [-127, 127]
+INT8_SCALE = 127.0
+# Rows scored at once, bounds the float32 working set of a query
+SEARCH_CHUNK_ROWS = 16384
+# Tombstoned rows tolerated before a compaction, on top of the live row count
+COMPACTION_MIN_DEAD_ROWS = 1024
+
+
+class MmapVectorFile:
+    """Append-only, memory-mapped vectors with ids, metadata and tombstones
+
+    Changes are kept in memory until save() and are visible to this process right
+    away. save() and refresh() must be called under the storage lock, save()
+    refreshes first so records are appended after those of other processes.
+    """
+
+    def __init__(self, base_path: str, dim: int, dtype: str = "float16"):
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(
+                f"Unsupported vector dtype {dtype}, use one of {list(VECTOR_DTYPES)}"
+            )
+        self.dim = dim
+        self._base_path = base_path
+        self._manifest_file = f"{base_path}.manifest"
+        self._target_dtype = dtype
+        self.load()
+
+    # ------------------------------------------------------------------
+    # Loading and refreshing
+    # ------------------------------------------------------------------
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self._manifest_file)
+
+    def _read_manifest(self) -> dict[str, Any]:
+        if not self.exists:
+            return {"generation": 0, "dim": self.dim, "dtype": self._target_dtype}
+        with open(self._manifest_file, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["dim"] != self.dim:
+            raise ValueError(
+                f"Embedding dim mismatch, expected: {self.dim}, but {self._manifest_file} has: {manifest['dim']}"
+            )
+        return manifest
+
+    def _file(self, generation: int, suffix: str) -> str:
+        return f"{self._base_path}.{generation}.{suffix}"
+
+    def load(self) -> None:
+        """(Re)load the current generation from disk, dropping unsaved changes"""
+        manifest = self._read_manifest()
+        self.generation = manifest["generation"]
+        self.dtype = manifest["dtype"]
+        if self.dtype != self._target_dtype:
+            logger.warning(
+                f"{self._base_path} stores {self.dtype} vectors, they are converted to {self._target_dtype} at the next compaction"
+            )
+        self._row_bytes = self.dim * np.dtype(VECTOR_DTYPES[self.dtype]).itemsize
+        self._ids: dict[str, int] = {}
+        self._meta: dict[int, dict[str, Any]] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._rows = 0
+        self._dead_rows = 0
+        self._log_offset = 0
+        self._matrix: np.ndarray | None = None
+        self._pending: dict[str, tuple[dict[str, Any], np.ndarray]] = {}
+        self._pending_deletes: set[str] = set()
+        self._read_log()
+
+    def refresh(self) -> None:
+        """Catch up with the records saved by other processes, keeping unsaved ones"""
+        if self._read_manifest()["generation"] != self.generation:
+            pending, pending_deletes = self._pending, self._pending_deletes
+            self.load()
+            self._pending, self._pending_deletes = pending, pending_deletes
+        else:
+            self._read_log()
+
+    def _read_log(self) -> None:
+        log_file = self._file(self.generation, "log")
+        if not os.path.exists(log_file):
+            return
+        with open(log_file, "rb") as f:
+            f.seek(self._log_offset)
+            data = f.read()
+        # A last line without newline was torn by a crash while appending
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if line:
+                self._apply_record(json.loads(line))
+        self._log_offset += end
+        self._map_vectors()
+
+    def _apply_record(self, record: dict[str, Any]) -> None:
+        if "del" in record:
+            row = self._ids.pop(record["del"], None)
+            if row is not None:
+                self._kill_row(row)
+            return
+        row = record["row"]
+        old_row = self._ids.get(record["id"])
+        if old_row is not None:
+            self._kill_row(old_row)
+        if row >= len(self._alive):
+            alive = np.zeros(max(row + 1, 2 * len(self._alive)), dtype=bool)
+            alive[: len(self._alive)] = self._alive
+            self._alive = alive
+        self._ids[record["id"]] = row
+        self._meta[row] = {**record["meta"], "__id__": record["id"]}
+        self._alive[row] = True
+        self._rows = max(self._rows, row + 1)
+
+    def _kill_row(self, row: int) -> None:
+        self._alive[row] = False
+        self._meta.pop(row, None)
+        self._dead_rows += 1
+
+    def _map_vectors(self) -> None:
+        if self._rows == 0:
+            self._matrix = None
+        elif self._matrix is None or len(self._matrix) != self._rows:
+            self._matrix = np.memmap(
+                self._file(self.generation, "vectors"),
+                dtype=VECTOR_DTYPES[self.dtype],
+                mode="r",
+                shape=(self._rows, self.dim),
+            )
+
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+
+    def _encode(self, vectors: np.ndarray, dtype: str) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        if dtype == "int8":
+            return np.clip(np.rint(vectors * INT8_SCALE), -127, 127).astype(np.int8)
+        return vectors.astype(VECTOR_DTYPES[dtype])
+
+    def _decode(self, rows: np.ndarray, dtype: str) -> np.ndarray:
+        rows = np.asarray(rows, dtype=np.float32)
+        return rows / INT8_SCALE if dtype == "int8" else rows
+
+    # ------------------------------------------------------------------
+    # Reads and writes
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        saved = sum(
+            1
+            for doc_id in self._ids
+            if doc_id not in self._pending and doc_id not in self._pending_deletes
+        )
+        return saved + len(self._pending)
+
+    def __contains__(self, doc_id: str) -> bool:
+        if doc_id in self._pending:
+            return True
+        return doc_id in self._ids and doc_id not in self._pending_deletes
+
+    def upsert(self, items: dict[str, tuple[dict[str, Any], np.ndarray]]) -> None:
+        """Add or replace vectors, items map id -> (metadata, vector)"""
+        if not items:
+            return
+        ids = list(items)
+        encoded = self._encode(np.stack([items[i][1] for i in ids]), self.dtype)
+        for doc_id, row in zip(ids, encoded):
+            self._pending[doc_id] = (dict(items[doc_id][0]), row)
+            self._pending_deletes.discard(doc_id)
+
+    def delete(self, ids: list[str]) -> int:
+        """Delete vectors by id, returns the number of ids that existed"""
+        deleted = 0
+        for doc_id in ids:
+            existed = doc_id in self
+            self._pending.pop(doc_id, None)
+            if doc_id in self._ids:
+                self._pending_deletes.add(doc_id)
+            deleted += existed
+        return deleted
+
+    def get(self, doc_id: str) -> dict[str, Any] | None:
+        if doc_id in self._pending:
+            return {**self._pending[doc_id][0], "__id__": doc_id}
+        if doc_id in self._pending_deletes or doc_id not in self._ids:
+            return None
+        return dict(self._meta[self._ids[doc_id]])
+
+    def get_vector(self, doc_id: str) -> np.ndarray | None:
+        """Normalised float32 vector of an id"""
+        if doc_id in self._pending:
+            return self._decode(self._pending[doc_id][1], self.dtype)
+        if doc_id in self._pending_deletes or doc_id not in self._ids:
+            return None
+        return self._decode(self._matrix[self._ids[doc_id]], self.dtype)
+
+    def items(self) -> Iterator[dict[str, Any]]:
+        """Metadata of all live vectors, including unsaved ones"""
+        for doc_id, row in self._ids.items():
+            if doc_id not in self._pending and doc_id not in self._pending_deletes:
+                yield self._meta[row]
+        for doc_id, (meta, _) in self._pending.items():
+            yield {**meta, "__id__": doc_id}
+
+    def _iter_chunks(self) -> Iterator[tuple[list[dict[str, Any]], np.ndarray]]:
+        """Live vectors as (metadata list, float32 matrix) chunks"""
+        alive = self._alive[: self._rows].copy()
+        for doc_id in (*self._pending, *self._pending_deletes):
+            row = self._ids.get(doc_id)
+            if row is not None:
+                alive[row] = False
+        for start in range(0, self._rows, SEARCH_CHUNK_ROWS):
+            rows = np.flatnonzero(alive[start : start + SEARCH_CHUNK_ROWS]) + start
+            if len(rows):
+                yield (
+                    [self._meta[row] for row in rows],
+                    self._decode(self._matrix[rows], self.dtype),
+                )
+        if self._pending:
+            yield (
+                [
+                    {**meta, "__id__": doc_id}
+                    for doc_id, (meta, _) in self._pending.items()
+                ],
+                self._decode(
+                    np.stack([row for _, row in self._pending.values()]), self.dtype
+                ),
+            )
+
+    def search(
+        self,
+        query: np.ndarray,
+        top_k: int,
+        better_than_threshold: float | None = None,
+        knn: Callable[[np.ndarray, np.ndarray, int], tuple[np.ndarray, np.ndarray]]
+        | None = None,
+    ) -> list[tuple[dict[str, Any], float]]:
+        """Cosine top_k over all live vectors, scanned chunk by chunk
+
+        Args:
+            knn: Optional kernel (matrix, query, k) -> (scores, indices) used instead
+                 of numpy to score a chunk
+        """
+        query = self._decode(self._encode(query, "float32"), "float32")[0]
+        best: list[tuple[float, int, dict[str, Any]]] = []
+        seq = 0
+        for metas, matrix in self._iter_chunks():
+            k = min(top_k, len(metas))
+            if knn is not None:
+                scores, indices = knn(matrix, query, k)
+            else:
+                all_scores = matrix @ query
+                indices = np.argpartition(-all_scores, k - 1)[:k]
+                scores = all_scores[indices]
+            for score, index in zip(scores, indices):
+                if index < 0:
+                    continue
+                if better_than_threshold is not None and score < better_than_threshold:
+                    continue
+                seq += 1
+                item = (float(score), seq, metas[index])
+                if len(best) < top_k:
+                    heapq.heappush(best, item)
+                elif item[0] > best[0][0]:
+                    heapq.heapreplace(best, item)
+        return [(meta, score) for score, _, meta in sorted(best, reverse=True)]
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self._pending or self._pending_deletes)
+
+    def _append(self, file_name: str, offset: int, chunks: list[bytes]) -> int:
+        mode = "r+b" if os.path.exists(file_name) else "wb"
+        with open(file_name, mode) as f:
+            # Cut data torn by an earlier crash before appending
+            f.seek(offset)
+            f.truncate()
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+
+    def _write_manifest(self, generation: int, dtype: str) -> None:
+        tmp_file = f"{self._manifest_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"generation": generation, "dim": self.dim, "dtype": dtype}, f)
+        os.replace(tmp_file, self._manifest_file)
+
+    def save(self) -> bool:
+        """Append the unsaved rows and records, returns False if there were none"""
+        self.refresh()
+        if not self.has_changes:
+            return False
+        if not self.exists:
+            self._write_manifest(self.generation, self.dtype)
+
+        records = [{"del": doc_id} for doc_id in self._pending_deletes]
+        rows = []
+        for row, (doc_id, (meta, vector)) in enumerate(
+            self._pending.items(), start=self._rows
+        ):
+            records.append({"row": row, "id": doc_id, "meta": meta})
+            rows.append(vector.tobytes())
+        # Rows first, so a log record never points past the end of the vector file
+        self._append(
+            self._file(self.generation, "vectors"), self._rows * self._row_bytes, rows
+        )
+        self._append(
+            self._file(self.generation, "log"),
+            self._log_offset,
+            [
+                (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                for record in records
+            ],
+        )
+        self._pending = {}
+        self._pending_deletes = set()
+        self._read_log()
+
+        if self._dead_rows > max(len(self._ids), COMPACTION_MIN_DEAD_ROWS) or (
+            self.dtype != self._target_dtype
+        ):
+            self.compact()
+        return True
+
+    def compact(self) -> None:
+        """Rewrite the live rows as a new generation, dropping tombstoned rows"""
+        generation = self.generation + 1
+        dtype = self._target_dtype
+        vectors_file = self._file(generation, "vectors")
+        log_file = self._file(generation, "log")
+        row = 0
+        with open(vectors_file, "wb") as vf, open(log_file, "wb") as lf:
+            for metas, matrix in self._iter_chunks():
+                vf.write(self._encode(matrix, dtype).tobytes())
+                for meta in metas:
+                    meta = dict(meta)
+                    doc_id = meta.pop("__id__")
+                    record = {"row": row, "id": doc_id, "meta": meta}
+                    lf.write(
+                        (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                    )
+                    row += 1
+            for f in (vf, lf):
+                f.flush()
+                os.fsync(f.fileno())
+        old_generation = self.generation
+        self._write_manifest(generation, dtype)
+        # Processes still mapping the old files keep reading them until they refresh
+        for suffix in ("vectors", "log"):
+            old_file = self._file(old_generation, suffix)
+            if os.path.exists(old_file):
+                os.remove(old_file)
+        pending, pending_deletes = self._pending, self._pending_deletes
+        self.load()
+        self._pending, self._pending_deletes = pending, pending_deletes
+        logger.info(f"Compacted {self._base_path} into {row} {dtype} rows")
+
+    def drop(self) -> None:
+        """Remove all data, other processes reload on the bumped generation"""
+        for suffix in ("vectors", "log"):
+            old_file = self._file(self.generation, suffix)
+            if os.path.exists(old_file):
+                os.remove(old_file)
+        self._write_manifest(self.generation + 1, self._target_dtype)
+        self.load()
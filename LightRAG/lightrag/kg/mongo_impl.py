@@ -1,5 +1,6 @@
 import os
 from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
 import numpy as np
 import configparser
 import asyncio
@@ -36,6 +37,9 @@ from pymongo.errors import PyMongoError  # type: ignore
 config = configparser.ConfigParser()
 config.read("config.ini", "utf-8")
 
+# Number of LLM cache writes between two size eviction passes
+LLM_CACHE_EVICTION_INTERVAL = 100
+
 
 class ClientManager:
     _instances = {"db": None, "ref_count": 0}
@@ -82,12 +86,65 @@ class MongoKVStorage(BaseKVStorage):
 
     def __post_init__(self):
         self._collection_name = self.namespace
+        self._cache_writes = 0
 
     async def initialize(self):
         if self.db is None:
             self.db = await ClientManager.get_client()
             self._data = await get_or_create_collection(self.db, self._collection_name)
             logger.debug(f"Use MongoDB as KV {self._collection_name}")
+            if is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
+                await self._migrate_legacy_cache_entries()
+                await self._create_cache_indexes()
+
+    async def _migrate_legacy_cache_entries(self):
+        """Backfill mode and cache_time of cache entries written before they existed
+
+        Without them legacy entries never match the llm_cache_ttl filter and are
+        never counted by the size eviction. cache_time is taken from create_time,
+        or set to now for entries without it.
+        """
+        try:
+            result = await self._data.update_many(
+                {"cache_time": {"$exists": False}},
+                [
+                    {
+                        "$set": {
+                            "cache_time": {
+                                "$ifNull": [
+                                    {"$toDate": {"$multiply": ["$create_time", 1000]}},
+                                    "$$NOW",
+                                ]
+                            },
+                            "mode": {
+                                "$ifNull": [
+                                    "$mode",
+                                    {"$arrayElemAt": [{"$split": ["$_id", "_"]}, 0]},
+                                ]
+                            },
+                        }
+                    }
+                ],
+            )
+            if result.modified_count:
+                logger.info(
+                    f"Backfilled mode and cache_time of {result.modified_count} "
+                    f"legacy LLM cache entries in {self._collection_name}"
+                )
+        except PyMongoError as e:
+            logger.warning(f"Failed to migrate legacy LLM cache entries: {e}")
+
+    async def _create_cache_indexes(self):
+        """Indexes for LLM cache eviction, and a TTL index when llm_cache_ttl is set"""
+        try:
+            await self._data.create_index([("mode", 1), ("cache_time", -1)])
+            ttl = self.global_config.get("llm_cache_ttl", 0)
+            if ttl > 0:
+                await self._data.create_index(
+                    "cache_time", name="cache_time_ttl", expireAfterSeconds=ttl
+                )
+        except PyMongoError as e:
+            logger.warning(f"Failed to create LLM cache indexes: {e}")
 
     async def finalize(self):
         if self.db is not None:
@@ -100,7 +157,8 @@ class MongoKVStorage(BaseKVStorage):
 
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
         cursor = self._data.find({"_id": {"$in": ids}})
-        return await cursor.to_list()
+        docs_by_id = {doc["_id"]: doc for doc in await cursor.to_list()}
+        return [docs_by_id.get(id) for id in ids]
 
     async def filter_keys(self, keys: set[str]) -> set[str]:
         cursor = self._data.find({"_id": {"$in": list(keys)}}, {"_id": 1})
@@ -146,6 +204,49 @@ class MongoKVStorage(BaseKVStorage):
         else:
             return None
 
+    async def get_cache_entry(self, mode: str, args_hash: str) -> dict[str, Any] | None:
+        """Point read of one cache entry, ignoring entries older than llm_cache_ttl"""
+        query: dict[str, Any] = {"_id": f"{mode}_{args_hash}"}
+        ttl = self.global_config.get("llm_cache_ttl", 0)
+        if ttl > 0:
+            # The TTL monitor only purges every minute, so filter expired entries here
+            query["cache_time"] = {
+                "$gte": datetime.now(timezone.utc) - timedelta(seconds=ttl)
+            }
+        return await self._data.find_one(query)
+
+    async def upsert_cache_entry(
+        self, mode: str, args_hash: str, entry: dict[str, Any]
+    ) -> None:
+        """Point write of one cache entry
+
+        Every LLM_CACHE_EVICTION_INTERVAL writes, the least recently written entries
+        of the mode beyond llm_cache_max_entries are evicted.
+        """
+        await self._data.update_one(
+            {"_id": f"{mode}_{args_hash}"},
+            {"$set": {**entry, "mode": mode, "cache_time": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+
+        max_entries = self.global_config.get("llm_cache_max_entries", 0)
+        self._cache_writes += 1
+        if max_entries > 0 and self._cache_writes % LLM_CACHE_EVICTION_INTERVAL == 0:
+            try:
+                cursor = (
+                    self._data.find({"mode": mode}, {"_id": 1})
+                    .sort("cache_time", -1)
+                    .skip(max_entries)
+                )
+                evict_ids = [doc["_id"] async for doc in cursor]
+                if evict_ids:
+                    await self._data.delete_many({"_id": {"$in": evict_ids}})
+                    logger.debug(
+                        f"Evicted {len(evict_ids)} LLM cache entries of {mode}"
+                    )
+            except PyMongoError as e:
+                logger.error(f"Error evicting LLM cache entries of mode {mode}: {e}")
+
     async def index_done_callback(self) -> None:
         # Mongo handles persistence automatically
         pass
@@ -256,6 +357,14 @@ class MongoDocStatusStorage(DocStatusStorage):
             )
         await asyncio.gather(*update_tasks)
 
+    async def update_status(self, data: dict[str, dict[str, Any]]) -> None:
+        """Partially update existing records with $set, unknown ids are ignored"""
+        if not data:
+            return
+        await asyncio.gather(
+            *(self._data.update_one({"_id": k}, {"$set": v}) for k, v in data.items())
+        )
+
     async def get_status_counts(self) -> dict[str, int]:
         """Get counts of documents in each status"""
         pipeline = [{"$group": {"_id": "$status", "count": {"$sum": 1}}}]
@@ -274,7 +383,6 @@ class MongoDocStatusStorage(DocStatusStorage):
         result = await cursor.to_list()
         return {
             doc["_id"]: DocProcessingStatus(
-                content=doc["content"],
                 content_summary=doc.get("content_summary"),
                 content_length=doc["content_length"],
                 status=doc["status"],
@@ -282,6 +390,7 @@ class MongoDocStatusStorage(DocStatusStorage):
                 updated_at=doc.get("updated_at"),
                 chunks_count=doc.get("chunks_count", -1),
                 file_path=doc.get("file_path", doc["_id"]),
+                error=doc.get("error"),
             )
             for doc in result
         }
@@ -15,17 +15,28 @@ from lightrag.base import BaseVectorStorage
 if not pm.is_installed("nano-vectordb"):
     pm.install("nano-vectordb")
 
-from nano_vectordb import NanoVectorDB
+from nano_vectordb.dbs import load_storage
+from .mmap_vector_file import MmapVectorFile
 from .shared_storage import (
     get_storage_lock,
     get_update_flag,
     set_all_update_flags,
 )
 
+# Row type of the memory-mapped vector file: float16, int8 or float32
+MMAP_VECTOR_DTYPE = os.getenv("MMAP_VECTOR_DTYPE", "float16")
+
 
 @final
 @dataclass
 class NanoVectorDBStorage(BaseVectorStorage):
+    """Local vector storage on a memory-mapped vector file
+
+    Vectors live in vdb_<namespace>.* files (see MmapVectorFile), which all worker
+    processes map and share through the OS page cache. A vdb_<namespace>.json file
+    written by nano-vectordb is imported on first start.
+    """
+
     def __post_init__(self):
         # Initialize basic attributes
         self._client = None
@@ -42,13 +53,15 @@ class NanoVectorDBStorage(BaseVectorStorage):
         self.cosine_better_than_threshold = cosine_threshold
 
         self._client_file_name = os.path.join(
-            self.global_config["working_dir"], f"vdb_{self.namespace}.json"
+            self.global_config["working_dir"], f"vdb_{self.namespace}"
         )
+        self._legacy_file_name = f"{self._client_file_name}.json"
         self._max_batch_size = self.global_config["embedding_batch_num"]
 
-        self._client = NanoVectorDB(
+        self._client = MmapVectorFile(
+            self._client_file_name,
             self.embedding_func.embedding_dim,
-            storage_file=self._client_file_name,
+            dtype=MMAP_VECTOR_DTYPE,
         )
 
     async def initialize(self):
@@ -58,6 +71,30 @@ class NanoVectorDBStorage(BaseVectorStorage):
         # Get the storage lock for use in other methods
         self._storage_lock = get_storage_lock(enable_logging=False)
 
+        async with self._storage_lock:
+            self._client.refresh()
+            if not self._client.exists and os.path.exists(self._legacy_file_name):
+                self._import_legacy_file()
+
+    def _import_legacy_file(self):
+        """Copy the vectors of a nano-vectordb JSON file into the vector file"""
+        storage = load_storage(self._legacy_file_name)
+        if storage is None:
+            return
+        self._client.upsert(
+            {
+                dp["__id__"]: (
+                    {k: v for k, v in dp.items() if k != "__id__"},
+                    storage["matrix"][i],
+                )
+                for i, dp in enumerate(storage["data"])
+            }
+        )
+        self._client.save()
+        logger.info(
+            f"Imported {len(storage['data'])} vectors of {self._legacy_file_name} into {self._client_file_name}"
+        )
+
     async def _get_client(self):
         """Check if the storage should be reloaded"""
         # Acquire lock to prevent concurrent read and write
@@ -67,11 +104,8 @@ class NanoVectorDBStorage(BaseVectorStorage):
                 logger.info(
                     f"Process {os.getpid()} reloading {self.namespace} due to update by another process"
                 )
-                # Reload data
-                self._client = NanoVectorDB(
-                    self.embedding_func.embedding_dim,
-                    storage_file=self._client_file_name,
-                )
+                # Read the records appended by the other process
+                self._client.refresh()
                 # Reset update flag
                 self.storage_updated.value = False
 
@@ -92,11 +126,10 @@ class NanoVectorDBStorage(BaseVectorStorage):
         current_time = int(time.time())
         list_data = [
             {
-                "__id__": k,
                 "__created_at__": current_time,
                 **{k1: v1 for k1, v1 in v.items() if k1 in self.meta_fields},
             }
-            for k, v in data.items()
+            for v in data.values()
         ]
         contents = [v["content"] for v in data.values()]
         batches = [
@@ -110,11 +143,13 @@ class NanoVectorDBStorage(BaseVectorStorage):
 
         embeddings = np.concatenate(embeddings_list)
         if len(embeddings) == len(list_data):
-            for i, d in enumerate(list_data):
-                d["__vector__"] = embeddings[i]
             client = await self._get_client()
-            results = client.upsert(datas=list_data)
-            return results
+            client.upsert(
+                {
+                    k: (meta, embeddings[i])
+                    for i, (k, meta) in enumerate(zip(data.keys(), list_data))
+                }
+            )
         else:
             # sometimes the embedding is not returned correctly. just log it.
             logger.error(
@@ -131,8 +166,8 @@ class NanoVectorDBStorage(BaseVectorStorage):
         embedding = embedding[0]
 
         client = await self._get_client()
-        results = client.query(
-            query=embedding,
+        results = client.search(
+            embedding,
             top_k=top_k,
             better_than_threshold=self.cosine_better_than_threshold,
         )
@@ -140,17 +175,17 @@ class NanoVectorDBStorage(BaseVectorStorage):
             {
                 **dp,
                 "id": dp["__id__"],
-                "distance": dp["__metrics__"],
+                "distance": score,
                 "created_at": dp.get("__created_at__"),
             }
-            for dp in results
+            for dp, score in results
         ]
         return results
 
     @property
     async def client_storage(self):
         client = await self._get_client()
-        return getattr(client, "_NanoVectorDB__storage")
+        return {"data": list(client.items())}
 
     async def delete(self, ids: list[str]):
         """Delete vectors with specified IDs
@@ -188,8 +223,7 @@ class NanoVectorDBStorage(BaseVectorStorage):
 
             # Check if the entity exists
             client = await self._get_client()
-            if client.get([entity_id]):
-                client.delete([entity_id])
+            if client.delete([entity_id]):
                 logger.debug(f"Successfully deleted entity {entity_name}")
             else:
                 logger.debug(f"Entity {entity_name} not found in storage")
@@ -206,10 +240,9 @@ class NanoVectorDBStorage(BaseVectorStorage):
 
         try:
             client = await self._get_client()
-            storage = getattr(client, "_NanoVectorDB__storage")
             relations = [
                 dp
-                for dp in storage["data"]
+                for dp in client.items()
                 if dp["src_id"] == entity_name or dp["tgt_id"] == entity_name
             ]
             logger.debug(f"Found {len(relations)} relations for entity {entity_name}")
@@ -227,29 +260,13 @@ class NanoVectorDBStorage(BaseVectorStorage):
             logger.error(f"Error deleting relations for {entity_name}: {e}")
 
     async def index_done_callback(self) -> bool:
-        """Save data to disk"""
-        async with self._storage_lock:
-            # Check if storage was updated by another process
-            if self.storage_updated.value:
-                # Storage was updated by another process, reload data instead of saving
-                logger.warning(
-                    f"Storage for {self.namespace} was updated by another process, reloading..."
-                )
-                self._client = NanoVectorDB(
-                    self.embedding_func.embedding_dim,
-                    storage_file=self._client_file_name,
-                )
-                # Reset update flag
-                self.storage_updated.value = False
-                return False  # Return error
-
-        # Acquire lock and perform persistence
+        """Append the vectors changed since the last save to disk"""
         async with self._storage_lock:
             try:
-                # Save data to disk
-                self._client.save()
-                # Notify other processes that data has been updated
-                await set_all_update_flags(self.namespace)
+                # Reads the records of other processes first, then appends ours
+                if self._client.save():
+                    # Notify other processes that data has been updated
+                    await set_all_update_flags(self.namespace)
                 # Reset own update flag to avoid self-reloading
                 self.storage_updated.value = False
                 return True  # Return success
@@ -257,8 +274,6 @@ class NanoVectorDBStorage(BaseVectorStorage):
                 logger.error(f"Error saving data for {self.namespace}: {e}")
                 return False  # Return error
 
-        return True  # Return success
-
     async def get_by_id(self, id: str) -> dict[str, Any] | None:
         """Get vector data by its ID
 
@@ -269,9 +284,8 @@ class NanoVectorDBStorage(BaseVectorStorage):
             The vector data if found, or None if not found
         """
         client = await self._get_client()
-        result = client.get([id])
-        if result:
-            dp = result[0]
+        dp = client.get(id)
+        if dp:
             return {
                 **dp,
                 "id": dp.get("__id__"),
@@ -292,7 +306,7 @@ class NanoVectorDBStorage(BaseVectorStorage):
             return []
 
         client = await self._get_client()
-        results = client.get(ids)
+        results = [client.get(id) for id in ids]
         return [
             {
                 **dp,
@@ -300,13 +314,14 @@ class NanoVectorDBStorage(BaseVectorStorage):
                 "created_at": dp.get("__created_at__"),
             }
             for dp in results
+            if dp
         ]
 
     async def drop(self) -> dict[str, str]:
         """Drop all vector data from storage and clean up resources
 
         This method will:
-        1. Remove the vector database storage file if it exists
+        1. Remove the vector files (and a legacy nano-vectordb file) if they exist
         2. Reinitialize the vector database client
         3. Update flags to notify other processes
         4. Changes is persisted to disk immediately
@@ -320,14 +335,9 @@ class NanoVectorDBStorage(BaseVectorStorage):
         """
         try:
             async with self._storage_lock:
-                # delete _client_file_name
-                if os.path.exists(self._client_file_name):
-                    os.remove(self._client_file_name)
-
-                self._client = NanoVectorDB(
-                    self.embedding_func.embedding_dim,
-                    storage_file=self._client_file_name,
-                )
+                self._client.drop()
+                if os.path.exists(self._legacy_file_name):
+                    os.remove(self._legacy_file_name)
 
                 # Notify other processes that data has been updated
                 await set_all_update_flags(self.namespace)
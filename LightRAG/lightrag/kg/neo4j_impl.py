@@ -2,7 +2,7 @@ import inspect
 import os
 import re
 from dataclasses import dataclass
-from typing import final
+from typing import AsyncIterator, final
 import configparser
 
 
@@ -39,6 +39,9 @@ load_dotenv(dotenv_path=".env", override=False)
 # Get maximum number of graph nodes from environment variable, default is 1000
 MAX_GRAPH_NODES = int(os.getenv("MAX_GRAPH_NODES", 1000))
 
+# Rows sent per UNWIND statement by the batch upserts
+UPSERT_BATCH_SIZE = 1000
+
 config = configparser.ConfigParser()
 config.read("config.ini", "utf-8")
 
@@ -726,6 +729,16 @@ class Neo4JStorage(BaseGraphStorage):
             await result.consume()  # Ensure results are fully consumed
             return edges_dict
 
+    async def upsert_node(self, node_id: str, node_data: dict[str, str]) -> None:
+        """
+        Upsert a node in the Neo4j database.
+
+        Args:
+            node_id: The unique identifier for the node (used as label)
+            node_data: Dictionary of node properties
+        """
+        await self.upsert_nodes_batch({node_id: node_data})
+
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=4, max=10),
@@ -738,44 +751,68 @@ class Neo4JStorage(BaseGraphStorage):
             )
         ),
     )
-    async def upsert_node(self, node_id: str, node_data: dict[str, str]) -> None:
+    async def upsert_nodes_batch(self, nodes: dict[str, dict[str, str]]) -> None:
         """
-        Upsert a node in the Neo4j database.
+        Upsert nodes with UNWIND, in a single write transaction.
+
+        Labels cannot be parameters in Cypher, so one statement is run per entity type.
 
         Args:
-            node_id: The unique identifier for the node (used as label)
-            node_data: Dictionary of node properties
+            nodes: Dictionary mapping node IDs to their properties
         """
-        properties = node_data
-        entity_type = properties["entity_type"]
-        if "entity_id" not in properties:
-            raise ValueError("Neo4j: node properties must contain an 'entity_id' field")
+        rows_by_type: dict[str, list[dict]] = {}
+        for node_id, properties in nodes.items():
+            if "entity_id" not in properties:
+                raise ValueError(
+                    "Neo4j: node properties must contain an 'entity_id' field"
+                )
+            rows_by_type.setdefault(properties["entity_type"], []).append(
+                {"entity_id": node_id, "properties": properties}
+            )
+        if not rows_by_type:
+            return
 
         try:
             async with self._driver.session(database=self._DATABASE) as session:
 
                 async def execute_upsert(tx: AsyncManagedTransaction):
-                    query = (
+                    for entity_type, rows in rows_by_type.items():
+                        query = (
+                            """
+                        UNWIND $rows AS row
+                        MERGE (n:base {entity_id: row.entity_id})
+                        SET n += row.properties
+                        SET n:`%s`
                         """
-                    MERGE (n:base {entity_id: $entity_id})
-                    SET n += $properties
-                    SET n:`%s`
-                    """
-                        % entity_type
-                    )
-                    result = await tx.run(
-                        query, entity_id=node_id, properties=properties
-                    )
-                    logger.debug(
-                        f"Upserted node with entity_id '{node_id}' and properties: {properties}"
-                    )
-                    await result.consume()  # Ensure result is fully consumed
+                            % entity_type
+                        )
+                        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+                            result = await tx.run(
+                                query, rows=rows[start : start + UPSERT_BATCH_SIZE]
+                            )
+                            await result.consume()  # Ensure result is fully consumed
+                    logger.debug(f"Upserted {len(nodes)} nodes")
 
                 await session.execute_write(execute_upsert)
         except Exception as e:
             logger.error(f"Error during upsert: {str(e)}")
             raise
 
+    async def upsert_edge(
+        self, source_node_id: str, target_node_id: str, edge_data: dict[str, str]
+    ) -> None:
+        """
+        Upsert an edge and its properties between two nodes identified by their labels.
+        Ensures both source and target nodes exist and are unique before creating the edge.
+        Uses entity_id property to uniquely identify nodes.
+
+        Args:
+            source_node_id (str): Label of the source node (used as identifier)
+            target_node_id (str): Label of the target node (used as identifier)
+            edge_data (dict): Dictionary of properties to set on the edge
+        """
+        await self.upsert_edges_batch({(source_node_id, target_node_id): edge_data})
+
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=4, max=10),
@@ -788,50 +825,42 @@ class Neo4JStorage(BaseGraphStorage):
             )
         ),
     )
-    async def upsert_edge(
-        self, source_node_id: str, target_node_id: str, edge_data: dict[str, str]
+    async def upsert_edges_batch(
+        self, edges: dict[tuple[str, str], dict[str, str]]
     ) -> None:
         """
-        Upsert an edge and its properties between two nodes identified by their labels.
-        Ensures both source and target nodes exist and are unique before creating the edge.
-        Uses entity_id property to uniquely identify nodes.
+        Upsert edges with UNWIND, in a single write transaction.
 
-        Args:
-            source_node_id (str): Label of the source node (used as identifier)
-            target_node_id (str): Label of the target node (used as identifier)
-            edge_data (dict): Dictionary of properties to set on the edge
+        Edges whose endpoint nodes do not exist are skipped by the MATCH.
 
-        Raises:
-            ValueError: If either source or target node does not exist or is not unique
+        Args:
+            edges: Dictionary mapping (source ID, target ID) to the edge properties
         """
+        rows = [
+            {"src": src, "tgt": tgt, "properties": properties}
+            for (src, tgt), properties in edges.items()
+        ]
+        if not rows:
+            return
+
         try:
-            edge_properties = edge_data
             async with self._driver.session(database=self._DATABASE) as session:
 
                 async def execute_upsert(tx: AsyncManagedTransaction):
                     query = """
-                    MATCH (source:base {entity_id: $source_entity_id})
-                    WITH source
-                    MATCH (target:base {entity_id: $target_entity_id})
+                    UNWIND $rows AS row
+                    MATCH (source:base {entity_id: row.src})
+                    WITH source, row
+                    MATCH (target:base {entity_id: row.tgt})
                     MERGE (source)-[r:DIRECTED]-(target)
-                    SET r += $properties
-                    RETURN r, source, target
+                    SET r += row.properties
                     """
-                    result = await tx.run(
-                        query,
-                        source_entity_id=source_node_id,
-                        target_entity_id=target_node_id,
-                        properties=edge_properties,
-                    )
-                    try:
-                        records = await result.fetch(2)
-                        if records:
-                            logger.debug(
-                                f"Upserted edge from '{source_node_id}' to '{target_node_id}'"
-                                f"with properties: {edge_properties}"
-                            )
-                    finally:
+                    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+                        result = await tx.run(
+                            query, rows=rows[start : start + UPSERT_BATCH_SIZE]
+                        )
                         await result.consume()  # Ensure result is consumed
+                    logger.debug(f"Upserted {len(rows)} edges")
 
                 await session.execute_write(execute_upsert)
         except Exception as e:
@@ -1202,6 +1231,83 @@ class Neo4JStorage(BaseGraphStorage):
         )
         return result
 
+    async def iter_nodes(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[tuple[str, dict]]]:
+        """Scan all nodes in entity_id order, paging with the entity_id index"""
+        last_id = None
+        while True:
+            async with self._driver.session(
+                database=self._DATABASE, default_access_mode="READ"
+            ) as session:
+                query = """
+                MATCH (n:base)
+                WHERE n.entity_id IS NOT NULL
+                  AND ($last_id IS NULL OR n.entity_id > $last_id)
+                RETURN n.entity_id AS entity_id, n
+                ORDER BY n.entity_id
+                LIMIT $limit
+                """
+                result = await session.run(query, last_id=last_id, limit=batch_size)
+                batch = []
+                try:
+                    async for record in result:
+                        node_dict = dict(record["n"])
+                        if "labels" in node_dict:
+                            node_dict["labels"] = [
+                                label
+                                for label in node_dict["labels"]
+                                if label != "base"
+                            ]
+                        batch.append((record["entity_id"], node_dict))
+                finally:
+                    await result.consume()
+            if not batch:
+                return
+            yield batch
+            if len(batch) < batch_size:
+                return
+            last_id = batch[-1][0]
+
+    async def iter_edges(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[tuple[str, str, dict]]]:
+        """Scan all edges once each, paging over their start nodes in entity_id order"""
+        last_id = None
+        while True:
+            async with self._driver.session(
+                database=self._DATABASE, default_access_mode="READ"
+            ) as session:
+                query = """
+                MATCH (a:base)
+                WHERE a.entity_id IS NOT NULL
+                  AND ($last_id IS NULL OR a.entity_id > $last_id)
+                WITH a ORDER BY a.entity_id LIMIT $limit
+                OPTIONAL MATCH (a)-[r]->(b:base)
+                RETURN a.entity_id AS source, b.entity_id AS target,
+                       properties(r) AS properties
+                ORDER BY source
+                """
+                result = await session.run(query, last_id=last_id, limit=batch_size)
+                batch = []
+                sources = set()
+                try:
+                    async for record in result:
+                        source = record["source"]
+                        sources.add(source)
+                        if record["target"] is not None:
+                            batch.append(
+                                (source, record["target"], record["properties"])
+                            )
+                finally:
+                    await result.consume()
+            if batch:
+                yield batch
+            if len(sources) < batch_size:
+                return
+            # Rows are ordered by the start node, the last one ends this page
+            last_id = source
+
     async def get_all_labels(self) -> list[str]:
         """
         Get all existing node labels in the database
@@ -1,6 +1,8 @@
 import os
+import pickle
+import struct
 from dataclasses import dataclass
-from typing import final
+from typing import AsyncIterator, final
 
 from lightrag.types import KnowledgeGraph, KnowledgeGraphNode, KnowledgeGraphEdge
 from lightrag.utils import logger
@@ -29,11 +31,29 @@ from dotenv import load_dotenv
 load_dotenv(dotenv_path=".env", override=False)
 
 MAX_GRAPH_NODES = int(os.getenv("MAX_GRAPH_NODES", 1000))
+# The write-ahead log is compacted into a new snapshot once it is larger than this
+# fraction of the snapshot size, and at least NETWORKX_WAL_COMPACTION_MIN_BYTES
+WAL_COMPACTION_RATIO = float(os.getenv("NETWORKX_WAL_COMPACTION_RATIO", 1.0))
+WAL_COMPACTION_MIN_BYTES = int(
+    os.getenv("NETWORKX_WAL_COMPACTION_MIN_BYTES", 8 * 1024 * 1024)
+)
+
+# Every write-ahead log record is a pickled list of operations prefixed by its length
+_WAL_RECORD_HEADER = struct.Struct(">I")
 
 
 @final
 @dataclass
 class NetworkXStorage(BaseGraphStorage):
+    """NetworkX graph kept in memory and persisted incrementally
+
+    Changes are appended to a write-ahead log (graph_<namespace>.wal) when a document
+    is done, and the log is periodically compacted into a pickled snapshot of the
+    whole graph (graph_<namespace>.snapshot). Other processes replay only the log
+    records they have not seen yet. GraphML is no longer written on every update,
+    use export_graphml or the lightrag-export-graphml command to get one.
+    """
+
     @staticmethod
     def load_nx_graph(file_name) -> nx.Graph:
         if os.path.exists(file_name):
@@ -47,23 +67,176 @@ class NetworkXStorage(BaseGraphStorage):
         )
         nx.write_graphml(graph, file_name)
 
+    @staticmethod
+    def graph_file_names(working_dir: str, namespace: str) -> tuple[str, str, str]:
+        """Paths of the snapshot, the write-ahead log and the legacy GraphML file"""
+        base = os.path.join(working_dir, f"graph_{namespace}")
+        return f"{base}.snapshot", f"{base}.wal", f"{base}.graphml"
+
+    @staticmethod
+    def read_wal(file_name: str, offset: int = 0) -> tuple[list[tuple], int]:
+        """Read the operations logged after offset
+
+        Returns:
+            The operations and the offset after the last complete record, a record
+            torn by a crash while appending is ignored
+        """
+        ops: list[tuple] = []
+        if not os.path.exists(file_name):
+            return ops, 0
+        with open(file_name, "rb") as f:
+            f.seek(offset)
+            while True:
+                header = f.read(_WAL_RECORD_HEADER.size)
+                if len(header) < _WAL_RECORD_HEADER.size:
+                    break
+                (size,) = _WAL_RECORD_HEADER.unpack(header)
+                payload = f.read(size)
+                if len(payload) < size:
+                    break
+                ops.extend(pickle.loads(payload))
+                offset = f.tell()
+        return ops, offset
+
+    @staticmethod
+    def apply_ops(graph: nx.Graph, ops: list[tuple]) -> None:
+        """Replay logged operations, replaying an operation twice has no effect"""
+        for op in ops:
+            kind = op[0]
+            if kind == "node":
+                graph.add_node(op[1], **op[2])
+            elif kind == "edge":
+                graph.add_edge(op[1], op[2], **op[3])
+            elif kind == "remove_node":
+                if graph.has_node(op[1]):
+                    graph.remove_node(op[1])
+            elif kind == "remove_edge":
+                if graph.has_edge(op[1], op[2]):
+                    graph.remove_edge(op[1], op[2])
+
+    @staticmethod
+    def load_graph(working_dir: str, namespace: str) -> tuple[nx.Graph, int, bool]:
+        """Load the snapshot (or a legacy GraphML file) and replay the log on top
+
+        Returns:
+            The graph, the log offset that was read up to, and whether the graph came
+            from a GraphML file written by an older version
+        """
+        snapshot_file, wal_file, graphml_file = NetworkXStorage.graph_file_names(
+            working_dir, namespace
+        )
+        from_graphml = False
+        if os.path.exists(snapshot_file):
+            with open(snapshot_file, "rb") as f:
+                graph = pickle.load(f)
+        else:
+            graph = NetworkXStorage.load_nx_graph(graphml_file)
+            from_graphml = graph is not None
+        graph = graph if graph is not None else nx.Graph()
+        ops, wal_offset = NetworkXStorage.read_wal(wal_file)
+        NetworkXStorage.apply_ops(graph, ops)
+        return graph, wal_offset, from_graphml
+
     def __post_init__(self):
-        self._graphml_xml_file = os.path.join(
-            self.global_config["working_dir"], f"graph_{self.namespace}.graphml"
+        self._snapshot_file, self._wal_file, self._graphml_xml_file = (
+            NetworkXStorage.graph_file_names(
+                self.global_config["working_dir"], self.namespace
+            )
         )
         self._storage_lock = None
         self.storage_updated = None
         self._graph = None
+        # Operations applied in memory but not yet appended to the log
+        self._pending_ops: list[tuple] = []
 
         # Load initial graph
-        preloaded_graph = NetworkXStorage.load_nx_graph(self._graphml_xml_file)
-        if preloaded_graph is not None:
+        self._load_graph()
+        if self._graph.number_of_nodes():
             logger.info(
-                f"Loaded graph from {self._graphml_xml_file} with {preloaded_graph.number_of_nodes()} nodes, {preloaded_graph.number_of_edges()} edges"
+                f"Loaded graph {self.namespace} with {self._graph.number_of_nodes()} nodes, {self._graph.number_of_edges()} edges"
             )
         else:
             logger.info("Created new empty graph")
-        self._graph = preloaded_graph or nx.Graph()
+
+    def _base_file_identity(self) -> tuple | None:
+        """Identity of the file the graph is loaded from, it changes on compaction"""
+        for file_name in (self._snapshot_file, self._graphml_xml_file):
+            try:
+                stat = os.stat(file_name)
+            except FileNotFoundError:
+                continue
+            return file_name, stat.st_ino, stat.st_mtime_ns, stat.st_size
+        return None
+
+    def _load_graph(self) -> None:
+        self._base_identity = self._base_file_identity()
+        self._graph, self._wal_offset, self._needs_compaction = (
+            NetworkXStorage.load_graph(
+                self.global_config["working_dir"], self.namespace
+            )
+        )
+
+    def _reload_graph(self) -> None:
+        """Catch up with the changes of other processes, keeping our pending ones"""
+        wal_size = (
+            os.path.getsize(self._wal_file) if os.path.exists(self._wal_file) else 0
+        )
+        if (
+            self._base_file_identity() != self._base_identity
+            or wal_size < self._wal_offset
+        ):
+            # Compacted or dropped by another process
+            self._load_graph()
+        else:
+            ops, self._wal_offset = NetworkXStorage.read_wal(
+                self._wal_file, self._wal_offset
+            )
+            NetworkXStorage.apply_ops(self._graph, ops)
+        NetworkXStorage.apply_ops(self._graph, self._pending_ops)
+
+    def _append_wal(self, ops: list[tuple]) -> None:
+        payload = pickle.dumps(ops, protocol=pickle.HIGHEST_PROTOCOL)
+        mode = "r+b" if os.path.exists(self._wal_file) else "wb"
+        with open(self._wal_file, mode) as f:
+            # Cut a record torn by an earlier crash before appending
+            f.seek(self._wal_offset)
+            f.truncate()
+            f.write(_WAL_RECORD_HEADER.pack(len(payload)))
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+            self._wal_offset = f.tell()
+
+    def _compact(self) -> None:
+        """Write the whole graph as a new snapshot and start an empty log"""
+        tmp_file = f"{self._snapshot_file}.tmp"
+        with open(tmp_file, "wb") as f:
+            pickle.dump(self._graph, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self._snapshot_file)
+        # Replaying the old log on the new snapshot would be harmless, so a crash
+        # before this truncation does not lose or corrupt anything
+        with open(self._wal_file, "wb"):
+            pass
+        self._wal_offset = 0
+        self._base_identity = self._base_file_identity()
+        self._needs_compaction = False
+        logger.info(
+            f"Compacted graph {self.namespace} into a snapshot with {self._graph.number_of_nodes()} nodes, {self._graph.number_of_edges()} edges"
+        )
+
+    def _should_compact(self) -> bool:
+        if self._needs_compaction:
+            return True
+        snapshot_size = (
+            os.path.getsize(self._snapshot_file)
+            if os.path.exists(self._snapshot_file)
+            else 0
+        )
+        return self._wal_offset > max(
+            WAL_COMPACTION_MIN_BYTES, WAL_COMPACTION_RATIO * snapshot_size
+        )
 
     async def initialize(self):
         """Initialize storage data"""
@@ -81,10 +254,8 @@ class NetworkXStorage(BaseGraphStorage):
                 logger.info(
                     f"Process {os.getpid()} reloading graph {self.namespace} due to update by another process"
                 )
-                # Reload data
-                self._graph = (
-                    NetworkXStorage.load_nx_graph(self._graphml_xml_file) or nx.Graph()
-                )
+                # Replay the changes logged by the other process
+                self._reload_graph()
                 # Reset update flag
                 self.storage_updated.value = False
 
@@ -123,6 +294,15 @@ class NetworkXStorage(BaseGraphStorage):
         return None
 
     async def upsert_node(self, node_id: str, node_data: dict[str, str]) -> None:
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+        await self.upsert_nodes_batch({node_id: node_data})
+
+    async def upsert_nodes_batch(self, nodes: dict[str, dict[str, str]]) -> None:
         """
         Importance notes:
         1. Changes will be persisted to disk during the next index_done_callback
@@ -130,10 +310,24 @@ class NetworkXStorage(BaseGraphStorage):
            KG-storage-log should be used to avoid data corruption
         """
         graph = await self._get_graph()
-        graph.add_node(node_id, **node_data)
+        graph.add_nodes_from(nodes.items())
+        self._pending_ops.extend(
+            ("node", node_id, dict(node_data)) for node_id, node_data in nodes.items()
+        )
 
     async def upsert_edge(
         self, source_node_id: str, target_node_id: str, edge_data: dict[str, str]
+    ) -> None:
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+        await self.upsert_edges_batch({(source_node_id, target_node_id): edge_data})
+
+    async def upsert_edges_batch(
+        self, edges: dict[tuple[str, str], dict[str, str]]
     ) -> None:
         """
         Importance notes:
@@ -142,7 +336,10 @@ class NetworkXStorage(BaseGraphStorage):
            KG-storage-log should be used to avoid data corruption
         """
         graph = await self._get_graph()
-        graph.add_edge(source_node_id, target_node_id, **edge_data)
+        graph.add_edges_from((src, tgt, data) for (src, tgt), data in edges.items())
+        self._pending_ops.extend(
+            ("edge", src, tgt, dict(data)) for (src, tgt), data in edges.items()
+        )
 
     async def delete_node(self, node_id: str) -> None:
         """
@@ -154,6 +351,7 @@ class NetworkXStorage(BaseGraphStorage):
         graph = await self._get_graph()
         if graph.has_node(node_id):
             graph.remove_node(node_id)
+            self._pending_ops.append(("remove_node", node_id))
             logger.debug(f"Node {node_id} deleted from the graph.")
         else:
             logger.warning(f"Node {node_id} not found in the graph for deletion.")
@@ -173,6 +371,7 @@ class NetworkXStorage(BaseGraphStorage):
         for node in nodes:
             if graph.has_node(node):
                 graph.remove_node(node)
+                self._pending_ops.append(("remove_node", node))
 
     async def remove_edges(self, edges: list[tuple[str, str]]):
         """Delete multiple edges
@@ -189,6 +388,35 @@ class NetworkXStorage(BaseGraphStorage):
         for source, target in edges:
             if graph.has_edge(source, target):
                 graph.remove_edge(source, target)
+                self._pending_ops.append(("remove_edge", source, target))
+
+    async def iter_nodes(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[tuple[str, dict]]]:
+        """Scan all nodes in batches, skipping nodes removed during the scan"""
+        graph = await self._get_graph()
+        node_ids = list(graph.nodes)
+        for i in range(0, len(node_ids), batch_size):
+            graph = await self._get_graph()
+            yield [
+                (node_id, graph.nodes[node_id])
+                for node_id in node_ids[i : i + batch_size]
+                if graph.has_node(node_id)
+            ]
+
+    async def iter_edges(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[tuple[str, str, dict]]]:
+        """Scan all edges in batches, skipping edges removed during the scan"""
+        graph = await self._get_graph()
+        edges = list(graph.edges)
+        for i in range(0, len(edges), batch_size):
+            graph = await self._get_graph()
+            yield [
+                (src, tgt, graph.edges[src, tgt])
+                for src, tgt in edges[i : i + batch_size]
+                if graph.has_edge(src, tgt)
+            ]
 
     async def get_all_labels(self) -> list[str]:
         """
@@ -358,26 +586,25 @@ class NetworkXStorage(BaseGraphStorage):
         return result
 
     async def index_done_callback(self) -> bool:
-        """Save data to disk"""
-        async with self._storage_lock:
-            # Check if storage was updated by another process
-            if self.storage_updated.value:
-                # Storage was updated by another process, reload data instead of saving
-                logger.info(
-                    f"Graph for {self.namespace} was updated by another process, reloading..."
-                )
-                self._graph = (
-                    NetworkXStorage.load_nx_graph(self._graphml_xml_file) or nx.Graph()
-                )
-                # Reset update flag
-                self.storage_updated.value = False
-                return False  # Return error
-
-        # Acquire lock and perform persistence
+        """Append the pending changes to the log, compacting it when it grew too large"""
         async with self._storage_lock:
             try:
-                # Save data to disk
-                NetworkXStorage.write_nx_graph(self._graph, self._graphml_xml_file)
+                # Catch up with another process first, so the log stays in order
+                if self.storage_updated.value:
+                    logger.info(
+                        f"Graph for {self.namespace} was updated by another process, replaying its changes..."
+                    )
+                    self._reload_graph()
+                    self.storage_updated.value = False
+
+                if not self._pending_ops and not self._needs_compaction:
+                    return True
+                if self._pending_ops:
+                    self._append_wal(self._pending_ops)
+                    self._pending_ops = []
+                if self._should_compact():
+                    self._compact()
+
                 # Notify other processes that data has been updated
                 await set_all_update_flags(self.namespace)
                 # Reset own update flag to avoid self-reloading
@@ -387,13 +614,16 @@ class NetworkXStorage(BaseGraphStorage):
                 logger.error(f"Error saving graph for {self.namespace}: {e}")
                 return False  # Return error
 
-        return True
+    async def export_graphml(self, file_name: str) -> None:
+        """Write the current graph, including pending changes, as a GraphML file"""
+        graph = await self._get_graph()
+        NetworkXStorage.write_nx_graph(graph, file_name)
 
     async def drop(self) -> dict[str, str]:
         """Drop all graph data from storage and clean up resources
 
         This method will:
-        1. Remove the graph storage file if it exists
+        1. Remove the graph snapshot, log and legacy GraphML files if they exist
         2. Reset the graph to an empty state
         3. Update flags to notify other processes
         4. Changes is persisted to disk immediately
@@ -405,16 +635,24 @@ class NetworkXStorage(BaseGraphStorage):
         """
         try:
             async with self._storage_lock:
-                # delete _client_file_name
-                if os.path.exists(self._graphml_xml_file):
-                    os.remove(self._graphml_xml_file)
+                for file_name in (
+                    self._snapshot_file,
+                    self._wal_file,
+                    self._graphml_xml_file,
+                ):
+                    if os.path.exists(file_name):
+                        os.remove(file_name)
                 self._graph = nx.Graph()
+                self._pending_ops = []
+                self._wal_offset = 0
+                self._base_identity = None
+                self._needs_compaction = False
                 # Notify other processes that data has been updated
                 await set_all_update_flags(self.namespace)
                 # Reset own update flag to avoid self-reloading
                 self.storage_updated.value = False
                 logger.info(
-                    f"Process {os.getpid()} drop graph {self.namespace} (file:{self._graphml_xml_file})"
+                    f"Process {os.getpid()} drop graph {self.namespace} (file:{self._snapshot_file})"
                 )
             return {"status": "success", "message": "data dropped"}
         except Exception as e:
@@ -1,10 +1,13 @@
 import asyncio
 import json
 import os
+import re
 import datetime
+import struct
 from datetime import timezone
+from functools import partial
 from dataclasses import dataclass, field
-from typing import Any, Union, final
+from typing import Any, AsyncIterator, Union, final
 import numpy as np
 import configparser
 
@@ -26,7 +29,12 @@ from ..base import (
     DocStatusStorage,
 )
 from ..namespace import NameSpace, is_namespace
-from ..utils import logger
+from ..utils import (
+    decode_doc_status_cursor,
+    encode_doc_status_cursor,
+    logger,
+    to_aware_datetime,
+)
 
 import pipmaster as pm
 
@@ -46,6 +54,43 @@ load_dotenv(dotenv_path=".env", override=False)
 # Get maximum number of graph nodes from environment variable, default is 1000
 MAX_GRAPH_NODES = int(os.getenv("MAX_GRAPH_NODES", 1000))
 
+# Number of LLM cache writes between two TTL / size eviction passes
+LLM_CACHE_EVICTION_INTERVAL = 100
+
+# Default number of rows written per executemany round trip / transaction
+DEFAULT_POSTGRES_BATCH_SIZE = 500
+
+# Cypher MERGE statements sent per round trip by the graph batch upserts
+UPSERT_BATCH_SIZE = 100
+
+
+# Vector ANN index defaults, see the pgvector documentation for the trade-offs
+DEFAULT_VECTOR_INDEX_TYPE = "hnsw"  # hnsw, ivfflat or none
+DEFAULT_HNSW_M = 16
+DEFAULT_HNSW_EF_CONSTRUCTION = 64
+# Candidates kept per HNSW search, results are cut to it before the workspace and
+# document filters, so it should stay well above the query top_k
+DEFAULT_HNSW_EF_SEARCH = 200
+DEFAULT_IVFFLAT_LISTS = 100
+DEFAULT_IVFFLAT_PROBES = 10
+
+# Largest dimension pgvector can index per column type
+MAX_INDEXED_DIMS = {"vector": 2000, "halfvec": 4000}
+
+# Binary element type of the pgvector column types
+VECTOR_DTYPES = {"vector": ">f4", "halfvec": ">f2"}
+
+
+def _encode_vector(vector: Any, dtype: str = ">f4") -> bytes:
+    """pgvector binary format: dim and unused as int16, then big-endian values"""
+    values = np.asarray(vector, dtype=dtype).reshape(-1)
+    return struct.pack(">HH", len(values), 0) + values.tobytes()
+
+
+def _decode_vector(data: bytes, dtype: str = ">f4") -> list[float]:
+    dim, _ = struct.unpack_from(">HH", data)
+    return np.frombuffer(data, dtype=dtype, count=dim, offset=4).tolist()
+
 
 class PostgreSQLDB:
     def __init__(self, config: dict[str, Any], **kwargs: Any):
@@ -56,8 +101,31 @@ class PostgreSQLDB:
         self.database = config["database"]
         self.workspace = config["workspace"]
         self.max = int(config["max_connections"])
+        self.batch_size = int(config.get("batch_size") or DEFAULT_POSTGRES_BATCH_SIZE)
         self.increment = 1
         self.pool: Pool | None = None
+        # Whether vectors are sent with the binary pgvector codec or as text
+        self.vector_codec = False
+        # vector, or halfvec to store vectors as float16 (pgvector >= 0.7)
+        self.vector_storage_type = config.get("vector_storage_type") or "vector"
+        if self.vector_storage_type not in VECTOR_DTYPES:
+            raise ValueError(
+                f"Unsupported vector storage type: {self.vector_storage_type}"
+            )
+        self.vector_index_type = (
+            config.get("vector_index_type") or DEFAULT_VECTOR_INDEX_TYPE
+        ).lower()
+        self.hnsw_m = int(config.get("hnsw_m") or DEFAULT_HNSW_M)
+        self.hnsw_ef_construction = int(
+            config.get("hnsw_ef_construction") or DEFAULT_HNSW_EF_CONSTRUCTION
+        )
+        self.hnsw_ef_search = int(
+            config.get("hnsw_ef_search") or DEFAULT_HNSW_EF_SEARCH
+        )
+        self.ivfflat_lists = int(config.get("ivfflat_lists") or DEFAULT_IVFFLAT_LISTS)
+        self.ivfflat_probes = int(
+            config.get("ivfflat_probes") or DEFAULT_IVFFLAT_PROBES
+        )
 
         if self.user is None or self.password is None or self.database is None:
             raise ValueError("Missing database user, password, or database")
@@ -72,6 +140,19 @@ class PostgreSQLDB:
                 port=self.port,
                 min_size=1,
                 max_size=self.max,
+                init=self._init_connection,
+                # Startup parameters are the session defaults, so unlike a SET in
+                # init they survive the RESET ALL run when a connection is
+                # released back to the pool
+                server_settings={
+                    "hnsw.ef_search": str(self.hnsw_ef_search),
+                    "ivfflat.probes": str(self.ivfflat_probes),
+                },
+            )
+            self.vector_codec = bool(
+                await self.pool.fetchval(
+                    "SELECT 1 FROM pg_type WHERE typname = 'vector' LIMIT 1"
+                )
             )
 
             logger.info(
@@ -83,6 +164,105 @@ class PostgreSQLDB:
             )
             raise
 
+    async def _init_connection(self, connection: asyncpg.Connection) -> None:
+        """Register the binary pgvector codecs on new pool connections"""
+        rows = await connection.fetch(
+            "SELECT t.typname, n.nspname FROM pg_type t "
+            "JOIN pg_namespace n ON n.oid = t.typnamespace "
+            "WHERE t.typname = ANY($1::text[])",
+            list(VECTOR_DTYPES),
+        )
+        for row in rows:
+            dtype = VECTOR_DTYPES[row["typname"]]
+            await connection.set_type_codec(
+                row["typname"],
+                schema=row["nspname"],
+                encoder=partial(_encode_vector, dtype=dtype),
+                decoder=partial(_decode_vector, dtype=dtype),
+                format="binary",
+            )
+
+    def encode_vector(self, vector: np.ndarray) -> Any:
+        """Vector query parameter for the codec in use"""
+        if self.vector_codec:
+            return vector
+        return json.dumps(np.asarray(vector).tolist())
+
+    async def check_vector_index(self, table_name: str, dim: int) -> None:
+        """Type the content_vector column of a vector table and keep its ANN index
+        in line with the configured index type and parameters
+
+        The column is converted to vector(dim) or halfvec(dim) once, which pgvector
+        needs to index it. Index names carry their parameters, so an index built
+        with other settings is dropped and rebuilt.
+        """
+        table = table_name.lower()
+        column_type = f"{self.vector_storage_type}({dim})"
+        try:
+            current = await self.query(
+                "SELECT format_type(atttypid, atttypmod) AS column_type FROM pg_attribute "
+                "WHERE attrelid = to_regclass($1) AND attname = 'content_vector'",
+                {"table": table},
+            )
+            indexes = await self.query(
+                "SELECT indexname FROM pg_indexes WHERE tablename = $1 "
+                "AND indexname LIKE $2",
+                {"table": table, "pattern": f"idx_{table}_vector%"},
+                multirows=True,
+            )
+            existing = {row["indexname"] for row in indexes or []}
+
+            if self.vector_index_type == "hnsw":
+                wanted = f"idx_{table}_vector_{self.vector_storage_type}_hnsw_m{self.hnsw_m}_ef{self.hnsw_ef_construction}"
+                using = (
+                    f"hnsw (content_vector {self.vector_storage_type}_cosine_ops) "
+                    f"WITH (m = {self.hnsw_m}, ef_construction = {self.hnsw_ef_construction})"
+                )
+            elif self.vector_index_type == "ivfflat":
+                wanted = f"idx_{table}_vector_{self.vector_storage_type}_ivfflat_l{self.ivfflat_lists}"
+                using = (
+                    f"ivfflat (content_vector {self.vector_storage_type}_cosine_ops) "
+                    f"WITH (lists = {self.ivfflat_lists})"
+                )
+            elif self.vector_index_type == "none":
+                wanted, using = None, None
+            else:
+                raise ValueError(f"Unknown vector index type: {self.vector_index_type}")
+
+            for index_name in existing - {wanted}:
+                logger.info(f"PostgreSQL, Dropping vector index {index_name}")
+                await self.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+            if current and current["column_type"] != column_type:
+                logger.info(
+                    f"PostgreSQL, Converting {table_name}.content_vector "
+                    f"from {current['column_type']} to {column_type}"
+                )
+                if wanted in existing:
+                    await self.execute(f"DROP INDEX IF EXISTS {wanted}")
+                    existing.discard(wanted)
+                await self.execute(
+                    f"ALTER TABLE {table_name} ALTER COLUMN content_vector "
+                    f"TYPE {column_type} USING content_vector::{column_type}"
+                )
+
+            if wanted is None or wanted in existing:
+                return
+            if dim > MAX_INDEXED_DIMS[self.vector_storage_type]:
+                logger.warning(
+                    f"PostgreSQL, {dim} dimensions are too many for a {self.vector_storage_type} index "
+                    f"on {table_name}, set POSTGRES_VECTOR_STORAGE_TYPE=halfvec; searching without index"
+                )
+                return
+            logger.info(f"PostgreSQL, Creating vector index {wanted} on {table_name}")
+            await self.execute(
+                f"CREATE INDEX IF NOT EXISTS {wanted} ON {table_name} USING {using}"
+            )
+        except Exception as e:
+            logger.error(
+                f"PostgreSQL, Failed to set up vector index on {table_name}, Got: {e}"
+            )
+
     @staticmethod
     async def configure_age(connection: asyncpg.Connection, graph_name: str) -> None:
         """Set the Apache AGE environment and creates a graph if it does not exist.
@@ -159,6 +339,42 @@ class PostgreSQLDB:
                     # Log error but don't interrupt the process
                     logger.warning(f"Failed to migrate {table_name}.{column_name}: {e}")
 
+    async def _migrate_doc_status_add_index_columns(self):
+        """Add the per-document chunk/entity/relation index and error columns to LIGHTRAG_DOC_STATUS"""
+        for column_name, column_type in (
+            ("chunks_list", "JSONB NULL DEFAULT '[]'::jsonb"),
+            ("entities_list", "JSONB NULL DEFAULT '[]'::jsonb"),
+            ("relations_list", "JSONB NULL DEFAULT '[]'::jsonb"),
+            ("error", "TEXT NULL"),
+        ):
+            try:
+                await self.execute(
+                    f"ALTER TABLE LIGHTRAG_DOC_STATUS ADD COLUMN IF NOT EXISTS "
+                    f"{column_name} {column_type}"
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Failed to add LIGHTRAG_DOC_STATUS.{column_name} column: {e}"
+                )
+
+    async def _migrate_llm_cache_add_embedding_columns(self):
+        """Add the columns the embedding similarity cache needs to LIGHTRAG_LLM_CACHE"""
+        for column_name, column_type in (
+            ("cache_type", "VARCHAR(32) NULL"),
+            ("embedding", "TEXT NULL"),
+            ("embedding_min", "REAL NULL"),
+            ("embedding_max", "REAL NULL"),
+        ):
+            try:
+                await self.execute(
+                    f"ALTER TABLE LIGHTRAG_LLM_CACHE ADD COLUMN IF NOT EXISTS "
+                    f"{column_name} {column_type}"
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Failed to add LIGHTRAG_LLM_CACHE.{column_name} column: {e}"
+                )
+
     async def check_tables(self):
         # First create all tables
         for k, v in TABLES.items():
@@ -196,6 +412,32 @@ class PostgreSQLDB:
                     f"PostgreSQL, Failed to create index on table {k}, Got: {e}"
                 )
 
+        # Index used by TTL and size based eviction of the LLM response cache
+        try:
+            index_exists = await self.query(
+                "SELECT 1 FROM pg_indexes WHERE indexname = 'idx_lightrag_llm_cache_mode_time'"
+            )
+            if not index_exists:
+                await self.execute(
+                    "CREATE INDEX idx_lightrag_llm_cache_mode_time ON LIGHTRAG_LLM_CACHE"
+                    "(workspace, mode, (COALESCE(update_time, create_time)))"
+                )
+        except Exception as e:
+            logger.error(
+                f"PostgreSQL, Failed to create eviction index on LIGHTRAG_LLM_CACHE, Got: {e}"
+            )
+
+        # Index backing the keyset pagination of the document status listing
+        try:
+            await self.execute(
+                "CREATE INDEX IF NOT EXISTS idx_lightrag_doc_status_updated ON LIGHTRAG_DOC_STATUS"
+                "(workspace, updated_at DESC, id DESC)"
+            )
+        except Exception as e:
+            logger.error(
+                f"PostgreSQL, Failed to create pagination index on LIGHTRAG_DOC_STATUS, Got: {e}"
+            )
+
         # After all tables are created, attempt to migrate timestamp fields
         try:
             await self._migrate_timestamp_columns()
@@ -203,6 +445,16 @@ class PostgreSQLDB:
             logger.error(f"PostgreSQL, Failed to migrate timestamp columns: {e}")
             # Don't throw an exception, allow the initialization process to continue
 
+        try:
+            await self._migrate_doc_status_add_index_columns()
+        except Exception as e:
+            logger.error(f"PostgreSQL, Failed to migrate doc status columns: {e}")
+
+        try:
+            await self._migrate_llm_cache_add_embedding_columns()
+        except Exception as e:
+            logger.error(f"PostgreSQL, Failed to migrate LLM cache columns: {e}")
+
     async def query(
         self,
         sql: str,
@@ -248,6 +500,23 @@ class PostgreSQLDB:
                 logger.error(f"PostgreSQL database, error:{e}")
                 raise
 
+    async def executemany(self, sql: str, rows: list[tuple]) -> None:
+        """Run sql once per row, pipelined by asyncpg in transactions of batch_size rows"""
+        if not rows:
+            return
+        try:
+            async with self.pool.acquire() as connection:  # type: ignore
+                for start in range(0, len(rows), self.batch_size):
+                    async with connection.transaction():
+                        await connection.executemany(
+                            sql, rows[start : start + self.batch_size]
+                        )
+        except Exception as e:
+            logger.error(
+                f"PostgreSQL database,\nsql:{sql},\nrows:{len(rows)},\nerror:{e}"
+            )
+            raise
+
     async def execute(
         self,
         sql: str,
@@ -272,7 +541,7 @@ class PostgreSQLDB:
             asyncpg.exceptions.DuplicateTableError,
         ) as e:
             if upsert:
-                print("Key value duplicate, but upsert succeeded.")
+                logger.warning(f"Key value duplicate, but upsert succeeded: {e}")
             else:
                 logger.error(f"Upsert error: {e}")
         except Exception as e:
@@ -316,6 +585,41 @@ class ClientManager:
                 "POSTGRES_MAX_CONNECTIONS",
                 config.get("postgres", "max_connections", fallback=20),
             ),
+            "batch_size": os.environ.get(
+                "POSTGRES_BATCH_SIZE",
+                config.get(
+                    "postgres", "batch_size", fallback=DEFAULT_POSTGRES_BATCH_SIZE
+                ),
+            ),
+            "vector_storage_type": os.environ.get(
+                "POSTGRES_VECTOR_STORAGE_TYPE",
+                config.get("postgres", "vector_storage_type", fallback="vector"),
+            ),
+            "vector_index_type": os.environ.get(
+                "POSTGRES_VECTOR_INDEX_TYPE",
+                config.get(
+                    "postgres", "vector_index_type", fallback=DEFAULT_VECTOR_INDEX_TYPE
+                ),
+            ),
+            "hnsw_m": os.environ.get(
+                "POSTGRES_HNSW_M", config.get("postgres", "hnsw_m", fallback=None)
+            ),
+            "hnsw_ef_construction": os.environ.get(
+                "POSTGRES_HNSW_EF_CONSTRUCTION",
+                config.get("postgres", "hnsw_ef_construction", fallback=None),
+            ),
+            "hnsw_ef_search": os.environ.get(
+                "POSTGRES_HNSW_EF_SEARCH",
+                config.get("postgres", "hnsw_ef_search", fallback=None),
+            ),
+            "ivfflat_lists": os.environ.get(
+                "POSTGRES_IVFFLAT_LISTS",
+                config.get("postgres", "ivfflat_lists", fallback=None),
+            ),
+            "ivfflat_probes": os.environ.get(
+                "POSTGRES_IVFFLAT_PROBES",
+                config.get("postgres", "ivfflat_probes", fallback=None),
+            ),
         }
 
     @classmethod
@@ -352,6 +656,7 @@ class PGKVStorage(BaseKVStorage):
 
     def __post_init__(self):
         self._max_batch_size = self.global_config["embedding_batch_num"]
+        self._cache_writes = 0
 
     async def initialize(self):
         if self.db is None:
@@ -421,14 +726,77 @@ class PGKVStorage(BaseKVStorage):
         else:
             return None
 
+    async def get_cache_entry(self, mode: str, args_hash: str) -> dict[str, Any] | None:
+        """Point read of one llm_response_cache row, ignoring rows older than llm_cache_ttl"""
+        if not is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
+            return await super().get_cache_entry(mode, args_hash)
+        sql = SQL_TEMPLATES["get_cache_entry_llm_response_cache"]
+        params = {
+            "workspace": self.db.workspace,
+            "mode": mode,
+            "id": args_hash,
+            "ttl": self.global_config.get("llm_cache_ttl", 0),
+        }
+        return await self.db.query(sql, params)
+
+    async def upsert_cache_entry(
+        self, mode: str, args_hash: str, entry: dict[str, Any]
+    ) -> None:
+        """Point write of one llm_response_cache row
+
+        Every LLM_CACHE_EVICTION_INTERVAL writes, expired rows are purged and the
+        least recently written rows beyond llm_cache_max_entries are evicted.
+        """
+        if not is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
+            return await super().upsert_cache_entry(mode, args_hash, entry)
+        _data = {
+            "workspace": self.db.workspace,
+            "id": args_hash,
+            "original_prompt": entry["original_prompt"],
+            "return_value": entry["return"],
+            "mode": mode,
+            "cache_type": entry.get("cache_type"),
+            "embedding": entry.get("embedding"),
+            "embedding_min": entry.get("embedding_min"),
+            "embedding_max": entry.get("embedding_max"),
+        }
+        await self.db.execute(SQL_TEMPLATES["upsert_llm_response_cache"], _data)
+
+        self._cache_writes += 1
+        if self._cache_writes % LLM_CACHE_EVICTION_INTERVAL == 0:
+            await self._evict_cache_entries(mode)
+
+    async def _evict_cache_entries(self, mode: str) -> None:
+        ttl = self.global_config.get("llm_cache_ttl", 0)
+        max_entries = self.global_config.get("llm_cache_max_entries", 0)
+        try:
+            if ttl > 0:
+                await self.db.execute(
+                    SQL_TEMPLATES["evict_expired_llm_response_cache"],
+                    {"workspace": self.db.workspace, "ttl": ttl},
+                )
+            if max_entries > 0:
+                await self.db.execute(
+                    SQL_TEMPLATES["evict_oldest_llm_response_cache"],
+                    {
+                        "workspace": self.db.workspace,
+                        "mode": mode,
+                        "max_entries": max_entries,
+                    },
+                )
+        except Exception as e:
+            logger.error(f"Error evicting LLM cache entries of mode {mode}: {e}")
+
     # Query by id
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
-        """Get doc_chunks data by id"""
-        sql = SQL_TEMPLATES["get_by_ids_" + self.namespace].format(
-            ids=",".join([f"'{id}'" for id in ids])
-        )
-        params = {"workspace": self.db.workspace}
+        """Get doc_chunks data by id, in the same order as ids (None for missing ids)"""
+        if not ids:
+            return []
         if is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
+            sql = SQL_TEMPLATES["get_by_ids_" + self.namespace].format(
+                ids=",".join([f"'{id}'" for id in ids])
+            )
+            params = {"workspace": self.db.workspace}
             array_res = await self.db.query(sql, params, multirows=True)
             modes = set()
             dict_res: dict[str, dict] = {}
@@ -441,7 +809,11 @@ class PGKVStorage(BaseKVStorage):
                 dict_res[row["mode"]][row["id"]] = row
             return [{k: v} for k, v in dict_res.items()]
         else:
-            return await self.db.query(sql, params, multirows=True)
+            sql = SQL_TEMPLATES["get_by_ids_" + self.namespace]
+            params = {"workspace": self.db.workspace, "ids": list(ids)}
+            rows = await self.db.query(sql, params, multirows=True)
+            rows_by_id = {row["id"]: row for row in rows}
+            return [rows_by_id.get(id) for id in ids]
 
     async def get_by_status(self, status: str) -> Union[list[dict[str, Any]], None]:
         """Specifically for llm_response_cache."""
@@ -479,27 +851,29 @@ class PGKVStorage(BaseKVStorage):
         if is_namespace(self.namespace, NameSpace.KV_STORE_TEXT_CHUNKS):
             pass
         elif is_namespace(self.namespace, NameSpace.KV_STORE_FULL_DOCS):
-            for k, v in data.items():
-                upsert_sql = SQL_TEMPLATES["upsert_doc_full"]
-                _data = {
-                    "id": k,
-                    "content": v["content"],
-                    "workspace": self.db.workspace,
-                }
-                await self.db.execute(upsert_sql, _data)
+            await self.db.executemany(
+                SQL_TEMPLATES["upsert_doc_full"],
+                [(k, v["content"], self.db.workspace) for k, v in data.items()],
+            )
         elif is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
-            for mode, items in data.items():
-                for k, v in items.items():
-                    upsert_sql = SQL_TEMPLATES["upsert_llm_response_cache"]
-                    _data = {
-                        "workspace": self.db.workspace,
-                        "id": k,
-                        "original_prompt": v["original_prompt"],
-                        "return_value": v["return"],
-                        "mode": mode,
-                    }
-
-                    await self.db.execute(upsert_sql, _data)
+            await self.db.executemany(
+                SQL_TEMPLATES["upsert_llm_response_cache"],
+                [
+                    (
+                        self.db.workspace,
+                        k,
+                        v["original_prompt"],
+                        v["return"],
+                        mode,
+                        v.get("cache_type"),
+                        v.get("embedding"),
+                        v.get("embedding_min"),
+                        v.get("embedding_max"),
+                    )
+                    for mode, items in data.items()
+                    for k, v in items.items()
+                ],
+            )
 
     async def index_done_callback(self) -> None:
         # PG handles persistence automatically
@@ -604,6 +978,11 @@ class PGVectorStorage(BaseVectorStorage):
     async def initialize(self):
         if self.db is None:
             self.db = await ClientManager.get_client()
+        table_name = namespace_to_table_name(self.namespace)
+        if table_name:
+            await self.db.check_vector_index(
+                table_name, self.embedding_func.embedding_dim
+            )
 
     async def finalize(self):
         if self.db is not None:
@@ -622,7 +1001,7 @@ class PGVectorStorage(BaseVectorStorage):
                 "chunk_order_index": item["chunk_order_index"],
                 "full_doc_id": item["full_doc_id"],
                 "content": item["content"],
-                "content_vector": json.dumps(item["__vector__"].tolist()),
+                "content_vector": self.db.encode_vector(item["__vector__"]),
                 "file_path": item["file_path"],
                 "create_time": current_time,
                 "update_time": current_time,
@@ -648,7 +1027,7 @@ class PGVectorStorage(BaseVectorStorage):
             "id": item["__id__"],
             "entity_name": item["entity_name"],
             "content": item["content"],
-            "content_vector": json.dumps(item["__vector__"].tolist()),
+            "content_vector": self.db.encode_vector(item["__vector__"]),
             "chunk_ids": chunk_ids,
             "file_path": item.get("file_path", None),
             "create_time": current_time,
@@ -672,7 +1051,7 @@ class PGVectorStorage(BaseVectorStorage):
             "source_id": item["src_id"],
             "target_id": item["tgt_id"],
             "content": item["content"],
-            "content_vector": json.dumps(item["__vector__"].tolist()),
+            "content_vector": self.db.encode_vector(item["__vector__"]),
             "chunk_ids": chunk_ids,
             "file_path": item.get("file_path", None),
             "create_time": current_time,
@@ -706,17 +1085,20 @@ class PGVectorStorage(BaseVectorStorage):
         embeddings = np.concatenate(embeddings_list)
         for i, d in enumerate(list_data):
             d["__vector__"] = embeddings[i]
-        for item in list_data:
-            if is_namespace(self.namespace, NameSpace.VECTOR_STORE_CHUNKS):
-                upsert_sql, data = self._upsert_chunks(item, current_time)
-            elif is_namespace(self.namespace, NameSpace.VECTOR_STORE_ENTITIES):
-                upsert_sql, data = self._upsert_entities(item, current_time)
-            elif is_namespace(self.namespace, NameSpace.VECTOR_STORE_RELATIONSHIPS):
-                upsert_sql, data = self._upsert_relationships(item, current_time)
-            else:
-                raise ValueError(f"{self.namespace} is not supported")
 
-            await self.db.execute(upsert_sql, data)
+        if is_namespace(self.namespace, NameSpace.VECTOR_STORE_CHUNKS):
+            prepare = self._upsert_chunks
+        elif is_namespace(self.namespace, NameSpace.VECTOR_STORE_ENTITIES):
+            prepare = self._upsert_entities
+        elif is_namespace(self.namespace, NameSpace.VECTOR_STORE_RELATIONSHIPS):
+            prepare = self._upsert_relationships
+        else:
+            raise ValueError(f"{self.namespace} is not supported")
+
+        prepared = [prepare(item, current_time) for item in list_data]
+        await self.db.executemany(
+            prepared[0][0], [tuple(data.values()) for _, data in prepared]
+        )
 
     #################### query method ###############
     async def query(
@@ -725,15 +1107,15 @@ class PGVectorStorage(BaseVectorStorage):
         embeddings = await self.embedding_func(
             [query], _priority=5
         )  # higher priority for query
-        embedding = embeddings[0]
-        embedding_string = ",".join(map(str, embedding))
-        # Use parameterized document IDs (None means search across all documents)
-        sql = SQL_TEMPLATES[self.namespace].format(embedding_string=embedding_string)
+        # Constant SQL with the vector bound as a parameter, so asyncpg reuses the
+        # prepared statement (None doc IDs means search across all documents)
+        sql = SQL_TEMPLATES[self.namespace]
         params = {
             "workspace": self.db.workspace,
             "doc_ids": ids,
             "better_than_threshold": self.cosine_better_than_threshold,
             "top_k": top_k,
+            "embedding": self.db.encode_vector(embeddings[0]),
         }
         results = await self.db.query(sql, params=params, multirows=True)
         return results
@@ -930,6 +1312,10 @@ class PGDocStatusStorage(DocStatusStorage):
                 created_at=result[0]["created_at"],
                 updated_at=result[0]["updated_at"],
                 file_path=result[0]["file_path"],
+                error=result[0].get("error"),
+                chunks_list=_load_json_list(result[0].get("chunks_list")),
+                entities_list=_load_json_list(result[0].get("entities_list")),
+                relations_list=_load_json_list(result[0].get("relations_list")),
             )
 
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
@@ -954,6 +1340,10 @@ class PGDocStatusStorage(DocStatusStorage):
                 "created_at": row["created_at"],
                 "updated_at": row["updated_at"],
                 "file_path": row["file_path"],
+                "error": row.get("error"),
+                "chunks_list": _load_json_list(row.get("chunks_list")),
+                "entities_list": _load_json_list(row.get("entities_list")),
+                "relations_list": _load_json_list(row.get("relations_list")),
             }
             for row in results
         ]
@@ -974,12 +1364,11 @@ class PGDocStatusStorage(DocStatusStorage):
         self, status: DocStatus
     ) -> dict[str, DocProcessingStatus]:
         """all documents with a specific status"""
-        sql = "select * from LIGHTRAG_DOC_STATUS where workspace=$1 and status=$2"
+        sql = SQL_TEMPLATES["get_docs_by_status"]
         params = {"workspace": self.db.workspace, "status": status.value}
         result = await self.db.query(sql, params, True)
         docs_by_status = {
             element["id"]: DocProcessingStatus(
-                content=element["content"],
                 content_summary=element["content_summary"],
                 content_length=element["content_length"],
                 status=element["status"],
@@ -987,11 +1376,59 @@ class PGDocStatusStorage(DocStatusStorage):
                 updated_at=element["updated_at"],
                 chunks_count=element["chunks_count"],
                 file_path=element["file_path"],
+                error=element["error"],
+                chunks_list=_load_json_list(element.get("chunks_list")),
+                entities_list=_load_json_list(element.get("entities_list")),
+                relations_list=_load_json_list(element.get("relations_list")),
             )
             for element in result
         }
         return docs_by_status
 
+    async def get_docs_paginated(
+        self,
+        status: DocStatus | None = None,
+        updated_after: datetime.datetime | None = None,
+        updated_before: datetime.datetime | None = None,
+        file_path_prefix: str | None = None,
+        cursor: str | None = None,
+        limit: int = 100,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """Keyset-paginated summary listing, the content column is never read"""
+        params: dict[str, Any] = {"workspace": self.db.workspace}
+        conditions = ["workspace=$1"]
+
+        def bind(value: Any) -> str:
+            params[f"p{len(params)}"] = value
+            return f"${len(params)}"
+
+        if status is not None:
+            conditions.append(f"status={bind(status.value)}")
+        if updated_after is not None:
+            conditions.append(f"updated_at >= {bind(to_aware_datetime(updated_after))}")
+        if updated_before is not None:
+            conditions.append(f"updated_at < {bind(to_aware_datetime(updated_before))}")
+        if file_path_prefix:
+            escaped = re.sub(r"([\\%_])", r"\\\1", file_path_prefix)
+            conditions.append(f"file_path LIKE {bind(escaped + '%')} ESCAPE '\\'")
+        if cursor:
+            after_updated_at, after_id = decode_doc_status_cursor(cursor)
+            conditions.append(
+                f"(updated_at, id) < ({bind(after_updated_at)}, {bind(after_id)})"
+            )
+        sql = SQL_TEMPLATES["get_doc_status_page"].format(
+            conditions=" AND ".join(conditions), limit=bind(limit + 1)
+        )
+        rows = await self.db.query(sql, params, multirows=True)
+
+        docs = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_doc_status_cursor(
+                docs[-1]["updated_at"], docs[-1]["id"]
+            )
+        return docs, next_cursor
+
     async def index_done_callback(self) -> None:
         # PG handles persistence automatically
         pass
@@ -1035,28 +1472,10 @@ class PGDocStatusStorage(DocStatusStorage):
         if not data:
             return
 
-        def parse_datetime(dt_str):
-            if dt_str is None:
-                return None
-            if isinstance(dt_str, (datetime.date, datetime.datetime)):
-                # If it's a datetime object without timezone info, remove timezone info
-                if isinstance(dt_str, datetime.datetime):
-                    # Remove timezone info, return naive datetime object
-                    return dt_str.replace(tzinfo=None)
-                return dt_str
-            try:
-                # Process ISO format string with timezone
-                dt = datetime.datetime.fromisoformat(dt_str)
-                # Remove timezone info, return naive datetime object
-                return dt.replace(tzinfo=None)
-            except (ValueError, TypeError):
-                logger.warning(f"Unable to parse datetime string: {dt_str}")
-                return None
-
         # Modified SQL to include created_at and updated_at in both INSERT and UPDATE operations
         # Both fields are updated from the input data in both INSERT and UPDATE cases
-        sql = """insert into LIGHTRAG_DOC_STATUS(workspace,id,content,content_summary,content_length,chunks_count,status,file_path,created_at,updated_at)
-                 values($1,$2,$3,$4,$5,$6,$7,$8,$9,$10)
+        sql = """insert into LIGHTRAG_DOC_STATUS(workspace,id,content,content_summary,content_length,chunks_count,status,file_path,chunks_list,entities_list,relations_list,created_at,updated_at,error)
+                 values($1,$2,$3,$4,$5,$6,$7,$8,$9::jsonb,$10::jsonb,$11::jsonb,$12,$13,$14)
                   on conflict(id,workspace) do update set
                   content = EXCLUDED.content,
                   content_summary = EXCLUDED.content_summary,
@@ -1064,29 +1483,71 @@ class PGDocStatusStorage(DocStatusStorage):
                   chunks_count = EXCLUDED.chunks_count,
                   status = EXCLUDED.status,
                   file_path = EXCLUDED.file_path,
+                  chunks_list = EXCLUDED.chunks_list,
+                  entities_list = EXCLUDED.entities_list,
+                  relations_list = EXCLUDED.relations_list,
                   created_at = EXCLUDED.created_at,
-                  updated_at = EXCLUDED.updated_at"""
-        for k, v in data.items():
-            # Remove timezone information, store utc time in db
-            created_at = parse_datetime(v.get("created_at"))
-            updated_at = parse_datetime(v.get("updated_at"))
+                  updated_at = EXCLUDED.updated_at,
+                  error = EXCLUDED.error"""
+        rows = [
+            (
+                self.db.workspace,
+                k,
+                # Content lives in full_docs, only records of older versions carry it
+                v.get("content"),
+                v["content_summary"],
+                v["content_length"],
+                # chunks_count is optional
+                v["chunks_count"] if "chunks_count" in v else -1,
+                v["status"],
+                v["file_path"],
+                json.dumps(v.get("chunks_list", [])),
+                json.dumps(v.get("entities_list", [])),
+                json.dumps(v.get("relations_list", [])),
+                # Remove timezone information, store utc time in db
+                _parse_doc_status_datetime(v.get("created_at")),
+                _parse_doc_status_datetime(v.get("updated_at")),
+                v.get("error"),
+            )
+            for k, v in data.items()
+        ]
+        await self.db.executemany(sql, rows)
 
-            # chunks_count is optional
-            await self.db.execute(
-                sql,
-                {
-                    "workspace": self.db.workspace,
-                    "id": k,
-                    "content": v["content"],
-                    "content_summary": v["content_summary"],
-                    "content_length": v["content_length"],
-                    "chunks_count": v["chunks_count"] if "chunks_count" in v else -1,
-                    "status": v["status"],
-                    "file_path": v["file_path"],
-                    "created_at": created_at,  # Use the converted datetime object
-                    "updated_at": updated_at,  # Use the converted datetime object
-                },
+    async def update_status(self, data: dict[str, dict[str, Any]]) -> None:
+        """Partially update existing document status records
+
+        Each distinct set of fields becomes one UPDATE statement run with executemany,
+        so a status transition writes the status, timestamp and error columns only.
+        """
+        if not data:
+            return
+
+        by_fields: dict[tuple[str, ...], list[tuple]] = {}
+        for doc_id, fields in data.items():
+            unknown = set(fields) - set(DOC_STATUS_COLUMN_TYPES)
+            if unknown:
+                raise ValueError(f"Unknown doc status fields: {sorted(unknown)}")
+            columns = tuple(sorted(fields))
+            values = []
+            for column in columns:
+                value = fields[column]
+                if DOC_STATUS_COLUMN_TYPES[column] == "jsonb":
+                    value = json.dumps(value if value is not None else [])
+                elif DOC_STATUS_COLUMN_TYPES[column] == "timestamp":
+                    value = _parse_doc_status_datetime(value)
+                values.append(value)
+            by_fields.setdefault(columns, []).append(
+                (self.db.workspace, doc_id, *values)
+            )
+
+        for columns, rows in by_fields.items():
+            assignments = ", ".join(
+                f"{column}=${i}"
+                + ("::jsonb" if DOC_STATUS_COLUMN_TYPES[column] == "jsonb" else "")
+                for i, column in enumerate(columns, start=3)
             )
+            sql = SQL_TEMPLATES["update_doc_status"].format(assignments=assignments)
+            await self.db.executemany(sql, rows)
 
     async def drop(self) -> dict[str, str]:
         """Drop the storage"""
@@ -1472,11 +1933,6 @@ class PGGraphStorage(BaseGraphStorage):
 
         return edges
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type((PGGraphQueryException,)),
-    )
     async def upsert_node(self, node_id: str, node_data: dict[str, str]) -> None:
         """
         Upsert a node in the Neo4j database.
@@ -1485,36 +1941,45 @@ class PGGraphStorage(BaseGraphStorage):
             node_id: The unique identifier for the node (used as label)
             node_data: Dictionary of node properties
         """
-        if "entity_id" not in node_data:
-            raise ValueError(
-                "PostgreSQL: node properties must contain an 'entity_id' field"
-            )
+        await self.upsert_nodes_batch({node_id: node_data})
 
-        label = self._normalize_node_id(node_id)
-        properties = self._format_properties(node_data)
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type((PGGraphQueryException,)),
+    )
+    async def upsert_nodes_batch(self, nodes: dict[str, dict[str, str]]) -> None:
+        """
+        Upsert nodes, sending UPSERT_BATCH_SIZE MERGE statements per round trip.
 
-        query = """SELECT * FROM cypher('%s', $$
+        Args:
+            nodes: Dictionary mapping node IDs to their properties
+        """
+        statements = []
+        for node_id, node_data in nodes.items():
+            if "entity_id" not in node_data:
+                raise ValueError(
+                    "PostgreSQL: node properties must contain an 'entity_id' field"
+                )
+            statements.append(
+                """SELECT * FROM cypher('%s', $$
                      MERGE (n:base {entity_id: "%s"})
                      SET n += %s
                      RETURN n
-                   $$) AS (n agtype)""" % (
-            self.graph_name,
-            label,
-            properties,
-        )
+                   $$) AS (n agtype)"""
+                % (
+                    self.graph_name,
+                    self._normalize_node_id(node_id),
+                    self._format_properties(node_data),
+                )
+            )
 
         try:
-            await self._query(query, readonly=False, upsert=True)
-
+            await self._execute_statements(statements)
         except Exception:
-            logger.error(f"POSTGRES, upsert_node error on node_id: `{node_id}`")
+            logger.error(f"POSTGRES, upsert_nodes_batch error on {len(nodes)} nodes")
             raise
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type((PGGraphQueryException,)),
-    )
     async def upsert_edge(
         self, source_node_id: str, target_node_id: str, edge_data: dict[str, str]
     ) -> None:
@@ -1526,11 +1991,27 @@ class PGGraphStorage(BaseGraphStorage):
             target_node_id (str): Label of the target node (used as identifier)
             edge_data (dict): dictionary of properties to set on the edge
         """
-        src_label = self._normalize_node_id(source_node_id)
-        tgt_label = self._normalize_node_id(target_node_id)
-        edge_properties = self._format_properties(edge_data)
+        await self.upsert_edges_batch({(source_node_id, target_node_id): edge_data})
 
-        query = """SELECT * FROM cypher('%s', $$
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type((PGGraphQueryException,)),
+    )
+    async def upsert_edges_batch(
+        self, edges: dict[tuple[str, str], dict[str, str]]
+    ) -> None:
+        """
+        Upsert edges, sending UPSERT_BATCH_SIZE MERGE statements per round trip.
+
+        Args:
+            edges: Dictionary mapping (source ID, target ID) to the edge properties
+        """
+        statements = []
+        for (source_node_id, target_node_id), edge_data in edges.items():
+            edge_properties = self._format_properties(edge_data)
+            statements.append(
+                """SELECT * FROM cypher('%s', $$
                      MATCH (source:base {entity_id: "%s"})
                      WITH source
                      MATCH (target:base {entity_id: "%s"})
@@ -1538,23 +2019,51 @@ class PGGraphStorage(BaseGraphStorage):
                      SET r += %s
                      SET r += %s
                      RETURN r
-                   $$) AS (r agtype)""" % (
-            self.graph_name,
-            src_label,
-            tgt_label,
-            edge_properties,
-            edge_properties,  # https://github.com/HKUDS/LightRAG/issues/1438#issuecomment-2826000195
-        )
+                   $$) AS (r agtype)"""
+                % (
+                    self.graph_name,
+                    self._normalize_node_id(source_node_id),
+                    self._normalize_node_id(target_node_id),
+                    edge_properties,
+                    edge_properties,  # https://github.com/HKUDS/LightRAG/issues/1438#issuecomment-2826000195
+                )
+            )
 
         try:
-            await self._query(query, readonly=False, upsert=True)
-
+            await self._execute_statements(statements)
         except Exception:
-            logger.error(
-                f"POSTGRES, upsert_edge error on edge: `{source_node_id}`-`{target_node_id}`"
-            )
+            logger.error(f"POSTGRES, upsert_edges_batch error on {len(edges)} edges")
             raise
 
+    async def _execute_statements(self, statements: list[str]) -> None:
+        """Run write statements as multi-statement queries of UPSERT_BATCH_SIZE
+        statements, each executed by the server in one implicit transaction
+
+        A unique violation rolls back the whole batch, so its statements are
+        then run one by one, where a conflict only skips that statement.
+        """
+        for start in range(0, len(statements), UPSERT_BATCH_SIZE):
+            batch = statements[start : start + UPSERT_BATCH_SIZE]
+            try:
+                async with self.db.pool.acquire() as connection:  # type: ignore
+                    await self.db.configure_age(connection, self.graph_name)
+                    await connection.execute(";\n".join(batch))
+            except asyncpg.exceptions.UniqueViolationError as e:
+                logger.warning(
+                    f"PostgreSQL, unique violation in a batch of {len(batch)} graph "
+                    f"writes, retrying them one by one: {e}"
+                )
+                for statement in batch:
+                    await self._query(statement, readonly=False, upsert=True)
+            except Exception as e:
+                raise PGGraphQueryException(
+                    {
+                        "message": f"Error executing {len(batch)} graph writes",
+                        "wrapped": batch[0],
+                        "detail": str(e),
+                    }
+                ) from e
+
     async def delete_node(self, node_id: str) -> None:
         """
         Delete a node from the graph.
@@ -1909,6 +2418,90 @@ class PGGraphStorage(BaseGraphStorage):
 
         return nodes_edges_dict
 
+    async def iter_nodes(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[tuple[str, dict]]]:
+        """Scan all nodes in entity_id order, paging with the entity_id index"""
+        last_id = None
+        while True:
+            after = (
+                ""
+                if last_id is None
+                else f'AND n.entity_id > "{self._normalize_node_id(last_id)}"'
+            )
+            query = """SELECT * FROM cypher('%s', $$
+                         MATCH (n:base)
+                         WHERE n.entity_id IS NOT NULL %s
+                         RETURN n.entity_id AS entity_id, n
+                         ORDER BY n.entity_id
+                         LIMIT %d
+                       $$) AS (entity_id text, n agtype)""" % (
+                self.graph_name,
+                after,
+                batch_size,
+            )
+            results = await self._query(query)
+
+            batch = []
+            for result in results:
+                node_dict = result["n"]["properties"]
+                if isinstance(node_dict, str):
+                    node_dict = json.loads(node_dict)
+                if "labels" in node_dict:
+                    node_dict["labels"] = [
+                        label for label in node_dict["labels"] if label != "base"
+                    ]
+                batch.append((result["entity_id"], node_dict))
+            if not batch:
+                return
+            yield batch
+            if len(results) < batch_size:
+                return
+            last_id = batch[-1][0]
+
+    async def iter_edges(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[tuple[str, str, dict]]]:
+        """Scan all edges once each, paging over their start nodes in entity_id order"""
+        last_id = None
+        while True:
+            after = (
+                ""
+                if last_id is None
+                else f'AND a.entity_id > "{self._normalize_node_id(last_id)}"'
+            )
+            query = """SELECT * FROM cypher('%s', $$
+                         MATCH (a:base)
+                         WHERE a.entity_id IS NOT NULL %s
+                         WITH a ORDER BY a.entity_id LIMIT %d
+                         OPTIONAL MATCH (a)-[r:DIRECTED]->(b:base)
+                         RETURN a.entity_id AS source, b.entity_id AS target,
+                                properties(r) AS edge_properties
+                         ORDER BY a.entity_id
+                       $$) AS (source text, target text, edge_properties agtype)""" % (
+                self.graph_name,
+                after,
+                batch_size,
+            )
+            results = await self._query(query)
+
+            sources = set()
+            batch = []
+            for result in results:
+                sources.add(result["source"])
+                if result["target"] is None:
+                    continue
+                edge_props = result["edge_properties"]
+                if isinstance(edge_props, str):
+                    edge_props = json.loads(edge_props)
+                batch.append((result["source"], result["target"], edge_props))
+            if batch:
+                yield batch
+            if len(sources) < batch_size:
+                return
+            # Rows are ordered by the start node, the last one ends this page
+            last_id = results[-1]["source"]
+
     async def get_all_labels(self) -> list[str]:
         """
         Get all labels (node IDs) in the graph.
@@ -2276,6 +2869,52 @@ class PGGraphStorage(BaseGraphStorage):
             return {"status": "error", "message": str(e)}
 
 
+def _load_json_list(value: Any) -> list:
+    """Decode a JSONB list column, which asyncpg returns as a string"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return json.loads(value)
+    return list(value)
+
+
+def _parse_doc_status_datetime(dt_str):
+    """Convert an ISO string or datetime to the naive UTC datetime stored in the db"""
+    if dt_str is None:
+        return None
+    if isinstance(dt_str, (datetime.date, datetime.datetime)):
+        # If it's a datetime object without timezone info, remove timezone info
+        if isinstance(dt_str, datetime.datetime):
+            # Remove timezone info, return naive datetime object
+            return dt_str.replace(tzinfo=None)
+        return dt_str
+    try:
+        # Process ISO format string with timezone
+        dt = datetime.datetime.fromisoformat(dt_str)
+        # Remove timezone info, return naive datetime object
+        return dt.replace(tzinfo=None)
+    except (ValueError, TypeError):
+        logger.warning(f"Unable to parse datetime string: {dt_str}")
+        return None
+
+
+# Columns of LIGHTRAG_DOC_STATUS that PGDocStatusStorage.update_status may write
+DOC_STATUS_COLUMN_TYPES = {
+    "content": "text",
+    "content_summary": "text",
+    "content_length": "int",
+    "chunks_count": "int",
+    "status": "text",
+    "file_path": "text",
+    "error": "text",
+    "chunks_list": "jsonb",
+    "entities_list": "jsonb",
+    "relations_list": "jsonb",
+    "created_at": "timestamp",
+    "updated_at": "timestamp",
+}
+
+
 NAMESPACE_TABLE_MAP = {
     NameSpace.KV_STORE_FULL_DOCS: "LIGHTRAG_DOC_FULL",
     NameSpace.KV_STORE_TEXT_CHUNKS: "LIGHTRAG_DOC_CHUNKS",
@@ -2357,6 +2996,10 @@ TABLES = {
 	                mode varchar(32) NOT NULL,
                     original_prompt TEXT,
                     return_value TEXT,
+                    cache_type VARCHAR(32) NULL,
+                    embedding TEXT NULL,
+                    embedding_min REAL NULL,
+                    embedding_max REAL NULL,
                     create_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     update_time TIMESTAMP,
 	                CONSTRAINT LIGHTRAG_LLM_CACHE_PK PRIMARY KEY (workspace, mode, id)
@@ -2372,6 +3015,10 @@ TABLES = {
 	               chunks_count int4 NULL,
 	               status varchar(64) NULL,
 	               file_path TEXT NULL,
+	               error TEXT NULL,
+	               chunks_list JSONB NULL DEFAULT '[]'::jsonb,
+	               entities_list JSONB NULL DEFAULT '[]'::jsonb,
+	               relations_list JSONB NULL DEFAULT '[]'::jsonb,
 	               created_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NULL,
 	               updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NULL,
 	               CONSTRAINT LIGHTRAG_DOC_STATUS_PK PRIMARY KEY (workspace, id)
@@ -2389,34 +3036,66 @@ SQL_TEMPLATES = {
                                 chunk_order_index, full_doc_id, file_path
                                 FROM LIGHTRAG_DOC_CHUNKS WHERE workspace=$1 AND id=$2
                             """,
-    "get_by_id_llm_response_cache": """SELECT id, original_prompt, COALESCE(return_value, '') as "return", mode
+    "get_by_id_llm_response_cache": """SELECT id, original_prompt, COALESCE(return_value, '') as "return", mode,
+                                cache_type, embedding, embedding_min, embedding_max,
+                                EXTRACT(EPOCH FROM COALESCE(update_time, create_time))::bigint as create_time
                                 FROM LIGHTRAG_LLM_CACHE WHERE workspace=$1 AND mode=$2
                                """,
     "get_by_mode_id_llm_response_cache": """SELECT id, original_prompt, COALESCE(return_value, '') as "return", mode
                            FROM LIGHTRAG_LLM_CACHE WHERE workspace=$1 AND mode=$2 AND id=$3
                           """,
+    "get_cache_entry_llm_response_cache": """SELECT id, original_prompt, COALESCE(return_value, '') as "return", mode
+                           FROM LIGHTRAG_LLM_CACHE WHERE workspace=$1 AND mode=$2 AND id=$3
+                           AND ($4::int = 0 OR COALESCE(update_time, create_time)
+                                > CURRENT_TIMESTAMP - $4::int * INTERVAL '1 second')
+                          """,
+    "evict_expired_llm_response_cache": """DELETE FROM LIGHTRAG_LLM_CACHE
+                           WHERE workspace=$1
+                           AND COALESCE(update_time, create_time) < CURRENT_TIMESTAMP - $2::int * INTERVAL '1 second'
+                          """,
+    "evict_oldest_llm_response_cache": """DELETE FROM LIGHTRAG_LLM_CACHE
+                           WHERE workspace=$1 AND mode=$2 AND id IN (
+                               SELECT id FROM LIGHTRAG_LLM_CACHE WHERE workspace=$1 AND mode=$2
+                               ORDER BY COALESCE(update_time, create_time) DESC OFFSET $3)
+                          """,
     "get_by_ids_full_docs": """SELECT id, COALESCE(content, '') as content
-                                 FROM LIGHTRAG_DOC_FULL WHERE workspace=$1 AND id IN ({ids})
+                                 FROM LIGHTRAG_DOC_FULL WHERE workspace=$1 AND id = ANY($2)
                             """,
     "get_by_ids_text_chunks": """SELECT id, tokens, COALESCE(content, '') as content,
                                   chunk_order_index, full_doc_id, file_path
-                                   FROM LIGHTRAG_DOC_CHUNKS WHERE workspace=$1 AND id IN ({ids})
+                                   FROM LIGHTRAG_DOC_CHUNKS WHERE workspace=$1 AND id = ANY($2)
                                 """,
     "get_by_ids_llm_response_cache": """SELECT id, original_prompt, COALESCE(return_value, '') as "return", mode
                                  FROM LIGHTRAG_LLM_CACHE WHERE workspace=$1 AND mode= IN ({ids})
                                 """,
     "filter_keys": "SELECT id FROM {table_name} WHERE workspace=$1 AND id IN ({ids})",
+    "update_doc_status": "UPDATE LIGHTRAG_DOC_STATUS SET {assignments} WHERE workspace=$1 AND id=$2",
+    "get_docs_by_status": """SELECT id, content_summary, content_length, chunks_count, status,
+                               file_path, error, chunks_list, entities_list, relations_list,
+                               created_at, updated_at
+                            FROM LIGHTRAG_DOC_STATUS WHERE workspace=$1 AND status=$2
+                         """,
+    "get_doc_status_page": """SELECT id, content_summary, content_length, chunks_count, status,
+                                file_path, error, created_at, updated_at
+                             FROM LIGHTRAG_DOC_STATUS WHERE {conditions}
+                             ORDER BY updated_at DESC, id DESC LIMIT {limit}
+                          """,
     "upsert_doc_full": """INSERT INTO LIGHTRAG_DOC_FULL (id, content, workspace)
                         VALUES ($1, $2, $3)
                         ON CONFLICT (workspace,id) DO UPDATE
                            SET content = $2, update_time = CURRENT_TIMESTAMP
                        """,
-    "upsert_llm_response_cache": """INSERT INTO LIGHTRAG_LLM_CACHE(workspace,id,original_prompt,return_value,mode)
-                                      VALUES ($1, $2, $3, $4, $5)
+    "upsert_llm_response_cache": """INSERT INTO LIGHTRAG_LLM_CACHE(workspace,id,original_prompt,return_value,mode,
+                                      cache_type,embedding,embedding_min,embedding_max)
+                                      VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
                                       ON CONFLICT (workspace,mode,id) DO UPDATE
                                       SET original_prompt = EXCLUDED.original_prompt,
                                       return_value=EXCLUDED.return_value,
                                       mode=EXCLUDED.mode,
+                                      cache_type=EXCLUDED.cache_type,
+                                      embedding=EXCLUDED.embedding,
+                                      embedding_min=EXCLUDED.embedding_min,
+                                      embedding_max=EXCLUDED.embedding_max,
                                       update_time = CURRENT_TIMESTAMP
                                      """,
     "upsert_chunk": """INSERT INTO LIGHTRAG_DOC_CHUNKS (workspace, id, tokens,
@@ -2456,56 +3135,53 @@ SQL_TEMPLATES = {
                       file_path=EXCLUDED.file_path,
                       update_time = EXCLUDED.update_time
                      """,
+    # Vector searches order by the distance operator itself so the ANN index is used,
+    # the threshold is applied to the top_k nearest rows afterwards
     "relationships": """
-    WITH relevant_chunks AS (
-        SELECT id as chunk_id
-        FROM LIGHTRAG_DOC_CHUNKS
-        WHERE $2::varchar[] IS NULL OR full_doc_id = ANY($2::varchar[])
-    )
-    SELECT source_id as src_id, target_id as tgt_id, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at
-    FROM (
-        SELECT r.id, r.source_id, r.target_id, r.create_time, 1 - (r.content_vector <=> '[{embedding_string}]'::vector) as distance
+    SELECT src_id, tgt_id, created_at FROM (
+        SELECT r.source_id as src_id, r.target_id as tgt_id,
+               EXTRACT(EPOCH FROM r.create_time)::BIGINT as created_at,
+               1 - (r.content_vector <=> $5) as distance
         FROM LIGHTRAG_VDB_RELATION r
-        JOIN relevant_chunks c ON c.chunk_id = ANY(r.chunk_ids)
         WHERE r.workspace=$1
-    ) filtered
+        AND ($2::varchar[] IS NULL OR EXISTS (
+            SELECT 1 FROM LIGHTRAG_DOC_CHUNKS c
+            WHERE c.workspace=$1 AND c.full_doc_id = ANY($2::varchar[])
+            AND c.id = ANY(r.chunk_ids)))
+        ORDER BY r.content_vector <=> $5
+        LIMIT $4
+    ) nearest
     WHERE distance>$3
     ORDER BY distance DESC
-    LIMIT $4
     """,
     "entities": """
-        WITH relevant_chunks AS (
-            SELECT id as chunk_id
-            FROM LIGHTRAG_DOC_CHUNKS
-            WHERE $2::varchar[] IS NULL OR full_doc_id = ANY($2::varchar[])
-        )
-        SELECT entity_name, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at FROM
-            (
-                SELECT e.id, e.entity_name, e.create_time, 1 - (e.content_vector <=> '[{embedding_string}]'::vector) as distance
-                FROM LIGHTRAG_VDB_ENTITY e
-                JOIN relevant_chunks c ON c.chunk_id = ANY(e.chunk_ids)
-                WHERE e.workspace=$1
-            ) as chunk_distances
-            WHERE distance>$3
-            ORDER BY distance DESC
-            LIMIT $4
+    SELECT entity_name, created_at FROM (
+        SELECT e.entity_name, EXTRACT(EPOCH FROM e.create_time)::BIGINT as created_at,
+               1 - (e.content_vector <=> $5) as distance
+        FROM LIGHTRAG_VDB_ENTITY e
+        WHERE e.workspace=$1
+        AND ($2::varchar[] IS NULL OR EXISTS (
+            SELECT 1 FROM LIGHTRAG_DOC_CHUNKS c
+            WHERE c.workspace=$1 AND c.full_doc_id = ANY($2::varchar[])
+            AND c.id = ANY(e.chunk_ids)))
+        ORDER BY e.content_vector <=> $5
+        LIMIT $4
+    ) nearest
+    WHERE distance>$3
+    ORDER BY distance DESC
     """,
     "chunks": """
-        WITH relevant_chunks AS (
-            SELECT id as chunk_id
-            FROM LIGHTRAG_DOC_CHUNKS
-            WHERE $2::varchar[] IS NULL OR full_doc_id = ANY($2::varchar[])
-        )
-        SELECT id, content, file_path, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at FROM
-            (
-                SELECT id, content, file_path, create_time, 1 - (content_vector <=> '[{embedding_string}]'::vector) as distance
-                FROM LIGHTRAG_DOC_CHUNKS
-                WHERE workspace=$1
-                AND id IN (SELECT chunk_id FROM relevant_chunks)
-            ) as chunk_distances
-            WHERE distance>$3
-            ORDER BY distance DESC
-            LIMIT $4
+    SELECT id, content, file_path, created_at FROM (
+        SELECT id, content, file_path, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at,
+               1 - (content_vector <=> $5) as distance
+        FROM LIGHTRAG_DOC_CHUNKS
+        WHERE workspace=$1
+        AND ($2::varchar[] IS NULL OR full_doc_id = ANY($2::varchar[]))
+        ORDER BY content_vector <=> $5
+        LIMIT $4
+    ) nearest
+    WHERE distance>$3
+    ORDER BY distance DESC
     """,
     # DROP tables
     "drop_specifiy_table_workspace": """
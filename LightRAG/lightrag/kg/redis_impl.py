@@ -1,4 +1,5 @@
 import os
+import time
 from typing import Any, final
 from dataclasses import dataclass
 import pipmaster as pm
@@ -14,6 +15,7 @@ from redis.exceptions import RedisError, ConnectionError  # type: ignore
 from lightrag.utils import logger
 
 from lightrag.base import BaseKVStorage
+from lightrag.namespace import NameSpace, is_namespace
 import json
 
 
@@ -42,6 +44,8 @@ class RedisKVStorage(BaseKVStorage):
             socket_connect_timeout=SOCKET_CONNECT_TIMEOUT,
         )
         self._redis = Redis(connection_pool=self._pool)
+        # Cache modes whose legacy {namespace}:{mode} dict was migrated
+        self._migrated_cache_modes: set[str] = set()
         logger.info(
             f"Initialized Redis connection pool for {self.namespace} with max {MAX_CONNECTIONS} connections"
         )
@@ -82,10 +86,140 @@ class RedisKVStorage(BaseKVStorage):
         async with self._get_redis_connection() as redis:
             try:
                 data = await redis.get(f"{self.namespace}:{id}")
-                return json.loads(data) if data else None
+                data = json.loads(data) if data else None
             except json.JSONDecodeError as e:
                 logger.error(f"JSON decode error for id {id}: {e}")
                 return None
+        if is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
+            # id is a cache mode: merge per-key entries into the legacy mode dict
+            entries = await self._get_cache_entries_by_mode(id)
+            if entries:
+                data = {**(data or {}), **entries}
+        return data
+
+    def _cache_key(self, mode: str, args_hash: str) -> str:
+        return f"{self.namespace}:{mode}:{args_hash}"
+
+    def _cache_lru_key(self, mode: str) -> str:
+        return f"{self.namespace}:lru:{mode}"
+
+    def _cache_lru_enabled(self) -> bool:
+        return self.global_config.get("llm_cache_max_entries", 0) > 0
+
+    async def _migrate_legacy_cache(self, mode: str) -> None:
+        """Move the entries of a legacy {namespace}:{mode} dict to per-key entries
+
+        Runs once per mode and process. A concurrent migration by another process
+        writes the same entries, so it is harmless.
+        """
+        if mode in self._migrated_cache_modes:
+            return
+        legacy_key = f"{self.namespace}:{mode}"
+        async with self._get_redis_connection() as redis:
+            value = await redis.get(legacy_key)
+            try:
+                legacy = json.loads(value) if value else None
+            except json.JSONDecodeError as e:
+                logger.error(f"JSON decode error for legacy cache {legacy_key}: {e}")
+                legacy = None
+            if isinstance(legacy, dict) and legacy:
+                ttl = self.global_config.get("llm_cache_ttl", 0)
+                now = time.time()
+                pipe = redis.pipeline()
+                for args_hash, entry in legacy.items():
+                    pipe.set(
+                        self._cache_key(mode, args_hash),
+                        json.dumps(entry),
+                        ex=ttl if ttl > 0 else None,
+                        nx=True,
+                    )
+                    if self._cache_lru_enabled():
+                        pipe.zadd(
+                            self._cache_lru_key(mode),
+                            {args_hash: entry.get("create_time", now)},
+                            nx=True,
+                        )
+                pipe.delete(legacy_key)
+                await pipe.execute()
+                logger.info(
+                    f"Migrated {len(legacy)} legacy cache entries of mode {mode} "
+                    f"in {self.namespace}"
+                )
+        self._migrated_cache_modes.add(mode)
+
+    async def _get_cache_entries_by_mode(self, mode: str) -> dict[str, Any]:
+        """Get all per-key cache entries of a mode"""
+        await self._migrate_legacy_cache(mode)
+        async with self._get_redis_connection() as redis:
+            if self._cache_lru_enabled():
+                args_hashes = await redis.zrange(self._cache_lru_key(mode), 0, -1)
+            else:
+                prefix = self._cache_key(mode, "")
+                args_hashes = [
+                    key[len(prefix) :]
+                    async for key in redis.scan_iter(match=f"{prefix}*", count=1000)
+                ]
+            if not args_hashes:
+                return {}
+            values = await redis.mget(
+                [self._cache_key(mode, args_hash) for args_hash in args_hashes]
+            )
+            return {
+                args_hash: json.loads(value)
+                for args_hash, value in zip(args_hashes, values)
+                if value
+            }
+
+    async def get_cache_entry(self, mode: str, args_hash: str) -> dict[str, Any] | None:
+        """Point read of one cache entry; a hit refreshes its LRU position"""
+        await self._migrate_legacy_cache(mode)
+        async with self._get_redis_connection() as redis:
+            value = await redis.get(self._cache_key(mode, args_hash))
+            if not value:
+                return None
+            if self._cache_lru_enabled():
+                await redis.zadd(self._cache_lru_key(mode), {args_hash: time.time()})
+            try:
+                return json.loads(value)
+            except json.JSONDecodeError as e:
+                logger.error(f"JSON decode error for cache entry {args_hash}: {e}")
+                return None
+
+    async def upsert_cache_entry(
+        self, mode: str, args_hash: str, entry: dict[str, Any]
+    ) -> None:
+        """Point write of one cache entry
+
+        Entries expire through Redis TTL (llm_cache_ttl). When llm_cache_max_entries
+        is set, a sorted set per mode tracks access times to evict the least
+        recently used entries beyond it.
+        """
+        await self._migrate_legacy_cache(mode)
+        ttl = self.global_config.get("llm_cache_ttl", 0)
+        max_entries = self.global_config.get("llm_cache_max_entries", 0)
+        lru_key = self._cache_lru_key(mode)
+        now = time.time()
+        async with self._get_redis_connection() as redis:
+            pipe = redis.pipeline()
+            pipe.set(
+                self._cache_key(mode, args_hash),
+                json.dumps(entry),
+                ex=ttl if ttl > 0 else None,
+            )
+            if max_entries > 0:
+                pipe.zadd(lru_key, {args_hash: now})
+                if ttl > 0:
+                    # Entries not accessed within ttl have expired already
+                    pipe.zremrangebyscore(lru_key, "-inf", now - ttl)
+            await pipe.execute()
+
+            if max_entries > 0:
+                overflow = await redis.zcard(lru_key) - max_entries
+                if overflow > 0:
+                    evicted = await redis.zpopmin(lru_key, overflow)
+                    await redis.delete(
+                        *[self._cache_key(mode, args_hash) for args_hash, _ in evicted]
+                    )
 
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
         async with self._get_redis_connection() as redis:
@@ -165,6 +299,13 @@ class RedisKVStorage(BaseKVStorage):
 
         try:
             await self.delete(modes)
+            async with self._get_redis_connection() as redis:
+                for mode in modes:
+                    async for key in redis.scan_iter(
+                        match=f"{self.namespace}:{mode}:*", count=1000
+                    ):
+                        await redis.delete(key)
+                    await redis.delete(self._cache_lru_key(mode))
             return True
         except Exception:
             return False
@@ -1,6 +1,9 @@
 import os
 import sys
+import time
+import heapq
 import asyncio
+import itertools
 from multiprocessing.synchronize import Lock as ProcessLock
 from multiprocessing import Manager
 from typing import Any, Dict, Optional, Union, TypeVar, Generic
@@ -38,9 +41,24 @@ _update_flags: Optional[Dict[str, bool]] = None  # namespace -> updated
 _storage_lock: Optional[LockType] = None
 _internal_lock: Optional[LockType] = None
 _pipeline_status_lock: Optional[LockType] = None
-_graph_db_lock: Optional[LockType] = None
 _data_init_lock: Optional[LockType] = None
 
+# keys currently locked by KeyedLock: (namespace, key) -> holder pid, key None locks the whole namespace
+_keyed_locks: Optional[Dict[tuple, int]] = None
+
+# polling interval bounds (seconds) while waiting for keys held by other coroutines or processes
+KEYED_LOCK_MIN_WAIT = 0.005
+KEYED_LOCK_MAX_WAIT = 0.1
+
+# Token buckets of the cross-worker rate limiters: name -> (requests, tokens, updated_at)
+_rate_limits: Optional[Dict[str, tuple]] = None
+# Waiting rate limiter callers: (name, pid) -> (best pending priority, last seen)
+_rate_limit_waiters: Optional[Dict[tuple, tuple]] = None
+RATE_LIMIT_MIN_WAIT = 0.01
+RATE_LIMIT_MAX_WAIT = 1.0
+# Waiter entries not refreshed for this long belong to a worker that went away
+RATE_LIMIT_WAITER_TTL = 5.0
+
 # async locks for coroutine synchronization in multiprocess mode
 _async_locks: Optional[Dict[str, asyncio.Lock]] = None
 
@@ -211,6 +229,215 @@ class UnifiedLock(Generic[T]):
             raise
 
 
+class KeyedLock:
+    """Lock a set of keys of a namespace across coroutines and processes
+
+    All keys are acquired at once or not at all, so callers locking overlapping key
+    sets cannot deadlock. With keys=None the whole namespace is locked: new keyed
+    acquisitions are held back right away, and the lock is granted once the keys
+    already held are released.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        keys: Optional[list[str]] = None,
+        enable_logging: bool = False,
+    ):
+        self._namespace = namespace
+        self._keys = None if keys is None else sorted(set(keys))
+        self._pid = os.getpid()
+        self._enable_logging = enable_logging
+        self._acquired = False
+
+    def _try_acquire(self) -> bool:
+        """Must be called with the internal lock held"""
+        whole = (self._namespace, None)
+        held = set(_keyed_locks.keys())
+        if self._keys is None:
+            if whole not in held:
+                # Reserve the namespace so no new keys are handed out meanwhile
+                _keyed_locks[whole] = self._pid
+                self._acquired = True
+            elif not self._acquired:
+                return False
+            return not any(
+                ns == self._namespace and key is not None for ns, key in held
+            )
+        if whole in held:
+            return False
+        wanted = [(self._namespace, key) for key in self._keys]
+        if any(name in held for name in wanted):
+            return False
+        _keyed_locks.update({name: self._pid for name in wanted})
+        self._acquired = True
+        return True
+
+    async def __aenter__(self) -> "KeyedLock":
+        if _keyed_locks is None:
+            raise ValueError("Shared-Data is not initialized")
+        wait = KEYED_LOCK_MIN_WAIT
+        try:
+            while True:
+                async with get_internal_lock():
+                    if self._try_acquire():
+                        break
+                await asyncio.sleep(wait)
+                wait = min(wait * 2, KEYED_LOCK_MAX_WAIT)
+        except BaseException:
+            # Drop a namespace reservation if we were cancelled while waiting
+            if self._acquired:
+                await self._release()
+            raise
+        direct_log(
+            f"== Lock == Process {self._pid}: Keyed lock '{self._namespace}' acquired "
+            f"({'all keys' if self._keys is None else f'{len(self._keys)} keys'})",
+            enable_output=self._enable_logging,
+        )
+        return self
+
+    async def _release(self):
+        async with get_internal_lock():
+            if self._keys is None:
+                _keyed_locks.pop((self._namespace, None), None)
+            else:
+                for key in self._keys:
+                    _keyed_locks.pop((self._namespace, key), None)
+        self._acquired = False
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self._release()
+        direct_log(
+            f"== Lock == Process {self._pid}: Keyed lock '{self._namespace}' released",
+            enable_output=self._enable_logging,
+        )
+
+
+def get_keyed_lock(
+    namespace: str, keys: Optional[list[str]] = None, enable_logging: bool = False
+) -> KeyedLock:
+    """return a lock over the given keys of a namespace, or the whole namespace if keys is None"""
+    return KeyedLock(namespace, keys, enable_logging=enable_logging)
+
+
+class RateLimiter:
+    """Requests- and tokens-per-minute budget shared by all worker processes
+
+    Both budgets are token buckets that start full and refill continuously at
+    rpm/60 and tpm/60 per second; a limit of 0 disables that budget. Callers of a
+    process wait in a local priority heap and only its head polls the shared
+    buckets, registering its priority while it waits. A call is admitted only when
+    no other process has a better (lower) priority waiting, so the `_priority`
+    ordering of priority_limit_async_func_call holds across workers as well.
+    """
+
+    def __init__(self, name: str, rpm: int = 0, tpm: int = 0):
+        self._name = name
+        self._rpm = max(0, rpm)
+        self._tpm = max(0, tpm)
+        self._pending: list[tuple] = []  # (priority, seq, tokens, future)
+        self._seq = itertools.count()
+        self._pump_task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._rpm > 0 or self._tpm > 0
+
+    def _try_acquire(self, waiter: tuple, priority: int, tokens: int) -> float:
+        """Must be called with the internal lock held
+
+        Returns 0 when the call is admitted, otherwise the seconds to wait before
+        trying again.
+        """
+        now = time.time()
+        blocked = False
+        for key, (other_priority, last_seen) in list(_rate_limit_waiters.items()):
+            if key[0] != self._name or key == waiter:
+                continue
+            if now - last_seen > RATE_LIMIT_WAITER_TTL:
+                _rate_limit_waiters.pop(key, None)
+            elif other_priority < priority:
+                blocked = True
+
+        state = _rate_limits.get(self._name)
+        if state is None:
+            requests, budget = float(self._rpm), float(self._tpm)
+        else:
+            requests, budget, updated_at = state
+            elapsed = max(0.0, now - updated_at)
+            requests = min(self._rpm, requests + elapsed * self._rpm / 60)
+            budget = min(self._tpm, budget + elapsed * self._tpm / 60)
+
+        # A single call larger than the whole budget waits for a full bucket
+        tokens = min(tokens, self._tpm)
+        wait = 0.0
+        if self._rpm and requests < 1:
+            wait = max(wait, (1 - requests) * 60 / self._rpm)
+        if self._tpm and budget < tokens:
+            wait = max(wait, (tokens - budget) * 60 / self._tpm)
+
+        if blocked or wait > 0:
+            _rate_limit_waiters[waiter] = (priority, now)
+            _rate_limits[self._name] = (requests, budget, now)
+            return min(max(wait, RATE_LIMIT_MIN_WAIT), RATE_LIMIT_MAX_WAIT)
+
+        _rate_limit_waiters.pop(waiter, None)
+        if self._rpm:
+            requests -= 1
+        if self._tpm:
+            budget -= tokens
+        _rate_limits[self._name] = (requests, budget, now)
+        return 0.0
+
+    async def _pump(self):
+        """Admit the local waiters in priority order against the shared buckets"""
+        waiter = (self._name, os.getpid())
+        try:
+            while True:
+                while self._pending and self._pending[0][3].done():
+                    heapq.heappop(self._pending)  # Caller gave up waiting
+                async with get_internal_lock():
+                    if not self._pending:
+                        # Checked under the lock with no await before returning,
+                        # so acquire() sees this task done and starts a new one
+                        _rate_limit_waiters.pop(waiter, None)
+                        return
+                    priority, _, tokens, future = self._pending[0]
+                    wait = self._try_acquire(waiter, priority, tokens)
+                if wait:
+                    await asyncio.sleep(wait)
+                    continue
+                heapq.heappop(self._pending)
+                if not future.done():
+                    future.set_result(None)
+        except Exception as e:
+            direct_log(
+                f"Process {os.getpid()} rate limiter '{self._name}' failed: {e}",
+                level="ERROR",
+            )
+            pending, self._pending = self._pending, []
+            for _, _, _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def acquire(self, tokens: int = 0, priority: int = 10) -> None:
+        """Wait until the shared budget admits one request using the given tokens"""
+        if not self.enabled:
+            return
+        if _rate_limits is None:
+            raise ValueError("Shared-Data is not initialized")
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._pending, (priority, next(self._seq), tokens, future))
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+        await future
+
+
+def get_rate_limiter(name: str, rpm: int = 0, tpm: int = 0) -> RateLimiter:
+    """return a limiter drawing on the named requests/tokens per minute budget shared by all workers"""
+    return RateLimiter(name, rpm, tpm)
+
+
 def get_internal_lock(enable_logging: bool = False) -> UnifiedLock:
     """return unified storage lock for data consistency"""
     async_lock = _async_locks.get("internal_lock") if _is_multiprocess else None
@@ -247,16 +474,18 @@ def get_pipeline_status_lock(enable_logging: bool = False) -> UnifiedLock:
     )
 
 
-def get_graph_db_lock(enable_logging: bool = False) -> UnifiedLock:
-    """return unified graph database lock for ensuring atomic operations"""
-    async_lock = _async_locks.get("graph_db_lock") if _is_multiprocess else None
-    return UnifiedLock(
-        lock=_graph_db_lock,
-        is_async=not _is_multiprocess,
-        name="graph_db_lock",
-        enable_logging=enable_logging,
-        async_lock=async_lock,
-    )
+def get_graph_db_lock(enable_logging: bool = False) -> KeyedLock:
+    """return exclusive graph database lock for operations touching arbitrary graph data
+
+    Merges lock only the entities they touch with get_graph_keys_lock, this lock waits
+    for those and keeps new ones out while it is held.
+    """
+    return KeyedLock("graph_db", None, enable_logging=enable_logging)
+
+
+def get_graph_keys_lock(keys: list[str], enable_logging: bool = False) -> KeyedLock:
+    """return graph database lock over the given entity names"""
+    return KeyedLock("graph_db", keys, enable_logging=enable_logging)
 
 
 def get_data_init_lock(enable_logging: bool = False) -> UnifiedLock:
@@ -296,8 +525,10 @@ def initialize_share_data(workers: int = 1):
         _storage_lock, \
         _internal_lock, \
         _pipeline_status_lock, \
-        _graph_db_lock, \
         _data_init_lock, \
+        _keyed_locks, \
+        _rate_limits, \
+        _rate_limit_waiters, \
         _shared_dicts, \
         _init_flags, \
         _initialized, \
@@ -319,8 +550,10 @@ def initialize_share_data(workers: int = 1):
         _internal_lock = _manager.Lock()
         _storage_lock = _manager.Lock()
         _pipeline_status_lock = _manager.Lock()
-        _graph_db_lock = _manager.Lock()
         _data_init_lock = _manager.Lock()
+        _keyed_locks = _manager.dict()
+        _rate_limits = _manager.dict()
+        _rate_limit_waiters = _manager.dict()
         _shared_dicts = _manager.dict()
         _init_flags = _manager.dict()
         _update_flags = _manager.dict()
@@ -330,7 +563,6 @@ def initialize_share_data(workers: int = 1):
             "internal_lock": asyncio.Lock(),
             "storage_lock": asyncio.Lock(),
             "pipeline_status_lock": asyncio.Lock(),
-            "graph_db_lock": asyncio.Lock(),
             "data_init_lock": asyncio.Lock(),
         }
 
@@ -342,8 +574,10 @@ def initialize_share_data(workers: int = 1):
         _internal_lock = asyncio.Lock()
         _storage_lock = asyncio.Lock()
         _pipeline_status_lock = asyncio.Lock()
-        _graph_db_lock = asyncio.Lock()
         _data_init_lock = asyncio.Lock()
+        _keyed_locks = {}
+        _rate_limits = {}
+        _rate_limit_waiters = {}
         _shared_dicts = {}
         _init_flags = {}
         _update_flags = {}
@@ -529,8 +763,10 @@ def finalize_share_data():
         _storage_lock, \
         _internal_lock, \
         _pipeline_status_lock, \
-        _graph_db_lock, \
         _data_init_lock, \
+        _keyed_locks, \
+        _rate_limits, \
+        _rate_limit_waiters, \
         _shared_dicts, \
         _init_flags, \
         _initialized, \
@@ -597,8 +833,10 @@ def finalize_share_data():
     _storage_lock = None
     _internal_lock = None
     _pipeline_status_lock = None
-    _graph_db_lock = None
     _data_init_lock = None
+    _keyed_locks = None
+    _rate_limits = None
+    _rate_limit_waiters = None
     _update_flags = None
     _async_locks = None
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import traceback
+import sys
 import asyncio
 import configparser
 import os
@@ -24,6 +25,7 @@ from typing import (
 from lightrag.constants import (
     DEFAULT_MAX_TOKEN_SUMMARY,
     DEFAULT_FORCE_LLM_SUMMARY_ON_MERGE,
+    DEFAULT_EMBEDDING_BATCH_WAIT_MS,
 )
 from lightrag.utils import get_env_value
 
@@ -33,8 +35,10 @@ from lightrag.kg import (
 )
 
 from lightrag.kg.shared_storage import (
+    get_graph_keys_lock,
     get_namespace_data,
     get_pipeline_status_lock,
+    get_rate_limiter,
 )
 
 from .base import (
@@ -51,13 +55,14 @@ from .base import (
 from .namespace import NameSpace, make_namespace
 from .operate import (
     chunking_by_token_size,
+    collect_entity_relation_keys,
     extract_entities,
     merge_nodes_and_edges,
+    strip_chunk_sources,
     kg_query,
     naive_query,
     query_with_keywords,
 )
-from .prompt import GRAPH_FIELD_SEP
 from .utils import (
     Tokenizer,
     TiktokenTokenizer,
@@ -67,6 +72,12 @@ from .utils import (
     convert_response_to_json,
     lazy_external_import,
     priority_limit_async_func_call,
+    batch_embedding_func_call,
+    cache_embedding_func_call,
+    EmbeddingVectorCache,
+    embedding_func_identity,
+    estimate_llm_call_tokens,
+    estimate_embedding_call_tokens,
     get_content_summary,
     clean_text,
     check_storage_env_vars,
@@ -194,22 +205,52 @@ class LightRAG:
     embedding_batch_num: int = field(default=int(os.getenv("EMBEDDING_BATCH_NUM", 32)))
     """Batch size for embedding computations."""
 
+    embedding_batch_wait_ms: float = field(
+        default=get_env_value(
+            "EMBEDDING_BATCH_WAIT_MS", DEFAULT_EMBEDDING_BATCH_WAIT_MS, float
+        )
+    )
+    """Milliseconds small embedding calls wait to be sent together with concurrent
+    ones, up to embedding_batch_num texts per call. 0 disables coalescing."""
+
     embedding_func_max_async: int = field(
         default=int(os.getenv("EMBEDDING_FUNC_MAX_ASYNC", 16))
     )
     """Maximum number of concurrent embedding function calls."""
 
+    embedding_rpm_limit: int = field(
+        default=get_env_value("EMBEDDING_RPM_LIMIT", 0, int)
+    )
+    """Embedding requests per minute allowed across all workers, 0 for no limit."""
+
+    embedding_tpm_limit: int = field(
+        default=get_env_value("EMBEDDING_TPM_LIMIT", 0, int)
+    )
+    """Embedding tokens per minute allowed across all workers, 0 for no limit."""
+
+    embedding_model_name: str = field(default=get_env_value("EMBEDDING_MODEL", "", str))
+    """Name of the embedding model, part of the embedding vector cache keys together
+    with the embedding function; the cache stays disabled when it is unknown."""
+
+    enable_embedding_vector_cache: bool = field(
+        default=get_env_value("ENABLE_EMBEDDING_VECTOR_CACHE", False, bool)
+    )
+    """If True, computed embeddings are stored by text hash in a SQLite file in the
+    working directory and reused for identical texts by all vector storages."""
+
     embedding_cache_config: dict[str, Any] = field(
         default_factory=lambda: {
             "enabled": False,
             "similarity_threshold": 0.95,
             "use_llm_check": False,
+            "top_k": 1,
         }
     )
     """Configuration for embedding cache.
     - enabled: If True, enables caching to avoid redundant computations.
     - similarity_threshold: Minimum similarity score to use cached embeddings.
     - use_llm_check: If True, validates cached embeddings using an LLM.
+    - top_k: Number of most similar cached queries passed to the LLM check, best first.
     """
 
     # LLM Configuration
@@ -227,6 +268,13 @@ class LightRAG:
     llm_model_max_async: int = field(default=int(os.getenv("MAX_ASYNC", 4)))
     """Maximum number of concurrent LLM calls."""
 
+    llm_rpm_limit: int = field(default=get_env_value("LLM_RPM_LIMIT", 0, int))
+    """LLM requests per minute allowed across all workers, 0 for no limit."""
+
+    llm_tpm_limit: int = field(default=get_env_value("LLM_TPM_LIMIT", 0, int))
+    """LLM tokens per minute allowed across all workers, prompt plus requested
+    completion tokens, 0 for no limit."""
+
     llm_model_kwargs: dict[str, Any] = field(default_factory=dict)
     """Additional keyword arguments passed to the LLM model function."""
 
@@ -246,6 +294,15 @@ class LightRAG:
     enable_llm_cache_for_entity_extract: bool = field(default=True)
     """If True, enables caching for entity extraction steps to reduce LLM costs."""
 
+    llm_cache_ttl: int = field(default=get_env_value("LLM_CACHE_TTL", 0, int))
+    """Seconds after which an LLM response cache entry expires. 0 means never."""
+
+    llm_cache_max_entries: int = field(
+        default=get_env_value("LLM_CACHE_MAX_ENTRIES", 0, int)
+    )
+    """Max number of LLM response cache entries kept per cache mode, least recently
+    used (or written, depending on storage) entries are evicted first. 0 means unlimited."""
+
     # Extensions
     # ---
 
@@ -348,8 +405,36 @@ class LightRAG:
 
         # Init Embedding
         self.embedding_func = priority_limit_async_func_call(
-            self.embedding_func_max_async
+            self.embedding_func_max_async,
+            rate_limiter=get_rate_limiter(
+                "embedding", self.embedding_rpm_limit, self.embedding_tpm_limit
+            ),
+            count_tokens=partial(estimate_embedding_call_tokens, self.tokenizer),
+        )(self.embedding_func)
+        # Coalesce concurrent query embeddings into single requests
+        self.embedding_func = batch_embedding_func_call(
+            self.embedding_batch_num, self.embedding_batch_wait_ms / 1000
         )(self.embedding_func)
+        # Answer identical texts from the persistent embedding cache
+        self.embedding_vector_cache: EmbeddingVectorCache | None = None
+        if self.enable_embedding_vector_cache:
+            embedding_id = embedding_func_identity(
+                self.embedding_func, self.embedding_model_name
+            )
+            if embedding_id is None:
+                logger.warning(
+                    "Embedding vector cache disabled: set EMBEDDING_MODEL (or "
+                    "embedding_model_name) to name the embedding model"
+                )
+            else:
+                self.embedding_vector_cache = EmbeddingVectorCache(
+                    os.path.join(self.working_dir, "embedding_vector_cache.db"),
+                    embedding_id=embedding_id,
+                    embedding_dim=self.embedding_func.embedding_dim,
+                )
+        self.embedding_func = cache_embedding_func_call(self.embedding_vector_cache)(
+            self.embedding_func
+        )
 
         # Initialize all storages
         self.key_string_value_json_storage_cls: type[BaseKVStorage] = (
@@ -437,7 +522,13 @@ class LightRAG:
         # Directly use llm_response_cache, don't create a new object
         hashing_kv = self.llm_response_cache
 
-        self.llm_model_func = priority_limit_async_func_call(self.llm_model_max_async)(
+        self.llm_model_func = priority_limit_async_func_call(
+            self.llm_model_max_async,
+            rate_limiter=get_rate_limiter(
+                "llm", self.llm_rpm_limit, self.llm_tpm_limit
+            ),
+            count_tokens=partial(estimate_llm_call_tokens, self.tokenizer),
+        )(
             partial(
                 self.llm_model_func,  # type: ignore
                 hashing_kv=hashing_kv,
@@ -516,6 +607,14 @@ class LightRAG:
 
             await asyncio.gather(*tasks)
 
+            if self.embedding_vector_cache is not None:
+                self.embedding_vector_cache.close()
+
+            # Release pooled LLM/embedding HTTP connections, only if the binding was used
+            openai_binding = sys.modules.get("lightrag.llm.openai")
+            if openai_binding is not None:
+                await openai_binding.close_openai_async_clients()
+
             self._storages_status = StoragesStatus.FINALIZED
             logger.debug("Finalized Storages")
 
@@ -760,11 +859,10 @@ class LightRAG:
             for content, (id_, file_path) in unique_contents.items()
         }
 
-        # 3. Generate document initial status
+        # 3. Generate document initial status, the content itself goes to full_docs
         new_docs: dict[str, Any] = {
             id_: {
                 "status": DocStatus.PENDING,
-                "content": content_data["content"],
                 "content_summary": get_content_summary(content_data["content"]),
                 "content_length": len(content_data["content"]),
                 "created_at": datetime.now(timezone.utc).isoformat(),
@@ -804,7 +902,10 @@ class LightRAG:
             logger.info("No new unique documents were found.")
             return
 
-        # 5. Store status document
+        # 5. Store the contents once in full_docs, then the status documents
+        await self.full_docs.upsert(
+            {doc_id: {"content": contents[doc_id]["content"]} for doc_id in new_docs}
+        )
         await self.doc_status.upsert(new_docs)
         logger.info(f"Stored {len(new_docs)} new unique documents")
 
@@ -918,6 +1019,7 @@ class LightRAG:
                     async with semaphore:
                         nonlocal processed_count
                         current_file_number = 0
+                        tasks: list[asyncio.Task] = []
                         try:
                             # Get file path from status document
                             file_path = getattr(
@@ -940,6 +1042,24 @@ class LightRAG:
                                 pipeline_status["latest_message"] = log_message
                                 pipeline_status["history_messages"].append(log_message)
 
+                            # Contents are only kept in full_docs, documents
+                            # enqueued by older versions still carry them in doc_status
+                            content_data = await self.full_docs.get_by_id(doc_id)
+                            if content_data is None:
+                                legacy_status = (
+                                    await self.doc_status.get_by_id(doc_id) or {}
+                                )
+                                if not legacy_status.get("content"):
+                                    raise ValueError(
+                                        f"Content of document {doc_id} not found in full_docs"
+                                    )
+                                content_data = {"content": legacy_status["content"]}
+                                await self.full_docs.upsert({doc_id: content_data})
+                                await self.doc_status.update_status(
+                                    {doc_id: {"content": None}}
+                                )
+                            content = content_data["content"]
+
                             # Generate chunks from document
                             chunks: dict[str, Any] = {
                                 compute_mdhash_id(dp["content"], prefix="chunk-"): {
@@ -949,7 +1069,7 @@ class LightRAG:
                                 }
                                 for dp in self.chunking_func(
                                     self.tokenizer,
-                                    status_doc.content,
+                                    content,
                                     split_by_character,
                                     split_by_character_only,
                                     self.chunk_overlap_token_size,
@@ -957,22 +1077,18 @@ class LightRAG:
                                 )
                             }
 
-                            # Process document (text chunks and full docs) in parallel
+                            # Process document (status, text chunks and graph) in parallel
                             # Create tasks with references for potential cancellation
                             doc_status_task = asyncio.create_task(
-                                self.doc_status.upsert(
+                                self.doc_status.update_status(
                                     {
                                         doc_id: {
                                             "status": DocStatus.PROCESSING,
                                             "chunks_count": len(chunks),
-                                            "content": status_doc.content,
-                                            "content_summary": status_doc.content_summary,
-                                            "content_length": status_doc.content_length,
-                                            "created_at": status_doc.created_at,
+                                            "error": None,
                                             "updated_at": datetime.now(
                                                 timezone.utc
                                             ).isoformat(),
-                                            "file_path": file_path,
                                         }
                                     }
                                 )
@@ -985,11 +1101,6 @@ class LightRAG:
                                     chunks, pipeline_status, pipeline_status_lock
                                 )
                             )
-                            full_docs_task = asyncio.create_task(
-                                self.full_docs.upsert(
-                                    {doc_id: {"content": status_doc.content}}
-                                )
-                            )
                             text_chunks_task = asyncio.create_task(
                                 self.text_chunks.upsert(chunks)
                             )
@@ -997,7 +1108,6 @@ class LightRAG:
                                 doc_status_task,
                                 chunks_vdb_task,
                                 entity_relation_task,
-                                full_docs_task,
                                 text_chunks_task,
                             ]
                             await asyncio.gather(*tasks)
@@ -1016,12 +1126,7 @@ class LightRAG:
                                 pipeline_status["history_messages"].append(error_msg)
 
                                 # Cancel other tasks as they are no longer meaningful
-                                for task in [
-                                    chunks_vdb_task,
-                                    entity_relation_task,
-                                    full_docs_task,
-                                    text_chunks_task,
-                                ]:
+                                for task in tasks:
                                     if not task.done():
                                         task.cancel()
 
@@ -1030,24 +1135,19 @@ class LightRAG:
                                 await self.llm_response_cache.index_done_callback()
 
                             # Update document status to failed
-                            await self.doc_status.upsert(
+                            await self.doc_status.update_status(
                                 {
                                     doc_id: {
                                         "status": DocStatus.FAILED,
                                         "error": str(e),
-                                        "content": status_doc.content,
-                                        "content_summary": status_doc.content_summary,
-                                        "content_length": status_doc.content_length,
-                                        "created_at": status_doc.created_at,
                                         "updated_at": datetime.now(
                                             timezone.utc
                                         ).isoformat(),
-                                        "file_path": file_path,
                                     }
                                 }
                             )
 
-                    # Semphore released, concurrency controlled by graph_db_lock in merge_nodes_and_edges instead
+                    # Semphore released, merges lock only the entities they touch in merge_nodes_and_edges
 
                     if file_extraction_stage_ok:
                         try:
@@ -1067,19 +1167,22 @@ class LightRAG:
                                 file_path=file_path,
                             )
 
-                            await self.doc_status.upsert(
+                            # Record which records this document produced, so
+                            # adelete_by_doc_id only has to touch those
+                            entities_list, relations_list = (
+                                collect_entity_relation_keys(chunk_results)
+                            )
+                            await self.doc_status.update_status(
                                 {
                                     doc_id: {
                                         "status": DocStatus.PROCESSED,
                                         "chunks_count": len(chunks),
-                                        "content": status_doc.content,
-                                        "content_summary": status_doc.content_summary,
-                                        "content_length": status_doc.content_length,
-                                        "created_at": status_doc.created_at,
+                                        "chunks_list": list(chunks.keys()),
+                                        "entities_list": entities_list,
+                                        "relations_list": relations_list,
                                         "updated_at": datetime.now(
                                             timezone.utc
                                         ).isoformat(),
-                                        "file_path": file_path,
                                     }
                                 }
                             )
@@ -1110,17 +1213,14 @@ class LightRAG:
                                 await self.llm_response_cache.index_done_callback()
 
                             # Update document status to failed
-                            await self.doc_status.upsert(
+                            await self.doc_status.update_status(
                                 {
                                     doc_id: {
                                         "status": DocStatus.FAILED,
                                         "error": str(e),
-                                        "content": status_doc.content,
-                                        "content_summary": status_doc.content_summary,
-                                        "content_length": status_doc.content_length,
-                                        "created_at": status_doc.created_at,
-                                        "updated_at": datetime.now().isoformat(),
-                                        "file_path": file_path,
+                                        "updated_at": datetime.now(
+                                            timezone.utc
+                                        ).isoformat(),
                                     }
                                 }
                             )
@@ -1591,6 +1691,9 @@ class LightRAG:
                 else:
                     logger.warning("Failed to clear all cache")
 
+            await self.llm_response_cache.embedding_cache_indexes.invalidate(
+                self.llm_response_cache
+            )
             await self.llm_response_cache.index_done_callback()
 
         except Exception as e:
@@ -1610,6 +1713,30 @@ class LightRAG:
         """
         return await self.doc_status.get_docs_by_status(status)
 
+    async def get_docs_paginated(
+        self,
+        status: DocStatus | None = None,
+        updated_after: datetime | None = None,
+        updated_before: datetime | None = None,
+        file_path_prefix: str | None = None,
+        cursor: str | None = None,
+        limit: int = 100,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """Get one page of document status summaries, most recently updated first
+
+        Returns:
+            Tuple of the summary dicts (without content) and the cursor of the next
+            page, which is None when there are no more documents
+        """
+        return await self.doc_status.get_docs_paginated(
+            status=status,
+            updated_after=updated_after,
+            updated_before=updated_before,
+            file_path_prefix=file_path_prefix,
+            cursor=cursor,
+            limit=limit,
+        )
+
     async def aget_docs_by_ids(
         self, ids: str | list[str]
     ) -> dict[str, DocProcessingStatus]:
@@ -1674,175 +1801,119 @@ class LightRAG:
         # Return the dictionary containing statuses only for the found document IDs
         return found_statuses
 
-    # TODO: Deprecated (Deleting documents can cause hallucinations in RAG.)
-    # Document delete is not working properly for most of the storage implementations.
-    async def adelete_by_doc_id(self, doc_id: str) -> None:
+    async def adelete_by_doc_id(self, doc_id: str) -> bool:
         """Delete a document and all its related data
 
+        Chunks, entities and relationships are located through the index kept in
+        the document's status record (chunks_list, entities_list, relations_list),
+        so only the affected records are read and written on every storage
+        backend. Documents processed before the index existed fall back to a
+        full scan.
+
         Args:
             doc_id: Document ID to delete
+
+        Returns:
+            bool: False if the document does not exist, True once it is deleted
         """
         try:
-            # 1. Get the document status and related data
-            if not await self.doc_status.get_by_id(doc_id):
+            # 1. Get the document status and its chunk/entity/relation index
+            doc_status = await self.doc_status.get_by_id(doc_id)
+            if not doc_status:
                 logger.warning(f"Document {doc_id} not found")
-                return
+                return False
 
             logger.debug(f"Starting deletion for document {doc_id}")
 
-            # 2. Get all chunks related to this document
-            # Find all chunks where full_doc_id equals the current doc_id
-            all_chunks = await self.text_chunks.get_all()
-            related_chunks = {
-                chunk_id: chunk_data
-                for chunk_id, chunk_data in all_chunks.items()
-                if isinstance(chunk_data, dict)
-                and chunk_data.get("full_doc_id") == doc_id
-            }
-
-            if not related_chunks:
-                logger.warning(f"No chunks found for document {doc_id}")
-                return
-
-            # Get all related chunk IDs
-            chunk_ids = set(related_chunks.keys())
-            logger.debug(f"Found {len(chunk_ids)} chunks to delete")
-
-            # TODO: self.entities_vdb.client_storage only works for local storage, need to fix this
-
-            # 3. Before deleting, check the related entities and relationships for these chunks
-            for chunk_id in chunk_ids:
-                # Check entities
-                entities_storage = await self.entities_vdb.client_storage
-                entities = [
-                    dp
-                    for dp in entities_storage["data"]
-                    if chunk_id in dp.get("source_id")
-                ]
-                logger.debug(f"Chunk {chunk_id} has {len(entities)} related entities")
-
-                # Check relationships
-                relationships_storage = await self.relationships_vdb.client_storage
-                relations = [
-                    dp
-                    for dp in relationships_storage["data"]
-                    if chunk_id in dp.get("source_id")
-                ]
-                logger.debug(f"Chunk {chunk_id} has {len(relations)} related relations")
-
-            # Continue with the original deletion process...
-
-            # 4. Delete chunks from vector database
-            if chunk_ids:
-                await self.chunks_vdb.delete(chunk_ids)
-                await self.text_chunks.delete(chunk_ids)
-
-            # 5. Find and process entities and relationships that have these chunks as source
-            # Get all nodes and edges from the graph storage using storage-agnostic methods
-            entities_to_delete = set()
-            entities_to_update = {}  # entity_name -> new_source_id
-            relationships_to_delete = set()
-            relationships_to_update = {}  # (src, tgt) -> new_source_id
-
-            # Process entities - use storage-agnostic methods
-            all_labels = await self.chunk_entity_relation_graph.get_all_labels()
-            for node_label in all_labels:
-                node_data = await self.chunk_entity_relation_graph.get_node(node_label)
-                if node_data and "source_id" in node_data:
-                    # Split source_id using GRAPH_FIELD_SEP
-                    sources = set(node_data["source_id"].split(GRAPH_FIELD_SEP))
-                    sources.difference_update(chunk_ids)
-                    if not sources:
-                        entities_to_delete.add(node_label)
-                        logger.debug(
-                            f"Entity {node_label} marked for deletion - no remaining sources"
-                        )
-                    else:
-                        new_source_id = GRAPH_FIELD_SEP.join(sources)
-                        entities_to_update[node_label] = new_source_id
-                        logger.debug(
-                            f"Entity {node_label} will be updated with new source_id: {new_source_id}"
-                        )
-
-            # Process relationships
-            for node_label in all_labels:
-                node_edges = await self.chunk_entity_relation_graph.get_node_edges(
-                    node_label
+            chunk_ids = set(doc_status.get("chunks_list") or [])
+            if doc_status.get("status") == DocStatus.PROCESSED and chunk_ids:
+                entity_names = set(doc_status.get("entities_list") or [])
+                relation_pairs = {
+                    tuple(pair) for pair in doc_status.get("relations_list") or []
+                }
+            else:
+                logger.warning(
+                    f"Document {doc_id} has no deletion index, scanning all chunks and graph data"
                 )
-                if node_edges:
-                    for src, tgt in node_edges:
-                        edge_data = await self.chunk_entity_relation_graph.get_edge(
-                            src, tgt
-                        )
-                        if edge_data and "source_id" in edge_data:
-                            # Split source_id using GRAPH_FIELD_SEP
-                            sources = set(edge_data["source_id"].split(GRAPH_FIELD_SEP))
-                            sources.difference_update(chunk_ids)
-                            if not sources:
-                                relationships_to_delete.add((src, tgt))
-                                logger.debug(
-                                    f"Relationship {src}-{tgt} marked for deletion - no remaining sources"
-                                )
-                            else:
-                                new_source_id = GRAPH_FIELD_SEP.join(sources)
-                                relationships_to_update[(src, tgt)] = new_source_id
-                                logger.debug(
-                                    f"Relationship {src}-{tgt} will be updated with new source_id: {new_source_id}"
-                                )
-
-            # Delete entities
-            if entities_to_delete:
-                for entity in entities_to_delete:
-                    await self.entities_vdb.delete_entity(entity)
-                    logger.debug(f"Deleted entity {entity} from vector DB")
-                await self.chunk_entity_relation_graph.remove_nodes(
-                    list(entities_to_delete)
+                chunk_ids, entity_names, relation_pairs = await self._scan_doc_index(
+                    doc_id
                 )
-                logger.debug(f"Deleted {len(entities_to_delete)} entities from graph")
-
-            # Update entities
-            for entity, new_source_id in entities_to_update.items():
-                node_data = await self.chunk_entity_relation_graph.get_node(entity)
-                if node_data:
-                    node_data["source_id"] = new_source_id
-                    await self.chunk_entity_relation_graph.upsert_node(
-                        entity, node_data
-                    )
-                    logger.debug(
-                        f"Updated entity {entity} with new source_id: {new_source_id}"
-                    )
+            logger.debug(
+                f"Found {len(chunk_ids)} chunks, {len(entity_names)} entities and "
+                f"{len(relation_pairs)} relationships for document {doc_id}"
+            )
 
-            # Delete relationships
-            if relationships_to_delete:
-                for src, tgt in relationships_to_delete:
-                    rel_id_0 = compute_mdhash_id(src + tgt, prefix="rel-")
-                    rel_id_1 = compute_mdhash_id(tgt + src, prefix="rel-")
-                    await self.relationships_vdb.delete([rel_id_0, rel_id_1])
-                    logger.debug(f"Deleted relationship {src}-{tgt} from vector DB")
-                await self.chunk_entity_relation_graph.remove_edges(
-                    list(relationships_to_delete)
-                )
-                logger.debug(
-                    f"Deleted {len(relationships_to_delete)} relationships from graph"
+            # Merges in the pipeline update the same nodes and edges
+            graph_keys_lock = get_graph_keys_lock(
+                list(entity_names | {node for pair in relation_pairs for node in pair})
+            )
+            async with graph_keys_lock:
+                # 2. Delete chunks from vector database and KV storage
+                if chunk_ids:
+                    await self.chunks_vdb.delete(list(chunk_ids))
+                    await self.text_chunks.delete(list(chunk_ids))
+
+                # 3. Strip the deleted chunks from the affected entities and relationships
+                graph = self.chunk_entity_relation_graph
+                nodes = await graph.get_nodes_batch(list(entity_names))
+                edges = await graph.get_edges_batch(
+                    [{"src": src, "tgt": tgt} for src, tgt in relation_pairs]
                 )
 
-            # Update relationships
-            for (src, tgt), new_source_id in relationships_to_update.items():
-                edge_data = await self.chunk_entity_relation_graph.get_edge(src, tgt)
-                if edge_data:
-                    edge_data["source_id"] = new_source_id
-                    await self.chunk_entity_relation_graph.upsert_edge(
-                        src, tgt, edge_data
-                    )
-                    logger.debug(
-                        f"Updated relationship {src}-{tgt} with new source_id: {new_source_id}"
+                entities_to_delete = []
+                entities_to_update = {}
+                for entity, node_data in nodes.items():
+                    sources = strip_chunk_sources(node_data, chunk_ids)
+                    if sources is None:
+                        continue
+                    if sources:
+                        entities_to_update[entity] = {**node_data, "source_id": sources}
+                    else:
+                        entities_to_delete.append(entity)
+
+                relationships_to_delete = []
+                relationships_to_update = {}
+                for (src, tgt), edge_data in edges.items():
+                    sources = strip_chunk_sources(edge_data, chunk_ids)
+                    if sources is None:
+                        continue
+                    if sources:
+                        relationships_to_update[(src, tgt)] = {
+                            **edge_data,
+                            "source_id": sources,
+                        }
+                    else:
+                        relationships_to_delete.append((src, tgt))
+
+                # 4. Apply the changes to the graph and vector storages
+                if relationships_to_delete:
+                    rel_ids = []
+                    for src, tgt in relationships_to_delete:
+                        rel_ids.append(compute_mdhash_id(src + tgt, prefix="rel-"))
+                        rel_ids.append(compute_mdhash_id(tgt + src, prefix="rel-"))
+                    await self.relationships_vdb.delete(rel_ids)
+                    await graph.remove_edges(relationships_to_delete)
+
+                if entities_to_delete:
+                    await self.entities_vdb.delete(
+                        [
+                            compute_mdhash_id(entity, prefix="ent-")
+                            for entity in entities_to_delete
+                        ]
                     )
+                    await graph.remove_nodes(entities_to_delete)
 
-            # 6. Delete original document and status
+                if entities_to_update:
+                    await graph.upsert_nodes_batch(entities_to_update)
+
+                if relationships_to_update:
+                    await graph.upsert_edges_batch(relationships_to_update)
+
+            # 5. Delete original document and status
             await self.full_docs.delete([doc_id])
             await self.doc_status.delete([doc_id])
 
-            # 7. Ensure all indexes are updated
+            # 6. Ensure all indexes are updated
             await self._insert_done()
 
             logger.info(
@@ -1850,87 +1921,52 @@ class LightRAG:
                 f"Deleted {len(entities_to_delete)} entities and {len(relationships_to_delete)} relationships. "
                 f"Updated {len(entities_to_update)} entities and {len(relationships_to_update)} relationships."
             )
-
-            async def process_data(data_type, vdb, chunk_id):
-                # Check data (entities or relationships)
-                storage = await vdb.client_storage
-                data_with_chunk = [
-                    dp
-                    for dp in storage["data"]
-                    if chunk_id in (dp.get("source_id") or "").split(GRAPH_FIELD_SEP)
-                ]
-
-                data_for_vdb = {}
-                if data_with_chunk:
-                    logger.warning(
-                        f"found {len(data_with_chunk)} {data_type} still referencing chunk {chunk_id}"
-                    )
-
-                    for item in data_with_chunk:
-                        old_sources = item["source_id"].split(GRAPH_FIELD_SEP)
-                        new_sources = [src for src in old_sources if src != chunk_id]
-
-                        if not new_sources:
-                            logger.info(
-                                f"{data_type} {item.get('entity_name', 'N/A')} is deleted because source_id is not exists"
-                            )
-                            await vdb.delete_entity(item)
-                        else:
-                            item["source_id"] = GRAPH_FIELD_SEP.join(new_sources)
-                            item_id = item["__id__"]
-                            data_for_vdb[item_id] = item.copy()
-                            if data_type == "entities":
-                                data_for_vdb[item_id]["content"] = data_for_vdb[
-                                    item_id
-                                ].get("content") or (
-                                    item.get("entity_name", "")
-                                    + (item.get("description") or "")
-                                )
-                            else:  # relationships
-                                data_for_vdb[item_id]["content"] = data_for_vdb[
-                                    item_id
-                                ].get("content") or (
-                                    (item.get("keywords") or "")
-                                    + (item.get("src_id") or "")
-                                    + (item.get("tgt_id") or "")
-                                    + (item.get("description") or "")
-                                )
-
-                    if data_for_vdb:
-                        await vdb.upsert(data_for_vdb)
-                        logger.info(f"Successfully updated {data_type} in vector DB")
-
-            # Add verification step
-            async def verify_deletion():
-                # Verify if the document has been deleted
-                if await self.full_docs.get_by_id(doc_id):
-                    logger.warning(f"Document {doc_id} still exists in full_docs")
-
-                # Verify if chunks have been deleted
-                all_remaining_chunks = await self.text_chunks.get_all()
-                remaining_related_chunks = {
-                    chunk_id: chunk_data
-                    for chunk_id, chunk_data in all_remaining_chunks.items()
-                    if isinstance(chunk_data, dict)
-                    and chunk_data.get("full_doc_id") == doc_id
-                }
-
-                if remaining_related_chunks:
-                    logger.warning(
-                        f"Found {len(remaining_related_chunks)} remaining chunks"
-                    )
-
-                # Verify entities and relationships
-                for chunk_id in chunk_ids:
-                    await process_data("entities", self.entities_vdb, chunk_id)
-                    await process_data(
-                        "relationships", self.relationships_vdb, chunk_id
-                    )
-
-            await verify_deletion()
+            return True
 
         except Exception as e:
             logger.error(f"Error while deleting document {doc_id}: {e}")
+            raise
+
+    async def _scan_doc_index(
+        self, doc_id: str
+    ) -> tuple[set[str], set[str], set[tuple[str, str]]]:
+        """Rebuild the deletion index of a document by scanning all stored data
+
+        Only used for documents processed before the index was recorded in their
+        status, and for documents whose processing did not complete.
+        """
+        all_chunks = await self.text_chunks.get_all()
+        chunk_ids = {
+            chunk_id
+            for chunk_id, chunk_data in all_chunks.items()
+            if isinstance(chunk_data, dict) and chunk_data.get("full_doc_id") == doc_id
+        }
+        if not chunk_ids:
+            return chunk_ids, set(), set()
+
+        graph = self.chunk_entity_relation_graph
+        all_labels = await graph.get_all_labels()
+        nodes = await graph.get_nodes_batch(all_labels)
+        entity_names = {
+            entity
+            for entity, node_data in nodes.items()
+            if strip_chunk_sources(node_data, chunk_ids) is not None
+        }
+        node_edges = await graph.get_nodes_edges_batch(all_labels)
+        pairs = {
+            tuple(sorted(edge))
+            for edge_list in node_edges.values()
+            for edge in edge_list or []
+        }
+        edges = await graph.get_edges_batch(
+            [{"src": src, "tgt": tgt} for src, tgt in pairs]
+        )
+        relation_pairs = {
+            pair
+            for pair, edge_data in edges.items()
+            if strip_chunk_sources(edge_data, chunk_ids) is not None
+        }
+        return chunk_ids, entity_names, relation_pairs
 
     async def adelete_by_entity(self, entity_name: str) -> None:
         """Asynchronously delete an entity and all its relationships.
@@ -2196,20 +2232,23 @@ class LightRAG:
     async def aexport_data(
         self,
         output_path: str,
-        file_format: Literal["csv", "excel", "md", "txt"] = "csv",
+        file_format: Literal["csv", "excel", "md", "txt", "jsonl", "parquet"] = "csv",
         include_vector_data: bool = False,
+        batch_size: int = 1000,
     ) -> None:
         """
         Asynchronously exports all entities, relations, and relationships to various formats.
         Args:
             output_path: The path to the output file (including extension).
-            file_format: Output format - "csv", "excel", "md", "txt".
+            file_format: Output format - "csv", "excel", "md", "txt", "jsonl", "parquet".
                 - csv: Comma-separated values file
                 - excel: Microsoft Excel file with multiple sheets
                 - md: Markdown tables
                 - txt: Plain text formatted output
-                - table: Print formatted tables to console
+                - jsonl: One JSON object per line
+                - parquet: Apache Parquet table
             include_vector_data: Whether to include data from the vector database.
+            batch_size: Number of nodes or edges read from the storages at a time.
         """
         from .utils import aexport_data as utils_aexport_data
 
@@ -2220,25 +2259,29 @@ class LightRAG:
             output_path,
             file_format,
             include_vector_data,
+            batch_size,
         )
 
     def export_data(
         self,
         output_path: str,
-        file_format: Literal["csv", "excel", "md", "txt"] = "csv",
+        file_format: Literal["csv", "excel", "md", "txt", "jsonl", "parquet"] = "csv",
         include_vector_data: bool = False,
+        batch_size: int = 1000,
     ) -> None:
         """
         Synchronously exports all entities, relations, and relationships to various formats.
         Args:
             output_path: The path to the output file (including extension).
-            file_format: Output format - "csv", "excel", "md", "txt".
+            file_format: Output format - "csv", "excel", "md", "txt", "jsonl", "parquet".
                 - csv: Comma-separated values file
                 - excel: Microsoft Excel file with multiple sheets
                 - md: Markdown tables
                 - txt: Plain text formatted output
-                - table: Print formatted tables to console
+                - jsonl: One JSON object per line
+                - parquet: Apache Parquet table
             include_vector_data: Whether to include data from the vector database.
+            batch_size: Number of nodes or edges read from the storages at a time.
         """
         try:
             loop = asyncio.get_event_loop()
@@ -2247,5 +2290,5 @@ class LightRAG:
             asyncio.set_event_loop(loop)
 
         loop.run_until_complete(
-            self.aexport_data(output_path, file_format, include_vector_data)
+            self.aexport_data(output_path, file_format, include_vector_data, batch_size)
         )
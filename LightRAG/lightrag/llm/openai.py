@@ -1,6 +1,9 @@
 from ..utils import verbose_debug, VERBOSE_DEBUG
 import sys
 import os
+import json
+import asyncio
+import weakref
 import logging
 
 if sys.version_info < (3, 9):
@@ -15,10 +18,12 @@ if not pm.is_installed("openai"):
 
 from openai import (
     AsyncOpenAI,
+    DefaultAsyncHttpxClient,
     APIConnectionError,
     RateLimitError,
     APITimeoutError,
 )
+import httpx
 from tenacity import (
     retry,
     stop_after_attempt,
@@ -29,6 +34,7 @@ from lightrag.utils import (
     wrap_embedding_func_with_attrs,
     locate_json_string_body_from_string,
     safe_unicode_decode,
+    get_env_value,
     logger,
 )
 from lightrag.types import GPTKeywordExtractionFormat
@@ -96,6 +102,101 @@ def create_openai_async_client(
     return AsyncOpenAI(**merged_configs)
 
 
+# Process-wide registry of pooled clients: event loop -> cache key -> client.
+# httpx connection pools are bound to the event loop they were opened on, so every
+# loop gets its own clients, and a loop's clients are dropped along with it.
+_openai_async_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[str, AsyncOpenAI]
+] = weakref.WeakKeyDictionary()
+
+
+def _create_pooled_http_client(max_connections: int) -> httpx.AsyncClient:
+    """Create a keep-alive httpx client sized for `max_connections` concurrent calls.
+
+    HTTP/2 is enabled when the optional `h2` package is installed and
+    OPENAI_HTTP2 is not disabled.
+    """
+    max_keepalive = get_env_value("OPENAI_POOL_MAX_KEEPALIVE", max_connections, int)
+    keepalive_expiry = get_env_value("OPENAI_POOL_KEEPALIVE_EXPIRY", 60.0, float)
+    http2 = get_env_value("OPENAI_HTTP2", True, bool) and pm.is_installed("h2")
+    return DefaultAsyncHttpxClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        ),
+    )
+
+
+def get_openai_async_client(
+    api_key: str | None = None,
+    base_url: str | None = None,
+    client_configs: dict[str, Any] = None,
+    max_connections: int | None = None,
+) -> AsyncOpenAI:
+    """Return a long-lived AsyncOpenAI client from the process-wide registry.
+
+    Clients are keyed by base_url, api_key, client_configs and pool size, and keep
+    their connection pool open until `close_openai_async_clients` is called, so
+    repeated calls skip TLS handshakes and connection setup.
+
+    Args:
+        api_key: OpenAI API key. If None, uses the OPENAI_API_KEY environment variable.
+        base_url: Base URL for the OpenAI API. If None, uses the default OpenAI API URL.
+        client_configs: Additional configuration options for the AsyncOpenAI client.
+            If it contains an `http_client`, that client is used as-is.
+        max_connections: Size of the connection pool. Defaults to OPENAI_POOL_MAX_CONNECTIONS,
+            falling back to MAX_ASYNC.
+
+    Returns:
+        A shared AsyncOpenAI client instance.
+    """
+    if client_configs is None:
+        client_configs = {}
+    if max_connections is None:
+        max_connections = get_env_value(
+            "OPENAI_POOL_MAX_CONNECTIONS", get_env_value("MAX_ASYNC", 4, int), int
+        )
+
+    cache_key = json.dumps(
+        [api_key, base_url, client_configs, max_connections],
+        sort_keys=True,
+        default=repr,
+    )
+    # Open connections can keep a closed loop alive, so drop its clients here
+    for closed_loop in [loop for loop in _openai_async_clients if loop.is_closed()]:
+        _openai_async_clients.pop(closed_loop, None)
+    loop_clients = _openai_async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = loop_clients.get(cache_key)
+    if client is not None and not client.is_closed():
+        return client
+
+    if "http_client" not in client_configs:
+        client_configs = {
+            **client_configs,
+            "http_client": _create_pooled_http_client(max_connections),
+        }
+    client = create_openai_async_client(
+        api_key=api_key, base_url=base_url, client_configs=client_configs
+    )
+    loop_clients[cache_key] = client
+    logger.debug(
+        f"Created pooled OpenAI client for {client.base_url} "
+        f"(max_connections={max_connections})"
+    )
+    return client
+
+
+async def close_openai_async_clients() -> None:
+    """Close every pooled client owned by the running event loop."""
+    for client in _openai_async_clients.pop(asyncio.get_running_loop(), {}).values():
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"Failed to close pooled OpenAI client: {e}")
+
+
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=4, max=10),
@@ -152,8 +253,8 @@ async def openai_complete_if_cache(
     # Extract client configuration options
     client_configs = kwargs.pop("openai_client_configs", {})
 
-    # Create the OpenAI client
-    openai_async_client = create_openai_async_client(
+    # Reuse the pooled OpenAI client
+    openai_async_client = get_openai_async_client(
         api_key=api_key, base_url=base_url, client_configs=client_configs
     )
 
@@ -188,21 +289,17 @@ async def openai_complete_if_cache(
             )
     except APIConnectionError as e:
         logger.error(f"OpenAI API Connection Error: {e}")
-        await openai_async_client.close()  # Ensure client is closed
         raise
     except RateLimitError as e:
         logger.error(f"OpenAI API Rate Limit Error: {e}")
-        await openai_async_client.close()  # Ensure client is closed
         raise
     except APITimeoutError as e:
         logger.error(f"OpenAI API Timeout Error: {e}")
-        await openai_async_client.close()  # Ensure client is closed
         raise
     except Exception as e:
         logger.error(
             f"OpenAI API Call Failed,\nModel: {model},\nParams: {kwargs}, Got: {e}"
         )
-        await openai_async_client.close()  # Ensure client is closed
         raise
 
     if hasattr(response, "__aiter__"):
@@ -247,8 +344,6 @@ async def openai_complete_if_cache(
                         logger.warning(
                             f"Failed to close stream response: {close_error}"
                         )
-                # Ensure client is closed in case of exception
-                await openai_async_client.close()
                 raise
             finally:
                 # Ensure resources are released even if no exception occurs
@@ -265,58 +360,39 @@ async def openai_complete_if_cache(
                             f"Failed to close stream response in finally block: {close_error}"
                         )
 
-                # This prevents resource leaks since the caller doesn't handle closing
-                try:
-                    await openai_async_client.close()
-                    logger.debug(
-                        "Successfully closed OpenAI client for streaming response"
-                    )
-                except Exception as client_close_error:
-                    logger.warning(
-                        f"Failed to close OpenAI client in streaming finally block: {client_close_error}"
-                    )
-
         return inner()
 
     else:
-        try:
-            if (
-                not response
-                or not response.choices
-                or not hasattr(response.choices[0], "message")
-                or not hasattr(response.choices[0].message, "content")
-            ):
-                logger.error("Invalid response from OpenAI API")
-                await openai_async_client.close()  # Ensure client is closed
-                raise InvalidResponseError("Invalid response from OpenAI API")
-
-            content = response.choices[0].message.content
-
-            if not content or content.strip() == "":
-                logger.error("Received empty content from OpenAI API")
-                await openai_async_client.close()  # Ensure client is closed
-                raise InvalidResponseError("Received empty content from OpenAI API")
-
-            if r"\u" in content:
-                content = safe_unicode_decode(content.encode("utf-8"))
-
-            if token_tracker and hasattr(response, "usage"):
-                token_counts = {
-                    "prompt_tokens": getattr(response.usage, "prompt_tokens", 0),
-                    "completion_tokens": getattr(
-                        response.usage, "completion_tokens", 0
-                    ),
-                    "total_tokens": getattr(response.usage, "total_tokens", 0),
-                }
-                token_tracker.add_usage(token_counts)
-
-            logger.debug(f"Response content len: {len(content)}")
-            verbose_debug(f"Response: {response}")
-
-            return content
-        finally:
-            # Ensure client is closed in all cases for non-streaming responses
-            await openai_async_client.close()
+        if (
+            not response
+            or not response.choices
+            or not hasattr(response.choices[0], "message")
+            or not hasattr(response.choices[0].message, "content")
+        ):
+            logger.error("Invalid response from OpenAI API")
+            raise InvalidResponseError("Invalid response from OpenAI API")
+
+        content = response.choices[0].message.content
+
+        if not content or content.strip() == "":
+            logger.error("Received empty content from OpenAI API")
+            raise InvalidResponseError("Received empty content from OpenAI API")
+
+        if r"\u" in content:
+            content = safe_unicode_decode(content.encode("utf-8"))
+
+        if token_tracker and hasattr(response, "usage"):
+            token_counts = {
+                "prompt_tokens": getattr(response.usage, "prompt_tokens", 0),
+                "completion_tokens": getattr(response.usage, "completion_tokens", 0),
+                "total_tokens": getattr(response.usage, "total_tokens", 0),
+            }
+            token_tracker.add_usage(token_counts)
+
+        logger.debug(f"Response content len: {len(content)}")
+        verbose_debug(f"Response: {response}")
+
+        return content
 
 
 async def openai_complete(
@@ -442,13 +518,15 @@ async def openai_embed(
         RateLimitError: If the OpenAI API rate limit is exceeded.
         APITimeoutError: If the OpenAI API request times out.
     """
-    # Create the OpenAI client
-    openai_async_client = create_openai_async_client(
-        api_key=api_key, base_url=base_url, client_configs=client_configs
+    # Reuse the pooled OpenAI client, sized for embedding concurrency
+    openai_async_client = get_openai_async_client(
+        api_key=api_key,
+        base_url=base_url,
+        client_configs=client_configs,
+        max_connections=get_env_value("EMBEDDING_FUNC_MAX_ASYNC", 16, int),
     )
 
-    async with openai_async_client:
-        response = await openai_async_client.embeddings.create(
-            model=model, input=texts, encoding_format="float"
-        )
-        return np.array([dp.embedding for dp in response.data])
+    response = await openai_async_client.embeddings.create(
+        model=model, input=texts, encoding_format="float"
+    )
+    return np.array([dp.embedding for dp in response.data])
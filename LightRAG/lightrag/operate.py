@@ -34,6 +34,7 @@ from .base import (
     QueryParam,
 )
 from .prompt import GRAPH_FIELD_SEP, PROMPTS
+from .constants import DEFAULT_CHUNK_FETCH_BATCH_SIZE
 import time
 from dotenv import load_dotenv
 
@@ -240,22 +241,21 @@ async def _handle_single_relationship_extraction(
     )
 
 
-async def _merge_nodes_then_upsert(
+async def _merge_node_data(
     entity_name: str,
     nodes_data: list[dict],
-    knowledge_graph_inst: BaseGraphStorage,
+    already_node: dict | None,
     global_config: dict,
     pipeline_status: dict = None,
     pipeline_status_lock=None,
     llm_response_cache: BaseKVStorage | None = None,
 ):
-    """Get existing nodes from knowledge graph use name,if exists, merge data, else create, then upsert."""
+    """Merge extracted entity data into the existing node (if any) and return the node data to upsert."""
     already_entity_types = []
     already_source_ids = []
     already_description = []
     already_file_paths = []
 
-    already_node = await knowledge_graph_inst.get_node(entity_name)
     if already_node:
         already_entity_types.append(already_node["entity_type"])
         already_source_ids.extend(
@@ -320,67 +320,58 @@ async def _merge_nodes_then_upsert(
         file_path=file_path,
         created_at=int(time.time()),
     )
-    await knowledge_graph_inst.upsert_node(
-        entity_name,
-        node_data=node_data,
-    )
-    node_data["entity_name"] = entity_name
     return node_data
 
 
-async def _merge_edges_then_upsert(
+async def _merge_edge_data(
     src_id: str,
     tgt_id: str,
     edges_data: list[dict],
-    knowledge_graph_inst: BaseGraphStorage,
+    already_edge: dict | None,
     global_config: dict,
     pipeline_status: dict = None,
     pipeline_status_lock=None,
     llm_response_cache: BaseKVStorage | None = None,
 ):
-    if src_id == tgt_id:
-        return None
-
+    """Merge extracted relation data into the existing edge (if any) and return the edge data to upsert."""
     already_weights = []
     already_source_ids = []
     already_description = []
     already_keywords = []
     already_file_paths = []
 
-    if await knowledge_graph_inst.has_edge(src_id, tgt_id):
-        already_edge = await knowledge_graph_inst.get_edge(src_id, tgt_id)
-        # Handle the case where get_edge returns None or missing fields
-        if already_edge:
-            # Get weight with default 0.0 if missing
-            already_weights.append(already_edge.get("weight", 0.0))
-
-            # Get source_id with empty string default if missing or None
-            if already_edge.get("source_id") is not None:
-                already_source_ids.extend(
-                    split_string_by_multi_markers(
-                        already_edge["source_id"], [GRAPH_FIELD_SEP]
-                    )
+    # Handle the case where the stored edge is missing fields
+    if already_edge:
+        # Get weight with default 0.0 if missing
+        already_weights.append(already_edge.get("weight", 0.0))
+
+        # Get source_id with empty string default if missing or None
+        if already_edge.get("source_id") is not None:
+            already_source_ids.extend(
+                split_string_by_multi_markers(
+                    already_edge["source_id"], [GRAPH_FIELD_SEP]
                 )
+            )
 
-            # Get file_path with empty string default if missing or None
-            if already_edge.get("file_path") is not None:
-                already_file_paths.extend(
-                    split_string_by_multi_markers(
-                        already_edge["file_path"], [GRAPH_FIELD_SEP]
-                    )
+        # Get file_path with empty string default if missing or None
+        if already_edge.get("file_path") is not None:
+            already_file_paths.extend(
+                split_string_by_multi_markers(
+                    already_edge["file_path"], [GRAPH_FIELD_SEP]
                 )
+            )
 
-            # Get description with empty string default if missing or None
-            if already_edge.get("description") is not None:
-                already_description.append(already_edge["description"])
+        # Get description with empty string default if missing or None
+        if already_edge.get("description") is not None:
+            already_description.append(already_edge["description"])
 
-            # Get keywords with empty string default if missing or None
-            if already_edge.get("keywords") is not None:
-                already_keywords.extend(
-                    split_string_by_multi_markers(
-                        already_edge["keywords"], [GRAPH_FIELD_SEP]
-                    )
+        # Get keywords with empty string default if missing or None
+        if already_edge.get("keywords") is not None:
+            already_keywords.extend(
+                split_string_by_multi_markers(
+                    already_edge["keywords"], [GRAPH_FIELD_SEP]
                 )
+            )
 
     # Process edges_data with None checks
     weight = sum([dp["weight"] for dp in edges_data] + already_weights)
@@ -421,30 +412,6 @@ async def _merge_edges_then_upsert(
         )
     )
 
-    for need_insert_id in [src_id, tgt_id]:
-        if not (await knowledge_graph_inst.has_node(need_insert_id)):
-            # # Discard this edge if the node does not exist
-            # if need_insert_id == src_id:
-            #     logger.warning(
-            #         f"Discard edge: {src_id} - {tgt_id} | Source node missing"
-            #     )
-            # else:
-            #     logger.warning(
-            #         f"Discard edge: {src_id} - {tgt_id} | Target node missing"
-            #     )
-            # return None
-            await knowledge_graph_inst.upsert_node(
-                need_insert_id,
-                node_data={
-                    "entity_id": need_insert_id,
-                    "source_id": source_id,
-                    "description": description,
-                    "entity_type": "UNKNOWN",
-                    "file_path": file_path,
-                    "created_at": int(time.time()),
-                },
-            )
-
     force_llm_summary_on_merge = global_config["force_llm_summary_on_merge"]
 
     num_fragment = description.count(GRAPH_FIELD_SEP) + 1
@@ -476,22 +443,8 @@ async def _merge_edges_then_upsert(
                     pipeline_status["latest_message"] = status_message
                     pipeline_status["history_messages"].append(status_message)
 
-    await knowledge_graph_inst.upsert_edge(
-        src_id,
-        tgt_id,
-        edge_data=dict(
-            weight=weight,
-            description=description,
-            keywords=keywords,
-            source_id=source_id,
-            file_path=file_path,
-            created_at=int(time.time()),
-        ),
-    )
-
-    edge_data = dict(
-        src_id=src_id,
-        tgt_id=tgt_id,
+    return dict(
+        weight=weight,
         description=description,
         keywords=keywords,
         source_id=source_id,
@@ -499,7 +452,114 @@ async def _merge_edges_then_upsert(
         created_at=int(time.time()),
     )
 
-    return edge_data
+
+def collect_entity_relation_keys(
+    chunk_results: list,
+) -> tuple[list[str], list[list[str]]]:
+    """Collect the entity names and relation pairs touched by extraction results
+
+    Relation pairs are sorted the same way merge_nodes_and_edges stores them, and
+    relation endpoints count as entities since merging creates missing nodes.
+    """
+    entity_names = set()
+    relation_pairs = set()
+    for maybe_nodes, maybe_edges in chunk_results:
+        entity_names.update(maybe_nodes)
+        for edge_key in maybe_edges:
+            relation_pairs.add(tuple(sorted(edge_key)))
+            entity_names.update(edge_key)
+    return sorted(entity_names), [list(pair) for pair in sorted(relation_pairs)]
+
+
+def strip_chunk_sources(data: dict | None, chunk_ids: set[str]) -> str | None:
+    """Remove chunk_ids from the source_id of a node or edge
+
+    Returns None when the record does not reference any of the chunks, otherwise
+    the remaining source_id (empty when no source is left).
+    """
+    if not data or not data.get("source_id"):
+        return None
+    sources = data["source_id"].split(GRAPH_FIELD_SEP)
+    remaining = [source for source in sources if source not in chunk_ids]
+    if len(remaining) == len(sources):
+        return None
+    return GRAPH_FIELD_SEP.join(remaining)
+
+
+async def _get_existing_graph_data(
+    knowledge_graph_inst: BaseGraphStorage,
+    node_ids: list[str],
+    edge_keys: list[tuple[str, str]],
+) -> tuple[dict[str, dict], dict[tuple[str, str], dict]]:
+    """Fetch the stored nodes and edges a merge will update with two batch calls"""
+    nodes, edges = await asyncio.gather(
+        knowledge_graph_inst.get_nodes_batch(node_ids),
+        knowledge_graph_inst.get_edges_batch(
+            [{"src": src, "tgt": tgt} for src, tgt in edge_keys]
+        ),
+    )
+    # In-memory storages return live objects, keep snapshots to detect changes
+    return (
+        {node_id: dict(node) for node_id, node in nodes.items()},
+        {edge_key: dict(edge) for edge_key, edge in edges.items()},
+    )
+
+
+async def _merge_graph_data(
+    all_nodes: dict[str, list[dict]],
+    all_edges: dict[tuple[str, str], list[dict]],
+    existing_nodes: dict[str, dict],
+    existing_edges: dict[tuple[str, str], dict],
+    global_config: dict,
+    pipeline_status: dict = None,
+    pipeline_status_lock=None,
+    llm_response_cache: BaseKVStorage | None = None,
+) -> tuple[dict[str, dict], dict[tuple[str, str], dict]]:
+    """Merge extracted entities and relations with stored data, summarizing concurrently"""
+    node_names = list(all_nodes)
+    edge_keys = list(all_edges)
+    results = await asyncio.gather(
+        *[
+            _merge_node_data(
+                entity_name,
+                all_nodes[entity_name],
+                existing_nodes.get(entity_name),
+                global_config,
+                pipeline_status,
+                pipeline_status_lock,
+                llm_response_cache,
+            )
+            for entity_name in node_names
+        ],
+        *[
+            _merge_edge_data(
+                src_id,
+                tgt_id,
+                all_edges[(src_id, tgt_id)],
+                existing_edges.get((src_id, tgt_id)),
+                global_config,
+                pipeline_status,
+                pipeline_status_lock,
+                llm_response_cache,
+            )
+            for src_id, tgt_id in edge_keys
+        ],
+    )
+    merged_nodes = dict(zip(node_names, results[: len(node_names)]))
+    merged_edges = dict(zip(edge_keys, results[len(node_names) :]))
+    return merged_nodes, merged_edges
+
+
+async def _upsert_graph_data(
+    knowledge_graph_inst: BaseGraphStorage,
+    nodes: dict[str, dict],
+    edges: dict[tuple[str, str], dict],
+) -> None:
+    """Write merged nodes, then the edges between them, in batches"""
+    if nodes:
+        await knowledge_graph_inst.upsert_nodes_batch(nodes)
+    if edges:
+        await knowledge_graph_inst.upsert_edges_batch(edges)
 
 
 async def merge_nodes_and_edges(
@@ -517,6 +577,11 @@ async def merge_nodes_and_edges(
 ) -> None:
     """Merge nodes and edges from extraction results
 
+    Existing nodes and edges are prefetched in batch and merged (including LLM
+    summaries) without holding any lock. Only the entities of this document are
+    then locked to re-validate the prefetched data and write the result back, so
+    documents that do not share entities merge in parallel.
+
     Args:
         chunk_results: List of tuples (maybe_nodes, maybe_edges) containing extracted entities and relationships
         knowledge_graph_inst: Knowledge graph storage
@@ -528,7 +593,7 @@ async def merge_nodes_and_edges(
         llm_response_cache: LLM response cache
     """
     # Get lock manager from shared storage
-    from .kg.shared_storage import get_graph_db_lock
+    from .kg.shared_storage import get_graph_keys_lock
 
     # Collect all nodes and edges from all chunks
     all_nodes = defaultdict(list)
@@ -542,55 +607,84 @@ async def merge_nodes_and_edges(
         # Collect edges with sorted keys for undirected graph
         for edge_key, edges in maybe_edges.items():
             sorted_edge_key = tuple(sorted(edge_key))
-            all_edges[sorted_edge_key].extend(edges)
-
-    # Centralized processing of all nodes and edges
-    entities_data = []
-    relationships_data = []
-
-    # Merge nodes and edges
-    # Use graph database lock to ensure atomic merges and updates
-    graph_db_lock = get_graph_db_lock(enable_logging=False)
-    async with graph_db_lock:
-        async with pipeline_status_lock:
-            log_message = (
-                f"Merging stage {current_file_number}/{total_files}: {file_path}"
-            )
-            logger.info(log_message)
-            pipeline_status["latest_message"] = log_message
-            pipeline_status["history_messages"].append(log_message)
+            if sorted_edge_key[0] != sorted_edge_key[1]:
+                all_edges[sorted_edge_key].extend(edges)
 
-        # Process and update all entities at once
-        for entity_name, entities in all_nodes.items():
-            entity_data = await _merge_nodes_then_upsert(
-                entity_name,
-                entities,
-                knowledge_graph_inst,
-                global_config,
-                pipeline_status,
-                pipeline_status_lock,
-                llm_response_cache,
+    async with pipeline_status_lock:
+        log_message = f"Merging stage {current_file_number}/{total_files}: {file_path}"
+        logger.info(log_message)
+        pipeline_status["latest_message"] = log_message
+        pipeline_status["history_messages"].append(log_message)
+
+    # Relation endpoints are locked too, as missing endpoints get created
+    node_ids = sorted(set(all_nodes) | {node for key in all_edges for node in key})
+    edge_keys = list(all_edges)
+
+    existing_nodes, existing_edges = await _get_existing_graph_data(
+        knowledge_graph_inst, node_ids, edge_keys
+    )
+    merged_nodes, merged_edges = await _merge_graph_data(
+        all_nodes,
+        all_edges,
+        existing_nodes,
+        existing_edges,
+        global_config,
+        pipeline_status,
+        pipeline_status_lock,
+        llm_response_cache,
+    )
+
+    async with get_graph_keys_lock(node_ids):
+        # Another document may have merged the same entities meanwhile
+        current_nodes, current_edges = await _get_existing_graph_data(
+            knowledge_graph_inst, node_ids, edge_keys
+        )
+        stale_nodes = {
+            entity_name: nodes_data
+            for entity_name, nodes_data in all_nodes.items()
+            if current_nodes.get(entity_name) != existing_nodes.get(entity_name)
+        }
+        stale_edges = {
+            edge_key: edges_data
+            for edge_key, edges_data in all_edges.items()
+            if current_edges.get(edge_key) != existing_edges.get(edge_key)
+        }
+        if stale_nodes or stale_edges:
+            logger.info(
+                f"Re-merging {len(stale_nodes)} entities and {len(stale_edges)} relations updated concurrently"
             )
-            entities_data.append(entity_data)
-
-        # Process and update all relationships at once
-        for edge_key, edges in all_edges.items():
-            edge_data = await _merge_edges_then_upsert(
-                edge_key[0],
-                edge_key[1],
-                edges,
-                knowledge_graph_inst,
+            remerged_nodes, remerged_edges = await _merge_graph_data(
+                stale_nodes,
+                stale_edges,
+                current_nodes,
+                current_edges,
                 global_config,
                 pipeline_status,
                 pipeline_status_lock,
                 llm_response_cache,
             )
-            if edge_data is not None:
-                relationships_data.append(edge_data)
+            merged_nodes.update(remerged_nodes)
+            merged_edges.update(remerged_edges)
+
+        # Create missing relation endpoints from the relation data
+        graph_nodes = dict(merged_nodes)
+        for (src_id, tgt_id), edge_data in merged_edges.items():
+            for node_id in (src_id, tgt_id):
+                if node_id not in graph_nodes and node_id not in current_nodes:
+                    graph_nodes[node_id] = {
+                        "entity_id": node_id,
+                        "source_id": edge_data["source_id"],
+                        "description": edge_data["description"],
+                        "entity_type": "UNKNOWN",
+                        "file_path": edge_data["file_path"],
+                        "created_at": int(time.time()),
+                    }
+
+        await _upsert_graph_data(knowledge_graph_inst, graph_nodes, merged_edges)
 
         # Update total counts
-        total_entities_count = len(entities_data)
-        total_relations_count = len(relationships_data)
+        total_entities_count = len(merged_nodes)
+        total_relations_count = len(merged_edges)
 
         log_message = f"Updating {total_entities_count} entities  {current_file_number}/{total_files}: {file_path}"
         logger.info(log_message)
@@ -600,16 +694,16 @@ async def merge_nodes_and_edges(
                 pipeline_status["history_messages"].append(log_message)
 
         # Update vector databases with all collected data
-        if entity_vdb is not None and entities_data:
+        if entity_vdb is not None and merged_nodes:
             data_for_vdb = {
-                compute_mdhash_id(dp["entity_name"], prefix="ent-"): {
-                    "entity_name": dp["entity_name"],
+                compute_mdhash_id(entity_name, prefix="ent-"): {
+                    "entity_name": entity_name,
                     "entity_type": dp["entity_type"],
-                    "content": f"{dp['entity_name']}\n{dp['description']}",
+                    "content": f"{entity_name}\n{dp['description']}",
                     "source_id": dp["source_id"],
                     "file_path": dp.get("file_path", "unknown_source"),
                 }
-                for dp in entities_data
+                for entity_name, dp in merged_nodes.items()
             }
             await entity_vdb.upsert(data_for_vdb)
 
@@ -620,17 +714,17 @@ async def merge_nodes_and_edges(
                 pipeline_status["latest_message"] = log_message
                 pipeline_status["history_messages"].append(log_message)
 
-        if relationships_vdb is not None and relationships_data:
+        if relationships_vdb is not None and merged_edges:
             data_for_vdb = {
-                compute_mdhash_id(dp["src_id"] + dp["tgt_id"], prefix="rel-"): {
-                    "src_id": dp["src_id"],
-                    "tgt_id": dp["tgt_id"],
+                compute_mdhash_id(src_id + tgt_id, prefix="rel-"): {
+                    "src_id": src_id,
+                    "tgt_id": tgt_id,
                     "keywords": dp["keywords"],
-                    "content": f"{dp['src_id']}\t{dp['tgt_id']}\n{dp['keywords']}\n{dp['description']}",
+                    "content": f"{src_id}\t{tgt_id}\n{dp['keywords']}\n{dp['description']}",
                     "source_id": dp["source_id"],
                     "file_path": dp.get("file_path", "unknown_source"),
                 }
-                for dp in relationships_data
+                for (src_id, tgt_id), dp in merged_edges.items()
             }
             await relationships_vdb.upsert(data_for_vdb)
 
@@ -1211,6 +1305,24 @@ async def _get_vector_context(
         return [], [], []
 
 
+async def _run_query_branch(
+    name: str, coro, query_param: QueryParam
+) -> tuple[str, tuple | BaseException]:
+    """Run one retrieval branch with the per-branch timeout and record its timing"""
+    timeout = query_param.branch_timeout if query_param.branch_timeout > 0 else None
+    start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(coro, timeout=timeout)
+    except asyncio.TimeoutError as e:
+        result = e
+        logger.warning(f"Query branch '{name}' timed out after {timeout}s, dropped")
+    except Exception as e:
+        result = e
+        logger.warning(f"Query branch '{name}' failed, dropped: {e}")
+    query_param.branch_timings[name] = round(time.perf_counter() - start, 4)
+    return name, result
+
+
 async def _build_query_context(
     ll_keywords: str,
     hl_keywords: str,
@@ -1223,79 +1335,74 @@ async def _build_query_context(
 ):
     logger.info(f"Process {os.getpid()} building query context...")
 
-    # Handle local and global modes as before
-    if query_param.mode == "local":
-        entities_context, relations_context, text_units_context = await _get_node_data(
+    # Chunks fetched by the local and global branches, so each is fetched only once
+    chunk_cache: dict[str, asyncio.Future] = {}
+
+    # Independent retrieval branches, run concurrently
+    branches = {}
+    if query_param.mode in ["local", "hybrid", "mix"]:
+        branches["local"] = _get_node_data(
             ll_keywords,
             knowledge_graph_inst,
             entities_vdb,
             text_chunks_db,
             query_param,
+            chunk_cache,
         )
-    elif query_param.mode == "global":
-        entities_context, relations_context, text_units_context = await _get_edge_data(
+    if query_param.mode in ["global", "hybrid", "mix"]:
+        branches["global"] = _get_edge_data(
             hl_keywords,
             knowledge_graph_inst,
             relationships_vdb,
             text_chunks_db,
             query_param,
+            chunk_cache,
         )
-    else:  # hybrid or mix mode
-        ll_data = await _get_node_data(
-            ll_keywords,
-            knowledge_graph_inst,
-            entities_vdb,
-            text_chunks_db,
-            query_param,
-        )
-        hl_data = await _get_edge_data(
-            hl_keywords,
-            knowledge_graph_inst,
-            relationships_vdb,
-            text_chunks_db,
+    # Only get vector data if in mix mode
+    if query_param.mode == "mix" and hasattr(query_param, "original_query"):
+        # Get tokenizer from text_chunks_db
+        tokenizer = text_chunks_db.global_config.get("tokenizer")
+        branches["vector"] = _get_vector_context(
+            query_param.original_query,  # We need to pass the original query
+            chunks_vdb,
             query_param,
+            tokenizer,
         )
 
-        (
-            ll_entities_context,
-            ll_relations_context,
-            ll_text_units_context,
-        ) = ll_data
-
-        (
-            hl_entities_context,
-            hl_relations_context,
-            hl_text_units_context,
-        ) = hl_data
-
-        # Initialize vector data with empty lists
-        vector_entities_context, vector_relations_context, vector_text_units_context = (
-            [],
-            [],
-            [],
-        )
+    query_param.branch_timings.clear()
+    branch_results = await asyncio.gather(
+        *[_run_query_branch(name, coro, query_param) for name, coro in branches.items()]
+    )
+    logger.info(f"Query branch timings (s): {query_param.branch_timings}")
 
-        # Only get vector data if in mix mode
-        if query_param.mode == "mix" and hasattr(query_param, "original_query"):
-            # Get tokenizer from text_chunks_db
-            tokenizer = text_chunks_db.global_config.get("tokenizer")
-
-            # Get vector context in triple format
-            vector_data = await _get_vector_context(
-                query_param.original_query,  # We need to pass the original query
-                chunks_vdb,
-                query_param,
-                tokenizer,
-            )
+    branch_data = {
+        name: result
+        for name, result in branch_results
+        if not isinstance(result, BaseException) and result is not None
+    }
+    if not branch_data:
+        # Nothing to degrade to: surface the first error
+        _, error = branch_results[0]
+        raise error
 
-            # If vector_data is not None, unpack it
-            if vector_data is not None:
-                (
-                    vector_entities_context,
-                    vector_relations_context,
-                    vector_text_units_context,
-                ) = vector_data
+    # Dropped or empty branches contribute nothing to the combined context
+    empty = ([], [], [])
+    ll_entities_context, ll_relations_context, ll_text_units_context = branch_data.get(
+        "local", empty
+    )
+    hl_entities_context, hl_relations_context, hl_text_units_context = branch_data.get(
+        "global", empty
+    )
+    vector_entities_context, vector_relations_context, vector_text_units_context = (
+        branch_data.get("vector", empty)
+    )
 
+    if len(branches) == 1:
+        # local or global mode
+        entities_context, relations_context, text_units_context = next(
+            iter(branch_data.values())
+        )
+    else:  # hybrid or mix mode
         # Combine and deduplicate the entities, relationships, and sources
         entities_context = process_combine_contexts(
             hl_entities_context, ll_entities_context, vector_entities_context
@@ -1343,6 +1450,7 @@ async def _get_node_data(
     entities_vdb: BaseVectorStorage,
     text_chunks_db: BaseKVStorage,
     query_param: QueryParam,
+    chunk_cache: dict[str, asyncio.Future] | None = None,
 ):
     # get similar entities
     logger.info(
@@ -1388,6 +1496,7 @@ async def _get_node_data(
         query_param,
         text_chunks_db,
         knowledge_graph_inst,
+        chunk_cache,
     )
     use_relations = await _find_most_related_edges_from_entities(
         node_datas,
@@ -1469,11 +1578,74 @@ async def _get_node_data(
     return entities_context, relations_context, text_units_context
 
 
+# Result of chunk futures whose fetch failed or was cancelled
+_CHUNK_FETCH_ABORTED = object()
+
+
+async def _get_text_chunks_by_ids(
+    text_chunks_db: BaseKVStorage,
+    chunk_ids: list[str],
+    chunk_cache: dict[str, asyncio.Future] | None = None,
+) -> dict[str, dict | None]:
+    """Resolve chunk ids with as few get_by_ids round trips as possible.
+
+    Unseen ids are fetched in batches of DEFAULT_CHUNK_FETCH_BATCH_SIZE, all batches
+    concurrently. chunk_cache is shared by the branches of one query and holds a future
+    per chunk id, so ids already fetched (or being fetched) by another branch are not
+    requested again. If the fetching branch fails or is cancelled, the branches
+    waiting on its futures fetch those ids themselves.
+    """
+    if chunk_cache is None:
+        chunk_cache = {}
+    unique_ids = list(dict.fromkeys(chunk_ids))
+    missing_ids = [c_id for c_id in unique_ids if c_id not in chunk_cache]
+
+    futures = {}
+    if missing_ids:
+        loop = asyncio.get_running_loop()
+        futures = {c_id: loop.create_future() for c_id in missing_ids}
+        chunk_cache.update(futures)
+    # Taken before any await, the owner of a future may drop it from chunk_cache
+    pending = {c_id: chunk_cache[c_id] for c_id in unique_ids}
+
+    if missing_ids:
+        batches = [
+            missing_ids[i : i + DEFAULT_CHUNK_FETCH_BATCH_SIZE]
+            for i in range(0, len(missing_ids), DEFAULT_CHUNK_FETCH_BATCH_SIZE)
+        ]
+        try:
+            results = await asyncio.gather(
+                *[text_chunks_db.get_by_ids(batch) for batch in batches]
+            )
+        except BaseException:
+            # Make waiters in other branches refetch, and let later calls retry
+            for c_id, future in futures.items():
+                chunk_cache.pop(c_id, None)
+                if not future.done():
+                    future.set_result(_CHUNK_FETCH_ABORTED)
+            raise
+        for batch, rows in zip(batches, results):
+            for c_id, row in zip(batch, rows):
+                futures[c_id].set_result(row)
+
+    # Shielded so a cancelled waiter does not cancel a future another branch owns
+    chunks = {c_id: await asyncio.shield(future) for c_id, future in pending.items()}
+    aborted_ids = [
+        c_id for c_id, chunk in chunks.items() if chunk is _CHUNK_FETCH_ABORTED
+    ]
+    if aborted_ids:
+        chunks.update(
+            await _get_text_chunks_by_ids(text_chunks_db, aborted_ids, chunk_cache)
+        )
+    return chunks
+
+
 async def _find_most_related_text_unit_from_entities(
     node_datas: list[dict],
     query_param: QueryParam,
     text_chunks_db: BaseKVStorage,
     knowledge_graph_inst: BaseGraphStorage,
+    chunk_cache: dict[str, asyncio.Future] | None = None,
 ):
     text_units = [
         split_string_by_multi_markers(dp["source_id"], [GRAPH_FIELD_SEP])
@@ -1518,20 +1690,13 @@ async def _find_most_related_text_unit_from_entities(
                 all_text_units_lookup[c_id] = index
                 tasks.append((c_id, index, this_edges))
 
-    # Process in batches tasks at a time to avoid overwhelming resources
-    batch_size = 5
-    results = []
-
-    for i in range(0, len(tasks), batch_size):
-        batch_tasks = tasks[i : i + batch_size]
-        batch_results = await asyncio.gather(
-            *[text_chunks_db.get_by_id(c_id) for c_id, _, _ in batch_tasks]
-        )
-        results.extend(batch_results)
+    chunks_dict = await _get_text_chunks_by_ids(
+        text_chunks_db, [c_id for c_id, _, _ in tasks], chunk_cache
+    )
 
-    for (c_id, index, this_edges), data in zip(tasks, results):
+    for c_id, index, this_edges in tasks:
         all_text_units_lookup[c_id] = {
-            "data": data,
+            "data": chunks_dict.get(c_id),
             "order": index,
             "relation_counts": 0,
         }
@@ -1647,6 +1812,7 @@ async def _get_edge_data(
     relationships_vdb: BaseVectorStorage,
     text_chunks_db: BaseKVStorage,
     query_param: QueryParam,
+    chunk_cache: dict[str, asyncio.Future] | None = None,
 ):
     logger.info(
         f"Query edges: {keywords}, top_k: {query_param.top_k}, cosine: {relationships_vdb.cosine_better_than_threshold}"
@@ -1714,6 +1880,7 @@ async def _get_edge_data(
             query_param,
             text_chunks_db,
             knowledge_graph_inst,
+            chunk_cache,
         ),
     )
     logger.info(
@@ -1832,30 +1999,33 @@ async def _find_related_text_unit_from_relationships(
     query_param: QueryParam,
     text_chunks_db: BaseKVStorage,
     knowledge_graph_inst: BaseGraphStorage,
+    chunk_cache: dict[str, asyncio.Future] | None = None,
 ):
     text_units = [
         split_string_by_multi_markers(dp["source_id"], [GRAPH_FIELD_SEP])
         for dp in edge_datas
         if dp["source_id"] is not None
     ]
-    all_text_units_lookup = {}
 
-    async def fetch_chunk_data(c_id, index):
-        if c_id not in all_text_units_lookup:
-            chunk_data = await text_chunks_db.get_by_id(c_id)
-            # Only store valid data
-            if chunk_data is not None and "content" in chunk_data:
-                all_text_units_lookup[c_id] = {
-                    "data": chunk_data,
-                    "order": index,
-                }
-
-    tasks = []
+    # Keep the first (highest ranked) relation index each chunk appears in
+    chunk_orders: dict[str, int] = {}
     for index, unit_list in enumerate(text_units):
         for c_id in unit_list:
-            tasks.append(fetch_chunk_data(c_id, index))
+            chunk_orders.setdefault(c_id, index)
 
-    await asyncio.gather(*tasks)
+    chunks_dict = await _get_text_chunks_by_ids(
+        text_chunks_db, list(chunk_orders), chunk_cache
+    )
+
+    all_text_units_lookup = {}
+    for c_id, index in chunk_orders.items():
+        chunk_data = chunks_dict.get(c_id)
+        # Only store valid data
+        if chunk_data is not None and "content" in chunk_data:
+            all_text_units_lookup[c_id] = {
+                "data": chunk_data,
+                "order": index,
+            }
 
     if not all_text_units_lookup:
         logger.warning("No valid text chunks found")
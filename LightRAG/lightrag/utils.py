@@ -1,18 +1,26 @@
 from __future__ import annotations
 import weakref
+from abc import ABC, abstractmethod
 
 import asyncio
+import base64
+import heapq
 import html
+import inspect
 import csv
 import json
 import logging
 import logging.handlers
 import os
 import re
+import sqlite3
+import threading
+import time
 from dataclasses import dataclass
-from functools import wraps
+from datetime import datetime, timezone
+from functools import partial, wraps
 from hashlib import md5
-from typing import Any, Protocol, Callable, TYPE_CHECKING, List
+from typing import Any, Protocol, Callable, TYPE_CHECKING, Iterable, List
 import numpy as np
 from lightrag.prompt import PROMPTS
 from dotenv import load_dotenv
@@ -313,13 +321,22 @@ class QueueFullError(Exception):
     pass
 
 
-def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
+def priority_limit_async_func_call(
+    max_size: int,
+    max_queue_size: int = 1000,
+    rate_limiter: Any = None,
+    count_tokens: Callable[..., int] | None = None,
+):
     """
     Enhanced priority-limited asynchronous function call decorator
 
     Args:
         max_size: Maximum number of concurrent calls
         max_queue_size: Maximum queue capacity to prevent memory overflow
+        rate_limiter: Optional shared_storage.RateLimiter every call must be admitted
+            by, in priority order, before it enters the queue
+        count_tokens: Estimates the tokens of a call from its arguments for the
+            rate limiter's tokens per minute budget
     Returns:
         Decorator function
     """
@@ -534,6 +551,11 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
             # Ensure worker system is initialized
             await ensure_workers()
 
+            # Wait for the provider budget shared by all workers
+            if rate_limiter is not None and rate_limiter.enabled:
+                tokens = count_tokens(*args, **kwargs) if count_tokens else 0
+                await rate_limiter.acquire(tokens, _priority)
+
             # Create a future for the result
             future = asyncio.Future()
             active_futures.add(future)
@@ -595,6 +617,266 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
     return final_decro
 
 
+def batch_embedding_func_call(max_batch_size: int, max_wait: float = 0.003):
+    """
+    Embedding function decorator coalescing concurrent small calls into batches
+
+    Texts of calls arriving within max_wait seconds of each other are embedded
+    together by one call of the wrapped function, sent as soon as max_batch_size
+    texts are waiting, with the best (lowest) `_priority` of the batch. Texts
+    already waiting or being embedded are not requested twice. Calls of
+    max_batch_size texts or more, or with other arguments, are passed through.
+
+    Args:
+        max_batch_size: Maximum number of texts sent in one coalesced call
+        max_wait: Seconds the first text of a batch waits for others, 0 disables batching
+    Returns:
+        Decorator function
+    """
+
+    def final_decro(func):
+        if max_wait <= 0:
+            return func
+
+        pending: dict[str, asyncio.Future] = {}  # text -> future, not sent yet
+        in_flight: dict[str, asyncio.Future] = {}  # text -> future, being embedded
+        batch_priority = None
+        flush_timer = None
+        tasks = set()
+
+        async def embed(texts: list[str], priority: int):
+            try:
+                embeddings = await func(texts, _priority=priority)
+                if len(embeddings) != len(texts):
+                    raise ValueError(
+                        f"Embedding function returned {len(embeddings)} vectors for {len(texts)} texts"
+                    )
+            except BaseException as e:
+                for text in texts:
+                    future = in_flight.pop(text)
+                    if not future.done():
+                        future.set_exception(e)
+                if not isinstance(e, Exception):
+                    raise
+                return
+            for text, embedding in zip(texts, embeddings):
+                future = in_flight.pop(text)
+                if not future.done():
+                    future.set_result(embedding)
+
+        def flush():
+            """Send all pending texts as one call"""
+            nonlocal pending, batch_priority, flush_timer
+            if flush_timer is not None:
+                flush_timer.cancel()
+                flush_timer = None
+            if not pending:
+                return
+            texts = list(pending)
+            in_flight.update(pending)
+            priority = batch_priority
+            pending, batch_priority = {}, None
+            task = asyncio.create_task(embed(texts, priority))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        @wraps(func)
+        async def wait_func(texts, *args, _priority=10, **kwargs):
+            nonlocal batch_priority, flush_timer
+            if args or kwargs or len(texts) >= max_batch_size:
+                return await func(texts, *args, _priority=_priority, **kwargs)
+
+            loop = asyncio.get_running_loop()
+            futures = []
+            for text in texts:
+                future = in_flight.get(text) or pending.get(text)
+                if future is None:
+                    future = pending[text] = loop.create_future()
+                    if batch_priority is None or _priority < batch_priority:
+                        batch_priority = _priority
+                    if len(pending) >= max_batch_size:
+                        flush()
+                futures.append(future)
+
+            if pending and flush_timer is None:
+                flush_timer = loop.call_later(max_wait, flush)
+
+            # Shielded so a cancelled caller does not cancel texts shared with others
+            results = await asyncio.gather(*(asyncio.shield(f) for f in futures))
+            return np.array(results)
+
+        return wait_func
+
+    return final_decro
+
+
+def embedding_func_identity(embedding_func: Any, model_name: str = "") -> str | None:
+    """
+    Identify the embedding model behind an embedding function
+
+    EmbeddingFunc wrappers, decorators and functools.partial layers are unwrapped
+    down to the underlying function, whose module and qualified name are combined
+    with the model name. The model name falls back to the ``model``,
+    ``embed_model`` or ``model_name`` keyword bound by a partial.
+
+    Args:
+        embedding_func: The embedding function, usually an EmbeddingFunc
+        model_name: The configured embedding model name, if known
+    Returns:
+        The identity string, or None when the model cannot be determined
+    """
+    func = embedding_func
+    bound: dict[str, Any] = {}
+    while True:
+        if isinstance(func, EmbeddingFunc):
+            func = func.func
+        elif isinstance(func, partial):
+            # Outer partials take precedence over the keywords they wrap
+            bound = {**func.keywords, **bound}
+            func = func.func
+        elif hasattr(func, "__wrapped__"):
+            func = func.__wrapped__
+        else:
+            break
+
+    if not model_name:
+        model_name = next(
+            (
+                str(bound[name])
+                for name in ("model", "embed_model", "model_name")
+                if bound.get(name)
+            ),
+            "",
+        )
+    if not model_name:
+        return None
+    func_name = getattr(func, "__qualname__", type(func).__qualname__)
+    return f"{getattr(func, '__module__', '')}.{func_name}:{model_name}"
+
+
+class EmbeddingVectorCache:
+    """Content-addressed store of computed embeddings in a local SQLite file.
+
+    Vectors are kept as float16 under the md5 of embedding function identity
+    (see embedding_func_identity), dimension and text, so byte-identical chunks,
+    descriptions and query keywords are embedded once across re-ingestion and
+    restarts. The file is shared by all worker processes (WAL journal); hits and
+    misses are counted per process, in texts.
+    """
+
+    def __init__(self, path: str, embedding_id: str, embedding_dim: int = 0):
+        self.path = path
+        self._key_prefix = f"{embedding_id}:{embedding_dim}:"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text: str) -> str:
+        return md5((self._key_prefix + text).encode()).hexdigest()
+
+    def _get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            # Stay below SQLite's default limit of 999 bound parameters
+            for start in range(0, len(keys), 900):
+                batch = keys[start : start + 900]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings "
+                    f"WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float16)
+        return found
+
+    def _put_many(self, items: dict[str, np.ndarray]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector) VALUES (?, ?)",
+                [
+                    (key, np.asarray(vector, dtype=np.float16).tobytes())
+                    for key, vector in items.items()
+                ],
+            )
+
+    async def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        """Return the cached float16 vectors of the keys found"""
+        return await asyncio.to_thread(self._get_many, keys)
+
+    async def put_many(self, items: dict[str, np.ndarray]) -> None:
+        await asyncio.to_thread(self._put_many, items)
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def cache_embedding_func_call(cache: EmbeddingVectorCache | None):
+    """
+    Embedding function decorator answering texts from an EmbeddingVectorCache
+
+    Only the texts missing from the cache are passed to the wrapped function, and
+    their vectors are stored for later calls.
+
+    Args:
+        cache: The cache to consult, None disables caching
+    Returns:
+        Decorator function
+    """
+
+    def final_decro(func):
+        if cache is None:
+            return func
+
+        @wraps(func)
+        async def wait_func(texts, *args, **kwargs):
+            keys = [cache.key(text) for text in texts]
+            try:
+                found = await cache.get_many(list(set(keys)))
+            except Exception as e:
+                logger.warning(f"Embedding cache lookup failed: {str(e)}")
+                found = {}
+
+            missing = {}  # key -> text, each distinct text embedded once
+            for key, text in zip(keys, texts):
+                if key not in found:
+                    missing.setdefault(key, text)
+            missed = sum(key not in found for key in keys)
+            cache.hits += len(keys) - missed
+            cache.misses += missed
+
+            if missing:
+                embeddings = await func(list(missing.values()), *args, **kwargs)
+                computed = dict(zip(missing, embeddings))
+                try:
+                    await cache.put_many(computed)
+                except Exception as e:
+                    logger.warning(f"Embedding cache write failed: {str(e)}")
+                found.update(computed)
+
+            return np.array([found[key] for key in keys], dtype=np.float32)
+
+        return wait_func
+
+    return final_decro
+
+
 def wrap_embedding_func_with_attrs(**kwargs):
     """Wrap a function with attributes"""
 
@@ -702,6 +984,28 @@ class TiktokenTokenizer(Tokenizer):
             raise ValueError(f"Invalid model_name: {model_name}.")
 
 
+def estimate_llm_call_tokens(
+    tokenizer: Tokenizer,
+    prompt: str,
+    system_prompt: str | None = None,
+    history_messages: list[dict[str, Any]] | None = None,
+    **kwargs: Any,
+) -> int:
+    """Estimate the tokens an LLM call counts against a tokens per minute budget:
+    the prompt, system prompt and history plus the requested completion size"""
+    texts = [prompt or "", system_prompt or ""]
+    texts.extend(str(m.get("content", "")) for m in history_messages or [])
+    tokens = sum(len(tokenizer.encode(text)) for text in texts if text)
+    return tokens + int(kwargs.get("max_tokens") or 0)
+
+
+def estimate_embedding_call_tokens(
+    tokenizer: Tokenizer, texts: list[str], *args: Any, **kwargs: Any
+) -> int:
+    """Estimate the tokens an embedding call counts against a tokens per minute budget"""
+    return sum(len(tokenizer.encode(text)) for text in texts)
+
+
 def pack_user_ass_to_openai_messages(*args: str):
     roles = ["user", "assistant"]
     return [
@@ -783,6 +1087,354 @@ def process_combine_contexts(*context_lists):
     return combined_data
 
 
+class EmbeddingCacheIndex:
+    """In-memory matrix of the quantized query embeddings cached for one cache mode.
+
+    Rows keep the uint8 embedding with its dequantization params and precomputed
+    norm, so a similarity lookup is a matrix-vector product instead of a Python
+    loop that decodes and dequantizes every cached entry. Like the cache itself,
+    the index holds at most max_entries rows and drops rows older than ttl.
+    """
+
+    BLOCK_ROWS = 1024
+
+    def __init__(self, dim: int, max_entries: int = 0, ttl: int = 0):
+        self.dim = dim
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.ids: list[str] = []
+        self._rows: dict[str, int] = {}
+        self._type_codes: dict[str | None, int] = {}
+        self._size = 0
+        self._quantized = np.empty((0, dim), dtype=np.uint8)
+        self._min = np.empty(0, dtype=np.float32)
+        self._scale = np.empty(0, dtype=np.float32)
+        self._norm = np.empty(0, dtype=np.float32)
+        self._types = np.empty(0, dtype=np.int16)
+        self._created = np.empty(0, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @classmethod
+    def from_mode_cache(
+        cls, mode_cache: dict[str, Any], max_entries: int = 0, ttl: int = 0
+    ) -> "EmbeddingCacheIndex | None":
+        """Build the index from a {args_hash: cache_entry} mode dict"""
+        entries = [
+            (cache_id, cache_data)
+            for cache_id, cache_data in mode_cache.items()
+            if isinstance(cache_data, dict) and cache_data.get("embedding") is not None
+        ]
+        if ttl > 0:
+            expired_before = time.time() - ttl
+            entries = [
+                entry
+                for entry in entries
+                if entry[1].get("create_time", 0) >= expired_before
+            ]
+        if max_entries > 0 and len(entries) > max_entries:
+            # Keep the newest entries, as the cache eviction does
+            entries = heapq.nlargest(
+                max_entries, entries, key=lambda entry: entry[1].get("create_time", 0)
+            )
+
+        index = None
+        for cache_id, cache_data in entries:
+            quantized = _decode_cached_embedding(cache_data)
+            if quantized is None:
+                continue
+            if index is None:
+                index = cls(len(quantized), max_entries=max_entries, ttl=ttl)
+            index.add_cache_entry(cache_id, cache_data, quantized)
+        return index
+
+    def add_cache_entry(
+        self,
+        cache_id: str,
+        cache_data: dict[str, Any],
+        quantized: np.ndarray | None = None,
+    ) -> None:
+        """Insert or replace a cache entry dict holding a hex encoded embedding"""
+        if quantized is None:
+            quantized = _decode_cached_embedding(cache_data)
+            if quantized is None:
+                return
+        self.add(
+            cache_id,
+            quantized,
+            cache_data.get("embedding_min"),
+            cache_data.get("embedding_max"),
+            cache_data.get("cache_type"),
+            created=cache_data.get("create_time"),
+        )
+
+    def add(
+        self,
+        cache_id: str,
+        quantized: np.ndarray,
+        min_val: float | None,
+        max_val: float | None,
+        cache_type: str | None = None,
+        created: float | None = None,
+    ) -> None:
+        """Insert or replace the embedding of one cache entry"""
+        quantized = np.asarray(quantized, dtype=np.uint8).reshape(-1)
+        if quantized.shape[0] != self.dim:
+            logger.warning(
+                f"Cached embedding dim {quantized.shape[0]} != index dim {self.dim}"
+            )
+            return
+        if min_val is None or max_val is None or min_val > max_val:
+            logger.warning(
+                f"Invalid embedding min/max values: min={min_val}, max={max_val}"
+            )
+            return
+
+        row = self._rows.get(cache_id)
+        if row is None:
+            if 0 < self.max_entries <= self._size:
+                self.remove(self.ids[int(np.argmin(self._created[: self._size]))])
+            row = self._size
+            if row == len(self._min):
+                self._grow(max(64, 2 * row))
+            self._rows[cache_id] = row
+            self.ids.append(cache_id)
+            self._size += 1
+
+        scale = (max_val - min_val) / 255
+        self._quantized[row] = quantized
+        self._min[row] = min_val
+        self._scale[row] = scale
+        self._norm[row] = np.linalg.norm(quantized * np.float32(scale) + min_val)
+        self._types[row] = self._type_codes.setdefault(
+            cache_type, len(self._type_codes)
+        )
+        self._created[row] = time.time() if created is None else created
+
+    def remove(self, cache_id: str) -> bool:
+        """Remove one cache entry, moving the last row into its place"""
+        row = self._rows.pop(cache_id, None)
+        if row is None:
+            return False
+        last = self._size - 1
+        if row != last:
+            moved_id = self.ids[last]
+            self.ids[row] = moved_id
+            self._rows[moved_id] = row
+            for name in ("_quantized", "_min", "_scale", "_norm", "_types", "_created"):
+                values = getattr(self, name)
+                values[row] = values[last]
+        self.ids.pop()
+        self._size = last
+        return True
+
+    def prune_expired(self) -> None:
+        """Remove the rows older than ttl"""
+        if self.ttl <= 0 or self._size == 0:
+            return
+        expired = np.flatnonzero(self._created[: self._size] < time.time() - self.ttl)
+        for cache_id in [self.ids[i] for i in expired]:
+            self.remove(cache_id)
+
+    def _grow(self, capacity: int) -> None:
+        quantized = np.zeros((capacity, self.dim), dtype=np.uint8)
+        quantized[: self._size] = self._quantized[: self._size]
+        self._quantized = quantized
+        for name, dtype in (
+            ("_min", np.float32),
+            ("_scale", np.float32),
+            ("_norm", np.float32),
+            ("_types", np.int16),
+            ("_created", np.float64),
+        ):
+            values = np.zeros(capacity, dtype=dtype)
+            values[: self._size] = getattr(self, name)[: self._size]
+            setattr(self, name, values)
+
+    def top_k(
+        self, embedding: np.ndarray, k: int = 1, cache_type: str | None = None
+    ) -> list[tuple[str, float]]:
+        """Return up to k (cache_id, cosine similarity) pairs, most similar first"""
+        self.prune_expired()
+        n = self._size
+        embedding = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        if n == 0 or embedding.shape[0] != self.dim:
+            return []
+
+        # cos(q*scale + min, x) = (scale * (q . x) + min * sum(x)) / (|row| * |x|)
+        # Convert uint8 rows through a small reused float32 buffer (cache friendly)
+        dots = np.empty(n, dtype=np.float32)
+        block = np.empty((min(self.BLOCK_ROWS, n), self.dim), dtype=np.float32)
+        for start in range(0, n, self.BLOCK_ROWS):
+            end = min(start + self.BLOCK_ROWS, n)
+            rows = block[: end - start]
+            np.copyto(rows, self._quantized[start:end], casting="unsafe")
+            np.dot(rows, embedding, out=dots[start:end])
+        dots = dots * self._scale[:n] + self._min[:n] * embedding.sum()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            similarities = dots / (self._norm[:n] * np.linalg.norm(embedding))
+        similarities = np.nan_to_num(similarities, nan=-1.0, posinf=-1.0, neginf=-1.0)
+
+        if cache_type:
+            code = self._type_codes.get(cache_type)
+            if code is None:
+                return []
+            similarities[self._types[:n] != code] = -np.inf
+
+        k = min(k, n)
+        if k == 1:
+            best = [int(np.argmax(similarities))]
+        else:
+            best = np.argpartition(-similarities, k - 1)[:k]
+            best = best[np.argsort(-similarities[best])]
+        return [
+            (self.ids[i], float(similarities[i]))
+            for i in best
+            if similarities[i] != -np.inf
+        ]
+
+
+def _decode_cached_embedding(cache_data: dict[str, Any]) -> np.ndarray | None:
+    try:
+        return np.frombuffer(
+            bytes.fromhex(cache_data["embedding"]), dtype=np.uint8
+        ).reshape(-1)
+    except Exception as e:
+        logger.warning(f"Error processing cached embedding: {str(e)}")
+        return None
+
+
+class EmbeddingCacheIndexRegistry:
+    """Embedding indexes of the cache modes of one LLM cache storage.
+
+    Each cache write is appended to a bounded per-mode log in shared storage under
+    a sequence number. On lookup a process applies the log entries newer than its
+    per-mode mark, and reloads a mode from storage only on first use or when it
+    fell more than LOG_SIZE writes behind. invalidate() makes every process
+    reload all modes, for entries removed outside save_to_cache.
+    """
+
+    LOG_SIZE = 1024
+
+    def __init__(self):
+        self._indexes: dict[str, EmbeddingCacheIndex | None] = {}
+        self._marks: dict[str, int] = {}
+        self._lock: asyncio.Lock | None = None
+        self._shared_ready = False
+        # Update flag and change log, None when the shared storage is not
+        # initialized (single process use)
+        self._reload_flag = None
+        self._log: dict[str, Any] | None = None
+
+    async def _init_shared(self, hashing_kv) -> None:
+        if self._shared_ready:
+            return
+        from lightrag.kg.shared_storage import get_namespace_data, get_update_flag
+
+        namespace = f"{hashing_kv.namespace}_embedding_index"
+        try:
+            self._reload_flag = await get_update_flag(namespace)
+            self._log = await get_namespace_data(namespace)
+        except ValueError:
+            self._reload_flag = self._log = None
+        self._shared_ready = True
+
+    def _log_seq(self, mode: str) -> int:
+        return self._log.get(f"{mode}:seq", 0) if self._log is not None else 0
+
+    def _new_index(self, hashing_kv, dim: int) -> EmbeddingCacheIndex:
+        return EmbeddingCacheIndex(
+            dim,
+            max_entries=hashing_kv.global_config.get("llm_cache_max_entries", 0),
+            ttl=hashing_kv.global_config.get("llm_cache_ttl", 0),
+        )
+
+    def _apply(self, hashing_kv, mode: str, cache_id: str, cache_data: dict) -> None:
+        quantized = _decode_cached_embedding(cache_data)
+        if quantized is None:
+            return
+        if self._indexes[mode] is None:
+            self._indexes[mode] = self._new_index(hashing_kv, len(quantized))
+        self._indexes[mode].add_cache_entry(cache_id, cache_data, quantized)
+
+    async def _load(self, hashing_kv, mode: str) -> None:
+        # Take the mark first, writes made during the load are replayed
+        self._marks[mode] = self._log_seq(mode)
+        mode_cache = await hashing_kv.get_by_id(mode) or {}
+        self._indexes[mode] = EmbeddingCacheIndex.from_mode_cache(
+            mode_cache,
+            max_entries=hashing_kv.global_config.get("llm_cache_max_entries", 0),
+            ttl=hashing_kv.global_config.get("llm_cache_ttl", 0),
+        )
+        logger.debug(
+            f"Loaded embedding cache index for mode {mode}: "
+            f"{len(self._indexes[mode] or [])} entries"
+        )
+
+    def _catch_up(self, hashing_kv, mode: str) -> bool:
+        """Apply the logged writes of other processes, False if some were pruned"""
+        latest = self._log_seq(mode)
+        mark = self._marks[mode]
+        if latest - mark > self.LOG_SIZE:
+            return False
+        for seq in range(mark + 1, latest + 1):
+            record = self._log.get(f"{mode}:{seq}")
+            if record is None:
+                return False
+            cache_id, cache_data = record
+            self._apply(hashing_kv, mode, cache_id, cache_data)
+        self._marks[mode] = latest
+        return True
+
+    async def get(self, hashing_kv, mode: str) -> EmbeddingCacheIndex | None:
+        """Get the embedding index of a cache mode, in sync with other processes"""
+        await self._init_shared(hashing_kv)
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._reload_flag is not None and self._reload_flag.value:
+                self._indexes.clear()
+                self._reload_flag.value = False
+            if mode not in self._indexes or not self._catch_up(hashing_kv, mode):
+                await self._load(hashing_kv, mode)
+        return self._indexes[mode]
+
+    async def add(self, hashing_kv, mode: str, cache_id: str, cache_data: dict) -> None:
+        """Add a saved cache entry to the local index and the shared change log"""
+        await self._init_shared(hashing_kv)
+        if mode in self._indexes:
+            self._apply(hashing_kv, mode, cache_id, cache_data)
+        if self._log is None:
+            return
+        from lightrag.kg.shared_storage import get_internal_lock
+
+        record = {
+            key: cache_data.get(key)
+            for key in (
+                "cache_type",
+                "embedding",
+                "embedding_min",
+                "embedding_max",
+                "create_time",
+            )
+        }
+        async with get_internal_lock():
+            seq = self._log.get(f"{mode}:seq", 0) + 1
+            self._log[f"{mode}:{seq}"] = (cache_id, record)
+            self._log[f"{mode}:seq"] = seq
+            self._log.pop(f"{mode}:{seq - self.LOG_SIZE}", None)
+
+    async def invalidate(self, hashing_kv) -> None:
+        """Make all processes reload their indexes from storage"""
+        await self._init_shared(hashing_kv)
+        self._indexes.clear()
+        if self._reload_flag is not None:
+            from lightrag.kg.shared_storage import set_all_update_flags
+
+            await set_all_update_flags(f"{hashing_kv.namespace}_embedding_index")
+
+
 async def get_best_cached_response(
     hashing_kv,
     current_embedding,
@@ -792,66 +1444,33 @@ async def get_best_cached_response(
     llm_func=None,
     original_prompt=None,
     cache_type=None,
+    top_k=1,
 ) -> str | None:
     logger.debug(
         f"get_best_cached_response:  mode={mode} cache_type={cache_type} use_llm_check={use_llm_check}"
     )
-    mode_cache = await hashing_kv.get_by_id(mode)
-    if not mode_cache:
+    index = await hashing_kv.embedding_cache_indexes.get(hashing_kv, mode)
+    if not index:
         return None
 
-    best_similarity = -1
-    best_response = None
-    best_prompt = None
-    best_cache_id = None
-
-    # Only iterate through cache entries for this mode
-    for cache_id, cache_data in mode_cache.items():
-        # Skip if cache_type doesn't match
-        if cache_type and cache_data.get("cache_type") != cache_type:
-            continue
-
-        # Check if cache data is valid
-        if cache_data["embedding"] is None:
-            continue
-
-        try:
-            # Safely convert cached embedding
-            cached_quantized = np.frombuffer(
-                bytes.fromhex(cache_data["embedding"]), dtype=np.uint8
-            ).reshape(cache_data["embedding_shape"])
-
-            # Ensure min_val and max_val are valid float values
-            embedding_min = cache_data.get("embedding_min")
-            embedding_max = cache_data.get("embedding_max")
-
-            if (
-                embedding_min is None
-                or embedding_max is None
-                or embedding_min >= embedding_max
-            ):
-                logger.warning(
-                    f"Invalid embedding min/max values: min={embedding_min}, max={embedding_max}"
-                )
-                continue
+    # Candidates above the threshold, most similar first
+    candidates = [
+        (cache_id, similarity)
+        for cache_id, similarity in index.top_k(
+            current_embedding, k=top_k if use_llm_check else 1, cache_type=cache_type
+        )
+        if similarity > similarity_threshold
+    ]
 
-            cached_embedding = dequantize_embedding(
-                cached_quantized,
-                embedding_min,
-                embedding_max,
-            )
-        except Exception as e:
-            logger.warning(f"Error processing cached embedding: {str(e)}")
+    for best_cache_id, best_similarity in candidates:
+        cache_data = await hashing_kv.get_cache_entry(mode, best_cache_id)
+        if cache_data is None:
+            # Evicted or expired in storage
+            index.remove(best_cache_id)
             continue
+        best_response = cache_data["return"]
+        best_prompt = cache_data["original_prompt"]
 
-        similarity = cosine_similarity(current_embedding, cached_embedding)
-        if similarity > best_similarity:
-            best_similarity = similarity
-            best_response = cache_data["return"]
-            best_prompt = cache_data["original_prompt"]
-            best_cache_id = cache_id
-
-    if best_similarity > similarity_threshold:
         # If LLM check is enabled and all required parameters are provided
         if (
             use_llm_check
@@ -887,7 +1506,7 @@ async def get_best_cached_response(
                     }
                     logger.debug(json.dumps(log_data, ensure_ascii=False))
                     logger.info(f"Cache rejected by LLM(mode:{mode} tpye:{cache_type})")
-                    return None
+                    continue
             except Exception as e:  # Catch all possible exceptions
                 logger.warning(f"LLM similarity check failed: {e}")
                 return None  # Return None directly when LLM check fails
@@ -968,13 +1587,38 @@ async def handle_cache(
         if not hashing_kv.global_config.get("enable_llm_cache_for_entity_extract"):
             return None, None, None, None
 
-    if exists_func(hashing_kv, "get_by_mode_and_id"):
-        mode_cache = await hashing_kv.get_by_mode_and_id(mode, args_hash) or {}
-    else:
-        mode_cache = await hashing_kv.get_by_id(mode) or {}
-    if args_hash in mode_cache:
+    cache_entry = await hashing_kv.get_cache_entry(mode, args_hash)
+    if cache_entry is not None:
         logger.debug(f"Non-embedding cached hit(mode:{mode} type:{cache_type})")
-        return mode_cache[args_hash]["return"], None, None, None
+        return cache_entry["return"], None, None, None
+
+    # Semantic lookup of similar queries (query modes only)
+    embedding_cache_config = hashing_kv.global_config.get("embedding_cache_config")
+    if (
+        mode != "default"
+        and embedding_cache_config
+        and embedding_cache_config["enabled"]
+    ):
+        use_llm_check = embedding_cache_config.get("use_llm_check", False)
+        current_embedding = (await hashing_kv.embedding_func([prompt]))[0]
+        quantized, min_val, max_val = quantize_embedding(current_embedding)
+        best_cached_response = await get_best_cached_response(
+            hashing_kv,
+            current_embedding,
+            similarity_threshold=embedding_cache_config["similarity_threshold"],
+            mode=mode,
+            use_llm_check=use_llm_check,
+            llm_func=hashing_kv.global_config.get("llm_model_func")
+            if use_llm_check
+            else None,
+            original_prompt=prompt,
+            cache_type=cache_type,
+            top_k=embedding_cache_config.get("top_k", 1),
+        )
+        if best_cached_response is not None:
+            logger.debug(f"Embedding cached hit(mode:{mode} type:{cache_type})")
+            return best_cached_response, None, None, None
+        return None, quantized, min_val, max_val
 
     logger.debug(f"Non-embedding cached missed(mode:{mode} type:{cache_type})")
     return None, None, None, None
@@ -1008,18 +1652,12 @@ async def save_to_cache(hashing_kv, cache_data: CacheData):
         logger.debug("Streaming response detected, skipping cache")
         return
 
-    # Get existing cache data
-    if exists_func(hashing_kv, "get_by_mode_and_id"):
-        mode_cache = (
-            await hashing_kv.get_by_mode_and_id(cache_data.mode, cache_data.args_hash)
-            or {}
-        )
-    else:
-        mode_cache = await hashing_kv.get_by_id(cache_data.mode) or {}
-
     # Check if we already have identical content cached
-    if cache_data.args_hash in mode_cache:
-        existing_content = mode_cache[cache_data.args_hash].get("return")
+    existing_entry = await hashing_kv.get_cache_entry(
+        cache_data.mode, cache_data.args_hash
+    )
+    if existing_entry is not None:
+        existing_content = existing_entry.get("return")
         if existing_content == cache_data.content:
             logger.info(
                 f"Cache content unchanged for {cache_data.args_hash}, skipping update"
@@ -1027,7 +1665,7 @@ async def save_to_cache(hashing_kv, cache_data: CacheData):
             return
 
     # Update cache with new content
-    mode_cache[cache_data.args_hash] = {
+    cache_entry = {
         "return": cache_data.content,
         "cache_type": cache_data.cache_type,
         "embedding": cache_data.quantized.tobytes().hex()
@@ -1036,15 +1674,27 @@ async def save_to_cache(hashing_kv, cache_data: CacheData):
         "embedding_shape": cache_data.quantized.shape
         if cache_data.quantized is not None
         else None,
-        "embedding_min": cache_data.min_val,
-        "embedding_max": cache_data.max_val,
+        "embedding_min": float(cache_data.min_val)
+        if cache_data.min_val is not None
+        else None,
+        "embedding_max": float(cache_data.max_val)
+        if cache_data.max_val is not None
+        else None,
         "original_prompt": cache_data.prompt,
+        "create_time": int(time.time()),
     }
 
     logger.info(f" == LLM cache == saving {cache_data.mode}: {cache_data.args_hash}")
 
     # Only upsert if there's actual new content
-    await hashing_kv.upsert({cache_data.mode: mode_cache})
+    await hashing_kv.upsert_cache_entry(
+        cache_data.mode, cache_data.args_hash, cache_entry
+    )
+
+    if cache_data.quantized is not None:
+        await hashing_kv.embedding_cache_indexes.add(
+            hashing_kv, cache_data.mode, cache_data.args_hash, cache_entry
+        )
 
 
 def safe_unicode_decode(content):
@@ -1163,6 +1813,232 @@ def always_get_an_event_loop() -> asyncio.AbstractEventLoop:
         return new_loop
 
 
+EXPORT_FILE_FORMATS = ("csv", "excel", "md", "txt", "jsonl", "parquet")
+
+# Export sections with the name of one of their items
+EXPORT_SECTIONS = {
+    "entities": "entity",
+    "relations": "relation",
+    "relationships": "relationship",
+}
+
+
+def _export_value(value: Any) -> str | None:
+    """Flat string form of a row value for columnar export formats"""
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+class _ExportWriter(ABC):
+    """Writes the export sections one after the other, a batch of rows at a time"""
+
+    # Fixed width formats need the column widths before the first row
+    needs_column_widths = False
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+
+    def begin_section(
+        self,
+        name: str,
+        fieldnames: list[str],
+        column_widths: dict[str, int] | None = None,
+    ) -> None:
+        self.section = name
+        self.fieldnames = fieldnames
+        self.column_widths = column_widths
+        self.row_count = 0
+
+    def write(self, rows: list[dict[str, Any]]) -> None:
+        if rows:
+            self.write_rows(rows)
+            self.row_count += len(rows)
+
+    @abstractmethod
+    def write_rows(self, rows: list[dict[str, Any]]) -> None:
+        """Write a non-empty batch of rows of the current section"""
+
+    def end_section(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class _CsvExportWriter(_ExportWriter):
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        self._file = open(output_path, "w", newline="", encoding="utf-8")
+        self._has_sections = False
+
+    def write_rows(self, rows):
+        if not self.row_count:
+            if self._has_sections:
+                self._file.write("\n\n")
+            self._file.write(f"# {self.section.upper()}\n")
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+            self._writer.writeheader()
+            self._has_sections = True
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class _ExcelExportWriter(_ExportWriter):
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        import xlsxwriter
+
+        # constant_memory flushes each row to disk once the next one starts
+        self._workbook = xlsxwriter.Workbook(output_path, {"constant_memory": True})
+
+    def write_rows(self, rows):
+        if not self.row_count:
+            self._sheet = self._workbook.add_worksheet(self.section.capitalize())
+            self._sheet.write_row(0, 0, self.fieldnames)
+        for i, row in enumerate(rows, start=self.row_count + 1):
+            self._sheet.write_row(
+                i, 0, [_export_value(row[k]) for k in self.fieldnames]
+            )
+
+    def close(self):
+        self._workbook.close()
+
+
+class _MarkdownExportWriter(_ExportWriter):
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        self._file = open(output_path, "w", encoding="utf-8")
+        self._file.write("# LightRAG Data Export\n\n")
+
+    def begin_section(self, name, fieldnames, column_widths=None):
+        super().begin_section(name, fieldnames, column_widths)
+        self._file.write(f"## {name.capitalize()}\n\n")
+
+    def write_rows(self, rows):
+        if not self.row_count:
+            self._file.write("| " + " | ".join(self.fieldnames) + " |\n")
+            self._file.write("| " + " | ".join(["---"] * len(self.fieldnames)) + " |\n")
+        for row in rows:
+            self._file.write(
+                "| " + " | ".join(str(row[k]) for k in self.fieldnames) + " |\n"
+            )
+
+    def end_section(self):
+        if self.row_count:
+            self._file.write("\n\n")
+        else:
+            self._file.write(f"*No {EXPORT_SECTIONS[self.section]} data available*\n\n")
+
+    def close(self):
+        self._file.close()
+
+
+class _TextExportWriter(_ExportWriter):
+    needs_column_widths = True
+
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        self._file = open(output_path, "w", encoding="utf-8")
+        self._file.write("LIGHTRAG DATA EXPORT\n")
+        self._file.write("=" * 80 + "\n\n")
+
+    def begin_section(self, name, fieldnames, column_widths=None):
+        super().begin_section(name, fieldnames, column_widths)
+        self._file.write(f"{name.upper()}\n")
+        self._file.write("-" * 80 + "\n")
+
+    def write_rows(self, rows):
+        widths = self.column_widths
+        if not self.row_count:
+            header = "  ".join(k.ljust(widths[k]) for k in self.fieldnames)
+            self._file.write(header + "\n")
+            self._file.write("-" * len(header) + "\n")
+        for row in rows:
+            self._file.write(
+                "  ".join(str(row[k]).ljust(widths[k]) for k in self.fieldnames) + "\n"
+            )
+
+    def end_section(self):
+        if self.row_count:
+            self._file.write("\n\n")
+        else:
+            self._file.write(f"No {EXPORT_SECTIONS[self.section]} data available\n\n")
+
+    def close(self):
+        self._file.close()
+
+
+class _JsonlExportWriter(_ExportWriter):
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        self._file = open(output_path, "w", encoding="utf-8")
+
+    def write_rows(self, rows):
+        item = EXPORT_SECTIONS[self.section]
+        for row in rows:
+            self._file.write(
+                json.dumps({"type": item, **row}, ensure_ascii=False, default=str)
+                + "\n"
+            )
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetExportWriter(_ExportWriter):
+    """All sections in one table, a string column per field plus the row type"""
+
+    FIELDS = [
+        "type",
+        "entity_name",
+        "src_entity",
+        "tgt_entity",
+        "relationship_id",
+        "source_id",
+        "graph_data",
+        "vector_data",
+        "data",
+    ]
+
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        import pipmaster as pm
+
+        if not pm.is_installed("pyarrow"):
+            pm.install("pyarrow")
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([(k, pa.string()) for k in self.FIELDS])
+        self._writer = pq.ParquetWriter(output_path, self._schema)
+
+    def write_rows(self, rows):
+        # One row group per batch
+        item = EXPORT_SECTIONS[self.section]
+        columns = {k: [_export_value(row.get(k)) for row in rows] for k in self.FIELDS}
+        columns["type"] = [item] * len(rows)
+        self._writer.write_table(
+            self._pa.Table.from_pydict(columns, schema=self._schema)
+        )
+
+    def close(self):
+        self._writer.close()
+
+
+_EXPORT_WRITERS: dict[str, type[_ExportWriter]] = {
+    "csv": _CsvExportWriter,
+    "excel": _ExcelExportWriter,
+    "md": _MarkdownExportWriter,
+    "txt": _TextExportWriter,
+    "jsonl": _JsonlExportWriter,
+    "parquet": _ParquetExportWriter,
+}
+
+
 async def aexport_data(
     chunk_entity_relation_graph,
     entities_vdb,
@@ -1170,301 +2046,148 @@ async def aexport_data(
     output_path: str,
     file_format: str = "csv",
     include_vector_data: bool = False,
+    batch_size: int = 1000,
 ) -> None:
     """
     Asynchronously exports all entities, relations, and relationships to various formats.
 
+    Nodes and edges are scanned from the graph storage in batches and every batch is
+    written before the next one is read, so memory use does not grow with the graph.
+
     Args:
         chunk_entity_relation_graph: Graph storage instance for entities and relations
         entities_vdb: Vector database storage for entities
         relationships_vdb: Vector database storage for relationships
         output_path: The path to the output file (including extension).
-        file_format: Output format - "csv", "excel", "md", "txt".
+        file_format: Output format - "csv", "excel", "md", "txt", "jsonl", "parquet".
             - csv: Comma-separated values file
             - excel: Microsoft Excel file with multiple sheets
             - md: Markdown tables
-            - txt: Plain text formatted output
+            - txt: Plain text formatted output (reads the graph twice to size the columns)
+            - jsonl: One JSON object per line, with the section in its "type" field
+            - parquet: One table with a "type" column, a row group per batch
         include_vector_data: Whether to include data from the vector database.
+        batch_size: Number of nodes or edges read from the storages at a time.
     """
-    # Collect data
-    entities_data = []
-    relations_data = []
-    relationships_data = []
-
-    # --- Entities ---
-    all_entities = await chunk_entity_relation_graph.get_all_labels()
-    for entity_name in all_entities:
-        # Get entity information from graph
-        node_data = await chunk_entity_relation_graph.get_node(entity_name)
-        source_id = node_data.get("source_id") if node_data else None
-
-        entity_info = {
-            "graph_data": node_data,
-            "source_id": source_id,
-        }
+    if file_format not in _EXPORT_WRITERS:
+        raise ValueError(
+            f"Unsupported file format: {file_format}. "
+            f"Choose from: {', '.join(EXPORT_FILE_FORMATS)}"
+        )
 
-        # Optional: Get vector database information
-        if include_vector_data:
-            entity_id = compute_mdhash_id(entity_name, prefix="ent-")
-            vector_data = await entities_vdb.get_by_id(entity_id)
-            entity_info["vector_data"] = vector_data
-
-        entity_row = {
-            "entity_name": entity_name,
-            "source_id": source_id,
-            "graph_data": str(
-                entity_info["graph_data"]
-            ),  # Convert to string to ensure compatibility
+    async def vector_data_by_id(vdb, ids: list[str]) -> dict[str, Any]:
+        records = await vdb.get_by_ids(ids)
+        return {
+            record.get("id", record.get("__id__")): record
+            for record in records
+            if record
         }
-        if include_vector_data and "vector_data" in entity_info:
-            entity_row["vector_data"] = str(entity_info["vector_data"])
-        entities_data.append(entity_row)
-
-    # --- Relations ---
-    for src_entity in all_entities:
-        for tgt_entity in all_entities:
-            if src_entity == tgt_entity:
-                continue
 
-            edge_exists = await chunk_entity_relation_graph.has_edge(
-                src_entity, tgt_entity
-            )
-            if edge_exists:
-                # Get edge information from graph
-                edge_data = await chunk_entity_relation_graph.get_edge(
-                    src_entity, tgt_entity
+    # --- Entities ---
+    async def entity_rows():
+        async for nodes in chunk_entity_relation_graph.iter_nodes(batch_size):
+            if include_vector_data:
+                vectors = await vector_data_by_id(
+                    entities_vdb,
+                    [compute_mdhash_id(name, prefix="ent-") for name, _ in nodes],
                 )
-                source_id = edge_data.get("source_id") if edge_data else None
-
-                relation_info = {
-                    "graph_data": edge_data,
-                    "source_id": source_id,
+            rows = []
+            for entity_name, node_data in nodes:
+                row = {
+                    "entity_name": entity_name,
+                    "source_id": node_data.get("source_id"),
+                    "graph_data": node_data,
                 }
-
-                # Optional: Get vector database information
                 if include_vector_data:
-                    rel_id = compute_mdhash_id(src_entity + tgt_entity, prefix="rel-")
-                    vector_data = await relationships_vdb.get_by_id(rel_id)
-                    relation_info["vector_data"] = vector_data
-
-                relation_row = {
-                    "src_entity": src_entity,
-                    "tgt_entity": tgt_entity,
-                    "source_id": relation_info["source_id"],
-                    "graph_data": str(relation_info["graph_data"]),  # Convert to string
-                }
-                if include_vector_data and "vector_data" in relation_info:
-                    relation_row["vector_data"] = str(relation_info["vector_data"])
-                relations_data.append(relation_row)
-
-    # --- Relationships (from VectorDB) ---
-    all_relationships = await relationships_vdb.client_storage
-    for rel in all_relationships["data"]:
-        relationships_data.append(
-            {
-                "relationship_id": rel["__id__"],
-                "data": str(rel),  # Convert to string for compatibility
-            }
-        )
-
-    # Export based on format
-    if file_format == "csv":
-        # CSV export
-        with open(output_path, "w", newline="", encoding="utf-8") as csvfile:
-            # Entities
-            if entities_data:
-                csvfile.write("# ENTITIES\n")
-                writer = csv.DictWriter(csvfile, fieldnames=entities_data[0].keys())
-                writer.writeheader()
-                writer.writerows(entities_data)
-                csvfile.write("\n\n")
-
-            # Relations
-            if relations_data:
-                csvfile.write("# RELATIONS\n")
-                writer = csv.DictWriter(csvfile, fieldnames=relations_data[0].keys())
-                writer.writeheader()
-                writer.writerows(relations_data)
-                csvfile.write("\n\n")
-
-            # Relationships
-            if relationships_data:
-                csvfile.write("# RELATIONSHIPS\n")
-                writer = csv.DictWriter(
-                    csvfile, fieldnames=relationships_data[0].keys()
-                )
-                writer.writeheader()
-                writer.writerows(relationships_data)
-
-    elif file_format == "excel":
-        # Excel export
-        import pandas as pd
-
-        entities_df = pd.DataFrame(entities_data) if entities_data else pd.DataFrame()
-        relations_df = (
-            pd.DataFrame(relations_data) if relations_data else pd.DataFrame()
-        )
-        relationships_df = (
-            pd.DataFrame(relationships_data) if relationships_data else pd.DataFrame()
-        )
-
-        with pd.ExcelWriter(output_path, engine="xlsxwriter") as writer:
-            if not entities_df.empty:
-                entities_df.to_excel(writer, sheet_name="Entities", index=False)
-            if not relations_df.empty:
-                relations_df.to_excel(writer, sheet_name="Relations", index=False)
-            if not relationships_df.empty:
-                relationships_df.to_excel(
-                    writer, sheet_name="Relationships", index=False
-                )
-
-    elif file_format == "md":
-        # Markdown export
-        with open(output_path, "w", encoding="utf-8") as mdfile:
-            mdfile.write("# LightRAG Data Export\n\n")
-
-            # Entities
-            mdfile.write("## Entities\n\n")
-            if entities_data:
-                # Write header
-                mdfile.write("| " + " | ".join(entities_data[0].keys()) + " |\n")
-                mdfile.write(
-                    "| " + " | ".join(["---"] * len(entities_data[0].keys())) + " |\n"
-                )
-
-                # Write rows
-                for entity in entities_data:
-                    mdfile.write(
-                        "| " + " | ".join(str(v) for v in entity.values()) + " |\n"
+                    row["vector_data"] = vectors.get(
+                        compute_mdhash_id(entity_name, prefix="ent-")
                     )
-                mdfile.write("\n\n")
-            else:
-                mdfile.write("*No entity data available*\n\n")
-
-            # Relations
-            mdfile.write("## Relations\n\n")
-            if relations_data:
-                # Write header
-                mdfile.write("| " + " | ".join(relations_data[0].keys()) + " |\n")
-                mdfile.write(
-                    "| " + " | ".join(["---"] * len(relations_data[0].keys())) + " |\n"
-                )
+                rows.append(row)
+            yield rows
 
-                # Write rows
-                for relation in relations_data:
-                    mdfile.write(
-                        "| " + " | ".join(str(v) for v in relation.values()) + " |\n"
-                    )
-                mdfile.write("\n\n")
-            else:
-                mdfile.write("*No relation data available*\n\n")
-
-            # Relationships
-            mdfile.write("## Relationships\n\n")
-            if relationships_data:
-                # Write header
-                mdfile.write("| " + " | ".join(relationships_data[0].keys()) + " |\n")
-                mdfile.write(
-                    "| "
-                    + " | ".join(["---"] * len(relationships_data[0].keys()))
-                    + " |\n"
+    # --- Relations ---
+    async def relation_rows():
+        async for edges in chunk_entity_relation_graph.iter_edges(batch_size):
+            if include_vector_data:
+                # The relationship vector is keyed by the extraction order of the
+                # endpoints, which may be the reverse of the stored edge
+                vectors = await vector_data_by_id(
+                    relationships_vdb,
+                    [
+                        compute_mdhash_id(a + b, prefix="rel-")
+                        for src, tgt, _ in edges
+                        for a, b in ((src, tgt), (tgt, src))
+                    ],
                 )
-
-                # Write rows
-                for relationship in relationships_data:
-                    mdfile.write(
-                        "| "
-                        + " | ".join(str(v) for v in relationship.values())
-                        + " |\n"
-                    )
-            else:
-                mdfile.write("*No relationship data available*\n\n")
-
-    elif file_format == "txt":
-        # Plain text export
-        with open(output_path, "w", encoding="utf-8") as txtfile:
-            txtfile.write("LIGHTRAG DATA EXPORT\n")
-            txtfile.write("=" * 80 + "\n\n")
-
-            # Entities
-            txtfile.write("ENTITIES\n")
-            txtfile.write("-" * 80 + "\n")
-            if entities_data:
-                # Create fixed width columns
-                col_widths = {
-                    k: max(len(k), max(len(str(e[k])) for e in entities_data))
-                    for k in entities_data[0]
-                }
-                header = "  ".join(k.ljust(col_widths[k]) for k in entities_data[0])
-                txtfile.write(header + "\n")
-                txtfile.write("-" * len(header) + "\n")
-
-                # Write rows
-                for entity in entities_data:
-                    row = "  ".join(
-                        str(v).ljust(col_widths[k]) for k, v in entity.items()
-                    )
-                    txtfile.write(row + "\n")
-                txtfile.write("\n\n")
-            else:
-                txtfile.write("No entity data available\n\n")
-
-            # Relations
-            txtfile.write("RELATIONS\n")
-            txtfile.write("-" * 80 + "\n")
-            if relations_data:
-                # Create fixed width columns
-                col_widths = {
-                    k: max(len(k), max(len(str(r[k])) for r in relations_data))
-                    for k in relations_data[0]
+            rows = []
+            for src_entity, tgt_entity, edge_data in edges:
+                row = {
+                    "src_entity": src_entity,
+                    "tgt_entity": tgt_entity,
+                    "source_id": edge_data.get("source_id") if edge_data else None,
+                    "graph_data": edge_data,
                 }
-                header = "  ".join(k.ljust(col_widths[k]) for k in relations_data[0])
-                txtfile.write(header + "\n")
-                txtfile.write("-" * len(header) + "\n")
-
-                # Write rows
-                for relation in relations_data:
-                    row = "  ".join(
-                        str(v).ljust(col_widths[k]) for k, v in relation.items()
+                if include_vector_data:
+                    row["vector_data"] = vectors.get(
+                        compute_mdhash_id(src_entity + tgt_entity, prefix="rel-")
+                    ) or vectors.get(
+                        compute_mdhash_id(tgt_entity + src_entity, prefix="rel-")
                     )
-                    txtfile.write(row + "\n")
-                txtfile.write("\n\n")
-            else:
-                txtfile.write("No relation data available\n\n")
-
-            # Relationships
-            txtfile.write("RELATIONSHIPS\n")
-            txtfile.write("-" * 80 + "\n")
-            if relationships_data:
-                # Create fixed width columns
-                col_widths = {
-                    k: max(len(k), max(len(str(r[k])) for r in relationships_data))
-                    for k in relationships_data[0]
-                }
-                header = "  ".join(
-                    k.ljust(col_widths[k]) for k in relationships_data[0]
-                )
-                txtfile.write(header + "\n")
-                txtfile.write("-" * len(header) + "\n")
+                rows.append(row)
+            yield rows
 
-                # Write rows
-                for relationship in relationships_data:
-                    row = "  ".join(
-                        str(v).ljust(col_widths[k]) for k, v in relationship.items()
-                    )
-                    txtfile.write(row + "\n")
-            else:
-                txtfile.write("No relationship data available\n\n")
+    # --- Relationships (from VectorDB) ---
+    async def relationship_rows():
+        # Only the local vector storages expose their content
+        storage = getattr(relationships_vdb, "client_storage", None)
+        if inspect.isawaitable(storage):
+            storage = await storage
+        if not storage:
+            return
+        batch = []
+        for rel in storage["data"]:
+            batch.append({"relationship_id": rel["__id__"], "data": rel})
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    vector_fields = ["vector_data"] if include_vector_data else []
+    sections = [
+        (
+            "entities",
+            ["entity_name", "source_id", "graph_data", *vector_fields],
+            entity_rows,
+        ),
+        (
+            "relations",
+            ["src_entity", "tgt_entity", "source_id", "graph_data", *vector_fields],
+            relation_rows,
+        ),
+        ("relationships", ["relationship_id", "data"], relationship_rows),
+    ]
 
-    else:
-        raise ValueError(
-            f"Unsupported file format: {file_format}. "
-            f"Choose from: csv, excel, md, txt"
-        )
-    if file_format is not None:
-        print(f"Data exported to: {output_path} with format: {file_format}")
-    else:
-        print("Data displayed as table format")
+    writer = _EXPORT_WRITERS[file_format](output_path)
+    try:
+        for name, fieldnames, rows_func in sections:
+            column_widths = None
+            if writer.needs_column_widths:
+                column_widths = {k: len(k) for k in fieldnames}
+                async for rows in rows_func():
+                    for row in rows:
+                        for k in fieldnames:
+                            column_widths[k] = max(column_widths[k], len(str(row[k])))
+
+            writer.begin_section(name, fieldnames, column_widths)
+            async for rows in rows_func():
+                writer.write(rows)
+                logger.info(f"Export: {writer.row_count} {name} written")
+            writer.end_section()
+    finally:
+        writer.close()
+
+    print(f"Data exported to: {output_path} with format: {file_format}")
 
 
 def export_data(
@@ -1474,6 +2197,7 @@ def export_data(
     output_path: str,
     file_format: str = "csv",
     include_vector_data: bool = False,
+    batch_size: int = 1000,
 ) -> None:
     """
     Synchronously exports all entities, relations, and relationships to various formats.
@@ -1483,12 +2207,15 @@ def export_data(
         entities_vdb: Vector database storage for entities
         relationships_vdb: Vector database storage for relationships
         output_path: The path to the output file (including extension).
-        file_format: Output format - "csv", "excel", "md", "txt".
+        file_format: Output format - "csv", "excel", "md", "txt", "jsonl", "parquet".
             - csv: Comma-separated values file
             - excel: Microsoft Excel file with multiple sheets
             - md: Markdown tables
             - txt: Plain text formatted output
+            - jsonl: One JSON object per line
+            - parquet: Apache Parquet table
         include_vector_data: Whether to include data from the vector database.
+        batch_size: Number of nodes or edges read from the storages at a time.
     """
     try:
         loop = asyncio.get_event_loop()
@@ -1504,6 +2231,7 @@ def export_data(
             output_path,
             file_format,
             include_vector_data,
+            batch_size,
         )
     )
 
@@ -1763,3 +2491,156 @@ class TokenTracker:
             f"Completion tokens: {usage['completion_tokens']}, "
             f"Total tokens: {usage['total_tokens']}"
         )
+
+
+class LatencyHistogram:
+    """Track latency of an operation in fixed log-scale millisecond buckets."""
+
+    BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, seconds: float):
+        """Record one latency sample given in seconds."""
+        ms = seconds * 1000
+        for i, bound in enumerate(self.BUCKETS_MS):
+            if ms <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> float | None:
+        """Upper bucket bound (ms) below which `q` (0-1) of the samples fall."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, bound in enumerate(self.BUCKETS_MS):
+            seen += self.counts[i]
+            if seen >= target:
+                return float(bound)
+        return self.max_ms
+
+    def get_stats(self):
+        """Get current latency statistics."""
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "buckets": {
+                **{f"<={b}ms": c for b, c in zip(self.BUCKETS_MS, self.counts)},
+                f">{self.BUCKETS_MS[-1]}ms": self.counts[-1],
+            },
+        }
+
+
+DOC_STATUS_SUMMARY_FIELDS = (
+    "content_summary",
+    "content_length",
+    "status",
+    "created_at",
+    "updated_at",
+    "chunks_count",
+    "file_path",
+    "error",
+    "metadata",
+)
+"""Doc status fields returned by the paginated listing (no content, no chunk/entity lists)"""
+
+
+def to_aware_datetime(value: Any) -> datetime | None:
+    """Parse an ISO string or datetime into a timezone-aware datetime (UTC if naive)."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def encode_doc_status_cursor(updated_at: Any, doc_id: str) -> str:
+    """Opaque keyset cursor pointing after the document (updated_at, id)"""
+    updated_at = to_aware_datetime(updated_at)
+    payload = json.dumps([updated_at.isoformat() if updated_at else None, doc_id])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_doc_status_cursor(cursor: str) -> tuple[datetime | None, str]:
+    """Inverse of encode_doc_status_cursor, raises ValueError on a malformed cursor"""
+    try:
+        updated_at, doc_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode("ascii"))
+        )
+        return to_aware_datetime(updated_at), str(doc_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def paginate_doc_status_summaries(
+    docs: Iterable[tuple[str, dict[str, Any]]],
+    status: str | None = None,
+    updated_after: datetime | None = None,
+    updated_before: datetime | None = None,
+    file_path_prefix: str | None = None,
+    cursor: str | None = None,
+    limit: int = 100,
+) -> tuple[list[dict[str, Any]], str | None]:
+    """Filter and page in-memory doc status records, most recently updated first.
+
+    Only the summary fields are copied out of each matching record, and only the
+    requested page is kept in a bounded heap, so listing a large in-memory storage
+    does not duplicate document contents.
+
+    Returns:
+        (page of summary dicts including "id", cursor of the next page or None)
+    """
+    updated_after = to_aware_datetime(updated_after)
+    updated_before = to_aware_datetime(updated_before)
+    after = decode_doc_status_cursor(cursor) if cursor else None
+    epoch = datetime.min.replace(tzinfo=timezone.utc)
+
+    def matches():
+        for doc_id, doc in docs:
+            if status is not None and doc.get("status") != status:
+                continue
+            if file_path_prefix and not (doc.get("file_path") or "").startswith(
+                file_path_prefix
+            ):
+                continue
+            updated_at = to_aware_datetime(doc.get("updated_at")) or epoch
+            if updated_after is not None and updated_at < updated_after:
+                continue
+            if updated_before is not None and updated_at >= updated_before:
+                continue
+            if after is not None and (updated_at, doc_id) >= (
+                after[0] or epoch,
+                after[1],
+            ):
+                continue
+            yield (updated_at, doc_id), doc
+
+    page = heapq.nlargest(limit + 1, matches(), key=lambda item: item[0])
+    summaries = [
+        {"id": doc_id, **{k: doc.get(k) for k in DOC_STATUS_SUMMARY_FIELDS}}
+        for (_, doc_id), doc in page[:limit]
+    ]
+    next_cursor = None
+    if len(page) > limit:
+        last = summaries[-1]
+        next_cursor = encode_doc_status_cursor(last["updated_at"], last["id"])
+    return summaries, next_cursor
@@ -0,0 +1,23 @@
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class MessageCursorPagination(CursorPagination):
+    """
+    Pages a thread's messages from the newest backwards. Each page is returned in
+    chronological order, `next` points to the older messages.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = "-created_at"
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "messages": list(reversed(data)),
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+            }
+        )
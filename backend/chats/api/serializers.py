@@ -44,14 +44,29 @@ class MessageSerializer(serializers.ModelSerializer):
 
 class ThreadSerializer(serializers.ModelSerializer):
     lastMessage = serializers.SerializerMethodField()
+    messageCount = serializers.IntegerField(source="message_count", read_only=True)
+    lastMessageAt = serializers.DateTimeField(source="last_message_at", read_only=True)
     createdAt = serializers.DateTimeField(source="created_at")
 
     class Meta:
         model = Thread
-        fields = ("id", "title", "lastMessage", "createdAt")
+        fields = (
+            "id",
+            "title",
+            "lastMessage",
+            "messageCount",
+            "lastMessageAt",
+            "createdAt",
+        )
 
     def get_lastMessage(self, obj):
-        latest_message = obj.latest_message
+        if not obj.message_count:
+            return None
+        # Prefetched by Thread.objects.with_last_message()
+        if hasattr(obj, "last_messages"):
+            latest_message = obj.last_messages[0] if obj.last_messages else None
+        else:
+            latest_message = obj.latest_message
         if latest_message:
             return MessageSerializer(latest_message).data
         return None
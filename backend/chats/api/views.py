@@ -1,7 +1,10 @@
+import json
+import logging
 import time
 
 from django.contrib.auth import authenticate
 from django.db import transaction
+from django.http import StreamingHttpResponse
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.decorators import api_view, permission_classes
@@ -9,9 +12,12 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from chats.api.pagination import MessageCursorPagination
 from chats.api.serializers import MessageSerializer, ThreadSerializer, UserSerializer
 from chats.models import ChatUser, Message, MessageRole, Thread
-from compliance.service import LightRagClient, LightRagMode
+from compliance.service import LightRagMode, get_lightrag_client
+
+logger = logging.getLogger(__name__)
 
 
 @api_view(["POST"])
@@ -58,7 +64,9 @@ class ThreadListView(APIView):
     def get(self, request):
         chat_user = ChatUser.objects.get(user=request.user)
         threads = (
-            Thread.objects.filter(chat_user=chat_user).order_by("-updated_at").all()
+            Thread.objects.filter(chat_user=chat_user)
+            .with_last_message()
+            .order_by("-updated_at")
         )
         serializer = ThreadSerializer(threads, many=True)
         return Response({"threads": serializer.data}, status=status.HTTP_200_OK)
@@ -67,7 +75,7 @@ class ThreadListView(APIView):
         chat_user = ChatUser.objects.get(user=request.user)
         empty_thread = (
             Thread.objects.filter(chat_user=chat_user)
-            .filter(messages__isnull=True)
+            .filter(message_count=0)
             .order_by("-updated_at")
             .first()
         )
@@ -97,10 +105,22 @@ class MessageView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, thread_id):
-        thread = Thread.objects.get(id=thread_id)
-        messages = Message.objects.filter(thread=thread).order_by("created_at").all()
-        serializer = MessageSerializer(messages, many=True)
-        return Response({"messages": serializer.data}, status=status.HTTP_200_OK)
+        """
+        Returns all messages of the thread in chronological order.
+
+        With a `cursor` or `page_size` query parameter only the latest page is
+        returned, and its `next` link (`?cursor=...`) loads the page of older
+        messages.
+        """
+        messages = Message.objects.filter(thread_id=thread_id)
+        paginator = MessageCursorPagination()
+        page_params = (paginator.cursor_query_param, paginator.page_size_query_param)
+        if not any(param in request.query_params for param in page_params):
+            serializer = MessageSerializer(messages.order_by("created_at"), many=True)
+            return Response({"messages": serializer.data}, status=status.HTTP_200_OK)
+        page = paginator.paginate_queryset(messages, request, view=self)
+        serializer = MessageSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request, thread_id):
         """
@@ -113,12 +133,19 @@ class MessageView(APIView):
             "message": "The message to send to the rag service"
             "system_prompt_type": "The type of system prompt to use",
             "custom_prompt": "The custom system prompt to use",
+            "stream": "Stream the answer as server-sent events (optional)"
         }
 
         Returns a JSON response with:
         {
             "text": "The result of the query",
         }
+
+        When "stream" is true the answer is sent as a text/event-stream of
+        `data: {"text": "<chunk>"}` events, followed by a final
+        `data: {"done": true, "ttft": "<seconds>", "time": "<seconds>"}` event
+        (or `data: {"error": "..."}`). The messages are saved once the stream
+        ends, including a partial answer if the client disconnects.
         """
         message = request.data.get("message", None)
         if not message:
@@ -136,15 +163,34 @@ class MessageView(APIView):
         rag_mode = request.data.get("mode", None)
         if not rag_mode:
             rag_mode = "naive"
+        try:
+            mode = LightRagMode(rag_mode)
+        except ValueError:
+            return Response(
+                {"error": f"invalid mode: {rag_mode}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         system_prompt_type = request.data.get("system_prompt_type", None)
         if not system_prompt_type:
             system_prompt_type = "chat"
         custom_prompt = request.data.get("custom_prompt", None)
+        if request.data.get("stream") in (True, "true", "1"):
+            if rag_type != "lightrag":
+                return Response(
+                    {"error": "streaming is only supported for lightrag"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            return self._stream(
+                thread,
+                message,
+                mode,
+                system_prompt_type,
+                custom_prompt,
+            )
         try:
             start_time = time.time()
             if rag_type == "lightrag":
-                lightrag = LightRagClient()
-                mode = LightRagMode(rag_mode)
+                lightrag = get_lightrag_client()
                 result = lightrag.query(
                     message, mode, system_prompt_type, custom_prompt
                 )
@@ -165,10 +211,68 @@ class MessageView(APIView):
                 role=MessageRole.ASSISTANT,
             )
         # TODO: make this prometheus metric
-        print(f"exec_time: {exec_time:.4f}")
+        logger.info("Chat answered in %.4fs", exec_time)
         return Response(
             {
                 "text": result,
             },
             status=status.HTTP_200_OK,
         )
+
+    def _stream(self, thread, message, mode, system_prompt_type, custom_prompt):
+        lightrag = get_lightrag_client()
+
+        def event(data):
+            return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+        def event_stream():
+            chunks = []
+            start_time = time.time()
+            ttft = None
+            try:
+                for chunk in lightrag.query_stream(
+                    message, mode, system_prompt_type, custom_prompt
+                ):
+                    if ttft is None:
+                        ttft = time.time() - start_time
+                    chunks.append(chunk)
+                    yield event({"text": chunk})
+            except Exception as e:
+                yield event({"error": str(e)})
+                return
+            finally:
+                # Runs on completion, on error and when the client disconnects
+                exec_time = time.time() - start_time
+                if chunks:
+                    with transaction.atomic():
+                        Message.objects.create(
+                            thread=thread,
+                            content=message,
+                            role=MessageRole.USER,
+                        )
+                        Message.objects.create(
+                            thread=thread,
+                            content="".join(chunks),
+                            role=MessageRole.ASSISTANT,
+                        )
+                # TODO: make this prometheus metric
+                logger.info(
+                    "Chat stream answered, ttft: %.4fs, exec_time: %.4fs",
+                    ttft or exec_time,
+                    exec_time,
+                )
+            yield event(
+                {
+                    "done": True,
+                    "ttft": f"{ttft or exec_time:.4f}",
+                    "time": f"{exec_time:.4f}",
+                }
+            )
+
+        response = StreamingHttpResponse(
+            event_stream(), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        # Stop nginx from buffering the event stream
+        response["X-Accel-Buffering"] = "no"
+        return response
@@ -0,0 +1,145 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_thread_message_stats(apps, schema_editor):
+    Thread = apps.get_model("chats", "Thread")
+    threads = Thread.objects.annotate(
+        count=models.Count("messages"), last_at=models.Max("messages__created_at")
+    ).filter(count__gt=0)
+    for thread in threads.iterator():
+        Thread.objects.filter(pk=thread.pk).update(
+            message_count=thread.count, last_message_at=thread.last_at
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("chats", "0002_alter_chatuser_options_chatuser_created_at_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="message",
+            options={
+                "ordering": ["created_at"],
+                "verbose_name": "Message",
+                "verbose_name_plural": "Messages",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="thread",
+            options={
+                "ordering": ["-updated_at"],
+                "verbose_name": "Thread",
+                "verbose_name_plural": "Threads",
+            },
+        ),
+        migrations.AlterField(
+            model_name="chatuser",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, verbose_name="Created at"),
+        ),
+        migrations.AlterField(
+            model_name="chatuser",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, verbose_name="Updated at"),
+        ),
+        migrations.AlterField(
+            model_name="chatuser",
+            name="user",
+            field=models.OneToOneField(
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="User",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="message",
+            name="content",
+            field=models.TextField(blank=True, default="", verbose_name="Content"),
+        ),
+        migrations.AlterField(
+            model_name="message",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, verbose_name="Created at"),
+        ),
+        migrations.AlterField(
+            model_name="message",
+            name="role",
+            field=models.CharField(
+                choices=[("user", "User"), ("assistant", "Assistant")],
+                default="user",
+                max_length=10,
+                verbose_name="Role",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="message",
+            name="system_prompt",
+            field=models.TextField(
+                blank=True, default="", verbose_name="System Prompt"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="message",
+            name="thread",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="messages",
+                to="chats.thread",
+                verbose_name="Thread",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="message",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, verbose_name="Updated at"),
+        ),
+        migrations.AlterField(
+            model_name="thread",
+            name="chat_user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="threads",
+                to="chats.chatuser",
+                verbose_name="Chat User",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="thread",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, verbose_name="Created at"),
+        ),
+        migrations.AlterField(
+            model_name="thread",
+            name="title",
+            field=models.CharField(
+                default="New Chat", max_length=255, verbose_name="Title"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="thread",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, verbose_name="Updated at"),
+        ),
+        migrations.AddField(
+            model_name="thread",
+            name="message_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Message count"),
+        ),
+        migrations.AddField(
+            model_name="thread",
+            name="last_message_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Last message at"
+            ),
+        ),
+        migrations.RunPython(
+            backfill_thread_message_stats, reverse_code=migrations.RunPython.noop
+        ),
+    ]
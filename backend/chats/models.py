@@ -25,6 +25,23 @@ class ChatUser(models.Model):
         return self.user.username
 
 
+class ThreadQuerySet(models.QuerySet):
+    def with_last_message(self):
+        """Prefetch the most recent message of each thread into `last_messages`."""
+        latest = Message.objects.filter(thread=models.OuterRef("thread")).order_by(
+            "-created_at"
+        )
+        return self.prefetch_related(
+            models.Prefetch(
+                "messages",
+                queryset=Message.objects.filter(
+                    id=models.Subquery(latest.values("id")[:1])
+                ),
+                to_attr="last_messages",
+            )
+        )
+
+
 class Thread(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     chat_user = models.ForeignKey(
@@ -36,9 +53,18 @@ class Thread(models.Model):
     title = models.CharField(
         max_length=255, default=_("New Chat"), verbose_name=_("Title")
     )
+    # Denormalized from the messages, kept up to date by the message signals
+    message_count = models.PositiveIntegerField(
+        default=0, verbose_name=_("Message count")
+    )
+    last_message_at = models.DateTimeField(
+        null=True, blank=True, verbose_name=_("Last message at")
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Created at"))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Updated at"))
 
+    objects = ThreadQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Thread")
         verbose_name_plural = _("Threads")
@@ -51,11 +77,6 @@ class Thread(models.Model):
     def __str__(self):
         return f"{self.title} - {self.chat_user.user.username}"
 
-    @property
-    def message_count(self):
-        """Return the number of messages in this thread."""
-        return self.messages.count()
-
     @property
     def latest_message(self):
         """Return the most recent message in this thread."""
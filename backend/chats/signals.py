@@ -1,24 +1,47 @@
 import re
 
-from django.db.models.signals import post_save
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
-from .models import Message
+from .models import Message, Thread
 
 
 @receiver(post_save, sender=Message)
 def update_thread_title_on_first_message(sender, instance, created, **kwargs):
     """
-    Update thread title with a summary of the first message content.
+    Count the message on its thread and update the thread title with a summary
+    of the first message content.
     """
     if not created:
         return
 
-    # Check if this is the first message in the thread
-    if instance.thread.message_count == 1:
-        title = generate_message_summary(instance.content)
-        instance.thread.title = title
-        instance.thread.save(update_fields=["title", "updated_at"])
+    # Only matches while the thread has no messages, so it runs for the first one
+    is_first = Thread.objects.filter(pk=instance.thread_id, message_count=0).update(
+        title=generate_message_summary(instance.content),
+        message_count=1,
+        last_message_at=instance.created_at,
+        updated_at=timezone.now(),
+    )
+    if not is_first:
+        Thread.objects.filter(pk=instance.thread_id).update(
+            message_count=F("message_count") + 1,
+            last_message_at=instance.created_at,
+        )
+
+
+@receiver(post_delete, sender=Message)
+def update_thread_on_message_delete(sender, instance, **kwargs):
+    """
+    Keep the message count and last message time of the thread in sync.
+    """
+    latest = Message.objects.filter(thread_id=OuterRef("pk")).order_by("-created_at")
+    Thread.objects.filter(pk=instance.thread_id).update(
+        message_count=Greatest(F("message_count") - 1, 0),
+        last_message_at=Subquery(latest.values("created_at")[:1]),
+    )
 
 
 def generate_message_summary(content, max_length=30):
@@ -1,5 +1,13 @@
+import json
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
 
 from .models import ChatUser, Message, MessageRole, Thread
 
@@ -77,3 +85,159 @@ class ThreadTitleAutoUpdateTest(TestCase):
         self.thread.refresh_from_db()
         self.assertTrue(len(self.thread.title) <= 50)
         self.assertTrue(self.thread.title.endswith("..."))
+
+
+class MessageStreamTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.chat_user = ChatUser.objects.create(user=self.user)
+        self.thread = Thread.objects.create(chat_user=self.chat_user)
+        self.client = APIClient()
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        self.url = reverse("messages", args=[self.thread.id])
+
+    def _events(self, response):
+        body = b"".join(response.streaming_content).decode()
+        return [
+            json.loads(line[len("data: ") :])
+            for line in body.split("\n\n")
+            if line.startswith("data: ")
+        ]
+
+    @mock.patch("chats.api.views.get_lightrag_client")
+    def test_stream_sends_chunks_and_saves_messages(self, get_client):
+        get_client.return_value.query_stream.return_value = iter(["Hel", "lo"])
+        response = self.client.post(
+            self.url, {"message": "Hi", "stream": True}, format="json"
+        )
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = self._events(response)
+        self.assertEqual([e["text"] for e in events[:-1]], ["Hel", "lo"])
+        self.assertTrue(events[-1]["done"])
+        self.assertIn("ttft", events[-1])
+        assistant = Message.objects.get(thread=self.thread, role=MessageRole.ASSISTANT)
+        self.assertEqual(assistant.content, "Hello")
+        self.assertEqual(Message.objects.filter(thread=self.thread).count(), 2)
+
+    @mock.patch("chats.api.views.get_lightrag_client")
+    def test_stream_error_without_output_saves_nothing(self, get_client):
+        get_client.return_value.query_stream.side_effect = Exception("down")
+        response = self.client.post(
+            self.url, {"message": "Hi", "stream": True}, format="json"
+        )
+
+        self.assertEqual(self._events(response), [{"error": "down"}])
+        self.assertFalse(Message.objects.filter(thread=self.thread).exists())
+
+    @mock.patch("chats.api.views.get_lightrag_client")
+    def test_stream_with_invalid_mode_is_rejected(self, get_client):
+        response = self.client.post(
+            self.url, {"message": "Hi", "mode": "bogus", "stream": True}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        get_client.return_value.query_stream.assert_not_called()
+
+
+class ThreadMessageStatsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.chat_user = ChatUser.objects.create(user=self.user)
+        self.thread = Thread.objects.create(chat_user=self.chat_user)
+
+    def test_message_count_and_last_message_at_follow_messages(self):
+        first = Message.objects.create(thread=self.thread, content="First")
+        last = Message.objects.create(
+            thread=self.thread, role=MessageRole.ASSISTANT, content="Second"
+        )
+
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.message_count, 2)
+        self.assertEqual(self.thread.last_message_at, last.created_at)
+
+        last.delete()
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.message_count, 1)
+        self.assertEqual(self.thread.last_message_at, first.created_at)
+
+
+class ThreadListQueryCountTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.chat_user = ChatUser.objects.create(user=self.user)
+        self.client = APIClient()
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+    def _create_threads(self, count):
+        for i in range(count):
+            thread = Thread.objects.create(chat_user=self.chat_user)
+            Message.objects.create(thread=thread, content=f"Question {i}")
+            Message.objects.create(
+                thread=thread, role=MessageRole.ASSISTANT, content=f"Answer {i}"
+            )
+
+    def _list_threads(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("threads"))
+        self.assertEqual(response.status_code, 200)
+        return response.json()["threads"], len(queries)
+
+    def test_query_count_does_not_grow_with_threads(self):
+        self._create_threads(3)
+        threads, few_queries = self._list_threads()
+        self.assertEqual(len(threads), 3)
+
+        self._create_threads(300)
+        threads, many_queries = self._list_threads()
+        self.assertEqual(len(threads), 303)
+        self.assertEqual(many_queries, few_queries)
+
+        self.assertEqual(threads[0]["messageCount"], 2)
+        self.assertEqual(threads[0]["lastMessage"]["content"], "Answer 299")
+
+
+class MessagePaginationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.chat_user = ChatUser.objects.create(user=self.user)
+        self.thread = Thread.objects.create(chat_user=self.chat_user)
+        self.client = APIClient()
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        for i in range(5):
+            Message.objects.create(thread=self.thread, content=f"Message {i}")
+
+    def test_pages_from_newest_in_chronological_order(self):
+        url = reverse("messages", args=[self.thread.id])
+        response = self.client.get(url, {"page_size": 3})
+        body = response.json()
+        self.assertEqual(
+            [m["content"] for m in body["messages"]],
+            ["Message 2", "Message 3", "Message 4"],
+        )
+
+        body = self.client.get(body["next"]).json()
+        self.assertEqual(
+            [m["content"] for m in body["messages"]], ["Message 0", "Message 1"]
+        )
+        self.assertIsNone(body["next"])
+
+    def test_returns_all_messages_without_page_parameters(self):
+        url = reverse("messages", args=[self.thread.id])
+        body = self.client.get(url).json()
+        self.assertEqual(
+            [m["content"] for m in body["messages"]],
+            [f"Message {i}" for i in range(5)],
+        )
+        self.assertNotIn("next", body)
@@ -2,13 +2,20 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
-from compliance.models import Regulation
+from compliance.models import IngestionJob, Regulation
 
 
 @admin.register(Regulation)
 class RegulationAdmin(admin.ModelAdmin):
-    list_display = ("identifier", "title", "date", "authority", "link_display")
-    list_filter = ("authority", "date")
+    list_display = (
+        "identifier",
+        "title",
+        "date",
+        "authority",
+        "indexed",
+        "link_display",
+    )
+    list_filter = ("authority", "indexed", "date")
     search_fields = ("identifier", "title", "text")
     date_hierarchy = "date"
 
@@ -23,3 +30,20 @@ class RegulationAdmin(admin.ModelAdmin):
         return "-"
 
     link_display.short_description = _("Source Link")
+
+
+@admin.register(IngestionJob)
+class IngestionJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "status",
+        "total",
+        "submitted",
+        "indexed",
+        "failed",
+        "attempts",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("status",)
+    readonly_fields = ("created_at", "started_at", "finished_at", "heartbeat_at")
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from compliance.models import Regulation
+from compliance.models import IngestionJob, Regulation
 
 
 class RegulationSerializer(serializers.ModelSerializer):
@@ -26,3 +26,26 @@ class RegulationSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         # Create the model instance with the converted date
         return super().create(validated_data)
+
+
+class IngestionJobSerializer(serializers.ModelSerializer):
+    duration = serializers.FloatField(read_only=True)
+    throughput = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = IngestionJob
+        fields = [
+            "id",
+            "status",
+            "total",
+            "submitted",
+            "indexed",
+            "failed",
+            "attempts",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+            "duration",
+            "throughput",
+        ]
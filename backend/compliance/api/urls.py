@@ -6,6 +6,9 @@ urlpatterns = [
     path("insert/", views.insert, name="insert"),
     path("batch-insert/", views.batch_insert, name="batch_insert"),
     path("query/", views.query, name="query"),
+    path("query/cache/", views.query_cache_stats, name="query_cache_stats"),
+    path("jobs/", views.IngestionJobListView.as_view(), name="jobs"),
+    path("jobs/<uuid:job_id>/", views.IngestionJobView.as_view(), name="job"),
     path("regulations/", views.RegulationListView.as_view(), name="regulations"),
     path(
         "regulations/<str:identifier>/",
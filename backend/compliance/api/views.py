@@ -1,16 +1,21 @@
-import json
 import time
 
-from django.db import transaction
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from compliance.api.serializers import RegulationSerializer
-from compliance.models import Regulation
-from compliance.service import LightRagClient, LightRagMode
+from compliance.api.serializers import IngestionJobSerializer, RegulationSerializer
+from compliance.ingestion import enqueue_regulations
+from compliance.models import IngestionJob, IngestionStatus, Regulation
+from compliance.service import LightRagMode, get_lightrag_client
+
+UNFINISHED_STATUSES = (
+    IngestionStatus.PENDING,
+    IngestionStatus.SUBMITTING,
+    IngestionStatus.PROCESSING,
+)
 
 
 class RegulationPagination(PageNumberPagination):
@@ -122,6 +127,10 @@ class RegulationView(APIView):
 
         Request Sample:
             DELETE /api/compliance/regulations/REGULATION-ID/
+
+        Response (409 Conflict):
+            The regulation is not in the RAG service yet but its ingestion job is
+            still running, so it may be indexed after the deletion.
     """
 
     def get(self, request, identifier):
@@ -141,15 +150,32 @@ class RegulationView(APIView):
             return Response(
                 {"error": "Regulation not found"}, status=status.HTTP_404_NOT_FOUND
             )
-        # TODO: Implement delete api and remove regulation from rags
-        # regulation.delete()
+        try:
+            deleted = get_lightrag_client().delete_document(regulation.identifier)
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        job = regulation.ingestion_job
+        if not deleted and job is not None and job.status in UNFINISHED_STATUSES:
+            # LightRAG may not have enqueued the submitted document yet, deleting
+            # the row now would leave it orphaned in the RAG store once indexed
+            return Response(
+                {
+                    "error": "Regulation is still being ingested, "
+                    "delete it again once its ingestion job has finished"
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+        regulation.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 @api_view(["POST"])
 def insert(request):
     """
-    API endpoint to insert a document into the GraphRAG service and database.
+    API endpoint to queue a document for the GraphRAG service and save it in the
+    database.
 
     Expects a JSON payload with regulation data including:
     {
@@ -160,6 +186,12 @@ def insert(request):
         "authority": "Approving authority",
         "link": "URL to regulation"
     }
+
+    Returns 202 with the id of the ingestion job that indexes the regulation:
+    {
+        "message": "Document queued for indexing",
+        "job_id": "<job id>"
+    }
     """
     serializer = RegulationSerializer(data=request.data)
     if not serializer.is_valid():
@@ -171,24 +203,10 @@ def insert(request):
                 {"message": "Regulation with this identifier already exists"},
                 status=status.HTTP_200_OK,
             )
-        lightrag_client = LightRagClient()
-        lightrag_client.insert_texts(
-            texts=[
-                json.dumps(
-                    {
-                        "title": validated_data["title"],
-                        "text": validated_data["text"],
-                        "authority": validated_data["authority"],
-                        "date": validated_data["date"],
-                    }
-                )
-            ],
-            ids=[validated_data["identifier"]],
-            sources=[validated_data.get("link", "")],
-        )
-        serializer.save()
+        job = enqueue_regulations([Regulation(**validated_data)])
         return Response(
-            {"message": "Document inserted successfully"}, status=status.HTTP_200_OK
+            {"message": "Document queued for indexing", "job_id": str(job.id)},
+            status=status.HTTP_202_ACCEPTED,
         )
     except Exception as e:
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -197,7 +215,8 @@ def insert(request):
 @api_view(["POST"])
 def batch_insert(request):
     """
-    API endpoint to insert multiple documents into the GraphRAG service and database.
+    API endpoint to queue multiple documents for the GraphRAG service and save
+    them in the database.
 
     Expects a JSON payload with an array of regulation data:
     {
@@ -210,17 +229,12 @@ def batch_insert(request):
                 "authority": "Approving authority 1",
                 "link": "URL to regulation 1"
             },
-            {
-                "identifier": "Unique identifier 2",
-                "title": "Regulation title 2",
-                "text": "Full regulation text 2",
-                "date": "Regulation date 2",
-                "authority": "Approving authority 2",
-                "link": "URL to regulation 2"
-            },
             ...
         ]
     }
+
+    Returns 202 with the id of the ingestion job that indexes the new regulations,
+    its progress is reported by GET /api/compliance/jobs/<job_id>/.
     """
     regulations_data = request.data.get("regulations", [])
     if not regulations_data or not isinstance(regulations_data, list):
@@ -236,7 +250,7 @@ def batch_insert(request):
     for i, reg_data in enumerate(regulations_data):
         serializer = RegulationSerializer(data=reg_data)
         if serializer.is_valid():
-            valid_regulations.append(serializer)
+            valid_regulations.append(serializer.validated_data)
         else:
             results["failed"].append(
                 {"index": i, "data": reg_data, "errors": serializer.errors}
@@ -250,50 +264,26 @@ def batch_insert(request):
         )
 
     try:
-        # Prepare data for bulk insert to RAG service
-        documents = []
-        ids = []
-        file_paths = []
+        # One lookup for the identifiers that already exist
+        seen = set(
+            Regulation.objects.filter(
+                identifier__in=[data["identifier"] for data in valid_regulations]
+            ).values_list("identifier", flat=True)
+        )
         regulation_instances = []
-
-        # Check for existing regulations and filter them out
-        for serializer in valid_regulations:
-            validated_data = serializer.validated_data
+        for validated_data in valid_regulations:
             identifier = validated_data["identifier"]
-
-            # Skip if regulation with this identifier already exists
-            if Regulation.objects.filter(identifier=identifier).exists():
+            if identifier in seen:
                 results["skipped"].append(
                     {"identifier": identifier, "reason": "Already exists"}
                 )
                 continue
-
-            documents.append(
-                json.dumps(
-                    {
-                        "title": validated_data["title"],
-                        "text": validated_data["text"],
-                        "authority": validated_data["authority"],
-                        "date": validated_data["date"],
-                    }
-                )
-            )
-            ids.append(identifier)
-            file_paths.append(validated_data.get("link", ""))
-
-            instance = Regulation(
-                identifier=identifier,
-                title=validated_data["title"],
-                text=validated_data["text"],
-                date=validated_data["date"],
-                authority=validated_data["authority"],
-                link=validated_data.get("link", ""),
-            )
-            regulation_instances.append(instance)
+            seen.add(identifier)
+            regulation_instances.append(Regulation(**validated_data))
             results["successful"].append(identifier)
 
         # If no new regulations to insert, return early
-        if not documents:
+        if not regulation_instances:
             return Response(
                 {
                     "message": "No new regulations to insert, all already exist",
@@ -302,39 +292,83 @@ def batch_insert(request):
                 status=status.HTTP_200_OK,
             )
 
-        with transaction.atomic():
-            lightrag = LightRagClient()
-            lightrag.insert(
-                documents,
-                ids=ids,
-                file_paths=file_paths,
-            )
-            Regulation.objects.bulk_create(regulation_instances)
-
+        job = enqueue_regulations(regulation_instances)
         return Response(
             {
-                "message": f"Successfully inserted {len(regulation_instances)} of {len(regulations_data)} documents, {len(results['skipped'])} documents skipped",
+                "message": f"Queued {len(regulation_instances)} of {len(regulations_data)} documents for indexing, {len(results['skipped'])} documents skipped",
+                "job_id": str(job.id),
                 "results": results,
             },
-            status=status.HTTP_200_OK,
+            status=status.HTTP_202_ACCEPTED,
         )
     except Exception as e:
-        # Add any successful inserts to failed list since we had an exception
-        for serializer in valid_regulations:
-            if serializer.validated_data["identifier"] not in results["successful"]:
-                results["failed"].append(
-                    {
-                        "identifier": serializer.validated_data["identifier"],
-                        "error": "Failed during insertion",
-                    }
-                )
-
         return Response(
             {"error": str(e), "results": results},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
 
 
+class IngestionJobListView(APIView):
+    """
+    API endpoint listing the ingestion jobs, newest first.
+
+    GET Request:
+        Request Sample:
+            GET /api/compliance/jobs/?page=1&page_size=20&status=processing
+
+        Response (200 OK): a paginated list of jobs as returned by IngestionJobView.
+    """
+
+    def get(self, request):
+        jobs = IngestionJob.objects.all()
+        job_status = request.query_params.get("status")
+        if job_status:
+            jobs = jobs.filter(status=job_status)
+        paginator = RegulationPagination()
+        page = paginator.paginate_queryset(jobs, request)
+        serializer = IngestionJobSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class IngestionJobView(APIView):
+    """
+    API endpoint reporting the progress of an ingestion job.
+
+    GET Request:
+        Request Sample:
+            GET /api/compliance/jobs/JOB-ID/
+
+        Response (200 OK):
+            {
+                "job": {
+                    "id": "JOB-ID",
+                    "status": "processing",
+                    "total": 100,
+                    "submitted": 100,
+                    "indexed": 40,
+                    "failed": 1,
+                    "attempts": 1,
+                    "error": "",
+                    "created_at": "...",
+                    "started_at": "...",
+                    "finished_at": null,
+                    "duration": 120.5,
+                    "throughput": 0.332
+                }
+            }
+    """
+
+    def get(self, request, job_id):
+        try:
+            job = IngestionJob.objects.get(id=job_id)
+        except IngestionJob.DoesNotExist:
+            return Response(
+                {"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+        serializer = IngestionJobSerializer(job)
+        return Response({"job": serializer.data}, status=status.HTTP_200_OK)
+
+
 @api_view(["POST"])
 def query(request):
     """
@@ -362,7 +396,7 @@ def query(request):
         mode = "naive"
     mode = LightRagMode(mode)
     try:
-        lightrag = LightRagClient()
+        lightrag = get_lightrag_client()
         start_time = time.time()
         result = lightrag.query(query, mode=mode)
         exec_time = time.time() - start_time
@@ -375,3 +409,21 @@ def query(request):
         )
     except Exception as e:
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["GET"])
+def query_cache_stats(request):
+    """
+    API endpoint reporting the effectiveness of the query result cache.
+
+    Returns a JSON response with:
+    {
+        "hits": "Queries answered from the cache",
+        "misses": "Queries sent to the GraphRAG service",
+        "hit_rate": "hits / (hits + misses)",
+        "saved_seconds": "Query time saved by the cache hits"
+    }
+    """
+    return Response(
+        get_lightrag_client().query_cache.stats(), status=status.HTTP_200_OK
+    )
@@ -0,0 +1,264 @@
+import json
+import os
+import threading
+import time
+from datetime import timedelta
+
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from compliance.models import IngestionJob, IngestionStatus, Regulation
+from compliance.service import get_lightrag_client
+
+INGESTION_BATCH_SIZE = int(os.getenv("INGESTION_BATCH_SIZE", "50"))
+INGESTION_POLL_INTERVAL = float(os.getenv("INGESTION_POLL_INTERVAL", "5"))
+# Seconds a job may wait for LightRAG to index its regulations
+INGESTION_TIMEOUT = float(os.getenv("INGESTION_TIMEOUT", "3600"))
+# Seconds without heartbeat after which a running job is taken over
+INGESTION_STALE_AFTER = float(os.getenv("INGESTION_STALE_AFTER", "600"))
+INGESTION_MAX_ATTEMPTS = int(os.getenv("INGESTION_MAX_ATTEMPTS", "3"))
+# Seconds before a failed job is retried, doubled with every attempt
+INGESTION_RETRY_BACKOFF = float(os.getenv("INGESTION_RETRY_BACKOFF", "30"))
+# Idle pipeline polls after which the still missing documents count as failed
+INGESTION_IDLE_POLLS = 3
+# Documents whose status is looked up per request, LightRAG accepts up to 1000
+STATUS_LOOKUP_BATCH_SIZE = 1000
+
+RUNNING_STATUSES = (IngestionStatus.SUBMITTING, IngestionStatus.PROCESSING)
+
+
+def regulation_document(regulation: Regulation) -> str:
+    """The text of a regulation as it is indexed by LightRAG."""
+    return json.dumps(
+        {
+            "title": regulation.title,
+            "text": regulation.text,
+            "authority": regulation.authority,
+            "date": str(regulation.date),
+        }
+    )
+
+
+def enqueue_regulations(regulations: list[Regulation]) -> IngestionJob:
+    """Save new regulations and queue them for indexing in one transaction."""
+    with transaction.atomic():
+        job = IngestionJob.objects.create(total=len(regulations))
+        for regulation in regulations:
+            regulation.ingestion_job = job
+            regulation.indexed = False
+        Regulation.objects.bulk_create(regulations)
+    return job
+
+
+def claim_job() -> IngestionJob | None:
+    """
+    Take the oldest pending job, or a running job whose worker stopped.
+
+    The update is guarded by the status and heartbeat that were read, so only
+    one worker wins each job on any database backend.
+    """
+    now = timezone.now()
+    stale = Q(
+        status__in=RUNNING_STATUSES,
+        heartbeat_at__lt=now - timedelta(seconds=INGESTION_STALE_AFTER),
+    )
+    IngestionJob.objects.filter(stale, attempts__gte=INGESTION_MAX_ATTEMPTS).update(
+        status=IngestionStatus.FAILED,
+        error="The worker stopped while running the job",
+        finished_at=now,
+    )
+    candidates = (
+        IngestionJob.objects.filter(
+            Q(status=IngestionStatus.PENDING, available_at__lte=now) | stale
+        )
+        .order_by("created_at")
+        .values_list("id", "status", "heartbeat_at")[:10]
+    )
+    for job_id, job_status, heartbeat_at in candidates:
+        claimed = IngestionJob.objects.filter(
+            id=job_id, status=job_status, heartbeat_at=heartbeat_at
+        ).update(
+            status=IngestionStatus.SUBMITTING,
+            heartbeat_at=now,
+            started_at=Coalesce("started_at", Value(now)),
+            finished_at=None,
+            failed=0,
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return IngestionJob.objects.get(id=job_id)
+    return None
+
+
+class IngestionWorker:
+    """
+    Runs ingestion jobs: submits the regulations of a job to LightRAG in batches,
+    then polls the pipeline until they are processed and marks them indexed.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        batch_size: int = INGESTION_BATCH_SIZE,
+        poll_interval: float = INGESTION_POLL_INTERVAL,
+        timeout: float = INGESTION_TIMEOUT,
+    ):
+        self.client = client or get_lightrag_client()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+    def run_pending(self) -> int:
+        """Run jobs until none is left to claim, returns the number of jobs run."""
+        count = 0
+        while (job := claim_job()) is not None:
+            self.run_job(job)
+            count += 1
+        return count
+
+    def run_forever(self, stop_event: threading.Event) -> None:
+        while not stop_event.is_set():
+            close_old_connections()
+            if not self.run_pending():
+                stop_event.wait(self.poll_interval)
+        close_old_connections()
+
+    def run_job(self, job: IngestionJob) -> None:
+        try:
+            self._submit(job)
+            self._wait_until_indexed(job)
+        except Exception as e:
+            now = timezone.now()
+            if job.attempts < INGESTION_MAX_ATTEMPTS:
+                backoff = INGESTION_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+                self._update(
+                    job,
+                    status=IngestionStatus.PENDING,
+                    error=str(e),
+                    heartbeat_at=None,
+                    available_at=now + timedelta(seconds=backoff),
+                )
+            else:
+                self._update(
+                    job,
+                    status=IngestionStatus.FAILED,
+                    error=str(e),
+                    heartbeat_at=None,
+                    finished_at=now,
+                )
+
+    def _update(self, job: IngestionJob, **fields) -> None:
+        for name, value in fields.items():
+            setattr(job, name, value)
+        IngestionJob.objects.filter(pk=job.pk).update(**fields)
+
+    def _submit(self, job: IngestionJob) -> None:
+        # Documents LightRAG already knows are skipped there, so a retried job
+        # can submit everything again
+        regulations = job.regulations.filter(indexed=False).order_by("pk")
+        batch = []
+        submitted = 0
+        for regulation in regulations.iterator(chunk_size=self.batch_size):
+            batch.append(regulation)
+            if len(batch) == self.batch_size:
+                submitted += self._submit_batch(batch)
+                self._update(job, submitted=submitted, heartbeat_at=timezone.now())
+                batch = []
+        if batch:
+            submitted += self._submit_batch(batch)
+        self._update(
+            job,
+            status=IngestionStatus.PROCESSING,
+            submitted=submitted,
+            heartbeat_at=timezone.now(),
+        )
+
+    def _submit_batch(self, batch: list[Regulation]) -> int:
+        self.client.insert_texts(
+            [regulation_document(regulation) for regulation in batch],
+            sources=[regulation.link for regulation in batch],
+            ids=[regulation.identifier for regulation in batch],
+        )
+        return len(batch)
+
+    def _wait_until_indexed(self, job: IngestionJob) -> None:
+        pending = set(
+            job.regulations.filter(indexed=False).values_list("identifier", flat=True)
+        )
+        deadline = time.monotonic() + self.timeout
+        idle_polls = 0
+        while pending:
+            pipeline = self.client.get_pipeline_status()
+            statuses = self._get_statuses(pending)
+            processed = {doc for doc in pending if statuses.get(doc) == "processed"}
+            failed = {doc for doc in pending if statuses.get(doc) == "failed"}
+            pending -= processed | failed
+            if processed:
+                Regulation.objects.filter(
+                    ingestion_job=job, identifier__in=processed
+                ).update(indexed=True)
+                # Answers cached before the documents were searchable are outdated
+                self.client.query_cache.invalidate()
+            self._update(
+                job,
+                indexed=job.indexed + len(processed),
+                failed=job.failed + len(failed),
+                heartbeat_at=timezone.now(),
+            )
+            if not pending:
+                break
+
+            if pipeline.get("busy") or pipeline.get("request_pending"):
+                idle_polls = 0
+            else:
+                idle_polls += 1
+            if idle_polls >= INGESTION_IDLE_POLLS:
+                self._update(
+                    job,
+                    status=IngestionStatus.FAILED,
+                    failed=job.failed + len(pending),
+                    error=f"{len(pending)} regulations were not indexed by LightRAG",
+                    finished_at=timezone.now(),
+                )
+                return
+            if time.monotonic() > deadline:
+                self._update(
+                    job,
+                    status=IngestionStatus.FAILED,
+                    failed=job.failed + len(pending),
+                    error=f"Timed out waiting for {len(pending)} regulations",
+                    finished_at=timezone.now(),
+                )
+                return
+            time.sleep(self.poll_interval)
+
+        if job.failed:
+            self._update(
+                job,
+                status=IngestionStatus.FAILED,
+                error=f"{job.failed} regulations failed to index in LightRAG",
+                finished_at=timezone.now(),
+            )
+        else:
+            self._update(
+                job,
+                status=IngestionStatus.COMPLETED,
+                finished_at=timezone.now(),
+            )
+
+    def _get_statuses(self, identifiers: set[str]) -> dict[str, str]:
+        """
+        LightRAG status of each of the identifiers, looked up by id since a
+        resubmitted document that LightRAG already knows is not updated again.
+        """
+        identifiers = sorted(identifiers)
+        statuses = {}
+        for start in range(0, len(identifiers), STATUS_LOOKUP_BATCH_SIZE):
+            statuses.update(
+                self.client.get_document_statuses(
+                    identifiers[start : start + STATUS_LOOKUP_BATCH_SIZE]
+                )
+            )
+        return statuses
@@ -1,20 +1,27 @@
-import asyncio
 import json
+import os
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
+import ijson
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.db import close_old_connections
+from django.db.models import Sum
 
 from compliance.api.serializers import RegulationSerializer
-from compliance.models import Regulation
+from compliance.ingestion import (
+    INGESTION_POLL_INTERVAL,
+    IngestionWorker,
+    enqueue_regulations,
+)
+from compliance.models import IngestionJob, Regulation
 from utils.scraper import Scraper
 
 # Constants
-DEFAULT_BATCH_SIZE = 5
+DEFAULT_BATCH_SIZE = 50
 DEFAULT_WORKERS = 1
 DEFAULT_START_INDEX = 0
 
@@ -25,8 +32,6 @@ ALLOWED_AUTHORITIES = [
     "وزير امور اقتصادي و دارايي",
 ]
 
-PROGRESS_UPDATE_FIELDS = ["successful", "failed", "skipped"]
-
 
 @dataclass
 class ImportConfig:
@@ -36,6 +41,7 @@ class ImportConfig:
     start_index: int
     limit: Optional[int]
     max_workers: int
+    checkpoint_path: str
 
 
 @dataclass
@@ -65,45 +71,75 @@ class ImportResults:
 
 
 class RulesDataLoader:
-    """Handles loading and filtering of rules data."""
+    """Handles streaming and filtering of rules data."""
 
     @staticmethod
-    def load_rules_from_file() -> List[Dict[str, Any]]:
-        """Load rules data from the JSON file."""
-        data_file_path = Scraper.get_all_rules_data_path()
-
+    def iter_rules_from_file(data_file_path: str) -> Iterator[Dict[str, Any]]:
+        """Stream the rules from the JSON file without loading all of it."""
         try:
-            with open(data_file_path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            with open(data_file_path, "rb") as f:
+                yield from ijson.items(f, "item")
         except FileNotFoundError:
             raise FileNotFoundError(f"Rules data file not found at: {data_file_path}")
-        except json.JSONDecodeError as e:
+        except ijson.JSONError as e:
             raise ValueError(f"Error decoding JSON from {data_file_path}: {str(e)}")
 
     @staticmethod
-    def filter_rules_by_authority(rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def filter_rules_by_authority(
+        rules: Iterable[Dict[str, Any]],
+    ) -> Iterator[Dict[str, Any]]:
         """Filter rules by allowed authorities."""
-        filtered_rules = []
         for rule in rules:
             authority = rule.get("authority", "").strip()
             if authority in ALLOWED_AUTHORITIES:
-                filtered_rules.append(rule)
-        return filtered_rules
+                yield rule
 
     @staticmethod
     def slice_rules_data(
-        rules: List[Dict[str, Any]], config: ImportConfig
-    ) -> List[Dict[str, Any]]:
+        rules: Iterable[Dict[str, Any]], config: ImportConfig
+    ) -> Iterator[Dict[str, Any]]:
         """Apply start index and limit to rules data."""
-        if config.start_index >= len(rules):
-            return []
-
-        rules_after_start = rules[config.start_index :]
+        stop = None if config.limit is None else config.start_index + config.limit
+        return islice(rules, config.start_index, stop)
 
-        if config.limit is not None:
-            return rules_after_start[: config.limit]
+    @staticmethod
+    def batched(
+        rules: Iterable[Dict[str, Any]], batch_size: int
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Group the rules into lists of batch_size."""
+        rules = iter(rules)
+        while batch := list(islice(rules, batch_size)):
+            yield batch
+
+
+class ImportCheckpoint:
+    """
+    Position of the next filtered rule to import, saved after every batch so an
+    interrupted import can resume where it stopped.
+    """
+
+    def __init__(self, path: str, source: str):
+        self.path = path
+        self.source = source
+
+    def load(self) -> int:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return DEFAULT_START_INDEX
+        if data.get("source") != self.source:
+            raise ValueError(
+                f"Checkpoint {self.path} was written for {data.get('source')}"
+            )
+        return data["position"]
 
-        return rules_after_start
+    def save(self, position: int) -> None:
+        # Replace the file atomically so a crash never leaves half a checkpoint
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"source": self.source, "position": position}, f)
+        os.replace(tmp_path, self.path)
 
 
 class RegulationValidator:
@@ -123,7 +159,7 @@ class RegulationValidator:
 
     @staticmethod
     def validate_regulations(
-        regulations_data: List[Dict[str, Any]]
+        regulations_data: List[Dict[str, Any]],
     ) -> tuple[List[RegulationSerializer], List[Dict[str, Any]]]:
         """Validate regulations data and return valid serializers and failed items."""
         valid_serializers = []
@@ -147,201 +183,117 @@ class RegulationValidator:
 
 
 class RegulationProcessor:
-    """Processes regulations for database and RAG insertion."""
+    """Saves new regulations and queues them for indexing, one job per batch."""
 
     def __init__(self):
-        self.results_lock = threading.Lock()
         self.results = ImportResults()
+        self.job_ids = []
 
     def process_batch(self, batch: List[Dict[str, Any]]) -> None:
         """Process a batch of rules."""
-        thread_local_results = ImportResults()
-
-        # Create regulation data
         regulations_data = [
             RegulationValidator.create_regulation_data(rule) for rule in batch
         ]
-
-        # Validate regulations
         valid_serializers, failed_items = RegulationValidator.validate_regulations(
             regulations_data
         )
-        thread_local_results.add_failed(failed_items)
+        self.results.add_failed(failed_items)
 
-        if not valid_serializers:
-            self._update_results(thread_local_results)
+        regulation_instances = self._new_regulations(valid_serializers)
+        if not regulation_instances:
             return
 
-        # Process valid regulations
-        self._process_valid_regulations(valid_serializers, thread_local_results)
-        self._update_results(thread_local_results)
-
-    def _process_valid_regulations(
-        self,
-        valid_serializers: List[RegulationSerializer],
-        thread_local_results: ImportResults,
-    ) -> None:
-        """Process valid regulations for insertion."""
+        identifiers = [regulation.identifier for regulation in regulation_instances]
+        try:
+            job = enqueue_regulations(regulation_instances)
+        except Exception as e:
+            self.results.add_failed(
+                [
+                    {
+                        "identifier": identifier,
+                        "reason": "Insertion Error",
+                        "details": str(e),
+                    }
+                    for identifier in identifiers
+                ]
+            )
+            return
+        self.job_ids.append(job.id)
+        self.results.add_successful(identifiers)
+
+    def _new_regulations(
+        self, valid_serializers: List[RegulationSerializer]
+    ) -> List[Regulation]:
+        """Drop the regulations that exist already or have no content."""
+        # One lookup per batch for the identifiers that were imported before
+        seen = set(
+            Regulation.objects.filter(
+                identifier__in=[
+                    serializer.validated_data["identifier"]
+                    for serializer in valid_serializers
+                ]
+            ).values_list("identifier", flat=True)
+        )
         regulation_instances = []
-        rag_documents = []
-        rag_ids = []
-        rag_file_paths = []
-        identifiers_for_insertion = []
-
         for serializer in valid_serializers:
             validated_data = serializer.validated_data
             identifier = validated_data["identifier"]
-
-            if self._should_skip_regulation(
-                validated_data, identifier, thread_local_results
-            ):
+            if identifier in seen:
+                self.results.add_skipped(
+                    [{"identifier": identifier, "reason": "Already exists in DB"}]
+                )
                 continue
-
-            self._prepare_regulation_for_insertion(
-                validated_data,
-                identifier,
-                regulation_instances,
-                rag_documents,
-                rag_ids,
-                rag_file_paths,
-                identifiers_for_insertion,
-            )
-
-        if regulation_instances:
-            self._insert_regulations(
-                regulation_instances,
-                rag_documents,
-                rag_ids,
-                rag_file_paths,
-                identifiers_for_insertion,
-                thread_local_results,
-            )
-
-    def _should_skip_regulation(
-        self,
-        validated_data: Dict[str, Any],
-        identifier: str,
-        thread_local_results: ImportResults,
-    ) -> bool:
-        """Check if regulation should be skipped."""
-        if Regulation.objects.filter(identifier=identifier).exists():
-            thread_local_results.add_skipped(
-                [{"identifier": identifier, "reason": "Already exists in DB"}]
-            )
-            return True
-
-        if not validated_data.get("text", "").strip():
-            thread_local_results.add_skipped(
-                [{"identifier": identifier, "reason": "Empty content"}]
-            )
-            return True
-
-        return False
-
-    def _prepare_regulation_for_insertion(
-        self,
-        validated_data: Dict[str, Any],
-        identifier: str,
-        regulation_instances: List[Regulation],
-        rag_documents: List[str],
-        rag_ids: List[str],
-        rag_file_paths: List[str],
-        identifiers_for_insertion: List[str],
-    ) -> None:
-        """Prepare regulation data for insertion."""
-        identifiers_for_insertion.append(identifier)
-
-        rag_documents.append(
-            json.dumps(
-                {
-                    "title": validated_data.get("title", ""),
-                    "text": validated_data.get("text", ""),
-                    "authority": validated_data.get("authority", ""),
-                    "date": validated_data.get("date", ""),
-                }
-            )
-        )
-
-        rag_ids.append(identifier)
-        rag_file_paths.append(validated_data.get("link", ""))
-        regulation_instances.append(Regulation(**validated_data))
-
-    def _insert_regulations(
-        self,
-        regulation_instances: List[Regulation],
-        rag_documents: List[str],
-        rag_ids: List[str],
-        rag_file_paths: List[str],
-        identifiers_for_insertion: List[str],
-        thread_local_results: ImportResults,
-    ) -> None:
-        """Insert regulations into database and RAG service."""
-        try:
-            from compliance.service import GraphRagService
-
-            rag_service = GraphRagService()
-            rag_service = asyncio.run(rag_service.initialize_rag())
-
-            with transaction.atomic():
-                rag_service.insert(
-                    rag_documents, ids=rag_ids, file_paths=rag_file_paths
+            if not validated_data.get("text", "").strip():
+                self.results.add_skipped(
+                    [{"identifier": identifier, "reason": "Empty content"}]
                 )
-                Regulation.objects.bulk_create(regulation_instances)
-
-            thread_local_results.add_successful(identifiers_for_insertion)
-
-        except Exception as e:
-            failed_items = [
-                {
-                    "identifier": identifier,
-                    "reason": "Insertion Error",
-                    "details": str(e),
-                }
-                for identifier in identifiers_for_insertion
-            ]
-            thread_local_results.add_failed(failed_items)
-
-    def _update_results(self, thread_local_results: ImportResults) -> None:
-        """Thread-safe update of global results."""
-        with self.results_lock:
-            self.results.add_successful(thread_local_results.successful)
-            self.results.add_failed(thread_local_results.failed)
-            self.results.add_skipped(thread_local_results.skipped)
+                continue
+            seen.add(identifier)
+            regulation_instances.append(Regulation(**validated_data))
+        return regulation_instances
 
 
 class ImportProgressTracker:
     """Tracks and reports import progress."""
 
-    def __init__(self, total_rules: int, start_time: float):
-        self.total_rules = total_rules
+    def __init__(self, start_time: float):
         self.start_time = start_time
 
+    def rules_per_second(self, results: ImportResults) -> float:
+        elapsed_time = time.time() - self.start_time
+        return results.get_total_processed() / elapsed_time if elapsed_time else 0.0
+
     def report_batch_completion(
-        self, completed_batches: int, total_batches: int, results: ImportResults, stdout
+        self, completed_batches: int, position: int, results: ImportResults, stdout
     ) -> None:
         """Report batch completion progress."""
-        total_processed = results.get_total_processed()
         elapsed_time = time.time() - self.start_time
-        progress_percentage = (
-            (total_processed / self.total_rules * 100) if self.total_rules > 0 else 0
-        )
-
         stdout.write(
-            f"Completed {completed_batches}/{total_batches} batches. "
-            f"Rules processed: {total_processed}/{self.total_rules} ({progress_percentage:.1f}%). "
-            f"Elapsed: {elapsed_time:.2f}s. "
-            f"(Success: {len(results.successful)}, Failed: {len(results.failed)}, Skipped: {len(results.skipped)})"
+            f"Completed {completed_batches} batches. "
+            f"Rules processed: {results.get_total_processed()} (next index: {position}). "
+            f"Elapsed: {elapsed_time:.2f}s, {self.rules_per_second(results):.1f} rules/sec. "
+            f"(Queued: {len(results.successful)}, Failed: {len(results.failed)}, Skipped: {len(results.skipped)})"
         )
 
-    def report_final_results(self, results: ImportResults, stdout) -> None:
+    def report_final_results(
+        self, results: ImportResults, job_ids: List[Any], stdout
+    ) -> None:
         """Report final import results."""
         total_time = time.time() - self.start_time
         stdout.write(
-            f"Import completed in {total_time:.2f} seconds. "
-            f"Successfully processed: {len(results.successful)}, "
+            f"Import completed in {total_time:.2f} seconds "
+            f"({self.rules_per_second(results):.1f} rules/sec). "
+            f"Queued: {len(results.successful)} in {len(job_ids)} jobs, "
             f"Skipped: {len(results.skipped)}, "
             f"Failed: {len(results.failed)}."
         )
+        indexing = IngestionJob.objects.filter(id__in=job_ids).aggregate(
+            indexed=Sum("indexed"), failed=Sum("failed")
+        )
+        stdout.write(
+            f"Indexed by GraphRAG so far: {indexing['indexed'] or 0}, "
+            f"Failed indexing: {indexing['failed'] or 0}."
+        )
 
 
 class Command(BaseCommand):
@@ -372,34 +324,54 @@ class Command(BaseCommand):
             "--workers",
             type=int,
             default=DEFAULT_WORKERS,
-            help="Number of worker threads to use for parallel processing",
+            help=(
+                "Number of ingestion workers submitting batches to the GraphRAG "
+                "service in parallel, 0 leaves the queued jobs to run_ingestion_worker"
+            ),
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default=None,
+            help="Checkpoint file (default: next to the rules data file)",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Start from the position saved in the checkpoint file",
         )
 
     def handle(self, *args, **options):
-        config = self._create_config(options)
-
-        if not self._validate_config(config):
+        data_file_path = Scraper.get_all_rules_data_path()
+        checkpoint = ImportCheckpoint(
+            options["checkpoint"] or f"{data_file_path}.checkpoint",
+            os.path.abspath(data_file_path),
+        )
+        config = self._create_config(options, checkpoint)
+        if config is None or not self._validate_config(config):
             return
 
         try:
-            rules_data = self._load_and_prepare_data(config)
+            self._execute_import(data_file_path, checkpoint, config)
         except (FileNotFoundError, ValueError) as e:
             self.stdout.write(self.style.ERROR(str(e)))
-            return
-
-        if not rules_data:
-            self.stdout.write(self.style.SUCCESS("No rules to process."))
-            return
-
-        self._execute_import(rules_data, config)
 
-    def _create_config(self, options: Dict[str, Any]) -> ImportConfig:
+    def _create_config(
+        self, options: Dict[str, Any], checkpoint: ImportCheckpoint
+    ) -> Optional[ImportConfig]:
         """Create import configuration from command options."""
+        start_index = options["start"]
+        if options["resume"]:
+            try:
+                start_index = checkpoint.load()
+            except ValueError as e:
+                self.stdout.write(self.style.ERROR(str(e)))
+                return None
         return ImportConfig(
             batch_size=options["batch_size"],
-            start_index=options["start"],
+            start_index=start_index,
             limit=options["limit"],
             max_workers=options["workers"],
+            checkpoint_path=checkpoint.path,
         )
 
     def _validate_config(self, config: ImportConfig) -> bool:
@@ -414,96 +386,98 @@ class Command(BaseCommand):
             )
             return False
 
-        return True
-
-    def _load_and_prepare_data(self, config: ImportConfig) -> List[Dict[str, Any]]:
-        """Load and prepare rules data for processing."""
-        # Load rules from file
-        all_rules = RulesDataLoader.load_rules_from_file()
-
-        # Filter by authority
-        filtered_rules = RulesDataLoader.filter_rules_by_authority(all_rules)
-
-        # Check start index bounds
-        if config.start_index >= len(filtered_rules):
+        if config.batch_size <= 0 or config.max_workers < 0:
             self.stdout.write(
-                self.style.WARNING(
-                    f"Start index {config.start_index} is out of bounds for "
-                    f"{len(filtered_rules)} filtered rules."
+                self.style.ERROR(
+                    "Batch size must be positive and workers cannot be negative."
                 )
             )
-            return []
+            return False
 
-        # Apply start and limit
-        return RulesDataLoader.slice_rules_data(filtered_rules, config)
+        return True
 
     def _execute_import(
-        self, rules_data: List[Dict[str, Any]], config: ImportConfig
+        self, data_file_path: str, checkpoint: ImportCheckpoint, config: ImportConfig
     ) -> None:
-        """Execute the import process."""
-        total_rules = len(rules_data)
+        """Stream the rules through validation and deduplication into the queue."""
+        rules = RulesDataLoader.slice_rules_data(
+            RulesDataLoader.filter_rules_by_authority(
+                RulesDataLoader.iter_rules_from_file(data_file_path)
+            ),
+            config,
+        )
         self.stdout.write(
             self.style.SUCCESS(
-                f"Processing {total_rules} rules (batch size: {config.batch_size}, "
-                f"workers: {config.max_workers})"
+                f"Processing rules from index {config.start_index} "
+                f"(batch size: {config.batch_size}, workers: {config.max_workers}, "
+                f"checkpoint: {config.checkpoint_path})"
             )
         )
 
         start_time = time.time()
         processor = RegulationProcessor()
-        progress_tracker = ImportProgressTracker(total_rules, start_time)
+        progress_tracker = ImportProgressTracker(start_time)
 
-        batches = self._create_batches(rules_data, config.batch_size)
-        self._process_batches_in_parallel(
-            batches, config.max_workers, processor, progress_tracker
+        # The workers share one GraphRAG client and submit the queued jobs while
+        # the next batches are parsed
+        producing_done = threading.Event()
+        threads = self._start_workers(config, producing_done)
+        try:
+            position = config.start_index
+            for completed_batches, batch in enumerate(
+                RulesDataLoader.batched(rules, config.batch_size), start=1
+            ):
+                processor.process_batch(batch)
+                position += len(batch)
+                checkpoint.save(position)
+                progress_tracker.report_batch_completion(
+                    completed_batches, position, processor.results, self.stdout
+                )
+        finally:
+            producing_done.set()
+            if threads:
+                self.stdout.write("Waiting for the ingestion workers to finish...")
+            for thread in threads:
+                thread.join()
+
+        if not processor.results.get_total_processed():
+            self.stdout.write(self.style.SUCCESS("No rules to process."))
+            return
+        progress_tracker.report_final_results(
+            processor.results, processor.job_ids, self.stdout
         )
 
-        progress_tracker.report_final_results(processor.results, self.style.SUCCESS)
-
-    def _create_batches(
-        self, rules_data: List[Dict[str, Any]], batch_size: int
-    ) -> List[List[Dict[str, Any]]]:
-        """Create batches from rules data."""
-        return [
-            rules_data[i : i + batch_size]
-            for i in range(0, len(rules_data), batch_size)
+    def _start_workers(
+        self, config: ImportConfig, producing_done: threading.Event
+    ) -> List[threading.Thread]:
+        """Start the ingestion workers that drain the queued jobs."""
+        if not config.max_workers:
+            return []
+        worker = IngestionWorker(batch_size=config.batch_size)
+        threads = [
+            threading.Thread(
+                target=self._run_worker,
+                args=(worker, producing_done),
+                name=f"import-rules-worker-{i}",
+                # Jobs cut short by Ctrl-C are taken over by run_ingestion_worker
+                # once their heartbeat is stale
+                daemon=True,
+            )
+            for i in range(config.max_workers)
         ]
+        for thread in threads:
+            thread.start()
+        return threads
 
-    def _process_batches_in_parallel(
-        self,
-        batches: List[List[Dict[str, Any]]],
-        max_workers: int,
-        processor: RegulationProcessor,
-        progress_tracker: ImportProgressTracker,
-    ) -> None:
-        """Process batches in parallel using thread pool."""
-        actual_workers = min(max_workers, len(batches)) if batches else 1
-
-        with ThreadPoolExecutor(max_workers=actual_workers) as executor:
-            futures = [
-                executor.submit(processor.process_batch, batch) for batch in batches
-            ]
-
-            completed_batches = 0
-            total_batches = len(futures)
-
-            for future in as_completed(futures):
-                try:
-                    future.result()
-                    completed_batches += 1
-
-                    with processor.results_lock:
-                        progress_tracker.report_batch_completion(
-                            completed_batches,
-                            total_batches,
-                            processor.results,
-                            self.style.SUCCESS,
-                        )
-
-                except Exception as exc:
-                    completed_batches += 1
-                    self.stdout.write(
-                        self.style.ERROR(
-                            f"Batch failed: {str(exc)}. Progress: {completed_batches}/{total_batches}"
-                        )
-                    )
+    @staticmethod
+    def _run_worker(worker: IngestionWorker, producing_done: threading.Event) -> None:
+        """Run queued jobs until the import is parsed and no job is left."""
+        try:
+            while True:
+                done = producing_done.is_set()
+                if not worker.run_pending() and done:
+                    break
+                if not done:
+                    producing_done.wait(INGESTION_POLL_INTERVAL)
+        finally:
+            close_old_connections()
@@ -0,0 +1,85 @@
+import threading
+
+from django.core.management.base import BaseCommand
+
+from compliance.ingestion import (
+    INGESTION_BATCH_SIZE,
+    INGESTION_POLL_INTERVAL,
+    INGESTION_TIMEOUT,
+    IngestionWorker,
+)
+
+DEFAULT_WORKERS = 2
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the queued ingestion jobs: submits their regulations to the GraphRAG "
+        "service and marks them indexed once processed"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=DEFAULT_WORKERS,
+            help="Number of jobs to run in parallel",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=INGESTION_BATCH_SIZE,
+            help="Number of regulations submitted to the GraphRAG service at once",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=INGESTION_POLL_INTERVAL,
+            help="Seconds between polls for new jobs and for the pipeline status",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=INGESTION_TIMEOUT,
+            help="Seconds a job may wait for its regulations to be indexed",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the queued jobs and exit instead of waiting for new ones",
+        )
+
+    def handle(self, *args, **options):
+        worker = IngestionWorker(
+            batch_size=options["batch_size"],
+            poll_interval=options["poll_interval"],
+            timeout=options["timeout"],
+        )
+        if options["once"]:
+            count = worker.run_pending()
+            self.stdout.write(self.style.SUCCESS(f"Ran {count} ingestion jobs."))
+            return
+
+        stop_event = threading.Event()
+        threads = [
+            threading.Thread(
+                target=worker.run_forever,
+                args=(stop_event,),
+                name=f"ingestion-worker-{i}",
+            )
+            for i in range(options["workers"])
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(
+            self.style.SUCCESS(f"Started {len(threads)} ingestion workers.")
+        )
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            # Jobs interrupted here are taken over once their heartbeat is stale
+            self.stdout.write("Stopping after the running jobs...")
+            stop_event.set()
+            for thread in threads:
+                thread.join()
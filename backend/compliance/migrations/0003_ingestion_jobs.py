@@ -0,0 +1,119 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:57
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def mark_existing_regulations_indexed(apps, schema_editor):
+    # Regulations were inserted into GraphRAG synchronously before the job queue
+    Regulation = apps.get_model("compliance", "Regulation")
+    Regulation.objects.update(indexed=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("compliance", "0002_alter_regulation_date"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="regulation",
+            name="indexed",
+            field=models.BooleanField(
+                default=False, help_text="Indexed by the GraphRAG Service"
+            ),
+        ),
+        migrations.RunPython(
+            mark_existing_regulations_indexed, reverse_code=migrations.RunPython.noop
+        ),
+        migrations.CreateModel(
+            name="IngestionJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("submitting", "Submitting"),
+                            ("processing", "Processing"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        help_text="Job Status",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "total",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Regulations in Job"
+                    ),
+                ),
+                (
+                    "submitted",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Regulations Submitted to GraphRAG"
+                    ),
+                ),
+                (
+                    "indexed",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Regulations Indexed"
+                    ),
+                ),
+                (
+                    "failed",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Regulations Failed to Index"
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(default=0, help_text="Run Attempts"),
+                ),
+                (
+                    "error",
+                    models.TextField(blank=True, default="", help_text="Last Error"),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("heartbeat_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "Ingestion Job",
+                "verbose_name_plural": "Ingestion Jobs",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "created_at"],
+                        name="compliance__status_b11de2_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name="regulation",
+            name="ingestion_job",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Ingestion Job",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="regulations",
+                to="compliance.ingestionjob",
+            ),
+        ),
+    ]
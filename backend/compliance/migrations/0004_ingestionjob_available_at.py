@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("compliance", "0003_ingestion_jobs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ingestionjob",
+            name="available_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
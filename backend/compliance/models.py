@@ -1,8 +1,75 @@
+import uuid
+
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django_jalali.db import models as jmodels
 
 
+class IngestionStatus(models.TextChoices):
+    PENDING = "pending", _("Pending")
+    SUBMITTING = "submitting", _("Submitting")
+    PROCESSING = "processing", _("Processing")
+    COMPLETED = "completed", _("Completed")
+    FAILED = "failed", _("Failed")
+
+
+class IngestionJob(models.Model):
+    """
+    A batch of regulations waiting to be indexed by the GraphRAG service.
+
+    Jobs are queued by the insert endpoints and run by the
+    run_ingestion_worker command.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(
+        max_length=20,
+        choices=IngestionStatus.choices,
+        default=IngestionStatus.PENDING,
+        help_text=_("Job Status"),
+    )
+    total = models.PositiveIntegerField(default=0, help_text=_("Regulations in Job"))
+    submitted = models.PositiveIntegerField(
+        default=0, help_text=_("Regulations Submitted to GraphRAG")
+    )
+    indexed = models.PositiveIntegerField(default=0, help_text=_("Regulations Indexed"))
+    failed = models.PositiveIntegerField(
+        default=0, help_text=_("Regulations Failed to Index")
+    )
+    attempts = models.PositiveIntegerField(default=0, help_text=_("Run Attempts"))
+    error = models.TextField(blank=True, default="", help_text=_("Last Error"))
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed while a worker runs the job, a stale one means the worker died
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    # A pending job is not claimed before this time, retries back off with it
+    available_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.id} - {self.status}"
+
+    @property
+    def duration(self):
+        """Seconds the job has been running, None before it starts."""
+        if not self.started_at:
+            return None
+        return ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+
+    @property
+    def throughput(self):
+        """Indexed regulations per second."""
+        duration = self.duration
+        return round(self.indexed / duration, 3) if duration else 0.0
+
+    class Meta:
+        verbose_name = _("Ingestion Job")
+        verbose_name_plural = _("Ingestion Jobs")
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+
 class Regulation(models.Model):
     """
     Model representing a regulation or law.
@@ -14,6 +81,17 @@ class Regulation(models.Model):
     authority = models.CharField(max_length=255, help_text=_("Approval Authority"))
     link = models.URLField(help_text=_("Regulation Link"), blank=True)
     text = models.TextField(help_text=_("Regulation Text"), blank=True, default="")
+    indexed = models.BooleanField(
+        default=False, help_text=_("Indexed by the GraphRAG Service")
+    )
+    ingestion_job = models.ForeignKey(
+        IngestionJob,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="regulations",
+        help_text=_("Ingestion Job"),
+    )
 
     def __str__(self):
         return f"{self.title} - {self.date}"
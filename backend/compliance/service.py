@@ -1,10 +1,44 @@
+import asyncio
+import hashlib
+import json
 import os
+import re
+import threading
+import time
+import unicodedata
 from enum import Enum
+from urllib.parse import quote
 
+import httpx
 import requests
+from django.conf import settings
+from django.core.cache import caches
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from compliance.system_prompt import SystemPromptProvider
 
+LIGHTRAG_HOST = os.getenv("LIGHTRAG_HOST", "http://lightrag:9621")
+LIGHTRAG_CONNECT_TIMEOUT = float(os.getenv("LIGHTRAG_CONNECT_TIMEOUT", "5"))
+LIGHTRAG_READ_TIMEOUT = float(os.getenv("LIGHTRAG_READ_TIMEOUT", "120"))
+LIGHTRAG_MAX_RETRIES = int(os.getenv("LIGHTRAG_MAX_RETRIES", "3"))
+LIGHTRAG_RETRY_BACKOFF = float(os.getenv("LIGHTRAG_RETRY_BACKOFF", "0.5"))
+LIGHTRAG_POOL_SIZE = int(os.getenv("LIGHTRAG_POOL_SIZE", "10"))
+# Responses that mean the request never reached LightRAG, so a POST is safe to
+# resend. A 500 or 504 may come after the work was done.
+LIGHTRAG_RETRY_STATUSES = (502, 503)
+# Seconds a query answer stays cached, 0 disables the cache. When unset, answers
+# are cached for an hour only if the cache backend is shared between processes.
+LIGHTRAG_QUERY_CACHE_TTL = os.getenv("LIGHTRAG_QUERY_CACHE_TTL")
+LIGHTRAG_QUERY_CACHE_DEFAULT_TTL = 3600
+LIGHTRAG_QUERY_CACHE_ALIAS = os.getenv("LIGHTRAG_QUERY_CACHE_ALIAS", "default")
+# Backends that keep entries in one process, invalidation from the ingestion
+# worker never reaches the web workers using them
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
 
 class LightRagMode(Enum):
     NAIVE = "naive"
@@ -15,51 +49,216 @@ class LightRagMode(Enum):
     BYPASS = "bypass"
 
 
-class LightRagClient:
-    def __init__(self):
-        self.host = os.getenv("LIGHTRAG_HOST", "http://lightrag:9621")
-        self.headers = {
-            "Content-Type": "application/json",
-        }
-        self.system_prompt_provider = SystemPromptProvider()
+class LightRagError(Exception):
+    def __init__(self, message: str, status_code: int = None):
+        super().__init__(message)
+        self.status_code = status_code
 
-    def query(
+
+class QueryResultCache:
+    """
+    Caches query answers in the Django cache.
+
+    Entries are keyed by the normalized question, the mode, the system prompt and
+    the knowledge base version. Indexing or deleting documents bumps the version,
+    so older answers are no longer found and expire with their TTL. Hits, misses
+    and the query time saved by hits are counted in the cache as well, so a
+    shared backend reports them for all workers.
+
+    The version is bumped by the ingestion worker, so the cache is only enabled
+    by default on a backend shared between processes (Redis, database, ...).
+    """
+
+    PREFIX = "lightrag:query"
+    VERSION_KEY = f"{PREFIX}:kb-version"
+    STAT_KEYS = ("hits", "misses", "saved_ms")
+    # Arabic letters that are typed in place of their Persian forms
+    CHARACTER_MAP = str.maketrans({"ي": "ی", "ى": "ی", "ك": "ک", "\u200c": " "})
+
+    def __init__(self, alias: str = None, ttl: int = None):
+        self.alias = alias or LIGHTRAG_QUERY_CACHE_ALIAS
+        if ttl is None and LIGHTRAG_QUERY_CACHE_TTL is not None:
+            ttl = int(LIGHTRAG_QUERY_CACHE_TTL)
+        elif ttl is None:
+            backend = settings.CACHES[self.alias]["BACKEND"]
+            shared = backend not in PROCESS_LOCAL_CACHE_BACKENDS
+            ttl = LIGHTRAG_QUERY_CACHE_DEFAULT_TTL if shared else 0
+        self.ttl = ttl
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @classmethod
+    def normalize_query(cls, query: str) -> str:
+        query = unicodedata.normalize("NFKC", query).translate(cls.CHARACTER_MAP)
+        query = re.sub(r"\s+", " ", query.casefold())
+        return query.strip(" ?؟!.")
+
+    def make_key(
         self,
         query: str,
         mode: LightRagMode,
-        system_prompt_type: str = "chat",
+        system_prompt_type: str,
         system_prompt: str = None,
     ) -> str:
-        url = f"{self.host}/query"
+        version = self.cache.get_or_set(self.VERSION_KEY, 1, timeout=None)
+        return self._key(query, mode, system_prompt_type, system_prompt, version)
 
-        user_prompt = self.system_prompt_provider.get_system_prompt(
-            system_prompt_type, system_prompt
-        )
+    async def amake_key(
+        self,
+        query: str,
+        mode: LightRagMode,
+        system_prompt_type: str,
+        system_prompt: str = None,
+    ) -> str:
+        version = await self.cache.aget_or_set(self.VERSION_KEY, 1, timeout=None)
+        return self._key(query, mode, system_prompt_type, system_prompt, version)
+
+    def _key(self, query, mode, system_prompt_type, system_prompt, version) -> str:
+        parts = [
+            self.normalize_query(query),
+            mode.value,
+            system_prompt_type,
+            system_prompt or "",
+        ]
+        digest = hashlib.sha256(
+            json.dumps(parts, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+        return f"{self.PREFIX}:v{version}:{digest}"
+
+    def get(self, key: str):
+        entry = self.cache.get(key)
+        self._count(entry)
+        return entry["text"] if entry else None
+
+    async def aget(self, key: str):
+        entry = await self.cache.aget(key)
+        await self._acount(entry)
+        return entry["text"] if entry else None
+
+    def set(self, key: str, text: str, exec_time: float) -> None:
+        self.cache.set(key, {"text": text, "time": exec_time}, self.ttl)
+
+    async def aset(self, key: str, text: str, exec_time: float) -> None:
+        await self.cache.aset(key, {"text": text, "time": exec_time}, self.ttl)
+
+    def invalidate(self) -> None:
+        """Start a new knowledge base version after documents changed."""
+        try:
+            self.cache.incr(self.VERSION_KEY)
+        except ValueError:
+            self.cache.set(self.VERSION_KEY, 2, timeout=None)
 
-        response = requests.post(
-            url,
-            headers=self.headers,
-            json=self._get_query_request(query, mode, user_prompt),
+    async def ainvalidate(self) -> None:
+        try:
+            await self.cache.aincr(self.VERSION_KEY)
+        except ValueError:
+            await self.cache.aset(self.VERSION_KEY, 2, timeout=None)
+
+    def _stat_updates(self, entry) -> dict:
+        if entry is None:
+            return {"misses": 1}
+        return {"hits": 1, "saved_ms": int(entry["time"] * 1000)}
+
+    def _count(self, entry) -> None:
+        for name, delta in self._stat_updates(entry).items():
+            key = f"{self.PREFIX}:stats:{name}"
+            if self.cache.add(key, delta, timeout=None):
+                continue
+            self.cache.incr(key, delta)
+
+    async def _acount(self, entry) -> None:
+        for name, delta in self._stat_updates(entry).items():
+            key = f"{self.PREFIX}:stats:{name}"
+            if await self.cache.aadd(key, delta, timeout=None):
+                continue
+            await self.cache.aincr(key, delta)
+
+    def stats(self) -> dict:
+        values = self.cache.get_many(
+            [f"{self.PREFIX}:stats:{name}" for name in self.STAT_KEYS]
+        )
+        hits, misses, saved_ms = (
+            values.get(f"{self.PREFIX}:stats:{name}", 0) for name in self.STAT_KEYS
         )
-        if response.status_code != 200:
-            raise error(response.json()["detail"][0]["msg"])
-        return self._translate_to_persian(response.json()["response"])
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "saved_seconds": round(saved_ms / 1000, 3),
+        }
+
+
+class BaseLightRagClient:
+    translations = {
+        "Compliance Status": "وضعیت تنقیحی",
+        "Regulatory Concerns": "ریسک‌های قانونی",
+        "Risk Assessment": "بررسی ریسک‌ها",
+        "Compliance Recommendations": "توصیه‌های تنقیحی",
+        "Regulatory Context": "قوانین مرتبط",
+        "Verdict": "نتیجه",
+        "References": "منابع",
+    }
+
+    def __init__(self, host: str = None):
+        self.host = host or LIGHTRAG_HOST
+        self.headers = {
+            "Content-Type": "application/json",
+        }
+        self.system_prompt_provider = SystemPromptProvider()
+        self.query_cache = QueryResultCache()
 
     @classmethod
     def _translate_to_persian(cls, text: str) -> str:
-        translations = {
-            "Compliance Status": "وضعیت تنقیحی",
-            "Regulatory Concerns": "ریسک‌های قانونی",
-            "Risk Assessment": "بررسی ریسک‌ها",
-            "Compliance Recommendations": "توصیه‌های تنقیحی",
-            "Regulatory Context": "قوانین مرتبط",
-            "Verdict": "نتیجه",
-            "References": "منابع",
-        }
-        for key, value in translations.items():
+        for key, value in cls.translations.items():
             text = text.replace(key, value)
         return text
 
+    @classmethod
+    def _split_translatable(cls, buffer: str) -> int:
+        """
+        Return how much of a streamed buffer can be translated and flushed.
+
+        The tail that could still be the start of a translated heading is held
+        back until the next chunk arrives.
+        """
+        cut = max(len(buffer) - max(len(key) for key in cls.translations) + 1, 0)
+        moved = True
+        while moved:
+            moved = False
+            for key in cls.translations:
+                start = buffer.find(key, max(cut - len(key) + 1, 0), cut + len(key))
+                if -1 < start < cut < start + len(key):
+                    cut, moved = start, True
+        return cut
+
+    @classmethod
+    def _parse_stream_line(cls, line) -> str:
+        if not line:
+            return ""
+        data = json.loads(line)
+        if "error" in data:
+            raise LightRagError(data["error"])
+        return data.get("response", "")
+
+    def _build_query_request(
+        self,
+        query: str,
+        mode: LightRagMode,
+        system_prompt_type: str = "chat",
+        system_prompt: str = None,
+    ) -> dict:
+        user_prompt = self.system_prompt_provider.get_system_prompt(
+            system_prompt_type, system_prompt
+        )
+        return self._get_query_request(query, mode, user_prompt)
+
     @classmethod
     def _get_query_request(
         cls, query: str, mode: LightRagMode, user_prompt: str = None
@@ -82,18 +281,6 @@ class LightRagClient:
             data["user_prompt"] = user_prompt
         return data
 
-    def insert_texts(
-        self, texts: [str], sources: [str] = None, ids: [str] = None
-    ) -> None:
-        url = f"{self.host}/document/texts"
-        response = requests.post(
-            url,
-            headers=self.headers,
-            json=self._get_insert_texts_request(texts, sources, ids),
-        )
-        if response.status_code != 200:
-            raise error(response.json()["detail"][0]["msg"])
-
     @classmethod
     def _get_insert_texts_request(
         cls, texts: [str], sources: [str] = None, ids: [str] = None
@@ -106,3 +293,403 @@ class LightRagClient:
         if ids:
             data["ids"] = ids
         return data
+
+    @classmethod
+    def _get_document_statuses(cls, body: dict) -> dict:
+        return {doc["id"]: doc["status"] for doc in body["documents"]}
+
+    @classmethod
+    def _raise_for_response(cls, status_code: int, body) -> None:
+        if status_code == 200:
+            return
+        detail = body.get("detail") if isinstance(body, dict) else None
+        if isinstance(detail, list) and detail:
+            message = detail[0].get("msg", str(detail[0]))
+        elif detail:
+            message = str(detail)
+        else:
+            message = f"LightRAG request failed with status {status_code}"
+        raise LightRagError(message, status_code=status_code)
+
+
+class LightRagClient(BaseLightRagClient):
+    """
+    Blocking LightRAG client backed by a pooled, keep-alive requests.Session.
+
+    Connection errors and 502/503 responses are retried with exponential backoff.
+    Read timeouts and other errors are not, since LightRAG may already have run
+    the (non-idempotent) request. Use get_lightrag_client() to share a single
+    instance per process.
+    """
+
+    def __init__(self, host: str = None):
+        super().__init__(host)
+        self.timeout = (LIGHTRAG_CONNECT_TIMEOUT, LIGHTRAG_READ_TIMEOUT)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        retry = Retry(
+            total=LIGHTRAG_MAX_RETRIES,
+            read=0,
+            other=0,
+            backoff_factor=LIGHTRAG_RETRY_BACKOFF,
+            status_forcelist=LIGHTRAG_RETRY_STATUSES,
+            # Only failures before LightRAG ran the request are retried, so
+            # POSTs are safe to retry as well
+            allowed_methods=None,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=LIGHTRAG_POOL_SIZE,
+            pool_maxsize=LIGHTRAG_POOL_SIZE,
+            max_retries=retry,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _request(self, method: str, path: str, payload: dict = None) -> dict:
+        try:
+            response = self.session.request(
+                method,
+                f"{self.host}{path}",
+                json=payload,
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            raise LightRagError(f"LightRAG request failed: {e}") from e
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        self._raise_for_response(response.status_code, body)
+        return body
+
+    def query(
+        self,
+        query: str,
+        mode: LightRagMode,
+        system_prompt_type: str = "chat",
+        system_prompt: str = None,
+    ) -> str:
+        key = None
+        if self.query_cache.enabled:
+            key = self.query_cache.make_key(
+                query, mode, system_prompt_type, system_prompt
+            )
+            cached = self.query_cache.get(key)
+            if cached is not None:
+                return cached
+        start_time = time.time()
+        body = self._request(
+            "POST",
+            "/query",
+            self._build_query_request(query, mode, system_prompt_type, system_prompt),
+        )
+        result = self._translate_to_persian(body["response"])
+        if key:
+            self.query_cache.set(key, result, time.time() - start_time)
+        return result
+
+    def query_stream(
+        self,
+        query: str,
+        mode: LightRagMode,
+        system_prompt_type: str = "chat",
+        system_prompt: str = None,
+    ):
+        """
+        Yield the answer in translated chunks as LightRAG generates it.
+
+        A cached answer is yielded as a single chunk, a complete streamed answer
+        is cached.
+        """
+        key = None
+        if self.query_cache.enabled:
+            key = self.query_cache.make_key(
+                query, mode, system_prompt_type, system_prompt
+            )
+            cached = self.query_cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        chunks = []
+        start_time = time.time()
+        for chunk in self._query_stream(query, mode, system_prompt_type, system_prompt):
+            chunks.append(chunk)
+            yield chunk
+        if key:
+            self.query_cache.set(key, "".join(chunks), time.time() - start_time)
+
+    def _query_stream(
+        self,
+        query: str,
+        mode: LightRagMode,
+        system_prompt_type: str = "chat",
+        system_prompt: str = None,
+    ):
+        payload = self._build_query_request(
+            query, mode, system_prompt_type, system_prompt
+        )
+        try:
+            response = self.session.post(
+                f"{self.host}/query/stream",
+                json=payload,
+                timeout=self.timeout,
+                stream=True,
+            )
+        except requests.RequestException as e:
+            raise LightRagError(f"LightRAG request failed: {e}") from e
+        with response:
+            if response.status_code != 200:
+                try:
+                    body = response.json()
+                except ValueError:
+                    body = None
+                self._raise_for_response(response.status_code, body)
+            buffer = ""
+            try:
+                for line in response.iter_lines(decode_unicode=True):
+                    buffer += self._parse_stream_line(line)
+                    cut = self._split_translatable(buffer)
+                    if cut:
+                        yield self._translate_to_persian(buffer[:cut])
+                        buffer = buffer[cut:]
+            except requests.RequestException as e:
+                raise LightRagError(f"LightRAG stream interrupted: {e}") from e
+            if buffer:
+                yield self._translate_to_persian(buffer)
+
+    def insert_texts(
+        self, texts: [str], sources: [str] = None, ids: [str] = None
+    ) -> None:
+        self._request(
+            "POST",
+            "/documents/texts",
+            self._get_insert_texts_request(texts, sources, ids),
+        )
+
+    def delete_document(self, doc_id: str) -> bool:
+        """Delete a document and its derived data, False if LightRAG has no such id."""
+        body = self._request("DELETE", f"/documents/{quote(doc_id, safe='')}")
+        self.query_cache.invalidate()
+        return body["status"] == "success"
+
+    def get_pipeline_status(self) -> dict:
+        """State of the LightRAG indexing pipeline (busy, request_pending, ...)."""
+        return self._request("GET", "/documents/pipeline_status")
+
+    def get_document_statuses(self, ids: [str]) -> dict:
+        """
+        Status of each of the documents ({id: "processed", ...}), at most 1000 ids.
+        Ids unknown to LightRAG are left out.
+        """
+        body = self._request("POST", "/documents/statuses", {"ids": ids})
+        return self._get_document_statuses(body)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class AsyncLightRagClient(BaseLightRagClient):
+    """
+    Non-blocking LightRAG client for ASGI views, backed by httpx.AsyncClient.
+
+    httpx clients are bound to the event loop they were created on, so one
+    pooled client is kept per running loop.
+    """
+
+    def __init__(self, host: str = None):
+        super().__init__(host)
+        self.timeout = httpx.Timeout(
+            LIGHTRAG_READ_TIMEOUT, connect=LIGHTRAG_CONNECT_TIMEOUT
+        )
+        self.limits = httpx.Limits(
+            max_connections=LIGHTRAG_POOL_SIZE,
+            max_keepalive_connections=LIGHTRAG_POOL_SIZE,
+        )
+        self._clients = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            # Connection failures are retried by the transport itself
+            transport = httpx.AsyncHTTPTransport(
+                retries=LIGHTRAG_MAX_RETRIES, limits=self.limits
+            )
+            client = httpx.AsyncClient(
+                base_url=self.host,
+                headers=self.headers,
+                timeout=self.timeout,
+                transport=transport,
+            )
+            self._clients = {
+                lp: c for lp, c in self._clients.items() if not lp.is_closed()
+            }
+            self._clients[loop] = client
+        return client
+
+    async def _request(self, method: str, path: str, payload: dict = None) -> dict:
+        client = self._get_client()
+        for attempt in range(LIGHTRAG_MAX_RETRIES + 1):
+            try:
+                response = await client.request(method, path, json=payload)
+            except httpx.HTTPError as e:
+                raise LightRagError(f"LightRAG request failed: {e}") from e
+            if (
+                response.status_code not in LIGHTRAG_RETRY_STATUSES
+                or attempt == LIGHTRAG_MAX_RETRIES
+            ):
+                break
+            await asyncio.sleep(LIGHTRAG_RETRY_BACKOFF * (2**attempt))
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        self._raise_for_response(response.status_code, body)
+        return body
+
+    async def query(
+        self,
+        query: str,
+        mode: LightRagMode,
+        system_prompt_type: str = "chat",
+        system_prompt: str = None,
+    ) -> str:
+        key = None
+        if self.query_cache.enabled:
+            key = await self.query_cache.amake_key(
+                query, mode, system_prompt_type, system_prompt
+            )
+            cached = await self.query_cache.aget(key)
+            if cached is not None:
+                return cached
+        start_time = time.time()
+        body = await self._request(
+            "POST",
+            "/query",
+            self._build_query_request(query, mode, system_prompt_type, system_prompt),
+        )
+        result = self._translate_to_persian(body["response"])
+        if key:
+            await self.query_cache.aset(key, result, time.time() - start_time)
+        return result
+
+    async def query_stream(
+        self,
+        query: str,
+        mode: LightRagMode,
+        system_prompt_type: str = "chat",
+        system_prompt: str = None,
+    ):
+        """
+        Yield the answer in translated chunks as LightRAG generates it.
+
+        A cached answer is yielded as a single chunk, a complete streamed answer
+        is cached.
+        """
+        key = None
+        if self.query_cache.enabled:
+            key = await self.query_cache.amake_key(
+                query, mode, system_prompt_type, system_prompt
+            )
+            cached = await self.query_cache.aget(key)
+            if cached is not None:
+                yield cached
+                return
+        chunks = []
+        start_time = time.time()
+        async for chunk in self._query_stream(
+            query, mode, system_prompt_type, system_prompt
+        ):
+            chunks.append(chunk)
+            yield chunk
+        if key:
+            await self.query_cache.aset(key, "".join(chunks), time.time() - start_time)
+
+    async def _query_stream(
+        self,
+        query: str,
+        mode: LightRagMode,
+        system_prompt_type: str = "chat",
+        system_prompt: str = None,
+    ):
+        payload = self._build_query_request(
+            query, mode, system_prompt_type, system_prompt
+        )
+        try:
+            async with self._get_client().stream(
+                "POST", "/query/stream", json=payload
+            ) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    try:
+                        body = response.json()
+                    except ValueError:
+                        body = None
+                    self._raise_for_response(response.status_code, body)
+                buffer = ""
+                async for line in response.aiter_lines():
+                    buffer += self._parse_stream_line(line)
+                    cut = self._split_translatable(buffer)
+                    if cut:
+                        yield self._translate_to_persian(buffer[:cut])
+                        buffer = buffer[cut:]
+        except httpx.HTTPError as e:
+            raise LightRagError(f"LightRAG stream interrupted: {e}") from e
+        if buffer:
+            yield self._translate_to_persian(buffer)
+
+    async def insert_texts(
+        self, texts: [str], sources: [str] = None, ids: [str] = None
+    ) -> None:
+        await self._request(
+            "POST",
+            "/documents/texts",
+            self._get_insert_texts_request(texts, sources, ids),
+        )
+
+    async def delete_document(self, doc_id: str) -> bool:
+        """Delete a document and its derived data, False if LightRAG has no such id."""
+        body = await self._request("DELETE", f"/documents/{quote(doc_id, safe='')}")
+        await self.query_cache.ainvalidate()
+        return body["status"] == "success"
+
+    async def get_pipeline_status(self) -> dict:
+        """State of the LightRAG indexing pipeline (busy, request_pending, ...)."""
+        return await self._request("GET", "/documents/pipeline_status")
+
+    async def get_document_statuses(self, ids: [str]) -> dict:
+        """
+        Status of each of the documents ({id: "processed", ...}), at most 1000 ids.
+        Ids unknown to LightRAG are left out.
+        """
+        body = await self._request("POST", "/documents/statuses", {"ids": ids})
+        return self._get_document_statuses(body)
+
+    async def aclose(self) -> None:
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+_client_lock = threading.Lock()
+_lightrag_client = None
+_async_lightrag_client = None
+
+
+def get_lightrag_client() -> LightRagClient:
+    global _lightrag_client
+    if _lightrag_client is None:
+        with _client_lock:
+            if _lightrag_client is None:
+                _lightrag_client = LightRagClient()
+    return _lightrag_client
+
+
+def get_async_lightrag_client() -> AsyncLightRagClient:
+    global _async_lightrag_client
+    if _async_lightrag_client is None:
+        with _client_lock:
+            if _async_lightrag_client is None:
+                _async_lightrag_client = AsyncLightRagClient()
+    return _async_lightrag_client
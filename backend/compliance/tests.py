@@ -1,3 +1,381 @@
-from django.test import TestCase
+import asyncio
+import json
+from unittest import mock
 
-# Create your tests here.
+import httpx
+import jdatetime
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from compliance import service
+from compliance.ingestion import IngestionWorker, claim_job, enqueue_regulations
+from compliance.models import IngestionJob, IngestionStatus, Regulation
+from compliance.service import (
+    AsyncLightRagClient,
+    LightRagClient,
+    LightRagError,
+    LightRagMode,
+    QueryResultCache,
+    get_lightrag_client,
+)
+
+
+class LightRagClientTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = LightRagClient(host="http://lightrag.test")
+
+    def _response(self, status_code, body):
+        response = mock.Mock(status_code=status_code)
+        response.json.return_value = body
+        return response
+
+    def test_module_client_is_shared(self):
+        """The pooled client is created once and reused across calls."""
+        self.assertIs(get_lightrag_client(), get_lightrag_client())
+
+    def test_session_is_pooled_with_retries(self):
+        adapter = self.client.session.get_adapter("http://lightrag.test")
+        self.assertEqual(adapter.max_retries.total, service.LIGHTRAG_MAX_RETRIES)
+        self.assertIn(503, adapter.max_retries.status_forcelist)
+        # A slow or failed POST may have been run already, it is not resent
+        self.assertEqual(adapter.max_retries.read, 0)
+        self.assertNotIn(500, adapter.max_retries.status_forcelist)
+
+    def test_query_uses_timeouts_and_translates(self):
+        with mock.patch.object(
+            self.client.session,
+            "request",
+            return_value=self._response(200, {"response": "Verdict: ok"}),
+        ) as post:
+            result = self.client.query("question", LightRagMode.NAIVE)
+        self.assertEqual(result, "نتیجه: ok")
+        _, kwargs = post.call_args
+        self.assertEqual(
+            kwargs["timeout"],
+            (service.LIGHTRAG_CONNECT_TIMEOUT, service.LIGHTRAG_READ_TIMEOUT),
+        )
+        self.assertEqual(kwargs["json"], {"query": "question", "mode": "naive"})
+
+    def test_insert_texts_posts_to_documents_endpoint(self):
+        with mock.patch.object(
+            self.client.session, "request", return_value=self._response(200, {})
+        ) as post:
+            self.client.insert_texts(["text"], sources=["link"], ids=["id-1"])
+        args, kwargs = post.call_args
+        self.assertEqual(args, ("POST", "http://lightrag.test/documents/texts"))
+        self.assertEqual(
+            kwargs["json"],
+            {"texts": ["text"], "file_sources": ["link"], "ids": ["id-1"]},
+        )
+
+    def test_delete_document(self):
+        with mock.patch.object(
+            self.client.session,
+            "request",
+            return_value=self._response(200, {"status": "not_found"}),
+        ) as request:
+            self.assertFalse(self.client.delete_document("REG/1"))
+        args, _ = request.call_args
+        self.assertEqual(args, ("DELETE", "http://lightrag.test/documents/REG%2F1"))
+
+    def test_query_stream_translates_across_chunks(self):
+        lines = [
+            json.dumps({"response": chunk})
+            for chunk in ["## Ver", "dict\n", "Compliant"]
+        ]
+        response = mock.MagicMock(status_code=200)
+        response.__enter__.return_value = response
+        response.iter_lines.return_value = iter(lines)
+        with mock.patch.object(self.client.session, "post", return_value=response):
+            chunks = list(self.client.query_stream("question", LightRagMode.NAIVE))
+        self.assertEqual("".join(chunks), "## نتیجه\nCompliant")
+
+    def test_query_stream_raises_error_line(self):
+        response = mock.MagicMock(status_code=200)
+        response.__enter__.return_value = response
+        response.iter_lines.return_value = iter([json.dumps({"error": "boom"})])
+        with mock.patch.object(self.client.session, "post", return_value=response):
+            with self.assertRaisesMessage(LightRagError, "boom"):
+                list(self.client.query_stream("question", LightRagMode.NAIVE))
+
+    def test_error_detail_is_raised(self):
+        for body, message in (
+            ({"detail": "boom"}, "boom"),
+            ({"detail": [{"msg": "field required"}]}, "field required"),
+        ):
+            with mock.patch.object(
+                self.client.session, "request", return_value=self._response(500, body)
+            ):
+                with self.assertRaisesMessage(LightRagError, message):
+                    self.client.query("question", LightRagMode.NAIVE)
+
+
+class AsyncLightRagClientTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_retries_server_errors(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            if len(calls) == 1:
+                return httpx.Response(503, json={"detail": "unavailable"})
+            return httpx.Response(200, json={"response": "ok"})
+
+        async def run():
+            client = AsyncLightRagClient(host="http://lightrag.test")
+            http_client = httpx.AsyncClient(
+                base_url=client.host, transport=httpx.MockTransport(handler)
+            )
+            with mock.patch.object(client, "_get_client", return_value=http_client):
+                with mock.patch.object(service, "LIGHTRAG_RETRY_BACKOFF", 0):
+                    result = await client.query("question", LightRagMode.NAIVE)
+            await http_client.aclose()
+            return result
+
+        self.assertEqual(asyncio.run(run()), "ok")
+        self.assertEqual(len(calls), 2)
+
+
+class QueryResultCacheTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = LightRagClient(host="http://lightrag.test")
+        self.client.query_cache = QueryResultCache(ttl=3600)
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {"response": "answer"}
+        patcher = mock.patch.object(
+            self.client.session, "request", return_value=response
+        )
+        self.request = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_normalized_question_is_answered_from_cache(self):
+        self.client.query("What is  the LAW?", LightRagMode.LOCAL)
+        result = self.client.query("what is the law", LightRagMode.LOCAL)
+
+        self.assertEqual(result, "answer")
+        self.assertEqual(self.request.call_count, 1)
+        stats = self.client.query_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_mode_and_prompt_type_are_part_of_the_key(self):
+        self.client.query("question", LightRagMode.LOCAL)
+        self.client.query("question", LightRagMode.GLOBAL)
+        self.client.query("question", LightRagMode.LOCAL, "compliance")
+        self.assertEqual(self.request.call_count, 3)
+
+    def test_invalidate_drops_cached_answers(self):
+        self.client.query("question", LightRagMode.NAIVE)
+        # Submitted documents are not searchable yet, the answer stays cached
+        self.client.insert_texts(["text"])
+        self.client.query("question", LightRagMode.NAIVE)
+        self.assertEqual(self.request.call_count, 2)
+
+        self.client.query_cache.invalidate()
+        self.client.query("question", LightRagMode.NAIVE)
+        self.assertEqual(self.request.call_count, 3)
+
+    def test_process_local_cache_is_disabled_by_default(self):
+        self.assertEqual(QueryResultCache().ttl, 0)
+        with self.settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                    "LOCATION": "query_cache",
+                }
+            }
+        ):
+            self.assertEqual(QueryResultCache().ttl, 3600)
+
+    def test_arabic_letters_normalize_to_persian(self):
+        self.assertEqual(
+            QueryResultCache.normalize_query("قانون كار چيست؟"), "قانون کار چیست"
+        )
+
+
+def make_regulation(identifier):
+    return Regulation(
+        identifier=identifier,
+        title=f"Regulation {identifier}",
+        date=jdatetime.date(1400, 1, 1),
+        authority="Parliament",
+        link="https://example.com",
+        text="Text",
+    )
+
+
+class IngestionQueueTest(TestCase):
+    def setUp(self):
+        self.api = APIClient()
+
+    def regulation_data(self, identifier):
+        return {
+            "identifier": identifier,
+            "title": "Title",
+            "date": "1400-01-01",
+            "authority": "Parliament",
+            "link": "https://example.com",
+            "text": "Text",
+        }
+
+    @mock.patch.object(LightRagClient, "insert_texts")
+    def test_insert_queues_job_without_calling_lightrag(self, insert_texts):
+        response = self.api.post(
+            "/api/compliance/insert/", self.regulation_data("R-1"), format="json"
+        )
+
+        self.assertEqual(response.status_code, 202)
+        job = IngestionJob.objects.get(id=response.data["job_id"])
+        self.assertEqual((job.status, job.total), (IngestionStatus.PENDING, 1))
+        self.assertFalse(Regulation.objects.get(identifier="R-1").indexed)
+        insert_texts.assert_not_called()
+
+    def test_batch_insert_skips_existing_and_duplicate_identifiers(self):
+        make_regulation("R-1").save()
+        payload = {
+            "regulations": [
+                self.regulation_data("R-1"),
+                self.regulation_data("R-2"),
+                self.regulation_data("R-2"),
+            ]
+        }
+
+        response = self.api.post(
+            "/api/compliance/batch-insert/", payload, format="json"
+        )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["results"]["successful"], ["R-2"])
+        self.assertEqual(len(response.data["results"]["skipped"]), 2)
+        self.assertEqual(IngestionJob.objects.get().total, 1)
+
+        detail = self.api.get(f"/api/compliance/jobs/{response.data['job_id']}/")
+        self.assertEqual(detail.data["job"]["status"], IngestionStatus.PENDING)
+
+    def test_job_is_claimed_once(self):
+        job = enqueue_regulations([make_regulation("R-1")])
+
+        claimed = claim_job()
+
+        self.assertEqual(claimed.id, job.id)
+        self.assertEqual(claimed.status, IngestionStatus.SUBMITTING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(claim_job())
+
+
+class RegulationDeleteTest(TestCase):
+    def setUp(self):
+        self.api = APIClient()
+
+    @mock.patch.object(LightRagClient, "delete_document", return_value=False)
+    def test_regulation_of_running_job_is_not_deleted(self, delete_document):
+        enqueue_regulations([make_regulation("R-1")])
+        IngestionJob.objects.update(status=IngestionStatus.PROCESSING)
+
+        response = self.api.delete("/api/compliance/regulations/R-1/")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(Regulation.objects.filter(identifier="R-1").exists())
+
+    @mock.patch.object(LightRagClient, "delete_document", return_value=False)
+    def test_regulation_unknown_to_lightrag_is_deleted(self, delete_document):
+        enqueue_regulations([make_regulation("R-1")])
+        IngestionJob.objects.update(status=IngestionStatus.FAILED)
+
+        response = self.api.delete("/api/compliance/regulations/R-1/")
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Regulation.objects.filter(identifier="R-1").exists())
+
+
+class IngestionWorkerTest(TestCase):
+    def setUp(self):
+        self.client = mock.Mock()
+        self.client.get_pipeline_status.return_value = {"busy": False}
+        self.worker = IngestionWorker(
+            client=self.client, batch_size=2, poll_interval=0, timeout=60
+        )
+
+    def document_statuses(self, processed=(), failed=()):
+        statuses = {
+            **{doc_id: "processed" for doc_id in processed},
+            **{doc_id: "failed" for doc_id in failed},
+        }
+
+        def get_document_statuses(ids):
+            return {doc_id: statuses[doc_id] for doc_id in ids if doc_id in statuses}
+
+        return get_document_statuses
+
+    def test_job_submits_in_batches_and_marks_regulations_indexed(self):
+        enqueue_regulations([make_regulation(f"R-{i}") for i in range(3)])
+        self.client.get_document_statuses.side_effect = self.document_statuses(
+            processed=["R-0", "R-1", "R-2"]
+        )
+
+        self.assertEqual(self.worker.run_pending(), 1)
+
+        self.assertEqual(self.client.insert_texts.call_count, 2)
+        job = IngestionJob.objects.get()
+        self.assertEqual(job.status, IngestionStatus.COMPLETED)
+        self.assertEqual((job.submitted, job.indexed, job.failed), (3, 3, 0))
+        self.assertEqual(Regulation.objects.filter(indexed=True).count(), 3)
+        self.client.query_cache.invalidate.assert_called_once()
+
+    def test_regulations_known_to_lightrag_are_found_by_id(self):
+        # A retried job resubmits documents LightRAG already indexed and skips
+        enqueue_regulations([make_regulation(f"R-{i}") for i in range(2)])
+        self.client.get_document_statuses.side_effect = self.document_statuses(
+            processed=["R-0", "R-1"]
+        )
+
+        self.worker.run_pending()
+
+        self.assertEqual(IngestionJob.objects.get().status, IngestionStatus.COMPLETED)
+        self.client.get_document_statuses.assert_called_once_with(["R-0", "R-1"])
+
+    def test_job_with_unindexed_regulations_fails(self):
+        enqueue_regulations([make_regulation(f"R-{i}") for i in range(3)])
+        self.client.get_document_statuses.side_effect = self.document_statuses(
+            processed=["R-0"], failed=["R-1"]
+        )
+
+        self.worker.run_pending()
+
+        job = IngestionJob.objects.get()
+        self.assertEqual(job.status, IngestionStatus.FAILED)
+        self.assertEqual((job.indexed, job.failed), (1, 2))
+        self.assertEqual(
+            list(
+                Regulation.objects.filter(indexed=True).values_list(
+                    "identifier", flat=True
+                )
+            ),
+            ["R-0"],
+        )
+
+    def test_failed_submission_is_retried_after_backoff(self):
+        enqueue_regulations([make_regulation("R-0")])
+        self.client.insert_texts.side_effect = LightRagError("unavailable")
+
+        self.assertEqual(self.worker.run_pending(), 1)
+        job = IngestionJob.objects.get()
+        self.assertEqual((job.status, job.attempts), (IngestionStatus.PENDING, 1))
+        self.assertGreater(job.available_at, timezone.now())
+        # The backoff keeps the job from being claimed again right away
+        self.assertEqual(self.worker.run_pending(), 0)
+
+        for _ in range(2):
+            IngestionJob.objects.update(available_at=timezone.now())
+            self.worker.run_pending()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, IngestionStatus.FAILED)
+        self.assertEqual(job.attempts, 3)
+        self.assertEqual(job.error, "unavailable")
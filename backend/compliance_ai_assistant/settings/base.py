@@ -88,6 +88,13 @@ DATABASES = {
     }
 }
 
+# Caches the LightRAG query results (see compliance.service.QueryResultCache)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
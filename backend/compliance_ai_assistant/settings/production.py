@@ -23,6 +23,18 @@ DATABASES = {
     }
 }
 
+# A cache shared by all workers, e.g. django.core.cache.backends.redis.RedisCache
+# with redis://host:6379 or django.core.cache.backends.db.DatabaseCache with a
+# table made by createcachetable. Without it the LightRAG query cache stays off
+# unless LIGHTRAG_QUERY_CACHE_TTL is set.
+if os.environ.get("CACHE_BACKEND"):
+    CACHES = {
+        "default": {
+            "BACKEND": os.environ["CACHE_BACKEND"],
+            "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+        }
+    }
+
 CORS_ALLOWED_ORIGINS = []
 
 CSRF_TRUSTED_ORIGINS = ["http://127.0.0.1:8000"]